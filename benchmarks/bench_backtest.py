@@ -0,0 +1,53 @@
+"""Measure backtest throughput in the vectorized and stepwise modes.
+
+Runs the volatility breakout over ``count`` synthetic 1m candles with the
+vectorized simulation, and over a tenth of them candle by candle.
+
+Run with ``PYTHONPATH=src python benchmarks/bench_backtest.py [count]``.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+import numpy as np
+
+from autotrade.market_data.store import CandleWindow
+from autotrade.services.backtest import Backtester
+from autotrade.services.strategy import StrategySpec
+
+MINUTE = 60 * 10**9
+
+
+def _candles(count: int) -> CandleWindow:
+    rng = np.random.default_rng(1)
+    close = 50_000_000 * np.exp(np.cumsum(rng.normal(0, 0.001, count)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.001, count))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.001, count))
+    timestamps = 1_704_067_200_000_000_000 + np.arange(count, dtype=np.int64) * MINUTE
+    return CandleWindow(timestamps, open_, high, low, close, rng.uniform(0, 5, count))
+
+
+def main(count: int) -> None:
+    candles = _candles(count)
+    spec = StrategySpec.create(
+        1,
+        "volatility_breakout",
+        {"k": 1.5, "take_profit": 0.004, "stop_loss": 0.004, "interval": "1m"},
+    )
+    for mode, size in (("vectorized", count), ("stepwise", count // 10)):
+        window = CandleWindow(*(column[:size] for column in candles))
+        backtester = Backtester(spec, fee=0, mode=mode)
+        start = time.perf_counter()
+        result = backtester.run("KRW-BTC", window)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{mode:>10}: {size:>9,} candles, {len(result.trades):>6} trades in "
+            f"{elapsed:6.3f}s ({size / elapsed:12,.0f} candles/s)"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
@@ -0,0 +1,63 @@
+"""Measure candle building from trades: streaming builder vs. batch rebuild.
+
+``streaming`` feeds trades one by one into a :class:`CandleBuilder` that
+maintains all default intervals; ``re-aggregate`` rebuilds every interval from
+the full tick history each time a 1m candle closes, which is what deriving
+candles by re-querying ticks costs; ``vectorized`` is one batch rebuild.
+
+Run with ``PYTHONPATH=src python benchmarks/bench_candle_builder.py [trades]``.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from autotrade.core.records import TickRecord
+from autotrade.market_data.builder import DEFAULT_INTERVALS, CandleBuilder, build_candles
+
+
+def main(count: int = 200_000) -> None:
+    rng = random.Random(7)
+    ts = 1_704_067_200_000_000_000
+    ticks = []
+    for _ in range(count):
+        ts += rng.randrange(1, 400) * 1_000_000
+        ticks.append(TickRecord("KRW-BTC", ts, rng.uniform(99, 101), rng.random()))
+    timestamps = np.array([t.ts_ns for t in ticks], dtype=np.int64)
+    prices = np.array([t.price for t in ticks])
+    sizes = np.array([t.size for t in ticks])
+
+    builder = CandleBuilder(DEFAULT_INTERVALS, grace=2)
+    start = time.perf_counter()
+    closed = builder.update(ticks) + builder.flush()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{'streaming':>13}: {elapsed / count * 1e9:7.0f} ns/trade "
+        f"({len(DEFAULT_INTERVALS)} intervals, {len(closed)} candles)"
+    )
+
+    start = time.perf_counter()
+    for name in DEFAULT_INTERVALS:
+        build_candles(timestamps, prices, sizes, name)
+    elapsed = time.perf_counter() - start
+    print(f"{'vectorized':>13}: {elapsed / count * 1e9:7.0f} ns/trade (one batch rebuild)")
+
+    minutes = np.flatnonzero(np.diff(timestamps // 60_000_000_000)) + 1
+    sample = minutes[:: max(1, len(minutes) // 20)]
+    start = time.perf_counter()
+    for stop in sample:
+        for name in DEFAULT_INTERVALS:
+            build_candles(timestamps[:stop], prices[:stop], sizes[:stop], name)
+    elapsed = (time.perf_counter() - start) / len(sample) * len(minutes)
+    print(
+        f"{'re-aggregate':>13}: {elapsed / count * 1e9:7.0f} ns/trade "
+        f"(extrapolated from {len(sample)} of {len(minutes)} closes)"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
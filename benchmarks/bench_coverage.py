@@ -0,0 +1,48 @@
+"""Time gap and completeness queries on the candle coverage index.
+
+Builds 90 days of 1m coverage with ``holes`` random missing minutes and
+compares :meth:`Coverage.gaps` / :meth:`Coverage.is_complete` with
+:func:`find_gaps` over the stored opening times (what a ``candles`` table
+scan has to do after fetching every row).
+
+Run with ``PYTHONPATH=src python benchmarks/bench_coverage.py [holes]``.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import timeit
+
+from autotrade.market_data.coverage import Coverage
+from autotrade.market_data.intervals import get_interval
+from autotrade.services.market_ingest.backfill import find_gaps
+
+
+def main(holes: int = 500) -> None:
+    minute = get_interval("1m")
+    start = 1_704_067_200_000_000_000
+    slots = 90 * 1_440
+    end = start + slots * minute.ns
+    missing = set(random.Random(3).sample(range(slots), holes))
+    open_times = [start + slot * minute.ns for slot in range(slots) if slot not in missing]
+
+    coverage = Coverage(minute)
+    coverage.add(open_times)
+    day_start = end - 1_440 * minute.ns
+
+    cases = {
+        "coverage gaps (90d)": lambda: coverage.gaps(start, end),
+        "coverage gaps (1d)": lambda: coverage.gaps(day_start, end),
+        "coverage is_complete": lambda: coverage.is_complete(day_start, end),
+        "find_gaps scan (90d)": lambda: find_gaps(open_times, minute, start, end),
+    }
+    print(f"{len(coverage)} runs, {len(coverage.to_bytes())} bytes persisted")
+    for label, run in cases.items():
+        number = 10 if "scan" in label else 1_000
+        seconds = min(timeit.repeat(run, number=number, repeat=5)) / number
+        print(f"{label:>22}: {seconds * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
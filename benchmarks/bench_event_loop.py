@@ -0,0 +1,137 @@
+"""Compare the asyncio and uvloop event loops on SSE and bus consumer workloads.
+
+Both workloads run over loopback TCP sockets so the loop's transport and
+scheduling code is exercised:
+
+* ``sse``: many clients each receive a fixed number of chart stream frames
+  produced by the real ``/chart/stream`` generator.
+* ``bus``: a producer streams newline-delimited bus messages which a consumer
+  validates into a :class:`CandlePayload`.
+
+Run with ``python benchmarks/bench_event_loop.py [clients] [frames]``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timezone
+
+from autotrade.app.routes.chart import _price_event_stream
+from autotrade.core.eventloop import loop_factory
+from autotrade.core.schemas import CandlePayload
+from autotrade.messaging import EventEnvelope, EventName
+from autotrade.messaging.redis import encode_event
+
+
+async def _serve(handler) -> tuple[asyncio.AbstractServer, int]:
+    server = await asyncio.start_server(handler, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def sse_workload(clients: int, frames: int) -> int:
+    async def handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        async for frame in _price_event_stream("BTC", 0, limit=frames):
+            writer.write(frame.encode())
+            await writer.drain()
+        writer.close()
+
+    async def client(port: int) -> int:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        received = 0
+        while received < frames:
+            await reader.readuntil(b"\n\n")
+            received += 1
+        writer.close()
+        return received
+
+    server, port = await _serve(handler)
+    async with server:
+        counts = await asyncio.gather(*(client(port) for _ in range(clients)))
+    return sum(counts)
+
+
+def _bus_line() -> bytes:
+    now = datetime.now(tz=timezone.utc)
+    envelope = EventEnvelope(
+        name=EventName.MARKET_CANDLE_INGESTED,
+        producer="bench",
+        produced_at_utc=now,
+        produced_at_kst=now,
+        payload={
+            "symbol": "KRW-BTC",
+            "interval": "1m",
+            "open": 1.0,
+            "high": 2.0,
+            "low": 0.5,
+            "close": 1.5,
+            "volume": 10.0,
+            "timestamp_utc": now,
+            "timestamp_kst": now,
+        },
+    )
+    return encode_event(envelope).encode() + b"\n"
+
+
+async def bus_workload(consumers: int, messages: int) -> int:
+    line = _bus_line()
+
+    async def handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        for start in range(0, messages, 100):
+            writer.write(line * min(100, messages - start))
+            await writer.drain()
+        writer.close()
+
+    async def consumer(port: int) -> int:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        decoded = 0
+        while decoded < messages:
+            raw = await reader.readline()
+            if not raw:
+                break
+            CandlePayload.model_validate(json.loads(raw)["payload"])
+            decoded += 1
+        writer.close()
+        return decoded
+
+    server, port = await _serve(handler)
+    async with server:
+        counts = await asyncio.gather(*(consumer(port) for _ in range(consumers)))
+    return sum(counts)
+
+
+def _measure(kind: str, workload, *args: int) -> float:
+    with asyncio.Runner(loop_factory=loop_factory(kind)) as runner:  # type: ignore[arg-type]
+        runner.run(workload(*args))  # warm up
+        best = 0.0
+        for _ in range(3):
+            start = time.perf_counter()
+            count = runner.run(workload(*args))
+            best = max(best, count / (time.perf_counter() - start))
+    return best
+
+
+def main(clients: int = 50, frames: int = 200) -> None:
+    kinds = ["asyncio"]
+    if loop_factory("uvloop") is not asyncio.new_event_loop:
+        kinds.append("uvloop")
+    workloads = {
+        f"sse ({clients} clients x {frames} frames)": (sse_workload, clients, frames),
+        f"bus ({clients // 10 or 1} consumers x {frames * 20} messages)": (
+            bus_workload,
+            clients // 10 or 1,
+            frames * 20,
+        ),
+    }
+    for label, (workload, *args) in workloads.items():
+        results = {kind: _measure(kind, workload, *args) for kind in kinds}
+        line = ", ".join(f"{kind} {rate:,.0f}/s" for kind, rate in results.items())
+        if len(results) == 2:
+            line += f" (uvloop x{results['uvloop'] / results['asyncio']:.2f})"
+        print(f"{label}: {line}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,107 @@
+"""Compare notional accumulation with ``Decimal``, ``float`` and fixed-point ints.
+
+``fixed-point mul`` floors every notional to 8 decimals; ``dot`` keeps the
+exact integer products and rescales once. The ledger section times the
+average-cost arithmetic :meth:`PositionLedger.apply_fill` performs per fill
+(alternating buys and sells) in ``Decimal`` and in fixed point, plus the cost
+of the full ``apply_fill`` call for reference (it also flips positions, so its
+result is not compared).
+
+Run with ``python benchmarks/bench_fixedpoint.py [fills]``.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import timeit
+from decimal import Decimal
+
+from autotrade.core.fixedpoint import SCALE, dot, mul, to_decimal, to_fixed
+from autotrade.services.position.ledger import PositionLedger
+
+
+def _decimal_fills(fills: list[tuple[Decimal, Decimal]]) -> Decimal:
+    quantity = cost = realized = Decimal(0)
+    for i, (price, size) in enumerate(fills):
+        if i & 1 and quantity:
+            closing = min(size, quantity)
+            basis = cost * closing / quantity
+            realized += price * closing - basis
+            cost -= basis
+            quantity -= closing
+        else:
+            quantity += size
+            cost += price * size
+    return realized
+
+
+def _fixed_fills(fills: list[tuple[int, int]]) -> int:
+    quantity = cost = realized = 0
+    for i, (price, size) in enumerate(fills):
+        if i & 1 and quantity:
+            closing = min(size, quantity)
+            basis = cost * closing // quantity
+            realized += price * closing // SCALE - basis
+            cost -= basis
+            quantity -= closing
+        else:
+            quantity += size
+            cost += price * size // SCALE
+    return realized
+
+
+def _ledger_fills(fills: list[tuple[int, int]]) -> int:
+    ledger = PositionLedger()
+    apply = ledger.apply_fill
+    for i, (price, size) in enumerate(fills):
+        apply("KRW-BTC", "sell" if i & 1 else "buy", price, size)
+    return ledger.position("KRW-BTC").realized_pnl
+
+
+def _report(label: str, seconds: float, count: int, error: Decimal | None = None) -> None:
+    suffix = "" if error is None else f"  |error| {error}"
+    print(f"{label:>20}: {seconds / count * 1e9:7.1f} ns/fill{suffix}")
+
+
+def main(count: int = 100_000) -> None:
+    rng = random.Random(7)
+    raw = [
+        (f"{rng.uniform(100, 100_000):.2f}", f"{rng.uniform(0.0001, 2):.8f}")
+        for _ in range(count)
+    ]
+    decimals = [(Decimal(price), Decimal(qty)) for price, qty in raw]
+    floats = [(float(price), float(qty)) for price, qty in raw]
+    fixed = [(to_fixed(price), to_fixed(qty)) for price, qty in raw]
+    prices, quantities = [p for p, _ in fixed], [q for _, q in fixed]
+
+    cases = {
+        "Decimal": lambda: sum((p * q for p, q in decimals), Decimal(0)),
+        "float": lambda: sum(p * q for p, q in floats),
+        "fixed-point mul": lambda: sum(mul(p, q) for p, q in fixed),
+        "fixed-point dot": lambda: dot(prices, quantities),
+    }
+    exact = cases["Decimal"]().quantize(Decimal("0.00000001"))
+    print("notional sum")
+    for label, run in cases.items():
+        seconds = min(timeit.repeat(run, number=1, repeat=5))
+        total = run()
+        value = to_decimal(total) if label.startswith("fixed") else total
+        _report(label, seconds, count, abs(Decimal(str(value)) - exact))
+
+    print("ledger fills")
+    exact = _decimal_fills(decimals)
+    for label, run, values in (
+        ("Decimal", _decimal_fills, decimals),
+        ("fixed-point", _fixed_fills, fixed),
+    ):
+        seconds = min(timeit.repeat(lambda: run(values), number=1, repeat=5))
+        total = run(values)
+        value = total if isinstance(total, Decimal) else to_decimal(total)
+        _report(label, seconds, count, abs(value - exact))
+    seconds = min(timeit.repeat(lambda: _ledger_fills(fixed), number=1, repeat=5))
+    _report("apply_fill", seconds, count)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
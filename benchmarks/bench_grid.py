@@ -0,0 +1,68 @@
+"""Compare bisect-indexed grid ticks with scanning every level.
+
+Feeds ``count`` random-walk prices through :class:`GridLevels` and through a
+linear scan of the same levels and orders for several grid sizes.
+
+Run with ``PYTHONPATH=src python benchmarks/bench_grid.py [count]``.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import sys
+import time
+
+from autotrade.core.fixedpoint import to_fixed
+from autotrade.services.strategy.grid import GridLevels
+
+
+def _prices(count: int) -> list[int]:
+    rng = random.Random(3)
+    price, prices = 50_000_000.0, []
+    for _ in range(count):
+        price *= math.exp(rng.gauss(0.0, 0.0005))
+        prices.append(to_fixed(round(price, -3)))
+    return prices
+
+
+def _scan(levels: list[int], orders: dict[int, str], last: int, price: int) -> int:
+    fills = 0
+    for index, level in enumerate(levels):
+        if price <= level < last and orders.get(level) == "buy":
+            del orders[level]
+            if index + 1 < len(levels):
+                orders.setdefault(levels[index + 1], "sell")
+            fills += 1
+        elif last < level <= price and orders.get(level) == "sell":
+            del orders[level]
+            if index > 0:
+                orders.setdefault(levels[index - 1], "buy")
+            fills += 1
+    return fills
+
+
+def main(count: int) -> None:
+    prices = _prices(count)
+    for levels in (50, 200, 1_000):
+        grid = GridLevels("KRW-BTC", prices[0], to_fixed(5_000), levels)
+        grid.seed(prices[0])
+        orders = dict(grid.orders)
+        start = time.perf_counter()
+        fills = sum(len(grid.on_price(price)) for price in prices)
+        indexed_ns = (time.perf_counter() - start) / count * 1e9
+
+        last = prices[0]
+        start = time.perf_counter()
+        for price in prices:
+            _scan(grid.prices, orders, last, price)
+            last = price
+        scan_ns = (time.perf_counter() - start) / count * 1e9
+        print(
+            f"{2 * levels + 1:>5} levels: indexed {indexed_ns:7.0f} ns/tick, "
+            f"scan {scan_ns:8.0f} ns ({fills} fills)"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,53 @@
+"""Time batch indicator computation against per-candle streaming updates.
+
+Computes every indicator over ``count`` synthetic candles with the NumPy batch
+functions and by replaying the candles through the streaming classes.
+
+Run with ``PYTHONPATH=src python benchmarks/bench_indicators.py [count]``.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+import numpy as np
+
+from autotrade.market_data.store import CandleWindow
+from autotrade.services.strategy.indicators import create
+
+CASES = [
+    ("sma", (20,)),
+    ("ema", (20,)),
+    ("atr", (20,)),
+    ("donchian", (20,)),
+    ("bollinger", (20, 2.0)),
+    ("volatility", (20,)),
+    ("volatility_range", (0.5,)),
+]
+
+
+def main(count: int) -> None:
+    rng = np.random.default_rng(1)
+    close = 60_000_000.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, count)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) * 1.002
+    low = np.minimum(open_, close) * 0.998
+    window = CandleWindow(
+        np.arange(count, dtype=np.int64), open_, high, low, close, np.ones(count)
+    )
+    for name, params in CASES:
+        start = time.perf_counter()
+        create(name, *params).compute(window)
+        batch = time.perf_counter() - start
+        start = time.perf_counter()
+        create(name, *params).prime(window)
+        streaming = time.perf_counter() - start
+        print(
+            f"{name:>16}: batch {batch * 1e3:8.2f} ms, "
+            f"streaming {streaming / count * 1e9:7.0f} ns/candle"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,102 @@
+"""Measure ingest engine throughput against the local replay server.
+
+A synthetic recording of trade and candle frames for many markets is replayed
+unpaced over loopback WebSockets; the engine parses, deduplicates and encodes
+every frame and publishes to an in-memory bus. Frame parsing is also measured
+alone, batched versus one ``json.loads`` per frame.
+
+Run with ``python benchmarks/bench_ingest.py [markets] [trades_per_market]``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+import timeit
+
+from autotrade.services.market_ingest import IngestEngine, parse_frames
+from autotrade.services.market_ingest.replay import ReplayServer
+
+BASE_MS = 1_704_067_200_000
+
+
+class NullBus:
+    def __init__(self) -> None:
+        self.published = 0
+
+    async def publish_many(self, items):
+        self.published += len(items)
+        return []
+
+
+def _recording(markets: list[str], trades: int) -> list[tuple[float, bytes]]:
+    frames = []
+    for seq in range(1, trades + 1):
+        for market in markets:
+            frames.append(
+                {
+                    "type": "trade",
+                    "code": market,
+                    "trade_timestamp": BASE_MS + seq,
+                    "trade_price": 50_000_000.0 + seq,
+                    "trade_volume": 0.001,
+                    "ask_bid": "ASK",
+                    "sequential_id": seq,
+                    "stream_type": "REALTIME",
+                }
+            )
+            if seq % 5 == 0:
+                frames.append(
+                    {
+                        "type": "candle.1m",
+                        "code": market,
+                        "candle_date_time_utc": "2024-01-01T00:00:00",
+                        "opening_price": 50_000_000.0,
+                        "high_price": 50_000_000.0 + seq,
+                        "low_price": 50_000_000.0,
+                        "trade_price": 50_000_000.0 + seq,
+                        "candle_acc_trade_volume": seq * 0.001,
+                    }
+                )
+    return [(0.0, json.dumps(frame).encode()) for frame in frames]
+
+
+async def _engine_throughput(
+    frames: list[tuple[float, bytes]], markets: list[str], trades: int
+) -> tuple[float, float]:
+    bus = NullBus()
+    async with ReplayServer(frames) as server:
+        engine = IngestEngine(bus, markets, url=server.url, markets_per_connection=50)
+        task = asyncio.create_task(engine.run())
+        start = time.perf_counter()
+        expected = len(markets) * trades
+        while engine.stats.trades < expected:
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - start
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    return len(frames) / elapsed, engine.stats.frames / max(engine.stats.batches, 1)
+
+
+def main(markets: int = 200, trades: int = 100) -> None:
+    codes = [f"KRW-M{index:03d}" for index in range(markets)]
+    frames = _recording(codes, trades)
+    raw = [frame for _, frame in frames[:1000]]
+
+    batched = min(timeit.repeat(lambda: parse_frames(raw), number=20, repeat=5)) / 20
+    single = min(
+        timeit.repeat(lambda: [json.loads(frame) for frame in raw], number=20, repeat=5)
+    ) / 20
+    print(f"parse 1000 frames: batched {batched * 1e3:.2f} ms, per-frame {single * 1e3:.2f} ms")
+
+    rate, mean_batch = asyncio.run(_engine_throughput(frames, codes, trades))
+    print(
+        f"engine: {len(frames):,} frames over {len(codes) // 50 or 1} connections, "
+        f"{rate:,.0f} msg/s (mean batch {mean_batch:.0f} frames)"
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,62 @@
+"""Measure the recording overhead of metrics and the ``timed`` helper.
+
+Run with ``python benchmarks/bench_metrics.py [iterations]``.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import timeit
+
+from autotrade.core.metrics import Counter, Histogram, timed
+
+
+def main(iterations: int = 500_000) -> None:
+    histogram = Histogram("bench_seconds", "bench")
+    counter = Counter("bench_total", "bench")
+
+    def bare() -> None:
+        pass
+
+    decorated = timed(histogram)(bare)
+
+    def block() -> None:
+        with timed(histogram):
+            pass
+
+    shared = timed(histogram)
+
+    def shared_block() -> None:
+        with shared:
+            pass
+
+    clock = time.perf_counter_ns
+
+    def clock_reads() -> None:
+        clock()
+        clock()
+
+    cases = {
+        "Counter.inc": counter.inc,
+        "Histogram.record": lambda: histogram.record(123_456),
+        "bare function": bare,
+        "@timed function": decorated,
+        "with timed(...)": block,
+        "with shared timed": shared_block,
+        "two clock reads": clock_reads,
+    }
+    results = {
+        label: min(timeit.repeat(run, number=iterations, repeat=5)) / iterations * 1e9
+        for label, run in cases.items()
+    }
+    for label, nanos in results.items():
+        print(f"{label:>18}: {nanos:7.1f} ns/call")
+    overhead = results["@timed function"] - results["bare function"]
+    print(f"{'@timed overhead':>18}: {overhead:7.1f} ns/call")
+    # The clock reads are a floor no implementation can go below.
+    print(f"{'beyond the clock':>18}: {overhead - results['two clock reads']:7.1f} ns/call")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
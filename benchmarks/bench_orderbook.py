@@ -0,0 +1,131 @@
+"""Measure order book update throughput and memory across many markets.
+
+``snapshot`` applies Upbit-style 15-level ``orderbook`` messages,
+``delta`` applies single-level changes to 50-level books, and ``query``
+runs best/depth/VWAP queries after every delta (which extends the
+cumulative prefixes from the changed level). Memory is measured with
+``tracemalloc`` over all books. ``scaling`` times one book side at growing
+depths: removing and re-inserting a random level (the list ``insert`` and
+``del`` memmove is O(n)), the same followed by a top-10 depth and a 5-unit
+VWAP query, and a top-of-book change followed by a full-depth query (the
+O(n) worst case of the on-demand prefix sums).
+
+Run with ``PYTHONPATH=src python benchmarks/bench_orderbook.py [markets]``.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+import tracemalloc
+
+from autotrade.market_data.orderbook import BookSide, OrderBooks
+
+
+def _message(rng: random.Random, code: str, timestamp: int, levels: int = 15) -> dict:
+    mid = rng.uniform(1_000, 100_000)
+    tick = mid / 10_000
+    return {
+        "type": "orderbook",
+        "code": code,
+        "timestamp": timestamp,
+        "orderbook_units": [
+            {
+                "ask_price": round(mid + (i + 1) * tick, 2),
+                "bid_price": round(mid - (i + 1) * tick, 2),
+                "ask_size": rng.uniform(0.01, 5),
+                "bid_size": rng.uniform(0.01, 5),
+            }
+            for i in range(levels)
+        ],
+    }
+
+
+def main(markets: int = 200) -> None:
+    rng = random.Random(11)
+    codes = [f"KRW-C{index:03d}" for index in range(markets)]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    books = OrderBooks()
+    books.apply_messages([_message(rng, code, 1, levels=50) for code in codes])
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"{'memory':>9}: {used / markets / 1024:6.1f} KiB/book (50 levels per side)")
+
+    messages = [_message(rng, rng.choice(codes), 2 + i) for i in range(20_000)]
+    start = time.perf_counter()
+    for offset in range(0, len(messages), 100):
+        books.apply_messages(messages[offset : offset + 100])
+    elapsed = time.perf_counter() - start
+    print(f"{'snapshot':>9}: {len(messages) / elapsed:10,.0f} updates/s (15 levels)")
+
+    for code in codes:
+        books.book(code).apply_snapshot(
+            [(100.0 - i, 1.0) for i in range(1, 51)],
+            [(100.0 + i, 1.0) for i in range(1, 51)],
+            sequence=0,
+        )
+    deltas = [
+        (rng.choice(codes), rng.choice(("bid", "ask")), float(rng.randrange(1, 60)), rng.choice((0.0, 2.0)))
+        for _ in range(200_000)
+    ]
+    sequences = dict.fromkeys(codes, 0)
+    start = time.perf_counter()
+    for code, side, distance, size in deltas:
+        sequences[code] += 1
+        price = 100.0 - distance if side == "bid" else 100.0 + distance
+        books.apply_delta(code, ((side, price, size),), sequence=sequences[code])
+    elapsed = time.perf_counter() - start
+    print(f"{'delta':>9}: {len(deltas) / elapsed:10,.0f} updates/s")
+
+    start = time.perf_counter()
+    for code, side, distance, size in deltas[:50_000]:
+        sequences[code] += 1
+        price = 100.0 - distance if side == "bid" else 100.0 + distance
+        books.apply_delta(code, ((side, price, size),), sequence=sequences[code])
+        book = books[code]
+        book.best_bid()
+        book.asks.depth(10)
+        book.vwap("buy", 5.0)
+    elapsed = time.perf_counter() - start
+    print(f"{'query':>9}: {50_000 / elapsed:10,.0f} updates+queries/s")
+
+    for levels in (15, 150, 1_500, 15_000):
+        _scaling(rng, levels)
+
+
+def _scaling(rng: random.Random, levels: int, count: int = 20_000) -> None:
+    side = BookSide("ask")
+    side.replace((100.0 + i, 1.0) for i in range(1, levels + 1))
+    prices = [100.0 + rng.randrange(1, levels + 1) for _ in range(count)]
+
+    start = time.perf_counter()
+    for price in prices:
+        side.set(price, 0.0)
+        side.set(price, 1.0)
+    update = (time.perf_counter() - start) / (2 * count)
+
+    start = time.perf_counter()
+    for price in prices:
+        side.set(price, 0.0)
+        side.set(price, 1.0)
+        side.depth(10)
+        side.vwap(5.0)
+    query = (time.perf_counter() - start) / count
+
+    deep = max(count * 15 // levels, 10)
+    start = time.perf_counter()
+    for index in range(deep):
+        side.set(101.0, 1.0 + index % 2)
+        side.depth(levels)
+    full = (time.perf_counter() - start) / deep
+    print(
+        f"{'scaling':>9}: {levels:6,d} levels  update {update * 1e6:6.2f} us"
+        f"  +shallow query {query * 1e6:6.2f} us  +full depth {full * 1e6:9.2f} us"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
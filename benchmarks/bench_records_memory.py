@@ -0,0 +1,89 @@
+"""Measure bytes per record for each in-memory candle/tick representation.
+
+Run with ``python benchmarks/bench_records_memory.py [count]``. Symbol and
+interval strings are shared between records, as they are when decoded from the
+bus with interned keys, so the figures reflect per-record overhead.
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from autotrade.core.clock import get_zone
+from autotrade.core.records import CandleRecord, TickRecord
+from autotrade.core.schemas import CandlePayload, TickPayload
+from autotrade.db.models.market import Candle, Tick
+
+_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+_ZONE = get_zone()
+
+
+def _measure(build: Callable[[int], object], count: int) -> float:
+    """Bytes still allocated per record once ``count`` records are built."""
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [build(index) for index in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return (after - before) / count
+
+
+def _candle_payload(index: int) -> CandlePayload:
+    opened = _START + timedelta(minutes=index)
+    return CandlePayload(
+        symbol="KRW-BTC",
+        interval="1m",
+        open=1.0 + index,
+        high=2.0 + index,
+        low=0.5 + index,
+        close=1.5 + index,
+        volume=10.0 + index,
+        timestamp_utc=opened,
+        timestamp_kst=opened.astimezone(_ZONE),
+    )
+
+
+def _tick_payload(index: int) -> TickPayload:
+    occurred = _START + timedelta(milliseconds=index)
+    return TickPayload(
+        symbol="KRW-BTC",
+        price=1.0 + index,
+        size=0.5 + index,
+        timestamp_utc=occurred,
+        timestamp_kst=occurred.astimezone(_ZONE),
+    )
+
+
+def main(count: int = 100_000) -> None:
+    candle_dtype = np.dtype([("ts_ns", "i8"), *[(f, "f8") for f in ("o", "h", "l", "c", "v")]])
+    candles = {
+        "CandlePayload (pydantic)": _candle_payload,
+        "Candle (ORM)": lambda i: CandleRecord.from_payload(_candle_payload(i)).to_orm(_START),
+        "dict": lambda i: _candle_payload(i).model_dump(),
+        "CandleRecord": lambda i: CandleRecord.from_payload(_candle_payload(i)),
+    }
+    ticks = {
+        "TickPayload (pydantic)": _tick_payload,
+        "Tick (ORM)": lambda i: TickRecord.from_payload(_tick_payload(i)).to_orm(),
+        "TickRecord": lambda i: TickRecord.from_payload(_tick_payload(i)),
+    }
+    for title, cases in (("candles", candles), ("ticks", ticks)):
+        print(f"{title} ({count} records)")
+        for label, build in cases.items():
+            print(f"  {label:>26}: {_measure(build, count):8.1f} bytes/record")
+        if title == "candles":
+            # Columnar rows (MarketDataStore, archive) for comparison.
+            print(f"  {'NumPy structured row':>26}: {candle_dtype.itemsize:8.1f} bytes/record")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
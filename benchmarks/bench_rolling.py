@@ -0,0 +1,42 @@
+"""Compare monotonic-deque rolling extremes with recomputing ``max(window)``.
+
+Pushes ``count`` prices through :class:`RollingMax` and through a naive
+``deque(maxlen=period)`` + ``max()`` for the turtle channel lengths.
+
+Run with ``PYTHONPATH=src python benchmarks/bench_rolling.py [count]``.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+from collections import deque
+
+from autotrade.services.strategy.rolling import RollingMax
+
+
+def main(count: int) -> None:
+    rng = random.Random(2)
+    prices = [rng.uniform(50_000_000, 60_000_000) for _ in range(count)]
+    for period in (20, 55, 200):
+        rolling = RollingMax(period)
+        start = time.perf_counter()
+        for price in prices:
+            rolling.push(price)
+        deque_ns = (time.perf_counter() - start) / count * 1e9
+
+        window: deque[float] = deque(maxlen=period)
+        start = time.perf_counter()
+        for price in prices:
+            window.append(price)
+            max(window)
+        naive_ns = (time.perf_counter() - start) / count * 1e9
+        print(
+            f"period {period:>3}: RollingMax {deque_ns:6.0f} ns/push, "
+            f"max(window) {naive_ns:6.0f} ns"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
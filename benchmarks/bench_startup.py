@@ -0,0 +1,69 @@
+"""Report import-time breakdown and time-to-first-request for the API app.
+
+Run with ``python benchmarks/bench_startup.py [module] [top]``. The breakdown
+comes from ``python -X importtime`` in a fresh interpreter; time-to-first-request
+covers importing ``autotrade.app.main``, running the lifespan and serving
+``/health`` through the ASGI test client.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_PATH = Path(__file__).resolve().parents[1] / "src"
+
+_FIRST_REQUEST = """
+import json, time
+start = time.perf_counter()
+from autotrade.app.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    client.get("/health")
+print(json.dumps([(imported - start) * 1e3, (time.perf_counter() - start) * 1e3]))
+"""
+
+
+def _python(*args: str) -> subprocess.CompletedProcess[str]:
+    env = {**os.environ, "PYTHONPATH": str(SRC_PATH)}
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, env=env, check=True
+    )
+
+
+def importtime(module: str) -> list[tuple[str, int, int]]:
+    """Return ``(module, self_us, cumulative_us)`` rows for importing ``module``."""
+
+    rows = []
+    for line in _python("-X", "importtime", "-c", f"import {module}").stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_part, cumulative_us, name = line.split("|")
+        rows.append((name.strip(), int(self_part.split(":")[1]), int(cumulative_us)))
+    return rows
+
+
+def main(module: str = "autotrade.app.main", top: int = 15) -> None:
+    rows = importtime(module)
+    total = next(cumulative for name, _, cumulative in rows if name == module)
+    print(f"import {module}: {total / 1e3:.1f} ms cumulative")
+    print(f"top {top} by self time:")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: -row[1])[:top]:
+        print(f"  {self_us / 1e3:7.1f} ms self {cumulative_us / 1e3:8.1f} ms cum  {name}")
+    packages: dict[str, int] = {}
+    for name, self_us, _ in rows:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + self_us
+    print("self time by top-level package:")
+    for root, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {self_us / 1e3:7.1f} ms  {root}")
+    import_ms, first_ms = json.loads(_python("-c", _FIRST_REQUEST).stdout)
+    print(f"import app: {import_ms:.1f} ms, time to first request: {first_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2], *(int(value) for value in sys.argv[2:3]))
@@ -0,0 +1,75 @@
+"""Time one strategy engine batch of daily candles for 200 symbols.
+
+Each batch carries one update per symbol; ``strategies`` volatility breakout
+rows are evaluated inline and the reported time spans candle application,
+evaluation and the (no-op) signal publish, i.e. what the latency budget covers.
+
+Run with ``PYTHONPATH=src python benchmarks/bench_strategy_engine.py [strategies]``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import sys
+import time
+
+from autotrade.core.clock import from_ns
+from autotrade.services.strategy import StrategyEngine, StrategySpec
+
+DAY = 86_400 * 10**9
+T0 = 1_704_067_200_000_000_000
+SYMBOLS = [f"KRW-C{index:03d}" for index in range(200)]
+
+
+class NullBus:
+    async def publish_many(self, items):
+        return [str(index) for index in range(len(items))]
+
+
+def _message(symbol: str, ts_ns: int, high: float) -> dict:
+    opened_at = from_ns(ts_ns).isoformat()
+    return {
+        "name": "market.candle.ingested",
+        "payload": {
+            "symbol": symbol,
+            "interval": "1d",
+            "open": 100.0,
+            "high": high,
+            "low": 99.0,
+            "close": 100.0,
+            "volume": 1.0,
+            "timestamp_utc": opened_at,
+            "timestamp_kst": opened_at,
+            "source": "upbit",
+        },
+    }
+
+
+def main(strategies: int) -> None:
+    specs = [
+        StrategySpec.create(
+            index, f"vb-{index}", {"kind": "volatility_breakout", "k": 0.3 + index / 100}
+        )
+        for index in range(strategies)
+    ]
+    engine = StrategyEngine(NullBus(), specs, workers=0, capacity=64)
+    timings = []
+
+    async def run() -> None:
+        for day in range(50):
+            batch = [_message(symbol, T0 + day * DAY, 101.0 + day % 3) for symbol in SYMBOLS]
+            start = time.perf_counter()
+            await engine.process(batch)
+            timings.append(time.perf_counter() - start)
+
+    asyncio.run(run())
+    print(
+        f"{strategies} strategies x {len(SYMBOLS)} symbols: "
+        f"median {statistics.median(timings) * 1e3:.2f} ms, max {max(timings) * 1e3:.2f} ms "
+        f"({engine.stats.signals} signals, budget {engine.budget * 1e3:.0f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,73 @@
+"""Compare full validation with the trusted construction path for bus payloads.
+
+Also compares validating raw JSON in pydantic-core with ``json.loads``.
+
+Run with ``python benchmarks/bench_validation.py [iterations]``.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import timeit
+from datetime import datetime, timezone
+
+from autotrade.messaging import EventEnvelope, EventName, PayloadDecoder
+from autotrade.messaging.redis import encode_event
+
+
+def _message() -> dict:
+    now = datetime.now(tz=timezone.utc)
+    envelope = EventEnvelope(
+        name=EventName.MARKET_CANDLE_INGESTED,
+        producer="bench",
+        produced_at_utc=now,
+        produced_at_kst=now,
+        payload={
+            "symbol": "KRW-BTC",
+            "interval": "1m",
+            "open": 1.0,
+            "high": 2.0,
+            "low": 0.5,
+            "close": 1.5,
+            "volume": 10.0,
+            "timestamp_utc": now,
+            "timestamp_kst": now,
+        },
+    )
+    return json.loads(encode_event(envelope))
+
+
+def main(iterations: int = 100_000) -> None:
+    message = _message()
+    name, payload = message["name"], message["payload"]
+    cases = {
+        "validated": (PayloadDecoder(sample_rate=0), False),
+        "trusted": (PayloadDecoder(sample_rate=0), True),
+        "trusted, 1-in-1000 sampled": (PayloadDecoder(sample_rate=1000), True),
+    }
+    for label, (decoder, trusted) in cases.items():
+        seconds = min(
+            timeit.repeat(
+                lambda: decoder.decode(name, payload, trusted=trusted),
+                number=iterations,
+                repeat=5,
+            )
+        )
+        print(f"{label:>28}: {seconds / iterations * 1e6:7.2f} us/payload")
+
+    raw = json.dumps(payload).encode()
+    decoder = PayloadDecoder(sample_rate=0)
+    sampler = PayloadDecoder(sample_rate=1000)
+    json_cases = {
+        "json.loads + validated": lambda: decoder.decode(name, json.loads(raw)),
+        "decode_json": lambda: decoder.decode_json(name, raw),
+        "sample only, 1-in-1000": lambda: sampler.sample(name, payload),
+    }
+    for label, case in json_cases.items():
+        seconds = min(timeit.repeat(case, number=iterations, repeat=5))
+        print(f"{label:>28}: {seconds / iterations * 1e6:7.2f} us/payload")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,27 @@
+"""Run the API server on the event loop selected by ``EVENT_LOOP``.
+
+Usage: ``python -m autotrade.app [--host HOST] [--port PORT]``.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections.abc import Sequence
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m autotrade.app")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    from autotrade.core.eventloop import uvicorn_loop
+
+    uvicorn.run("autotrade.app.main:app", host=args.host, port=args.port, loop=uvicorn_loop())
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - command line entry point
+    raise SystemExit(main())
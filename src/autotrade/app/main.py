@@ -2,17 +2,81 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator
+
 from fastapi import FastAPI
+from fastapi.responses import Response
 
-from autotrade.core.clock import now
-from autotrade.core.config import settings
+from autotrade.core import metrics
+from autotrade.core.clock import get_clock, now, set_clock
+from autotrade.core.config import get_settings
+from autotrade.core.eventloop import LoopLagMonitor
 from autotrade.core.logging import configure_logging
+from autotrade.core.timesync import (
+    ClockSynchronizer,
+    DisciplinedClock,
+    build_reference_source,
+)
+from autotrade.app.routes.admin import router as admin_router
 from autotrade.app.routes.chart import router as chart_router
 
-configure_logging()
 
-app = FastAPI(title=settings.app_name)
+def _clock_metric(field: str) -> float | None:
+    clock = get_clock()
+    if not isinstance(clock, DisciplinedClock) or clock.estimate is None:
+        return None
+    if field == "offset":
+        return clock.offset_ns() / 1e9
+    return clock.estimate.uncertainty_ns / 1e9
+
+
+metrics.gauge(
+    "autotrade_clock_offset_seconds", "Correction applied to the local clock."
+).set_function(lambda: _clock_metric("offset"))
+metrics.gauge(
+    "autotrade_clock_uncertainty_seconds", "Uncertainty of the last clock estimate."
+).set_function(lambda: _clock_metric("uncertainty"))
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Configure logging and start background services (clock sync, lag probe).
+
+    Logging is configured here rather than at import time so that importing
+    the app (tests, CLIs, workers reusing routes) has no side effects.
+    """
+
+    configure_logging()
+    settings = get_settings()
+    tasks: list[asyncio.Task[None]] = []
+    if settings.loop_lag_interval > 0:
+        monitor = LoopLagMonitor(settings.loop_lag_interval, settings.loop_lag_threshold)
+        tasks.append(asyncio.create_task(monitor.run(), name="loop-lag-monitor"))
+    if settings.clock_reference:
+        clock = DisciplinedClock(max_slew_ppm=settings.clock_max_slew_ppm)
+        set_clock(clock)
+        synchronizer = ClockSynchronizer(
+            build_reference_source(settings.clock_reference),
+            clock,
+            interval=settings.clock_sync_interval,
+            samples=settings.clock_sync_samples,
+        )
+        tasks.append(asyncio.create_task(synchronizer.run()))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+
+app = FastAPI(title=get_settings().app_name, lifespan=lifespan)
 app.include_router(chart_router)
+app.include_router(admin_router)
 
 
 @app.get("/health", tags=["system"])
@@ -20,14 +84,27 @@ def healthcheck() -> dict[str, object]:
     """Simple health endpoint exposing synchronized timestamps."""
 
     snapshot = now()
+    clock = get_clock()
+    if isinstance(clock, DisciplinedClock):
+        clock_status = clock.status()
+    else:
+        clock_status = {"synchronized": False, "offset_ms": None, "uncertainty_ms": None}
     return {
         "status": "ok",
-        "environment": settings.environment,
+        "environment": get_settings().environment,
         "timestamps": {
             "utc": snapshot.utc.isoformat(),
             "kst": snapshot.kst.isoformat(),
         },
+        "clock": clock_status,
     }
 
 
+@app.get("/metrics", tags=["system"], include_in_schema=False)
+def metrics_endpoint() -> Response:
+    """Expose process metrics in the Prometheus text format."""
+
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 __all__ = ["app"]
@@ -1,5 +1,5 @@
 """Application route registrations."""
 
-from autotrade.app.routes import chart
+from autotrade.app.routes import admin, chart
 
-__all__ = ["chart"]
+__all__ = ["admin", "chart"]
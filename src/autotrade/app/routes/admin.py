@@ -0,0 +1,91 @@
+"""Operator-only diagnostics endpoints (profiling and heap inspection).
+
+The routes are disabled (``404``) unless ``ADMIN_TOKEN`` is configured and
+every request must send it in the ``X-Admin-Token`` header.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import secrets
+from typing import Any
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+
+from autotrade.core.config import get_settings
+from autotrade.core.profiling import MemoryTracker, profile
+
+_profile_lock = asyncio.Lock()
+_memory = MemoryTracker()
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    """Reject requests that do not carry the configured admin token."""
+
+    expected = get_settings().admin_token
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    include_in_schema=False,
+    dependencies=[Depends(require_admin)],
+)
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile_endpoint(
+    seconds: float = Query(10.0, gt=0, le=120),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    tasks: bool = Query(False),
+) -> PlainTextResponse:
+    """Sample all threads for ``seconds`` and return collapsed stacks.
+
+    Feed the response to ``flamegraph.pl`` or speedscope. ``tasks=true`` also
+    samples where suspended asyncio tasks are awaiting.
+    """
+
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    async with _profile_lock:
+        profiler = await profile(seconds, interval=interval_ms / 1000, tasks=tasks)
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={
+            "X-Profile-Samples": str(profiler.samples),
+            "X-Profile-Seconds": f"{profiler.duration:.3f}",
+        },
+    )
+
+
+@router.post("/memory/snapshot")
+def memory_snapshot(limit: int = Query(20, ge=1, le=500)) -> dict[str, Any]:
+    """Start tracing allocations if needed and store a new baseline."""
+
+    return _memory.snapshot(limit)
+
+
+@router.get("/memory/diff")
+def memory_diff(limit: int = Query(20, ge=1, le=500)) -> dict[str, Any]:
+    """Return the allocation sites that grew most since the baseline."""
+
+    try:
+        return _memory.diff(limit)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from None
+
+
+@router.delete("/memory", status_code=204, response_class=Response)
+def memory_stop() -> Response:
+    """Stop allocation tracing and drop the baseline."""
+
+    _memory.stop()
+    return Response(status_code=204)
+
+
+__all__ = ["require_admin", "router"]
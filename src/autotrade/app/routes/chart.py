@@ -4,17 +4,34 @@ from __future__ import annotations
 
 import asyncio
 import json
+import logging
 import math
 import random
-from typing import AsyncIterator
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, AsyncIterator
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import HTMLResponse, StreamingResponse
 
-from autotrade.core.clock import now
+from autotrade.core.clock import from_ns, now, to_epoch_ns
+from autotrade.core.metrics import counter, gauge
+from autotrade.core.records import CandleRecord
+from autotrade.market_data.coverage import Coverage
+from autotrade.market_data.intervals import Interval, get_interval
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["chart"])
 
+MAX_HISTORY_CANDLES = 5_000
+"""Largest number of candle slots one ``/chart/history`` request may span."""
+
+# Symbols come from the query string, so they are deliberately not labels.
+_SSE_CLIENTS = gauge("autotrade_sse_clients", "Connected chart stream clients.")
+_SSE_FRAMES = counter("autotrade_sse_frames_total", "Chart stream frames sent.")
+
 # Minimal HTML template providing a real-time chart using Chart.js and SSE.
 _CHART_PAGE_TEMPLATE = """
 <!DOCTYPE html>
@@ -116,9 +133,10 @@ async def _price_event_stream(
 
     base = random.uniform(25000, 35000)
     step = 0
-    history: list[float] = []
+    history: deque[float] = deque(maxlen=window)
     emitted = 0
 
+    _SSE_CLIENTS.inc()
     try:
         while True:
             snapshot = now()
@@ -127,17 +145,16 @@ async def _price_event_stream(
             noise = random.uniform(-40, 40)
             price = round(base + seasonal + noise, 2)
             history.append(price)
-            if len(history) > window:
-                history.pop(0)
 
             payload = {
                 "symbol": symbol,
                 "timestamp": snapshot.utc.isoformat(),
                 "price": price,
-                "window": history[-window:],
+                "window": list(history),
             }
             data = json.dumps(payload, separators=(",", ":"))
             yield f"data: {data}\n\n"
+            _SSE_FRAMES.inc()
             emitted += 1
             if limit is not None and emitted >= limit:
                 break
@@ -145,6 +162,8 @@ async def _price_event_stream(
             await asyncio.sleep(interval)
     except asyncio.CancelledError:  # pragma: no cover - cooperative cancellation
         raise
+    finally:
+        _SSE_CLIENTS.dec()
 
 
 @router.get("/chart", response_class=HTMLResponse)
@@ -170,4 +189,117 @@ async def chart_stream(
     return StreamingResponse(generator, media_type="text/event-stream")
 
 
-__all__ = ["router", "chart_page", "chart_stream"]
+@lru_cache(maxsize=1)
+def get_session_factory() -> Any:
+    """Return the process-wide database session factory (overridable in tests)."""
+
+    from autotrade.db.session import get_async_session
+
+    return get_async_session()
+
+
+@lru_cache(maxsize=1)
+def get_candle_cache() -> Any:
+    """Return the process-wide candle cache, or ``None`` without ``redis``."""
+
+    from autotrade.market_data.cache import build_candle_cache
+
+    try:
+        return build_candle_cache(get_session_factory())
+    except ModuleNotFoundError:  # pragma: no cover - requires redis package
+        return None
+
+
+async def _recent_candles(
+    cache: Any, symbol: str, spec: Interval, start_ns: int, end_ns: int
+) -> list[CandleRecord] | None:
+    """Return the candles in ``[start_ns, end_ns)`` from the candle cache.
+
+    The range must end at the current bucket, whose in-progress candle takes
+    one extra slot. ``None`` means the cache cannot serve the range (too long
+    or unavailable) and the caller should query the database.
+    """
+
+    limit = spec.slots(start_ns, end_ns) + 1
+    if cache is None or limit > cache.capacity:
+        return None
+    try:
+        payloads = await cache.get_recent(symbol, spec.name, limit)
+    except Exception as exc:
+        logger.warning("Candle cache read for %s failed: %r; querying the database", symbol, exc)
+        return None
+    records = (CandleRecord.from_payload(payload) for payload in payloads)
+    return [record for record in records if start_ns <= record.ts_ns < end_ns]
+
+
+@router.get("/chart/history")
+async def chart_history(
+    symbol: str = Query(min_length=1, max_length=32),
+    interval: str = Query(default="1m"),
+    start: datetime = Query(),
+    end: datetime | None = Query(default=None),
+    strict: bool = Query(default=False),
+    session_factory: Any = Depends(get_session_factory),
+    cache: Any = Depends(get_candle_cache),
+) -> dict[str, Any]:
+    """Return stored candles for ``[start, end)`` flagged with their coverage.
+
+    Missing buckets are listed in ``gaps``; with ``strict`` an incomplete
+    range is refused with ``409`` instead of being returned partially.
+    Ranges ending now (no ``end``) that fit in the candle cache are read
+    from Redis; everything else comes from the ``candles`` table.
+    """
+
+    from autotrade.db.candles import fetch_candles, load_coverage
+    from autotrade.db.session import session_scope
+
+    try:
+        spec = get_interval(interval)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from None
+    start_ns = to_epoch_ns(start)
+    end_ns = to_epoch_ns(end) if end is not None else spec.floor(to_epoch_ns(now().utc))
+    if spec.slots(start_ns, end_ns) > MAX_HISTORY_CANDLES:
+        raise HTTPException(
+            status_code=400, detail=f"Range exceeds {MAX_HISTORY_CANDLES} candles"
+        )
+
+    symbol = symbol.upper()
+    async with session_scope(session_factory) as session:
+        coverage = await load_coverage(session, symbol, spec.name) or Coverage(spec)
+        gaps = [
+            {"start": from_ns(gap_start).isoformat(), "end": from_ns(gap_end).isoformat()}
+            for gap_start, gap_end in coverage.gaps(start_ns, end_ns)
+        ]
+        refused = strict and bool(gaps)
+        candles: list[CandleRecord] | None = [] if refused else None
+        if candles is None and end is None:
+            candles = await _recent_candles(cache, symbol, spec, start_ns, end_ns)
+        if candles is None:
+            candles = await fetch_candles(session, symbol, spec.name, start_ns, end_ns)
+    if refused:
+        raise HTTPException(
+            status_code=409, detail={"message": "Candle history is incomplete", "gaps": gaps}
+        )
+
+    return {
+        "symbol": symbol,
+        "interval": spec.name,
+        "complete": not gaps,
+        "completeness": coverage.completeness(start_ns, end_ns),
+        "gaps": gaps,
+        "candles": [
+            {
+                "timestamp": from_ns(candle.ts_ns).isoformat(),
+                "open": candle.open,
+                "high": candle.high,
+                "low": candle.low,
+                "close": candle.close,
+                "volume": candle.volume,
+            }
+            for candle in candles
+        ],
+    }
+
+
+__all__ = ["MAX_HISTORY_CANDLES", "router", "chart_history", "chart_page", "chart_stream"]
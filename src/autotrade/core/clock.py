@@ -1,33 +1,334 @@
-"""Shared clock utilities ensuring synchronized timestamps across services."""
+"""Shared clock utilities ensuring synchronized timestamps across services.
+
+All services read time through a process-wide :class:`Clock`. The default
+:class:`SystemClock` returns integer epoch nanoseconds anchored to
+``time.monotonic_ns`` and caches the canonical timezone, so the hot path is two
+integer additions. :class:`TimeSnapshot` only materializes ``datetime`` objects
+when ``utc``/``kst`` are accessed.
+
+Replays and backtests install a :class:`SimulatedClock` with :func:`set_clock`
+or :func:`use_clock`; consumers keep calling :func:`now`/:func:`now_ns` and
+``await get_clock().sleep(...)`` unchanged.
+"""
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import datetime, timezone
-from zoneinfo import ZoneInfo
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import TYPE_CHECKING, Protocol
+
+from .config import get_settings
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import numpy as np
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NS_PER_SECOND = 1_000_000_000
+_NS_PER_HOUR = 3_600 * _NS_PER_SECOND
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str | None = None) -> tzinfo:
+    """Return the cached ``ZoneInfo`` for ``name`` (default: configured zone)."""
+
+    from zoneinfo import ZoneInfo
+
+    return ZoneInfo(name or get_settings().timezone)
+
 
-from .config import settings
+def from_ns(value: int, zone: tzinfo = timezone.utc) -> datetime:
+    """Convert epoch nanoseconds to an aware ``datetime`` (microsecond precision)."""
+
+    moment = _EPOCH + timedelta(microseconds=value // 1_000)
+    return moment if zone is timezone.utc else moment.astimezone(zone)
+
+
+def to_epoch_ns(value: datetime | str) -> int:
+    """Convert an aware ``datetime`` (or ISO-8601 string) to epoch nanoseconds.
+
+    Naive values are taken to be UTC.
+    """
+
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1) * 1_000
 
 
-@dataclass(frozen=True, slots=True)
 class TimeSnapshot:
-    """Container for paired UTC and KST timestamps."""
+    """Instant in time exposing paired UTC and KST timestamps.
+
+    Only the integer ``ns`` is captured eagerly; the ``datetime`` views are
+    built on first access and cached.
+    """
+
+    __slots__ = ("ns", "_zone", "_utc", "_kst")
+
+    def __init__(self, ns: int, zone: tzinfo | None = None) -> None:
+        self.ns = ns
+        self._zone = zone or get_zone()
+        self._utc: datetime | None = None
+        self._kst: datetime | None = None
+
+    @property
+    def utc(self) -> datetime:
+        if self._utc is None:
+            self._utc = from_ns(self.ns)
+        return self._utc
+
+    @property
+    def kst(self) -> datetime:
+        if self._kst is None:
+            self._kst = self.utc.astimezone(self._zone)
+        return self._kst
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TimeSnapshot):
+            return NotImplemented
+        return self.ns == other.ns
+
+    def __hash__(self) -> int:
+        return hash(self.ns)
+
+    def __repr__(self) -> str:
+        return f"TimeSnapshot(utc={self.utc.isoformat()!r}, kst={self.kst.isoformat()!r})"
+
+
+class Clock(Protocol):
+    """Time source used by services; swap implementations for replays."""
+
+    zone: tzinfo
+
+    def now_ns(self) -> int:
+        """Return the current epoch time in nanoseconds."""
+
+    def monotonic_ns(self) -> int:
+        """Return a monotonic reading suitable for measuring durations."""
+
+    async def sleep(self, seconds: float) -> None:
+        """Suspend the caller for ``seconds`` of this clock's time."""
+
+
+class SystemClock:
+    """Wall clock derived from ``time.monotonic_ns`` and a periodic anchor.
+
+    Wall time is read once per ``reanchor_interval`` seconds; in between,
+    :meth:`now_ns` extrapolates with the monotonic clock, which is cheaper and
+    unaffected by host time adjustments until the next anchor.
+
+    The ``(monotonic, wall)`` anchor pair is replaced as one tuple so readers
+    on other threads never combine halves of different anchors, and
+    :meth:`now_ns` never returns less than its previous result: when a
+    re-anchor finds the wall clock behind the extrapolation, readings hold at
+    the last value until wall time catches up.
+    """
+
+    def __init__(self, zone: tzinfo | None = None, *, reanchor_interval: float = 60.0) -> None:
+        self.zone = zone or get_zone()
+        self._reanchor_ns = int(reanchor_interval * _NS_PER_SECOND)
+        self._last = 0
+        self.reanchor()
+
+    def reanchor(self) -> None:
+        """Re-read the wall clock and reset the monotonic anchor."""
 
-    utc: datetime
-    kst: datetime
+        self._anchor = (time.monotonic_ns(), time.time_ns())
+
+    def now_ns(self) -> int:
+        mono, wall = self._anchor
+        elapsed = time.monotonic_ns() - mono
+        if elapsed > self._reanchor_ns:
+            self.reanchor()
+            mono, wall = self._anchor
+            elapsed = 0
+        value = wall + elapsed
+        if value > self._last:
+            self._last = value
+            return value
+        return self._last
+
+    def monotonic_ns(self) -> int:
+        return time.monotonic_ns()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+class SimulatedClock:
+    """Controllable clock for replays and backtests.
+
+    With ``speed=None`` (the default) time is step-driven: it only moves through
+    :meth:`advance`/:meth:`set`, and :meth:`sleep` waits until the clock has
+    been advanced far enough. With a ``speed`` factor the clock runs that many
+    times faster than real time from ``start_ns``.
+    """
+
+    def __init__(
+        self,
+        start_ns: int = 0,
+        *,
+        speed: float | None = None,
+        zone: tzinfo | None = None,
+    ) -> None:
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive")
+        self.zone = zone or get_zone()
+        self.speed = speed
+        # (monotonic, simulated) anchor pair, replaced as one tuple.
+        self._anchor = (time.monotonic_ns(), start_ns)
+        self._sleepers: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+
+    def now_ns(self) -> int:
+        mono, now = self._anchor
+        if self.speed is None:
+            return now
+        return now + int((time.monotonic_ns() - mono) * self.speed)
+
+    def monotonic_ns(self) -> int:
+        return self.now_ns()
+
+    def set(self, value_ns: int) -> None:
+        """Jump to ``value_ns`` (must not move backwards) and wake sleepers."""
+
+        current = self.now_ns()
+        if value_ns < current:
+            raise ValueError("SimulatedClock cannot move backwards")
+        self._anchor = (time.monotonic_ns(), value_ns)
+        self._wake(value_ns)
+
+    def advance(self, seconds: float = 0.0, *, ns: int = 0) -> int:
+        """Move the clock forward and return the new epoch nanoseconds."""
+
+        target = self.now_ns() + int(seconds * _NS_PER_SECOND) + ns
+        self.set(target)
+        return target
+
+    async def sleep(self, seconds: float) -> None:
+        if self.speed is not None:
+            await asyncio.sleep(seconds / self.speed)
+            return
+        now = self._anchor[1]
+        deadline = now + int(seconds * _NS_PER_SECOND)
+        if deadline <= now:
+            await asyncio.sleep(0)
+            return
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (deadline, next(self._sequence), future))
+        await future
+
+    def next_deadline(self) -> int | None:
+        """Return the earliest pending sleep deadline, if any."""
+
+        while self._sleepers and self._sleepers[0][2].done():
+            heapq.heappop(self._sleepers)
+        return self._sleepers[0][0] if self._sleepers else None
+
+    def _wake(self, now_ns: int) -> None:
+        while self._sleepers and self._sleepers[0][0] <= now_ns:
+            _, _, future = heapq.heappop(self._sleepers)
+            if not future.done():
+                future.set_result(None)
+
+
+_clock: Clock | None = None
+
+
+def get_clock() -> Clock:
+    """Return the process-wide clock, creating a :class:`SystemClock` lazily."""
+
+    global _clock
+    if _clock is None:
+        _clock = SystemClock()
+    return _clock
+
+
+def set_clock(clock: Clock | None) -> None:
+    """Install ``clock`` process-wide (``None`` restores the system clock)."""
+
+    global _clock
+    _clock = clock
+
+
+@contextmanager
+def use_clock(clock: Clock) -> Iterator[Clock]:
+    """Temporarily install ``clock``, restoring the previous one on exit."""
+
+    global _clock
+    previous = _clock
+    _clock = clock
+    try:
+        yield clock
+    finally:
+        _clock = previous
+
+
+def now_ns() -> int:
+    """Return the current epoch time in integer nanoseconds."""
+
+    return (_clock or get_clock()).now_ns()
 
 
 def now() -> TimeSnapshot:
     """Return the current time in both UTC and KST.
 
-    The reference clock pulls UTC time first to avoid drift, then converts the
-    timestamp to the configured canonical timezone (defaulting to Asia/Seoul).
-    All timestamps are timezone-aware ``datetime`` objects.
+    The reference clock captures one integer UTC instant; the UTC and
+    configured-timezone (defaulting to Asia/Seoul) ``datetime`` views are
+    timezone-aware and materialized lazily from it.
     """
 
-    utc_time = datetime.now(tz=timezone.utc)
-    kst_zone = ZoneInfo(settings.timezone)
-    return TimeSnapshot(utc=utc_time, kst=utc_time.astimezone(kst_zone))
+    clock = _clock or get_clock()
+    return TimeSnapshot(clock.now_ns(), clock.zone)
+
+
+def to_datetime64(
+    values: "np.ndarray | list[int]", zone: tzinfo | None = None
+) -> tuple["np.ndarray", "np.ndarray"]:
+    """Convert epoch nanoseconds to UTC and local wall-clock ``datetime64[ns]``.
+
+    Offsets are resolved once per distinct hour in ``values`` rather than per
+    element, so large batches convert at NumPy speed. Zones whose transitions
+    are not aligned to whole hours may be off near those transitions.
+    """
+
+    import numpy as np
+
+    zone = zone or get_zone()
+    ns = np.asarray(values, dtype=np.int64)
+    utc = ns.astype("datetime64[ns]")
+    hours, inverse = np.unique(ns // _NS_PER_HOUR, return_inverse=True)
+    offsets = np.fromiter(
+        (
+            from_ns(int(hour) * _NS_PER_HOUR, zone).utcoffset() // timedelta(microseconds=1)
+            * 1_000
+            for hour in hours
+        ),
+        dtype=np.int64,
+        count=len(hours),
+    )
+    local = (ns + offsets[inverse.reshape(ns.shape)]).astype("datetime64[ns]")
+    return utc, local
 
 
-__all__ = ["TimeSnapshot", "now"]
+__all__ = [
+    "Clock",
+    "SimulatedClock",
+    "SystemClock",
+    "TimeSnapshot",
+    "from_ns",
+    "get_clock",
+    "get_zone",
+    "now",
+    "now_ns",
+    "set_clock",
+    "to_datetime64",
+    "to_epoch_ns",
+    "use_clock",
+]
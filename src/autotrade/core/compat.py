@@ -31,6 +31,14 @@ except ModuleNotFoundError:  # pragma: no cover - simplified shim used in tests
                 for name in getattr(self, "__annotations__", {})
             }
 
+        @classmethod
+        def model_validate(cls, data: Any) -> Any:
+            return cls(**dict(data))
+
+        @classmethod
+        def model_construct(cls, **data: Any) -> Any:
+            return cls(**data)
+
     @dataclass
     class _FieldInfo:  # type: ignore
         default: Any = None
@@ -47,6 +47,55 @@ class Settings(BaseSettings):
         Enables SSL/TLS for Redis connections.
     redis_db:
         Optional logical database selection for Redis.
+    candle_cache_capacity:
+        Maximum number of recent candles retained per ``(symbol, interval)``
+        in the Redis candle cache.
+    clock_reference:
+        Reference time source for clock offset estimation, either an SNTP
+        ``host[:port]`` or ``local``. Synchronization is disabled when unset.
+    clock_sync_interval / clock_sync_samples:
+        Seconds between synchronization bursts and samples taken per burst.
+    clock_max_slew_ppm:
+        Maximum rate at which clock corrections are slewed in.
+    payload_validation_sample_rate:
+        Fully validate one in this many trusted internal event payloads to
+        detect contract drift; ``1`` validates every payload and ``0``
+        disables sampling.
+    log_format:
+        ``text`` for human readable lines or ``json`` for one JSON object per
+        record.
+    log_queue:
+        Route log records through a background listener thread so callers
+        never block on log I/O.
+    upbit_ws_url:
+        Upbit WebSocket endpoint used by the market ingest engine.
+    ingest_markets_per_connection:
+        Markets multiplexed over each ingest WebSocket connection.
+    upbit_rest_url:
+        Upbit REST API root used for market lists and candle backfills.
+    backfill_rate_limit / backfill_concurrency:
+        Candle backfill requests per second (further limited by Upbit's
+        ``Remaining-Req`` header) and concurrent request workers.
+    candle_intervals:
+        Comma separated intervals the ingest engine builds from trades.
+    candle_grace / candle_partial_updates:
+        Seconds a built candle stays open for late trades, and for which
+        intervals in-progress candle updates are published before they close
+        (``true``, ``false`` or comma separated intervals).
+    strategy_workers:
+        Worker processes evaluating heavy strategies (``0`` runs every
+        strategy on the event loop).
+    strategy_latency_budget:
+        Seconds allowed from reading a candle batch to publishing its
+        signals; slower batches are counted and logged by the strategy engine.
+    event_loop:
+        ``asyncio`` or ``uvloop`` for the API server and service workers.
+    loop_lag_interval / loop_lag_threshold:
+        Seconds between event loop lag probes (``0`` disables the monitor) and
+        the stall duration that logs the blocking stack (``0`` disables it).
+    admin_token:
+        Shared secret required in the ``X-Admin-Token`` header by the
+        ``/admin`` diagnostics endpoints; they are disabled when unset.
     """
 
     environment: Literal["local", "development", "staging", "production"] = Field(
@@ -89,6 +138,56 @@ class Settings(BaseSettings):
     message_namespace: str = Field(
         default="autotrade", validation_alias="MESSAGE_NAMESPACE"
     )
+    candle_cache_capacity: int = Field(
+        default=500, validation_alias="CANDLE_CACHE_CAPACITY"
+    )
+    clock_reference: str | None = Field(
+        default=None, validation_alias="CLOCK_REFERENCE"
+    )
+    clock_sync_interval: float = Field(
+        default=64.0, validation_alias="CLOCK_SYNC_INTERVAL"
+    )
+    clock_sync_samples: int = Field(default=8, validation_alias="CLOCK_SYNC_SAMPLES")
+    clock_max_slew_ppm: float = Field(
+        default=500.0, validation_alias="CLOCK_MAX_SLEW_PPM"
+    )
+    payload_validation_sample_rate: int = Field(
+        default=1000, validation_alias="PAYLOAD_VALIDATION_SAMPLE_RATE"
+    )
+    log_format: Literal["text", "json"] = Field(
+        default="text", validation_alias="LOG_FORMAT"
+    )
+    log_queue: bool = Field(default=True, validation_alias="LOG_QUEUE")
+    upbit_ws_url: str = Field(
+        default="wss://api.upbit.com/websocket/v1", validation_alias="UPBIT_WS_URL"
+    )
+    ingest_markets_per_connection: int = Field(
+        default=100, validation_alias="INGEST_MARKETS_PER_CONNECTION"
+    )
+    upbit_rest_url: str = Field(
+        default="https://api.upbit.com", validation_alias="UPBIT_REST_URL"
+    )
+    backfill_rate_limit: float = Field(default=10.0, validation_alias="BACKFILL_RATE_LIMIT")
+    backfill_concurrency: int = Field(default=4, validation_alias="BACKFILL_CONCURRENCY")
+    candle_intervals: str = Field(
+        default="1m,3m,5m,15m,60m,240m,1d", validation_alias="CANDLE_INTERVALS"
+    )
+    candle_grace: float = Field(default=2.0, validation_alias="CANDLE_GRACE")
+    candle_partial_updates: str = Field(
+        default="1d", validation_alias="CANDLE_PARTIAL_UPDATES"
+    )
+    strategy_workers: int = Field(default=2, validation_alias="STRATEGY_WORKERS")
+    strategy_latency_budget: float = Field(
+        default=0.25, validation_alias="STRATEGY_LATENCY_BUDGET"
+    )
+    event_loop: Literal["asyncio", "uvloop"] = Field(
+        default="asyncio", validation_alias="EVENT_LOOP"
+    )
+    loop_lag_interval: float = Field(default=0.25, validation_alias="LOOP_LAG_INTERVAL")
+    loop_lag_threshold: float = Field(
+        default=0.1, validation_alias="LOOP_LAG_THRESHOLD"
+    )
+    admin_token: str | None = Field(default=None, validation_alias="ADMIN_TOKEN")
 
     model_config = {
         "env_file": ".env",
@@ -0,0 +1,159 @@
+"""Event loop selection and loop-lag monitoring.
+
+A single blocking call in a coroutine stalls every SSE client and consumer
+sharing the loop. :class:`LoopLagMonitor` measures how late the loop wakes a
+periodic timer and records the delay in the
+``autotrade_event_loop_lag_seconds`` histogram. A watchdog thread notices when
+the loop stops ticking for longer than ``threshold``. It then logs the loop
+thread's stack and the running task *while the loop is still blocked*, so the
+log names the offending code and not just the symptom.
+
+``EVENT_LOOP=uvloop`` runs services on uvloop when it is installed (it ships
+with ``uvicorn[standard]``). Entry points start through :func:`run`, and
+``python -m autotrade.app`` passes the choice on to uvicorn.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections.abc import Callable, Coroutine
+from typing import Any, Literal, TypeVar
+
+from .config import get_settings
+from .metrics import counter, histogram
+
+EventLoopKind = Literal["asyncio", "uvloop"]
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+_LAG = histogram(
+    "autotrade_event_loop_lag_seconds", "Delay between a timer's due time and its callback."
+)
+_STALLS = counter(
+    "autotrade_event_loop_stalls_total", "Loop stalls longer than the lag threshold."
+)
+
+
+def loop_factory(kind: EventLoopKind | None = None) -> Callable[[], asyncio.AbstractEventLoop]:
+    """Return a factory for the configured event loop implementation.
+
+    Falls back to the standard loop (with a warning) when uvloop is requested
+    but not installed.
+    """
+
+    kind = kind or get_settings().event_loop
+    if kind == "uvloop":
+        try:
+            import uvloop  # type: ignore
+        except ModuleNotFoundError:
+            logger.warning("EVENT_LOOP=uvloop but uvloop is not installed; using asyncio")
+        else:
+            return uvloop.new_event_loop
+    return asyncio.new_event_loop
+
+
+def uvicorn_loop(kind: EventLoopKind | None = None) -> str:
+    """Return the ``loop`` argument to pass to :func:`uvicorn.run`."""
+
+    factory = loop_factory(kind)
+    return "asyncio" if factory is asyncio.new_event_loop else "uvloop"
+
+
+def run(main: Coroutine[Any, Any, T], *, kind: EventLoopKind | None = None) -> T:
+    """Run ``main`` to completion on a new loop of the configured kind."""
+
+    with asyncio.Runner(loop_factory=loop_factory(kind)) as runner:
+        return runner.run(main)
+
+
+class LoopLagMonitor:
+    """Continuously measure event loop scheduling delay.
+
+    Parameters
+    ----------
+    interval:
+        Seconds between probes; each probe sleeps this long and records how
+        late it woke up.
+    threshold:
+        A stall longer than this is logged with the blocking stack (``0``
+        disables stall detection and the watchdog thread).
+    """
+
+    def __init__(self, interval: float = 0.25, threshold: float = 0.1) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls = 0
+        self.max_lag = 0
+        """Largest lag observed so far, in nanoseconds."""
+        self._interval_ns = int(interval * 1e9)
+        self._beat = 0
+        self._reported = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._stop = threading.Event()
+
+    async def run(self) -> None:
+        """Probe until cancelled."""
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter_ns()
+        watchdog = None
+        if self.threshold > 0:
+            self._stop.clear()
+            watchdog = threading.Thread(
+                target=self._watch, name="autotrade-loop-watchdog", daemon=True
+            )
+            watchdog.start()
+        record = _LAG.record
+        try:
+            while True:
+                start = self._beat = time.perf_counter_ns()
+                await asyncio.sleep(self.interval)
+                lag = max(time.perf_counter_ns() - start - self._interval_ns, 0)
+                record(lag)
+                if lag > self.max_lag:
+                    self.max_lag = lag
+        finally:
+            if watchdog is not None:
+                self._stop.set()
+                watchdog.join()
+
+    def _watch(self) -> None:
+        threshold_ns = int(self.threshold * 1e9)
+        check = max(self.threshold / 2, 0.01)
+        while not self._stop.wait(check):
+            beat = self._beat
+            stalled = time.perf_counter_ns() - beat - self._interval_ns
+            if stalled > threshold_ns and beat != self._reported:
+                # Report each stall once, while the loop is still blocked.
+                self._reported = beat
+                self._report(stalled / 1e9)
+
+    def _report(self, stalled: float) -> None:
+        self.stalls += 1
+        _STALLS.inc()
+        frame = sys._current_frames().get(self._loop_thread)  # type: ignore[arg-type]
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        del frame
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        task_name = task.get_name() if task is not None else None
+        logger.warning(
+            "Event loop blocked for at least %.0f ms (task %s):\n%s",
+            stalled * 1000,
+            task_name,
+            stack,
+            extra={"loop_lag_ms": round(stalled * 1000, 1), "task": task_name},
+        )
+
+
+__all__ = ["EventLoopKind", "LoopLagMonitor", "loop_factory", "run", "uvicorn_loop"]
@@ -0,0 +1,259 @@
+"""Fixed-point integer prices and quantities.
+
+Prices, quantities and quote amounts on hot paths are plain ``int`` values
+scaled by :data:`SCALE` (10^8, matching the ``Numeric(18, 8)`` columns used by
+orders and positions). Addition and comparison are native integer operations.
+:func:`mul` and :func:`mul_div` are the per-fill operations and are a single
+``a * b // SCALE`` (floor) with no further checks; :func:`div`, :func:`dot`
+and :func:`round_to_step` round half-even. Values of ordinary magnitude fit in a signed
+64-bit integer, so the same representation can be stored in NumPy ``int64``
+columns.
+
+Conversion happens only at boundaries: :func:`to_fixed` accepts ``Decimal``
+(database ``Numeric`` columns), ``str`` (exchange/API JSON) and ``float``
+(legacy ``Float`` columns, via their shortest decimal representation);
+:func:`to_decimal` converts back exactly.
+
+:class:`MarketSpec` carries per-market tick and lot sizes so prices can be
+snapped to valid increments without leaving the integer domain.
+"""
+
+from __future__ import annotations
+
+import operator
+from bisect import bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+from typing import Literal
+
+SCALE_DIGITS = 8
+SCALE = 10**SCALE_DIGITS
+"""Number of fixed-point units in one whole price/quantity unit."""
+
+_QUANTUM = Decimal(1).scaleb(-SCALE_DIGITS)
+
+Rounding = Literal["down", "up", "nearest"]
+
+
+def to_fixed(value: Decimal | int | float | str) -> int:
+    """Convert ``value`` to fixed-point units, rounding half-even past 8 digits.
+
+    ``int`` inputs are treated as whole units. Floats go through ``repr`` so
+    ``0.1`` converts to exactly ``10_000_000`` rather than its binary value.
+    """
+
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value * SCALE
+    if isinstance(value, float):
+        value = repr(value)
+    try:
+        decimal = value if isinstance(value, Decimal) else Decimal(value)
+        return int(decimal.scaleb(SCALE_DIGITS).to_integral_value(ROUND_HALF_EVEN))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Cannot convert {value!r} to a fixed-point value") from None
+
+
+def to_decimal(value: int) -> Decimal:
+    """Return the exact ``Decimal`` (8 decimal places) for fixed-point ``value``."""
+
+    return Decimal(value).scaleb(-SCALE_DIGITS).quantize(_QUANTUM)
+
+
+def to_float(value: int) -> float:
+    """Return ``value`` as a float for display, charting or NumPy maths."""
+
+    return value / SCALE
+
+
+def _round_div(numerator: int, denominator: int) -> int:
+    """Integer division rounding half to even (``denominator`` > 0)."""
+
+    quotient, remainder = divmod(numerator, denominator)
+    twice = remainder * 2
+    if twice > denominator or (twice == denominator and quotient & 1):
+        quotient += 1
+    return quotient
+
+
+def mul(a: int, b: int) -> int:
+    """Multiply two fixed-point values (e.g. price × quantity → notional).
+
+    The result is floored to the last stored digit.
+    """
+
+    return a * b // SCALE
+
+
+def div(a: int, b: int) -> int:
+    """Divide two fixed-point values (e.g. cost ÷ quantity → average price)."""
+
+    if b == 0:
+        raise ZeroDivisionError("fixed-point division by zero")
+    if b < 0:
+        a, b = -a, -b
+    return _round_div(a * SCALE, b)
+
+
+def dot(a: Iterable[int], b: Iterable[int]) -> int:
+    """Sum of ``a[i] * b[i]`` rescaled once, so per-term rounding cannot accumulate."""
+
+    return _round_div(sum(map(operator.mul, a, b)), SCALE)
+
+
+def mul_div(a: int, b: int, c: int) -> int:
+    """Return ``a * b / c`` floored once, e.g. the cost basis of a partial close."""
+
+    return a * b // c
+
+
+def round_to_step(value: int, step: int, rounding: Rounding = "nearest") -> int:
+    """Snap ``value`` to a multiple of ``step`` (both fixed-point)."""
+
+    if step <= 0:
+        raise ValueError("step must be positive")
+    if rounding == "down":
+        return value // step * step
+    if rounding == "up":
+        return -(-value // step) * step
+    return _round_div(value, step) * step
+
+
+# Upbit KRW market price units: (lower bound in KRW, tick size in KRW).
+UPBIT_KRW_TICKS: tuple[tuple[str, str], ...] = (
+    ("0", "0.00000001"),
+    ("0.0001", "0.0000001"),
+    ("0.001", "0.000001"),
+    ("0.01", "0.00001"),
+    ("0.1", "0.0001"),
+    ("1", "0.001"),
+    ("10", "0.01"),
+    ("100", "0.1"),
+    ("1000", "1"),
+    ("10000", "10"),
+    ("100000", "50"),
+    ("500000", "100"),
+    ("1000000", "500"),
+    ("2000000", "1000"),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class MarketSpec:
+    """Tick/lot metadata for one market, all in fixed-point units.
+
+    Parameters
+    ----------
+    symbol:
+        Exchange market code such as ``KRW-BTC``.
+    ticks:
+        ``(lower_bound, tick_size)`` pairs sorted by bound; the tick size of
+        the highest bound not above a price applies to it.
+    lot_size:
+        Smallest quantity increment.
+    min_notional:
+        Minimum order value in the quote currency (``0`` disables the check).
+    """
+
+    symbol: str
+    ticks: tuple[tuple[int, int], ...]
+    lot_size: int = 1
+    min_notional: int = 0
+    _bounds: tuple[int, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not self.ticks or self.ticks[0][0] != 0:
+            raise ValueError("ticks must start at a lower bound of 0")
+        object.__setattr__(self, "_bounds", tuple(bound for bound, _ in self.ticks))
+
+    @classmethod
+    def from_table(
+        cls,
+        symbol: str,
+        table: tuple[tuple[str, str], ...],
+        *,
+        lot_size: str = "0.00000001",
+        min_notional: str = "0",
+    ) -> "MarketSpec":
+        """Build a spec from a decimal-string tick table."""
+
+        return cls(
+            symbol=symbol,
+            ticks=tuple((to_fixed(bound), to_fixed(tick)) for bound, tick in table),
+            lot_size=to_fixed(lot_size),
+            min_notional=to_fixed(min_notional),
+        )
+
+    @property
+    def quote(self) -> str:
+        return self.symbol.partition("-")[0]
+
+    def tick_size(self, price: int) -> int:
+        """Return the tick size applying at ``price``."""
+
+        return self.ticks[max(bisect_right(self._bounds, price) - 1, 0)][1]
+
+    def round_price(self, price: int, rounding: Rounding = "nearest") -> int:
+        """Snap ``price`` to the tick grid of its price band."""
+
+        return round_to_step(price, self.tick_size(price), rounding)
+
+    def round_quantity(self, quantity: int) -> int:
+        """Round ``quantity`` down to a whole number of lots."""
+
+        return round_to_step(quantity, self.lot_size, "down")
+
+    def is_valid_order(self, price: int, quantity: int) -> bool:
+        """Return whether ``price``/``quantity`` satisfy tick, lot and notional rules."""
+
+        return (
+            price > 0
+            and quantity > 0
+            and price % self.tick_size(price) == 0
+            and quantity % self.lot_size == 0
+            and mul(price, quantity) >= self.min_notional
+        )
+
+
+_SPECS: dict[str, MarketSpec] = {}
+
+
+def register_market_spec(spec: MarketSpec) -> None:
+    """Register ``spec`` so :func:`get_market_spec` returns it for its symbol."""
+
+    _SPECS[spec.symbol] = spec
+
+
+def get_market_spec(symbol: str) -> MarketSpec:
+    """Return the registered spec for ``symbol``.
+
+    Unregistered KRW markets use the Upbit KRW tick table and 5,000 KRW
+    minimum order; other markets default to a 1e-8 tick and lot size.
+    """
+
+    spec = _SPECS.get(symbol)
+    if spec is None:
+        if symbol.startswith("KRW-"):
+            spec = MarketSpec.from_table(symbol, UPBIT_KRW_TICKS, min_notional="5000")
+        else:
+            spec = MarketSpec.from_table(symbol, (("0", "0.00000001"),))
+        _SPECS[symbol] = spec
+    return spec
+
+
+__all__ = [
+    "MarketSpec",
+    "SCALE",
+    "SCALE_DIGITS",
+    "UPBIT_KRW_TICKS",
+    "div",
+    "dot",
+    "get_market_spec",
+    "mul",
+    "mul_div",
+    "register_market_spec",
+    "round_to_step",
+    "to_decimal",
+    "to_fixed",
+    "to_float",
+]
@@ -0,0 +1,46 @@
+"""Helpers for lazily resolved package exports.
+
+Package ``__init__`` modules map public names to the submodule defining them
+and install the returned ``__getattr__``/``__dir__`` (PEP 562). Importing the
+package then costs nothing beyond the package itself; a submodule and its
+third-party dependencies (Redis, SQLAlchemy, NumPy …) load on first access of
+one of its names, which is then cached in the package namespace.
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+from collections.abc import Callable, Mapping
+from typing import Any
+
+
+def lazy_exports(
+    package: str, exports: Mapping[str, str]
+) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """Return ``(__getattr__, __dir__)`` resolving ``exports`` on demand.
+
+    Parameters
+    ----------
+    package:
+        ``__name__`` of the package installing the hooks.
+    exports:
+        Mapping of exported name to the relative module (``".redis"``) that
+        defines it.
+    """
+
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted({*vars(sys.modules[package]), *exports})
+
+    return __getattr__, __dir__
+
+
+__all__ = ["lazy_exports"]
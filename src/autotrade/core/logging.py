@@ -1,14 +1,136 @@
-"""Application wide logging helpers."""
+"""Application wide logging helpers.
+
+:func:`configure_logging` installs one root handler. In queued mode (the
+default) that handler is a :class:`~logging.handlers.QueueHandler` which only
+snapshots the record and appends it to an in-memory queue; formatting and
+stream I/O run on a :class:`~logging.handlers.QueueListener` thread, so logging
+from the event loop never blocks on a slow terminal or pipe.
+
+Records carry the correlation and causation ids of the event being handled
+(see :func:`bind_event`) and can be rendered as JSON lines for log shippers.
+Per-tick code paths should log through :func:`get_throttled_logger`, which
+samples and rate-limits messages per call site before a record is even built.
+"""
 
 from __future__ import annotations
 
+import atexit
+import contextlib
+import contextvars
+import copy
+import json
 import logging
-from typing import Optional
+import logging.handlers
+import queue
+import sys
+import time
+from collections.abc import Iterator, Mapping
+from datetime import datetime, timezone
+from typing import IO, Any, Literal, Optional
+
+from .config import get_settings
+
+LogFormat = Literal["text", "json"]
+
+_TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+
+_correlation: contextvars.ContextVar[tuple[str | None, str | None]] = (
+    contextvars.ContextVar("autotrade_log_correlation", default=(None, None))
+)
+
+# Attributes present on every LogRecord; anything else was passed via ``extra``.
+_RESERVED = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None))
+) | {"message", "asctime", "correlation_id", "causation_id"}
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+@contextlib.contextmanager
+def bind_event(envelope: Any = None, *, correlation_id: str | None = None) -> Iterator[None]:
+    """Attach an event's correlation/causation ids to records logged inside.
+
+    ``envelope`` may be an :class:`~autotrade.messaging.envelope.EventEnvelope`
+    or a decoded bus message mapping; ``correlation_id`` overrides it.
+    """
+
+    if isinstance(envelope, Mapping):
+        ids = (envelope.get("correlation_id"), envelope.get("causation_id"))
+    elif envelope is not None:
+        ids = (envelope.correlation_id, envelope.causation_id)
+    else:
+        ids = (None, None)
+    if correlation_id is not None:
+        ids = (correlation_id, ids[1])
+    token = _correlation.set(ids)
+    try:
+        yield
+    finally:
+        _correlation.reset(token)
 
-from .config import settings
 
+class CorrelationFilter(logging.Filter):
+    """Stamp records with the ids bound by :func:`bind_event`."""
 
-def configure_logging(level: Optional[int] = None) -> None:
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "correlation_id"):
+            record.correlation_id, record.causation_id = _correlation.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as one JSON object per line, including ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        document: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        correlation_id = getattr(record, "correlation_id", None)
+        if correlation_id is not None:
+            document["correlation_id"] = correlation_id
+        causation_id = getattr(record, "causation_id", None)
+        if causation_id is not None:
+            document["causation_id"] = causation_id
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                document[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            document["exc"] = record.exc_text
+        if record.stack_info:
+            document["stack"] = record.stack_info
+        return json.dumps(document, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queue handler keeping structured fields for the listener's formatter.
+
+    The stock handler formats the record on the calling thread; here only the
+    message is interpolated and the traceback rendered, which is the minimum
+    needed before the record crosses threads.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(
+    level: Optional[int] = None,
+    *,
+    fmt: LogFormat | None = None,
+    queued: bool | None = None,
+    stream: IO[str] | None = None,
+) -> None:
     """Configure global logging.
 
     Parameters
@@ -16,18 +138,167 @@ def configure_logging(level: Optional[int] = None) -> None:
     level:
         Override logging level. When ``None`` the function derives an
         environment-aware level.
+    fmt:
+        ``"text"`` or ``"json"``; defaults to ``Settings.log_format``.
+    queued:
+        Hand records to a background listener thread; defaults to
+        ``Settings.log_queue``.
+    stream:
+        Output stream (defaults to ``sys.stderr``).
     """
 
+    global _listener
+
+    settings = get_settings()
     if level is None:
         if settings.environment in {"production", "staging"}:
             level = logging.INFO
         else:
             level = logging.DEBUG
+    fmt = fmt or settings.log_format
+    queued = settings.log_queue if queued is None else queued
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(_TEXT_FORMAT))
+
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if getattr(handler, "_autotrade", False):
+            root.removeHandler(handler)
+            handler.close()
+
+    handler: logging.Handler
+    if queued:
+        records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        handler = _QueueHandler(records)
+        _listener = logging.handlers.QueueListener(records, output)
+        _listener.start()
+    else:
+        handler = output
+    handler.addFilter(CorrelationFilter())
+    handler._autotrade = True  # type: ignore[attr-defined]
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread, if running."""
+
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+class ThrottledLogger:
+    """Sampled and rate-limited front end for a :class:`logging.Logger`.
+
+    Each message template is throttled independently: only every ``every``-th
+    call is considered and at most ``per_second`` records (bursting to
+    ``burst``) are emitted. The next emitted record for a template carries the
+    number of calls dropped since the previous one in its ``suppressed`` field.
+    Disabled levels are rejected before any bookkeeping.
+
+    Parameters
+    ----------
+    logger:
+        Logger that receives the emitted records.
+    every:
+        Keep one call in ``every`` (``1`` keeps all).
+    per_second:
+        Token-bucket rate limit per template; ``None`` disables it.
+    burst:
+        Bucket capacity for ``per_second``.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        *,
+        every: int = 1,
+        per_second: float | None = None,
+        burst: int = 1,
+    ) -> None:
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        self.logger = logger
+        self.every = every
+        self.per_second = per_second
+        self.burst = max(burst, 1)
+        # template -> [calls, suppressed, tokens, refilled_at]
+        self._state: dict[str, list[Any]] = {}
+
+    def _admit(self, msg: str) -> int | None:
+        state = self._state.get(msg)
+        if state is None:
+            state = self._state[msg] = [0, 0, float(self.burst), time.monotonic()]
+        state[0] += 1
+        if (state[0] - 1) % self.every:
+            state[1] += 1
+            return None
+        if self.per_second is not None:
+            now = time.monotonic()
+            state[2] = min(self.burst, state[2] + (now - state[3]) * self.per_second)
+            state[3] = now
+            if state[2] < 1:
+                state[1] += 1
+                return None
+            state[2] -= 1
+        suppressed, state[1] = state[1], 0
+        return suppressed
+
+    def _emit(self, level: int, msg: str, args: tuple[Any, ...], kwargs: Any) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        suppressed = self._admit(msg)
+        if suppressed is None:
+            return
+        if suppressed:
+            kwargs["extra"] = {**kwargs.get("extra", {}), "suppressed": suppressed}
+        # Attribute the record to the caller of debug()/info()/... .
+        kwargs.setdefault("stacklevel", 3)
+        self.logger.log(level, msg, *args, **kwargs)
+
+    def log(self, level: int, msg: str, *args: Any, **kwargs: Any) -> None:
+        self._emit(level, msg, args, kwargs)
+
+    def debug(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        self._emit(logging.DEBUG, msg, args, kwargs)
+
+    def info(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        self._emit(logging.INFO, msg, args, kwargs)
+
+    def warning(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        self._emit(logging.WARNING, msg, args, kwargs)
+
+    def error(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        self._emit(logging.ERROR, msg, args, kwargs)
+
+
+def get_throttled_logger(
+    name: str,
+    *,
+    every: int = 1,
+    per_second: float | None = None,
+    burst: int = 1,
+) -> ThrottledLogger:
+    """Return a :class:`ThrottledLogger` for the logger called ``name``."""
 
-    logging.basicConfig(
-        level=level,
-        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+    return ThrottledLogger(
+        logging.getLogger(name), every=every, per_second=per_second, burst=burst
     )
 
 
-__all__ = ["configure_logging"]
+__all__ = [
+    "CorrelationFilter",
+    "JsonFormatter",
+    "ThrottledLogger",
+    "bind_event",
+    "configure_logging",
+    "get_throttled_logger",
+    "shutdown_logging",
+]
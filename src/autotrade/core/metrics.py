@@ -0,0 +1,453 @@
+"""Lightweight in-process metrics with Prometheus text exposition.
+
+The registry supports counters, gauges and log-linear ("HDR-style")
+histograms. Recording is a handful of integer operations with no locks:
+metrics are updated from the event loop thread, and the rare lost update when
+several threads record concurrently is acceptable for monitoring data.
+
+Histograms record non-negative integers — durations in nanoseconds from
+``time.perf_counter_ns`` — into buckets whose width doubles every
+:data:`SUB_BUCKETS` buckets, giving a bounded relative error of
+``1 / SUB_BUCKETS`` at any magnitude without configuring bucket bounds up
+front. The fine buckets are folded into a fixed set of Prometheus ``le``
+buckets when :func:`render` is called; a fine bucket straddling an exported
+bound is counted in the next one, so exported counts err low by at most one
+fine bucket.
+
+Hot functions are timed with :func:`timed`, usable as a decorator (sync or
+async) or a context manager; it queues raw durations and buckets them in
+batches, keeping the per-call cost to the two clock reads and an append::
+
+    publish_seconds = histogram("autotrade_bus_publish_seconds", "Publish latency")
+
+    @timed(publish_seconds)
+    async def publish(...): ...
+
+    with timed(publish_seconds):
+        ...
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import math
+import time
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+"""Linear sub-buckets per power of two (12.5 % worst-case relative error)."""
+
+DEFAULT_SECONDS_BUCKETS: tuple[float, ...] = (
+    0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001,
+    0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+    0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+"""Exported ``le`` bounds (seconds) for nanosecond latency histograms."""
+
+PENDING_LIMIT = 1024
+"""Deferred observations a histogram queues before bucketing them."""
+
+_perf_ns = time.perf_counter_ns
+
+
+def bucket_index(value: int) -> int:
+    """Return the log-linear bucket holding non-negative integer ``value``."""
+
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return shift * SUB_BUCKETS + (value >> shift)
+
+
+def bucket_upper_bound(index: int) -> int:
+    """Return the exclusive upper bound of bucket ``index``."""
+
+    if index < 2 * SUB_BUCKETS:
+        return index + 1
+    shift = index // SUB_BUCKETS - 1
+    return (index - shift * SUB_BUCKETS + 1) << shift
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], Any] = {}
+
+    def labels(self, *values: Any, **labels: Any) -> Any:
+        """Return the child metric for the given label values (cached)."""
+
+        key = tuple(str(v) for v in values) if values else tuple(
+            str(labels[name]) for name in self.labelnames
+        )
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self) -> Any:  # pragma: no cover - overridden
+        raise NotImplementedError
+
+    def _series(self) -> Iterable[tuple[tuple[str, ...], Any]]:
+        if self.labelnames:
+            return list(self._children.items())
+        return [((), self)]
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for values, child in self._series():
+            lines.extend(child._samples(self.name, self.labelnames, values))
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing total."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.value: float = 0
+
+    def _new_child(self) -> "Counter":
+        return Counter(self.name, self.documentation)
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def _samples(self, name: str, labelnames: Sequence[str], values: Sequence[str]) -> list[str]:
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(self.value)}"]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be computed on scrape."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.value: float = 0
+        self._function: Callable[[], float | None] | None = None
+
+    def _new_child(self) -> "Gauge":
+        return Gauge(self.name, self.documentation)
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float | None]) -> None:
+        """Compute the value with ``function`` at scrape time (``None`` skips)."""
+
+        self._function = function
+
+    def _samples(self, name: str, labelnames: Sequence[str], values: Sequence[str]) -> list[str]:
+        value = self._function() if self._function is not None else self.value
+        if value is None:
+            return []
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    """Log-linear histogram of non-negative integers.
+
+    Parameters
+    ----------
+    scale:
+        Factor converting recorded integers to the exported unit (``1e-9`` for
+        nanoseconds exported as seconds).
+    buckets:
+        Exported ``le`` bounds in the exported unit.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        *,
+        scale: float = 1e-9,
+        buckets: Sequence[float] = DEFAULT_SECONDS_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.scale = scale
+        self.buckets = tuple(sorted(buckets))
+        self.counts: list[int] = [0] * (64 * SUB_BUCKETS)
+        self.total = 0
+        self._pending: list[int] = []
+
+    def _new_child(self) -> "Histogram":
+        return Histogram(self.name, self.documentation, scale=self.scale, buckets=self.buckets)
+
+    def record(self, value: int) -> None:
+        """Record one observation (negative values are clamped to zero)."""
+
+        # bucket_index() inlined for SUB_BUCKET_BITS == 3.
+        if value < 16:
+            if value < 0:
+                value = 0
+            self.counts[value] += 1
+        else:
+            shift = value.bit_length() - 4
+            self.counts[(shift << 3) + (value >> shift)] += 1
+        self.total += value
+
+    def defer(self, value: int) -> None:
+        """Queue one observation to be bucketed by the next :meth:`fold`.
+
+        Appending is cheaper than bucketing, so hot paths defer and the queue
+        is folded once it holds :data:`PENDING_LIMIT` values or when the
+        histogram is read.
+        """
+
+        pending = self._pending
+        pending.append(value)
+        if len(pending) >= PENDING_LIMIT:
+            self.fold()
+
+    def fold(self) -> None:
+        """Bucket the deferred observations into :attr:`counts`."""
+
+        pending = self._pending
+        if not pending:
+            return
+        # Values appended by another thread while folding stay queued.
+        values = pending[:]
+        del pending[: len(values)]
+        if len(values) < 64:
+            for value in values:
+                self.record(value)
+            return
+
+        import numpy as np
+
+        array = np.maximum(np.array(values, dtype=np.int64), 0)
+        # frexp's exponent is the bit length for values below 2**53 ns.
+        shift = np.maximum(np.frexp(array)[1] - (SUB_BUCKET_BITS + 1), 0)
+        index = (shift << SUB_BUCKET_BITS) + (array >> shift)
+        tally = np.bincount(index)
+        counts = self.counts
+        for bucket in np.flatnonzero(tally).tolist():
+            counts[bucket] += int(tally[bucket])
+        self.total += int(array.sum())
+
+    @property
+    def count(self) -> int:
+        self.fold()
+        return sum(self.counts)
+
+    def observe(self, value: float) -> None:
+        """Record ``value`` given in the exported unit (e.g. seconds)."""
+
+        self.record(int(value / self.scale))
+
+    def quantile(self, q: float) -> float:
+        """Return an upper-bound estimate of quantile ``q`` in the exported unit."""
+
+        count = self.count
+        if not count:
+            return math.nan
+        rank = max(1, math.ceil(q * count))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bucket_upper_bound(index) * self.scale
+        return math.inf  # pragma: no cover - counts always sum to count
+
+    def _samples(self, name: str, labelnames: Sequence[str], values: Sequence[str]) -> list[str]:
+        self.fold()
+        lines = []
+        cumulative = 0
+        index = 0
+        counts = self.counts
+        for bound in self.buckets:
+            limit = int(bound / self.scale)
+            # Fine buckets entirely below ``limit`` (exclusive upper bound).
+            while index < len(counts) and bucket_upper_bound(index) <= limit + 1:
+                cumulative += counts[index]
+                index += 1
+            le = _format_labels(labelnames, values, f'le="{bound}"')
+            lines.append(f"{name}_bucket{le} {cumulative}")
+        count = sum(counts)
+        inf = _format_labels(labelnames, values, 'le="+Inf"')
+        lines.append(f"{name}_bucket{inf} {count}")
+        label_text = _format_labels(labelnames, values)
+        lines.append(f"{name}_sum{label_text} {_format_value(self.total * self.scale)}")
+        lines.append(f"{name}_count{label_text} {count}")
+        return lines
+
+
+class Registry:
+    """Named collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def _get_or_create(self, cls: type, name: str, *args: Any, **kwargs: Any) -> Any:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name!r} already registered as {metric.kind}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        **kwargs: Any,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, **kwargs)
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+render = REGISTRY.render
+
+
+class timed:
+    """Time a block or function into ``histogram`` in nanoseconds.
+
+    Used as a context manager, each ``with`` block records one observation;
+    used as a decorator it wraps sync and async functions alike. Durations are
+    queued with :meth:`Histogram.defer` and bucketed in batches.
+
+    The decorator keeps the start time on the caller's stack and the context
+    manager stacks the starts of nested entries, so nested and recursive use
+    of one instance pairs each exit with its own entry. Tasks or threads that
+    interleave blocks should each enter a fresh ``timed(...)``.
+    """
+
+    __slots__ = ("histogram", "_pending", "_start", "_outer")
+
+    def __init__(self, histogram: Histogram) -> None:
+        self.histogram = histogram
+        self._pending = histogram._pending
+        self._start = 0
+        self._outer: list[int] | None = None
+
+    def __enter__(self) -> "timed":
+        if self._start:
+            # Nested or recursive entry: keep the enclosing block's start.
+            if self._outer is None:
+                self._outer = []
+            self._outer.append(self._start)
+        self._start = _perf_ns()
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, traceback: object) -> None:
+        elapsed = _perf_ns() - self._start
+        self._start = self._outer.pop() if self._outer else 0
+        pending = self._pending
+        pending.append(elapsed)
+        if len(pending) >= PENDING_LIMIT:
+            self.histogram.fold()
+
+    def __call__(self, function: F) -> F:
+        pending = self.histogram._pending
+        append = pending.append
+        fold = self.histogram.fold
+        perf_ns = _perf_ns
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                start = perf_ns()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    append(perf_ns() - start)
+                    if len(pending) >= PENDING_LIMIT:
+                        fold()
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = perf_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                append(perf_ns() - start)
+                if len(pending) >= PENDING_LIMIT:
+                    fold()
+
+        return wrapper  # type: ignore[return-value]
+
+
+__all__ = [
+    "CONTENT_TYPE",
+    "Counter",
+    "DEFAULT_SECONDS_BUCKETS",
+    "Gauge",
+    "Histogram",
+    "PENDING_LIMIT",
+    "REGISTRY",
+    "Registry",
+    "bucket_index",
+    "bucket_upper_bound",
+    "counter",
+    "gauge",
+    "histogram",
+    "render",
+    "timed",
+]
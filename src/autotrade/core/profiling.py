@@ -0,0 +1,288 @@
+"""On-demand statistical profiling of a running process.
+
+:class:`SamplingProfiler` runs a daemon thread that wakes every ``interval``
+seconds, grabs every thread's current frame with :func:`sys._current_frames`
+and counts the resulting call stacks. Nothing is installed in the profiled
+code (no ``sys.setprofile`` hooks), so the cost to the application is one
+brief GIL acquisition per sample and the profiler can be attached to a live
+service for a few seconds at a time.
+
+Samples taken on the event loop thread are attributed to the asyncio task
+running at that moment, so a flame graph separates the work done by each
+consumer or request. With ``tasks=True`` the await chains of suspended tasks
+are sampled as well, which shows where tasks sit waiting (slow I/O, locks,
+queues) rather than where CPU is spent.
+
+Results are rendered in the "collapsed stack" format understood by
+``flamegraph.pl``, speedscope and similar tools: one line per unique stack,
+frames separated by ``;`` root first, followed by the sample count.
+
+:class:`MemoryTracker` wraps :mod:`tracemalloc` to take a baseline snapshot and
+later report the allocation sites that grew the most.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from types import FrameType
+from typing import Any
+
+MAX_DEPTH = 128
+"""Frames kept per sampled stack (innermost frames are dropped beyond this)."""
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_qualname}"
+
+
+def _walk(frame: FrameType | None) -> list[str]:
+    """Return frame labels from the outermost caller down to ``frame``."""
+
+    labels: list[str] = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _await_chain(coro: Any) -> list[str]:
+    """Return frame labels along a suspended coroutine's ``await`` chain."""
+
+    labels: list[str] = []
+    while coro is not None and len(labels) < MAX_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        labels.append(_frame_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return labels
+
+
+def _task_label(task: asyncio.Task[Any]) -> str:
+    return f"task:{task.get_name()}"
+
+
+class SamplingProfiler:
+    """Sample the stacks of all threads at a fixed interval.
+
+    Parameters
+    ----------
+    interval:
+        Seconds between samples.
+    tasks:
+        Also sample the await chains of suspended asyncio tasks.
+    loop:
+        Event loop whose thread and tasks get task attribution. Defaults to
+        the loop running when :meth:`start` is called, if any.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        *,
+        tasks: bool = False,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = interval
+        self.tasks = tasks
+        self.loop = loop
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._loop_thread: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            raise RuntimeError("profiler already running")
+        if self.loop is None:
+            try:
+                self.loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+        if self.loop is not None and self.loop.is_running():
+            self._loop_thread = getattr(self.loop, "_thread_id", None)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="autotrade-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        started = time.perf_counter()
+        deadline = started
+        own = threading.get_ident()
+        while not self._stop.is_set():
+            self.sample(exclude=own)
+            deadline += self.interval
+            # Keep a fixed cadence; skip ahead rather than burst after a stall.
+            delay = deadline - time.perf_counter()
+            if delay < 0:
+                deadline = time.perf_counter()
+                delay = 0
+            self._stop.wait(delay)
+        self.duration += time.perf_counter() - started
+
+    def sample(self, exclude: int | None = None) -> None:
+        """Record one sample of every thread except ``exclude``."""
+
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        frames = sys._current_frames()
+        loop = self.loop
+        running_task = None
+        if loop is not None and self._loop_thread is not None:
+            running_task = asyncio.current_task(loop)
+        for ident, frame in frames.items():
+            if ident == exclude:
+                continue
+            root = [names.get(ident, f"thread-{ident}")]
+            if ident == self._loop_thread:
+                root.append(_task_label(running_task) if running_task else "loop")
+            self.stacks[tuple(root + _walk(frame))] += 1
+        del frames
+        if self.tasks and loop is not None:
+            try:
+                pending = asyncio.all_tasks(loop)
+            except RuntimeError:  # pragma: no cover - task set mutated repeatedly
+                pending = set()
+            for task in pending:
+                if task is running_task or task.done():
+                    continue
+                chain = _await_chain(task.get_coro())
+                if chain:
+                    self.stacks[("await", _task_label(task), *chain)] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Return the samples as collapsed stacks, most frequent first."""
+
+        return "".join(
+            f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+async def profile(
+    seconds: float, *, interval: float = 0.005, tasks: bool = False
+) -> SamplingProfiler:
+    """Profile the running process for ``seconds`` without blocking the loop."""
+
+    profiler = SamplingProfiler(interval, tasks=tasks)
+    profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+    return profiler
+
+
+class MemoryTracker:
+    """Report allocation growth between a baseline and the current heap.
+
+    Parameters
+    ----------
+    frames:
+        Traceback depth stored by :mod:`tracemalloc` per allocation; more
+        frames cost more memory and time per allocation.
+    """
+
+    def __init__(self, frames: int = 1) -> None:
+        self.frames = frames
+        self.baseline: tracemalloc.Snapshot | None = None
+        self._started = False
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started = True
+
+    def stop(self) -> None:
+        """Drop the baseline and stop tracing if this tracker started it."""
+
+        self.baseline = None
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    @staticmethod
+    def _take() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<unknown>"),
+            )
+        )
+
+    def snapshot(self, limit: int = 20) -> dict[str, Any]:
+        """Start tracing if needed, store a new baseline and return its top sites."""
+
+        self.start()
+        self.baseline = self._take()
+        stats = self.baseline.statistics("lineno")
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {"site": str(stat.traceback), "size": stat.size, "count": stat.count}
+                for stat in stats[:limit]
+            ],
+        }
+
+    def diff(self, limit: int = 20) -> dict[str, Any]:
+        """Return the allocation sites that changed most since the baseline."""
+
+        if self.baseline is None or not tracemalloc.is_tracing():
+            raise RuntimeError("no baseline snapshot; call snapshot() first")
+        stats = self._take().compare_to(self.baseline, "lineno")
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "growth_bytes": sum(stat.size_diff for stat in stats),
+            "top": [
+                {
+                    "site": str(stat.traceback),
+                    "size": stat.size,
+                    "size_diff": stat.size_diff,
+                    "count": stat.count,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+
+__all__ = ["MAX_DEPTH", "MemoryTracker", "SamplingProfiler", "profile"]
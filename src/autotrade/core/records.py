@@ -0,0 +1,151 @@
+"""Compact tuple-backed records for high-volume market data.
+
+Pydantic payloads carry a ``__dict__``, a fields-set and validation metadata
+per instance, and each ``datetime`` is a separate object; ORM rows add
+SQLAlchemy instance state on top. Queues and buffers that hold millions of
+candles or trades use :class:`CandleRecord` and :class:`TickRecord` instead:
+``NamedTuple`` subclasses with no per-instance ``__dict__`` and a single integer
+epoch-nanosecond timestamp.
+
+Conversions to and from :class:`~autotrade.core.schemas.CandlePayload`,
+:class:`~autotrade.core.schemas.TickPayload` and the ``Candle``/``Tick`` ORM
+models are lossless for every stored field. The KST timestamp is not stored;
+it is the same instant as the UTC one and is rebuilt in the configured zone.
+"""
+
+from __future__ import annotations
+
+from datetime import tzinfo
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from .clock import from_ns, get_zone, now, to_epoch_ns
+from .schemas import CandlePayload, TickPayload
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from autotrade.db.models.market import Candle, Tick
+
+
+class CandleRecord(NamedTuple):
+    """One OHLCV candle keyed by its opening time in epoch nanoseconds."""
+
+    symbol: str
+    interval: str
+    ts_ns: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    source: str = "upbit"
+
+    @classmethod
+    def from_payload(cls, payload: CandlePayload) -> "CandleRecord":
+        return cls(
+            payload.symbol,
+            payload.interval,
+            to_epoch_ns(payload.timestamp_utc),
+            payload.open,
+            payload.high,
+            payload.low,
+            payload.close,
+            payload.volume,
+            payload.source,
+        )
+
+    @classmethod
+    def from_orm(cls, row: "Candle") -> "CandleRecord":
+        return cls(
+            row.symbol,
+            row.interval,
+            to_epoch_ns(row.opened_at),
+            row.open,
+            row.high,
+            row.low,
+            row.close,
+            row.volume,
+            row.source or "upbit",
+        )
+
+    def to_payload(self, zone: tzinfo | None = None) -> CandlePayload:
+        """Return the equivalent payload, validated by ``CandlePayload``."""
+
+        opened_at = from_ns(self.ts_ns)
+        return CandlePayload.model_validate(
+            {
+                "symbol": self.symbol,
+                "interval": self.interval,
+                "open": self.open,
+                "high": self.high,
+                "low": self.low,
+                "close": self.close,
+                "volume": self.volume,
+                "timestamp_utc": opened_at,
+                "timestamp_kst": opened_at.astimezone(zone or get_zone()),
+                "source": self.source,
+            }
+        )
+
+    def to_orm(self, ingest_ts: Any = None) -> "Candle":
+        """Return a new ``Candle`` row; ``ingest_ts`` defaults to now."""
+
+        from autotrade.db.models.market import Candle
+
+        return Candle(
+            symbol=self.symbol,
+            interval=self.interval,
+            opened_at=from_ns(self.ts_ns),
+            open=self.open,
+            high=self.high,
+            low=self.low,
+            close=self.close,
+            volume=self.volume,
+            source=self.source,
+            ingest_ts=ingest_ts or now().utc,
+        )
+
+
+class TickRecord(NamedTuple):
+    """One executed trade keyed by its execution time in epoch nanoseconds."""
+
+    symbol: str
+    ts_ns: int
+    price: float
+    size: float
+
+    @classmethod
+    def from_payload(cls, payload: TickPayload) -> "TickRecord":
+        return cls(
+            payload.symbol,
+            to_epoch_ns(payload.timestamp_utc),
+            payload.price,
+            payload.size,
+        )
+
+    @classmethod
+    def from_orm(cls, row: "Tick") -> "TickRecord":
+        return cls(row.symbol, to_epoch_ns(row.occurred_at), row.price, row.size)
+
+    def to_payload(self, zone: tzinfo | None = None) -> TickPayload:
+        occurred_at = from_ns(self.ts_ns)
+        return TickPayload.model_validate(
+            {
+                "symbol": self.symbol,
+                "price": self.price,
+                "size": self.size,
+                "timestamp_utc": occurred_at,
+                "timestamp_kst": occurred_at.astimezone(zone or get_zone()),
+            }
+        )
+
+    def to_orm(self) -> "Tick":
+        from autotrade.db.models.market import Tick
+
+        return Tick(
+            symbol=self.symbol,
+            occurred_at=from_ns(self.ts_ns),
+            price=self.price,
+            size=self.size,
+        )
+
+
+__all__ = ["CandleRecord", "TickRecord"]
@@ -23,6 +23,17 @@ class CandlePayload(BaseModel):
     source: Literal["upbit"] = "upbit"
 
 
+class TickPayload(BaseModel):
+    """Canonical payload for individual trades received from the exchange."""
+
+    symbol: str
+    price: float = Field(..., ge=0)
+    size: float = Field(..., ge=0)
+    timestamp_utc: datetime
+    timestamp_kst: datetime
+    source: Literal["upbit"] = "upbit"
+
+
 class StrategySignal(BaseModel):
     """Payload emitted by the strategy service."""
 
@@ -92,6 +103,7 @@ class AIParameterApplication(BaseModel):
 
 __all__ = [
     "CandlePayload",
+    "TickPayload",
     "StrategySignal",
     "PositionLifecycleEvent",
     "RiskLimitBreach",
@@ -0,0 +1,351 @@
+"""Clock offset estimation and slewing against a reference time source.
+
+:class:`ClockSynchronizer` periodically takes a burst of samples from a
+:class:`ReferenceSource` (an SNTP server via :class:`SNTPSource`, or
+:class:`LocalReferenceSource` in tests). Each sample yields the classic NTP
+offset ``((t2 - t1) + (t3 - t4)) / 2`` and round-trip delay
+``(t4 - t1) - (t3 - t2)``. Following the NTP clock filter, the sample with the
+smallest delay is trusted most; its offset becomes the estimate and the
+uncertainty is half its delay plus the jitter of the better half of the burst.
+
+The estimate is applied by :class:`DisciplinedClock`, which wraps the system
+clock. The first estimate is stepped in at once, so timestamps read from the
+clock before that first synchronization may jump (even backwards). Every later
+estimate is slewed in at a bounded rate (``max_slew_ppm``), so once
+synchronized the corrected time never jumps or runs backwards.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import random
+import socket
+import struct
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import tzinfo
+from typing import Protocol
+
+from .clock import SystemClock
+
+logger = logging.getLogger(__name__)
+
+_NTP_EPOCH_OFFSET = 2_208_988_800  # seconds between 1900-01-01 and 1970-01-01
+_NTP_PACKET = struct.Struct("!B B b b 11I")
+_NS_PER_SECOND = 1_000_000_000
+
+
+@dataclass(frozen=True, slots=True)
+class ClockSample:
+    """Single request/response exchange with a reference clock (epoch ns)."""
+
+    t1: int  # client transmit (local clock)
+    t2: int  # server receive (reference clock)
+    t3: int  # server transmit (reference clock)
+    t4: int  # client receive (local clock)
+
+    @property
+    def offset_ns(self) -> int:
+        return ((self.t2 - self.t1) + (self.t3 - self.t4)) // 2
+
+    @property
+    def delay_ns(self) -> int:
+        return max((self.t4 - self.t1) - (self.t3 - self.t2), 0)
+
+
+@dataclass(frozen=True, slots=True)
+class ClockEstimate:
+    """Filtered offset estimate derived from a burst of samples."""
+
+    offset_ns: int
+    delay_ns: int
+    uncertainty_ns: int
+    samples: int
+    measured_at_ns: int
+
+
+def estimate_offset(samples: list[ClockSample]) -> ClockEstimate:
+    """Combine ``samples`` into a :class:`ClockEstimate` (minimum-delay filter)."""
+
+    if not samples:
+        raise ValueError("at least one sample is required")
+    ranked = sorted(samples, key=lambda sample: sample.delay_ns)
+    best = ranked[0]
+    better_half = ranked[: max(1, (len(ranked) + 1) // 2)]
+    jitter = math.sqrt(
+        sum((sample.offset_ns - best.offset_ns) ** 2 for sample in better_half)
+        / len(better_half)
+    )
+    return ClockEstimate(
+        offset_ns=best.offset_ns,
+        delay_ns=best.delay_ns,
+        uncertainty_ns=best.delay_ns // 2 + int(jitter),
+        samples=len(samples),
+        measured_at_ns=best.t4,
+    )
+
+
+class ReferenceSource(Protocol):
+    """Reference clock queried by :class:`ClockSynchronizer`."""
+
+    name: str
+
+    async def query(self, local_ns: Callable[[], int]) -> ClockSample:
+        """Perform one exchange timestamped with ``local_ns``."""
+
+
+class SNTPSource:
+    """Simple Network Time Protocol (RFC 4330) client over UDP."""
+
+    def __init__(self, host: str, port: int = 123, *, timeout: float = 1.0) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.name = f"sntp://{host}:{port}"
+
+    @classmethod
+    def from_address(cls, address: str, *, timeout: float = 1.0) -> "SNTPSource":
+        """Build a source from ``host`` or ``host:port``."""
+
+        host, _, port = address.removeprefix("sntp://").partition(":")
+        return cls(host, int(port) if port else 123, timeout=timeout)
+
+    async def query(self, local_ns: Callable[[], int]) -> ClockSample:
+        loop = asyncio.get_running_loop()
+        response: asyncio.Future[bytes] = loop.create_future()
+
+        class _Protocol(asyncio.DatagramProtocol):
+            def datagram_received(self, data: bytes, addr: object) -> None:
+                if not response.done():
+                    response.set_result(data)
+
+            def error_received(self, exc: Exception) -> None:
+                if not response.done():
+                    response.set_exception(exc)
+
+        transport, _ = await loop.create_datagram_endpoint(
+            _Protocol, remote_addr=(self.host, self.port), family=socket.AF_INET
+        )
+        try:
+            t1 = local_ns()
+            transmit = _to_ntp(t1)
+            # LI=0, VN=4, Mode=3 (client); transmit timestamp doubles as nonce.
+            transport.sendto(_NTP_PACKET.pack(0x23, 0, 0, 0, *([0] * 9), *transmit))
+            data = await asyncio.wait_for(response, self.timeout)
+            t4 = local_ns()
+        finally:
+            transport.close()
+        if len(data) < _NTP_PACKET.size:
+            raise ValueError(f"Short SNTP response ({len(data)} bytes) from {self.name}")
+        fields = _NTP_PACKET.unpack_from(data)
+        mode, stratum = fields[0] & 0x7, fields[1]
+        if mode != 4 or stratum == 0 or tuple(fields[9:11]) != transmit:
+            raise ValueError(f"Invalid SNTP response from {self.name}")
+        t2 = _from_ntp(fields[11], fields[12])
+        t3 = _from_ntp(fields[13], fields[14])
+        return ClockSample(t1=t1, t2=t2, t3=t3, t4=t4)
+
+
+def _to_ntp(value_ns: int) -> tuple[int, int]:
+    seconds, nanos = divmod(value_ns, _NS_PER_SECOND)
+    return seconds + _NTP_EPOCH_OFFSET, (nanos << 32) // _NS_PER_SECOND
+
+
+def _from_ntp(seconds: int, fraction: int) -> int:
+    return (seconds - _NTP_EPOCH_OFFSET) * _NS_PER_SECOND + (fraction * _NS_PER_SECOND >> 32)
+
+
+class LocalReferenceSource:
+    """In-process reference with a known offset, delay and jitter (for tests).
+
+    The reference reads the local clock shifted by ``offset_ns``; each
+    exchange takes ``delay_ns`` of simulated network time plus up to
+    ``jitter_ns`` of extra, asymmetric outbound delay.
+    """
+
+    def __init__(
+        self,
+        offset_ns: int = 0,
+        *,
+        delay_ns: int = 200_000,
+        jitter_ns: int = 0,
+        seed: int | None = None,
+    ) -> None:
+        self.offset_ns = offset_ns
+        self.delay_ns = delay_ns
+        self.jitter_ns = jitter_ns
+        self.name = "local"
+        self._random = random.Random(seed)
+
+    async def query(self, local_ns: Callable[[], int]) -> ClockSample:
+        t1 = local_ns()
+        extra = self._random.randint(0, self.jitter_ns) if self.jitter_ns else 0
+        outbound = self.delay_ns // 2 + extra
+        inbound = self.delay_ns - self.delay_ns // 2
+        t2 = t1 + outbound + self.offset_ns
+        t3 = t2
+        await asyncio.sleep(0)
+        return ClockSample(t1=t1, t2=t2, t3=t3, t4=t1 + outbound + inbound)
+
+
+class DisciplinedClock:
+    """Clock applying a slewed offset correction on top of :class:`SystemClock`.
+
+    Parameters
+    ----------
+    base:
+        Uncorrected local clock (defaults to a new :class:`SystemClock`).
+    max_slew_ppm:
+        Maximum rate at which the correction may change, in parts per million
+        of elapsed time; 500 ppm matches ``ntpd``'s slew limit.
+    """
+
+    def __init__(
+        self,
+        base: SystemClock | None = None,
+        *,
+        max_slew_ppm: float = 500.0,
+    ) -> None:
+        self.base = base or SystemClock()
+        self.zone: tzinfo = self.base.zone
+        self.max_slew_ppm = max_slew_ppm
+        self.estimate: ClockEstimate | None = None
+        self._from_ns = 0
+        self._target_ns = 0
+        self._anchor_mono = time.monotonic_ns()
+
+    @property
+    def synchronized(self) -> bool:
+        return self.estimate is not None
+
+    def offset_ns(self, mono_ns: int | None = None) -> int:
+        """Correction currently applied to the base clock."""
+
+        mono = time.monotonic_ns() if mono_ns is None else mono_ns
+        remaining = self._target_ns - self._from_ns
+        if not remaining:
+            return self._target_ns
+        budget = int((mono - self._anchor_mono) * self.max_slew_ppm / 1_000_000)
+        if budget >= abs(remaining):
+            return self._target_ns
+        return self._from_ns + (budget if remaining > 0 else -budget)
+
+    @property
+    def target_offset_ns(self) -> int:
+        return self._target_ns
+
+    def apply(self, estimate: ClockEstimate) -> None:
+        """Slew towards ``estimate``.
+
+        The first estimate is stepped in immediately, whatever the clock has
+        returned so far; later ones are slewed at ``max_slew_ppm``.
+        """
+
+        mono = time.monotonic_ns()
+        if self.estimate is None:
+            self._from_ns = self._target_ns = estimate.offset_ns
+        else:
+            self._from_ns = self.offset_ns(mono)
+            self._target_ns = estimate.offset_ns
+        self._anchor_mono = mono
+        self.estimate = estimate
+
+    def now_ns(self) -> int:
+        mono = time.monotonic_ns()
+        return self.base.now_ns() + self.offset_ns(mono)
+
+    def monotonic_ns(self) -> int:
+        return self.base.monotonic_ns()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+    def status(self) -> dict[str, object]:
+        """Return offset/uncertainty figures suitable for health endpoints."""
+
+        estimate = self.estimate
+        return {
+            "synchronized": estimate is not None,
+            "offset_ms": self.offset_ns() / 1e6,
+            "target_offset_ms": self._target_ns / 1e6,
+            "uncertainty_ms": None if estimate is None else estimate.uncertainty_ns / 1e6,
+            "delay_ms": None if estimate is None else estimate.delay_ns / 1e6,
+        }
+
+
+class ClockSynchronizer:
+    """Periodically estimate the offset of ``clock`` against ``source``."""
+
+    def __init__(
+        self,
+        source: ReferenceSource,
+        clock: DisciplinedClock,
+        *,
+        interval: float = 64.0,
+        samples: int = 8,
+        sample_spacing: float = 0.05,
+    ) -> None:
+        self.source = source
+        self.clock = clock
+        self.interval = interval
+        self.samples = samples
+        self.sample_spacing = sample_spacing
+
+    async def sync_once(self) -> ClockEstimate:
+        """Take one burst of samples and apply the filtered estimate."""
+
+        collected: list[ClockSample] = []
+        for index in range(self.samples):
+            if index and self.sample_spacing:
+                await asyncio.sleep(self.sample_spacing)
+            try:
+                collected.append(await self.source.query(self.clock.base.now_ns))
+            except (OSError, ValueError, asyncio.TimeoutError) as exc:
+                logger.debug("Clock sample from %s failed: %s", self.source.name, exc)
+        estimate = estimate_offset(collected)
+        self.clock.apply(estimate)
+        return estimate
+
+    async def run(self, stop: asyncio.Event | None = None) -> None:
+        """Synchronize every ``interval`` seconds until ``stop`` is set."""
+
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                estimate = await self.sync_once()
+                logger.debug(
+                    "Clock offset %.3f ms ± %.3f ms against %s",
+                    estimate.offset_ns / 1e6,
+                    estimate.uncertainty_ns / 1e6,
+                    self.source.name,
+                )
+            except ValueError:
+                logger.warning("No usable clock samples from %s", self.source.name)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+def build_reference_source(reference: str) -> ReferenceSource:
+    """Build a source from a ``CLOCK_REFERENCE`` setting value."""
+
+    if reference == "local":
+        return LocalReferenceSource()
+    return SNTPSource.from_address(reference)
+
+
+__all__ = [
+    "ClockEstimate",
+    "ClockSample",
+    "ClockSynchronizer",
+    "DisciplinedClock",
+    "LocalReferenceSource",
+    "ReferenceSource",
+    "SNTPSource",
+    "build_reference_source",
+    "estimate_offset",
+]
@@ -1,7 +1,18 @@
-"""Database package exposing SQLAlchemy models and session helpers."""
+"""Database package exposing SQLAlchemy models and session helpers.
 
-from autotrade.db.base import Base, metadata
-from autotrade.db.session import create_async_engine, get_async_session
+Names are resolved lazily so that importing a submodule such as
+``autotrade.db.candles`` does not pay for the async engine machinery.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from autotrade.core.lazy import lazy_exports
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from autotrade.db.base import Base, metadata
+    from autotrade.db.session import create_async_engine, get_async_session
 
 __all__ = [
     "Base",
@@ -9,3 +20,13 @@ __all__ = [
     "create_async_engine",
     "get_async_session",
 ]
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "Base": ".base",
+        "metadata": ".base",
+        "create_async_engine": ".session",
+        "get_async_session": ".session",
+    },
+)
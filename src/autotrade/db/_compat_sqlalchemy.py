@@ -84,6 +84,10 @@ class Text:
     pass
 
 
+class LargeBinary:
+    pass
+
+
 class ForeignKey:
     def __init__(self, target: str) -> None:  # pragma: no cover - trivial shim
         self.target = target
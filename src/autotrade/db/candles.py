@@ -0,0 +1,245 @@
+"""Query helpers for the ``candles`` and ``candle_coverage`` tables."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any, Sequence
+
+try:  # pragma: no cover - optional dependency import
+    from sqlalchemy import func, select
+    from sqlalchemy import update as sql_update
+    from sqlalchemy.ext.asyncio import AsyncSession
+except ModuleNotFoundError:  # pragma: no cover - fallback for tests
+    AsyncSession = Any  # type: ignore
+
+    def select(*args: Any, **kwargs: Any):  # type: ignore
+        raise RuntimeError("SQLAlchemy is required for database queries")
+
+    sql_update = select  # type: ignore
+    func = None  # type: ignore
+
+from autotrade.core.clock import from_ns, now, now_ns, to_epoch_ns
+from autotrade.core.records import CandleRecord
+from autotrade.db.models.market import Candle, CandleCoverage
+from autotrade.market_data.coverage import Coverage
+from autotrade.market_data.intervals import get_interval
+
+_UPDATED_COLUMNS = ("open", "high", "low", "close", "volume", "source", "ingest_ts")
+
+
+async def fetch_recent_candles(
+    session: AsyncSession, symbol: str, interval: str, limit: int
+) -> Sequence[Candle]:
+    """Return the latest ``limit`` candles for ``symbol``/``interval``.
+
+    Rows are returned in ascending ``opened_at`` order so callers can treat the
+    result as a time series.
+    """
+
+    statement = (
+        select(Candle)
+        .where(Candle.symbol == symbol, Candle.interval == interval)
+        .order_by(Candle.opened_at.desc())
+        .limit(limit)
+    )
+    result = await session.scalars(statement)
+    rows = list(result)
+    rows.reverse()
+    return rows
+
+
+async def fetch_open_times(
+    session: AsyncSession, symbol: str, interval: str, start_ns: int, end_ns: int
+) -> list[int]:
+    """Return the ``opened_at`` values (epoch ns) stored in ``[start_ns, end_ns)``."""
+
+    statement = (
+        select(Candle.opened_at)
+        .where(
+            Candle.symbol == symbol,
+            Candle.interval == interval,
+            Candle.opened_at >= from_ns(start_ns),
+            Candle.opened_at < from_ns(end_ns),
+        )
+        .order_by(Candle.opened_at)
+    )
+    result = await session.scalars(statement)
+    return [to_epoch_ns(value) for value in result]
+
+
+async def fetch_candles(
+    session: AsyncSession, symbol: str, interval: str, start_ns: int, end_ns: int
+) -> list[CandleRecord]:
+    """Return the candles opening in ``[start_ns, end_ns)`` in ascending order."""
+
+    statement = (
+        select(Candle)
+        .where(
+            Candle.symbol == symbol,
+            Candle.interval == interval,
+            Candle.opened_at >= from_ns(start_ns),
+            Candle.opened_at < from_ns(end_ns),
+        )
+        .order_by(Candle.opened_at)
+    )
+    result = await session.scalars(statement)
+    return [CandleRecord.from_orm(row) for row in result]
+
+
+def _insert_for(session: AsyncSession) -> Any:
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:  # pragma: no cover - only PostgreSQL/TimescaleDB is deployed
+        raise NotImplementedError(f"Candle upserts are not implemented for {dialect}")
+    return insert
+
+
+async def upsert_candles(
+    session: AsyncSession,
+    records: Iterable[CandleRecord],
+    *,
+    chunk_size: int = 1_000,
+    ingest_ts: datetime | None = None,
+    coverage: bool = True,
+) -> int:
+    """Insert or update candles in multi-row ``INSERT .. ON CONFLICT`` batches.
+
+    Rows are keyed by ``(symbol, interval, opened_at)``; existing rows take the
+    new OHLCV values and a fresh ``updated_at``, which archive exports use to
+    pick up revised rows. With ``coverage`` the buckets of candles that have
+    already closed are merged into ``candle_coverage`` (see
+    :func:`merge_coverage`). Returns the number of records written. The caller
+    owns the transaction (see :func:`~autotrade.db.session.session_scope`).
+    """
+
+    insert = _insert_for(session)
+    ingest_ts = ingest_ts or now().utc
+    written = 0
+    batch: list[dict[str, Any]] = []
+    series: dict[tuple[str, str], list[int]] = {}
+
+    async def flush() -> None:
+        statement = insert(Candle).values(batch)
+        statement = statement.on_conflict_do_update(
+            index_elements=["symbol", "interval", "opened_at"],
+            set_={
+                **{name: statement.excluded[name] for name in _UPDATED_COLUMNS},
+                "updated_at": func.now(),
+            },
+        )
+        await session.execute(statement)
+
+    for record in records:
+        if coverage:
+            series.setdefault((record.symbol, record.interval), []).append(record.ts_ns)
+        batch.append(
+            {
+                "symbol": record.symbol,
+                "interval": record.interval,
+                "opened_at": from_ns(record.ts_ns),
+                "open": record.open,
+                "high": record.high,
+                "low": record.low,
+                "close": record.close,
+                "volume": record.volume,
+                "source": record.source,
+                "ingest_ts": ingest_ts,
+            }
+        )
+        if len(batch) >= chunk_size:
+            await flush()
+            written += len(batch)
+            batch = []
+    if batch:
+        await flush()
+        written += len(batch)
+    if series:
+        current = now_ns()
+        for (symbol, name), open_times in series.items():
+            try:
+                interval = get_interval(name)
+            except ValueError:  # e.g. monthly candles have no fixed grid
+                continue
+            update = Coverage(interval)
+            update.add(ts for ts in open_times if ts + interval.ns <= current)
+            if len(update):
+                await merge_coverage(session, symbol, name, update)
+    return written
+
+
+async def load_coverage(session: AsyncSession, symbol: str, interval: str) -> Coverage | None:
+    """Return the stored coverage of a series, or ``None`` if it has none yet."""
+
+    statement = select(CandleCoverage.runs).where(
+        CandleCoverage.symbol == symbol, CandleCoverage.interval == interval
+    )
+    runs = await session.scalar(statement)
+    return None if runs is None else Coverage.from_bytes(interval, runs)
+
+
+async def merge_coverage(
+    session: AsyncSession, symbol: str, interval: str, update: Coverage
+) -> Coverage:
+    """Merge ``update`` into the stored coverage of a series and return it.
+
+    An empty row is inserted first (``ON CONFLICT DO NOTHING``) so the row
+    always exists when it is read ``FOR UPDATE``: concurrent writers of the
+    same series, including the first ones, serialize on its lock instead of
+    overwriting each other's runs.
+    """
+
+    stamp = now().utc
+    insert = _insert_for(session)
+    await session.execute(
+        insert(CandleCoverage)
+        .values(symbol=symbol, interval=interval, runs=b"", updated_at=stamp)
+        .on_conflict_do_nothing(index_elements=["symbol", "interval"])
+    )
+    statement = (
+        select(CandleCoverage.runs)
+        .where(CandleCoverage.symbol == symbol, CandleCoverage.interval == interval)
+        .with_for_update()
+    )
+    merged = Coverage.from_bytes(interval, await session.scalar(statement))
+    merged.update(update)
+    await session.execute(
+        sql_update(CandleCoverage)
+        .where(CandleCoverage.symbol == symbol, CandleCoverage.interval == interval)
+        .values(runs=merged.to_bytes(), updated_at=stamp)
+    )
+    return merged
+
+
+async def rebuild_coverage(session: AsyncSession, symbol: str, interval: str) -> Coverage:
+    """Scan the ``candles`` table once and merge what it holds into the coverage.
+
+    Used for series stored before coverage was tracked.
+    """
+
+    spec = get_interval(interval)
+    statement = select(Candle.opened_at).where(
+        Candle.symbol == symbol, Candle.interval == interval
+    )
+    current = now_ns()
+    update = Coverage(spec)
+    update.add(
+        ts
+        for ts in (to_epoch_ns(value) for value in await session.scalars(statement))
+        if ts + spec.ns <= current
+    )
+    return await merge_coverage(session, symbol, interval, update)
+
+
+__all__ = [
+    "fetch_candles",
+    "fetch_open_times",
+    "fetch_recent_candles",
+    "load_coverage",
+    "merge_coverage",
+    "rebuild_coverage",
+    "upsert_candles",
+]
@@ -1,7 +1,8 @@
 """Declarative model registry."""
 
 from autotrade.db.models.ai import Experiment
-from autotrade.db.models.market import Candle, Tick
+from autotrade.db.models.market import Candle, CandleCoverage, Tick
+from autotrade.db.models.outbox import OutboxEvent
 from autotrade.db.models.risk import RiskLimitBreach, RiskSnapshot
 from autotrade.db.models.strategy import Signal, SignalSide, Strategy
 from autotrade.db.models.trading import (
@@ -14,9 +15,11 @@ from autotrade.db.models.trading import (
 
 __all__ = [
     "Candle",
+    "CandleCoverage",
     "Experiment",
     "Order",
     "OrderStatus",
+    "OutboxEvent",
     "Position",
     "PositionSide",
     "PositionStatus",
@@ -5,12 +5,13 @@ from __future__ import annotations
 from datetime import datetime
 
 try:  # pragma: no cover - optional dependency import
-    from sqlalchemy import DateTime, Float, String
+    from sqlalchemy import DateTime, Float, LargeBinary, String
     from sqlalchemy.orm import Mapped, mapped_column
 except ModuleNotFoundError:  # pragma: no cover - fallback for tests
     from autotrade.db._compat_sqlalchemy import (  # type: ignore
         DateTime,
         Float,
+        LargeBinary,
         Mapped,
         String,
         mapped_column,
@@ -53,4 +54,17 @@ class Tick(TimestampMixin, Base):
     size: Mapped[float] = mapped_column(Float, nullable=False)
 
 
-__all__ = ["Candle", "Tick"]
+class CandleCoverage(TimestampMixin, Base):
+    """Run-length encoded candle buckets ingested per series.
+
+    ``runs`` holds :meth:`autotrade.market_data.coverage.Coverage.to_bytes`.
+    """
+
+    __tablename__ = "candle_coverage"
+
+    symbol: Mapped[str] = mapped_column(String(20), primary_key=True)
+    interval: Mapped[str] = mapped_column(String(16), primary_key=True)
+    runs: Mapped[bytes] = mapped_column(LargeBinary, nullable=False, default=b"")
+
+
+__all__ = ["Candle", "CandleCoverage", "Tick"]
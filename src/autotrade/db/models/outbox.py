@@ -0,0 +1,36 @@
+"""Transactional outbox for events awaiting publication."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+try:  # pragma: no cover - optional dependency import
+    from sqlalchemy import DateTime, String, Text
+    from sqlalchemy.orm import Mapped, mapped_column
+except ModuleNotFoundError:  # pragma: no cover - fallback for tests
+    from autotrade.db._compat_sqlalchemy import (  # type: ignore
+        DateTime,
+        Mapped,
+        String,
+        Text,
+        mapped_column,
+    )
+
+from autotrade.db.base import Base, TimestampMixin
+
+
+class OutboxEvent(TimestampMixin, Base):
+    """Encoded bus message written in the same transaction as its source rows."""
+
+    __tablename__ = "outbox_events"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    stream: Mapped[str] = mapped_column(String(128), nullable=False)
+    event_name: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    sent_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
+
+
+__all__ = ["OutboxEvent"]
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import time
 from collections.abc import AsyncIterator, Callable
 from contextlib import asynccontextmanager
 from typing import Any
@@ -24,6 +25,18 @@ except ModuleNotFoundError:  # pragma: no cover - fallback for tests
         raise RuntimeError("SQLAlchemy is required for database sessions")
 
 from autotrade.core.config import get_settings
+from autotrade.core.metrics import counter, histogram
+
+_SESSION_SECONDS = histogram(
+    "autotrade_db_session_seconds",
+    "Duration of session_scope transactions, including commit or rollback.",
+    ("outcome",),
+)
+_SESSION_COMMITTED = _SESSION_SECONDS.labels("commit")
+_SESSION_ROLLED_BACK = _SESSION_SECONDS.labels("rollback")
+_SESSION_ERRORS = counter(
+    "autotrade_db_session_errors_total", "Transactions rolled back after an error."
+)
 
 
 def create_async_engine(engine_factory: Callable[[], str] | None = None) -> AsyncEngine:
@@ -53,13 +66,18 @@ def get_async_session(engine: AsyncEngine | None = None) -> async_sessionmaker[A
 async def session_scope(session_factory: async_sessionmaker[AsyncSession]) -> AsyncIterator[AsyncSession]:
     """Provide a transactional scope for async database operations."""
 
+    start = time.perf_counter_ns()
     session = session_factory()
     try:
         yield session
         await session.commit()
     except Exception:  # pragma: no cover - protective rollback
         await session.rollback()
+        _SESSION_ERRORS.inc()
+        _SESSION_ROLLED_BACK.record(time.perf_counter_ns() - start)
         raise
+    else:
+        _SESSION_COMMITTED.record(time.perf_counter_ns() - start)
     finally:
         await session.close()
 
@@ -0,0 +1,60 @@
+"""Shared market data access layers (caches and in-process stores).
+
+Names are resolved lazily: the NumPy store does not load Redis and the Redis
+cache does not load NumPy until used.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from autotrade.core.lazy import lazy_exports
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .builder import CandleBuilder, build_candles, rebuild_from_archive
+    from .cache import CacheStats, CandleCache, build_candle_cache, database_loader
+    from .coverage import Coverage
+    from .intervals import INTERVALS, Interval, get_interval
+    from .orderbook import OrderBook, OrderBooks
+    from .store import CandleRing, CandleWindow, MarketDataStore
+
+__all__ = [
+    "CacheStats",
+    "CandleBuilder",
+    "CandleCache",
+    "CandleRing",
+    "CandleWindow",
+    "Coverage",
+    "INTERVALS",
+    "Interval",
+    "MarketDataStore",
+    "OrderBook",
+    "OrderBooks",
+    "build_candle_cache",
+    "build_candles",
+    "database_loader",
+    "get_interval",
+    "rebuild_from_archive",
+]
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "CandleBuilder": ".builder",
+        "build_candles": ".builder",
+        "rebuild_from_archive": ".builder",
+        "CacheStats": ".cache",
+        "CandleCache": ".cache",
+        "build_candle_cache": ".cache",
+        "database_loader": ".cache",
+        "Coverage": ".coverage",
+        "INTERVALS": ".intervals",
+        "Interval": ".intervals",
+        "get_interval": ".intervals",
+        "OrderBook": ".orderbook",
+        "OrderBooks": ".orderbook",
+        "CandleRing": ".store",
+        "CandleWindow": ".store",
+        "MarketDataStore": ".store",
+    },
+)
@@ -0,0 +1,579 @@
+"""Columnar Parquet/Arrow archive of candles and ticks for backtests.
+
+The archive keeps one directory per series and one sub-directory per UTC date::
+
+    <root>/candles/<symbol>/<interval>/date=2024-01-01/part-<first>-<last>.arrow
+    <root>/ticks/<symbol>/date=2024-01-01/part-<first>-<last>.arrow
+
+Part files are immutable and named after the first and last timestamp (epoch
+nanoseconds) they contain. Each export run appends new parts after the series
+watermark stored in ``_watermark.json``, so exports are incremental. Candle
+rows revised or backfilled behind the watermark are found through their
+``updated_at`` column and merged into the date partitions they belong to,
+which are rewritten as a single part. Arrow IPC
+files are written uncompressed and read through memory maps, which makes column
+access zero-copy; Parquet is available for smaller, compressed archives.
+
+Reads push the symbol predicate down to the directory layout and the time
+predicate down to the date partitions and part file names before any file is
+opened. Run ``python -m autotrade.market_data.archive --help`` for the export
+command line.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from collections.abc import Mapping, Sequence
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+
+try:  # pragma: no cover - exercised when pyarrow is available
+    import pyarrow as pa  # type: ignore
+    import pyarrow.ipc as pa_ipc  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+    _pyarrow_missing: Exception | None = None
+except ModuleNotFoundError:  # pragma: no cover - executed in minimal test envs
+    pa = pa_ipc = pq = None  # type: ignore
+    _pyarrow_missing = ModuleNotFoundError(
+        "The 'pyarrow' package is required for the market data archive."
+    )
+
+try:  # pragma: no cover - optional dependency import
+    from sqlalchemy import func, select
+except ModuleNotFoundError:  # pragma: no cover - fallback for tests
+    def select(*args: Any, **kwargs: Any):  # type: ignore
+        raise RuntimeError("SQLAlchemy is required for archive exports")
+
+    func = None  # type: ignore
+
+from autotrade.core.clock import to_epoch_ns
+from autotrade.db.models.market import Candle, Tick
+
+from .store import FIELDS
+
+ArchiveFormat = Literal["arrow", "parquet"]
+Kind = Literal["candles", "ticks"]
+
+CANDLE_COLUMNS: tuple[str, ...] = ("timestamp", *FIELDS)
+TICK_COLUMNS: tuple[str, ...] = ("timestamp", "price", "size")
+
+_DAY_NS = 86_400 * 1_000_000_000
+_SUFFIX = {"arrow": ".arrow", "parquet": ".parquet"}
+_WATERMARK = "_watermark.json"
+
+
+def _require_pyarrow() -> None:
+    if _pyarrow_missing is not None:  # pragma: no cover - requires pyarrow
+        raise _pyarrow_missing
+
+
+def _as_ns(value: datetime | str | int | None) -> int | None:
+    if value is None or isinstance(value, int):
+        return value
+    return to_epoch_ns(value)
+
+
+def _series_dir(root: Path, kind: Kind, symbol: str, interval: str | None) -> Path:
+    path = root / kind / symbol
+    return path / interval if interval is not None else path
+
+
+def _date_label(day: int) -> str:
+    stamp = datetime.fromtimestamp(day * 86_400, tz=timezone.utc)
+    return f"date={stamp:%Y-%m-%d}"
+
+
+def _label_day(label: str) -> int:
+    stamp = datetime.strptime(label.removeprefix("date="), "%Y-%m-%d")
+    return int(stamp.replace(tzinfo=timezone.utc).timestamp()) // 86_400
+
+
+def _read_marks(series_dir: Path) -> dict[str, int]:
+    path = series_dir / _WATERMARK
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def _store_marks(series_dir: Path, **marks: int) -> None:
+    tmp = series_dir / (_WATERMARK + ".tmp")
+    tmp.write_text(json.dumps({**_read_marks(series_dir), **marks}))
+    os.replace(tmp, series_dir / _WATERMARK)
+
+
+class ArchiveWriter:
+    """Append-only writer producing date-partitioned part files."""
+
+    def __init__(self, root: str | os.PathLike[str], *, format: ArchiveFormat = "arrow") -> None:
+        _require_pyarrow()
+        if format not in _SUFFIX:
+            raise ValueError(f"Unsupported archive format {format!r}")
+        self.root = Path(root)
+        self.format = format
+
+    def watermark(self, kind: Kind, symbol: str, interval: str | None = None) -> int | None:
+        """Return the newest archived timestamp for a series, if any."""
+
+        value = _read_marks(_series_dir(self.root, kind, symbol, interval)).get(
+            "last_timestamp_ns"
+        )
+        return None if value is None else int(value)
+
+    def revision_mark(self, kind: Kind, symbol: str, interval: str | None = None) -> int | None:
+        """Return the newest source ``updated_at`` (epoch ns) already archived."""
+
+        value = _read_marks(_series_dir(self.root, kind, symbol, interval)).get("updated_at_ns")
+        return None if value is None else int(value)
+
+    def store_revision_mark(
+        self, kind: Kind, symbol: str, interval: str | None, updated_at_ns: int
+    ) -> None:
+        """Record that source rows updated up to ``updated_at_ns`` are archived."""
+
+        series_dir = _series_dir(self.root, kind, symbol, interval)
+        series_dir.mkdir(parents=True, exist_ok=True)
+        _store_marks(series_dir, updated_at_ns=updated_at_ns)
+
+    def revise_candles(
+        self, symbol: str, interval: str, columns: Mapping[str, Sequence[Any]]
+    ) -> list[Path]:
+        """Archive candle ``columns``, replacing rows already archived.
+
+        Rows after the watermark are appended as by :meth:`write_candles`.
+        Rows at or before it are merged into their date partition, replacing
+        archived rows with the same timestamp, and the partition is rewritten
+        as one part file.
+        """
+
+        return self._revise("candles", symbol, interval, CANDLE_COLUMNS, columns)
+
+    def write_candles(
+        self, symbol: str, interval: str, columns: Mapping[str, Sequence[Any]]
+    ) -> list[Path]:
+        """Archive candle ``columns`` keyed by :data:`CANDLE_COLUMNS`."""
+
+        return self._write("candles", symbol, interval, CANDLE_COLUMNS, columns)
+
+    def write_ticks(self, symbol: str, columns: Mapping[str, Sequence[Any]]) -> list[Path]:
+        """Archive tick ``columns`` keyed by :data:`TICK_COLUMNS`."""
+
+        return self._write("ticks", symbol, None, TICK_COLUMNS, columns)
+
+    def _write(
+        self,
+        kind: Kind,
+        symbol: str,
+        interval: str | None,
+        names: tuple[str, ...],
+        columns: Mapping[str, Sequence[Any]],
+    ) -> list[Path]:
+        timestamps = np.asarray(columns["timestamp"], dtype=np.int64)
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = timestamps[order]
+        watermark = self.watermark(kind, symbol, interval)
+        first = 0 if watermark is None else int(np.searchsorted(timestamps, watermark, "right"))
+        if first == len(timestamps):
+            return []
+
+        arrays = {"timestamp": timestamps[first:]}
+        for name in names[1:]:
+            arrays[name] = np.asarray(columns[name], dtype=np.float64)[order][first:]
+
+        series_dir = _series_dir(self.root, kind, symbol, interval)
+        days = arrays["timestamp"] // _DAY_NS
+        boundaries = np.flatnonzero(np.diff(days)) + 1
+        starts = np.concatenate(([0], boundaries))
+        stops = np.concatenate((boundaries, [len(days)]))
+        written: list[Path] = []
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            chunk = {name: values[start:stop] for name, values in arrays.items()}
+            ts = chunk["timestamp"]
+            directory = series_dir / _date_label(int(days[start]))
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"part-{ts[0]}-{ts[-1]}{_SUFFIX[self.format]}"
+            self._write_table(path, names, chunk)
+            written.append(path)
+
+        _store_marks(series_dir, last_timestamp_ns=int(arrays["timestamp"][-1]))
+        return written
+
+    def _revise(
+        self,
+        kind: Kind,
+        symbol: str,
+        interval: str | None,
+        names: tuple[str, ...],
+        columns: Mapping[str, Sequence[Any]],
+    ) -> list[Path]:
+        timestamps = np.asarray(columns["timestamp"], dtype=np.int64)
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = timestamps[order]
+        arrays = {"timestamp": timestamps}
+        for name in names[1:]:
+            arrays[name] = np.asarray(columns[name], dtype=np.float64)[order]
+        watermark = self.watermark(kind, symbol, interval)
+        split = 0 if watermark is None else int(np.searchsorted(timestamps, watermark, "right"))
+
+        series_dir = _series_dir(self.root, kind, symbol, interval)
+        written: list[Path] = []
+        days = timestamps[:split] // _DAY_NS
+        for day in np.unique(days).tolist():
+            lo, hi = np.searchsorted(days, [day, day + 1]).tolist()
+            directory = series_dir / _date_label(day)
+            old_parts = sorted(
+                path for path in directory.glob("part-*") if path.suffix in (".arrow", ".parquet")
+            )
+            # Archived rows first so that revised rows win the de-duplication.
+            merged = {name: [] for name in names}
+            for path in old_parts:
+                table = ArchiveReader._open(path, names, None, None)
+                for name in names:
+                    merged[name].append(np.array(_column(table, name)))
+            for name in names:
+                merged[name].append(arrays[name][lo:hi])
+            chunk = {name: np.concatenate(parts) for name, parts in merged.items()}
+            keep = np.argsort(chunk["timestamp"], kind="stable")
+            ts = chunk["timestamp"][keep]
+            last = np.append(ts[1:] != ts[:-1], True)
+            chunk = {name: values[keep][last] for name, values in chunk.items()}
+            ts = chunk["timestamp"]
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"part-{ts[0]}-{ts[-1]}{_SUFFIX[self.format]}"
+            self._write_table(path, names, chunk)
+            for old in old_parts:
+                if old != path:
+                    old.unlink()
+            written.append(path)
+
+        if split < len(timestamps):
+            tail = {name: values[split:] for name, values in arrays.items()}
+            written.extend(self._write(kind, symbol, interval, names, tail))
+        return written
+
+    def _write_table(
+        self, path: Path, names: tuple[str, ...], chunk: Mapping[str, np.ndarray]
+    ) -> None:
+        fields = [pa.array(chunk["timestamp"], type=pa.timestamp("ns", tz="UTC"))]
+        fields.extend(pa.array(chunk[name], type=pa.float64()) for name in names[1:])
+        table = pa.Table.from_arrays(fields, names=list(names))
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        if self.format == "arrow":
+            with pa.OSFile(str(tmp), "wb") as sink:
+                with pa_ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        else:
+            pq.write_table(table, tmp)
+        os.replace(tmp, path)
+
+
+
+class ArchiveReader:
+    """Memory-mapped reader returning NumPy column arrays for a time range."""
+
+    def __init__(self, root: str | os.PathLike[str]) -> None:
+        _require_pyarrow()
+        self.root = Path(root)
+
+    def symbols(self, kind: Kind = "candles") -> list[str]:
+        base = self.root / kind
+        return sorted(entry.name for entry in base.iterdir()) if base.exists() else []
+
+    def read_candles(
+        self,
+        symbol: str,
+        interval: str,
+        start: datetime | str | int | None = None,
+        end: datetime | str | int | None = None,
+        *,
+        columns: Sequence[str] | None = None,
+    ) -> dict[str, np.ndarray]:
+        """Return candle columns with ``start <= timestamp < end``.
+
+        The ``timestamp`` column (int64 epoch nanoseconds) is always included.
+        Arrays are zero-copy views of the mapped file when the range falls in a
+        single part file.
+        """
+
+        return self._read("candles", symbol, interval, start, end, columns or CANDLE_COLUMNS)
+
+    def read_ticks(
+        self,
+        symbol: str,
+        start: datetime | str | int | None = None,
+        end: datetime | str | int | None = None,
+        *,
+        columns: Sequence[str] | None = None,
+    ) -> dict[str, np.ndarray]:
+        """Return tick columns with ``start <= timestamp < end``."""
+
+        return self._read("ticks", symbol, None, start, end, columns or TICK_COLUMNS)
+
+    def parts(
+        self,
+        kind: Kind,
+        symbol: str,
+        interval: str | None = None,
+        start: datetime | str | int | None = None,
+        end: datetime | str | int | None = None,
+    ) -> list[Path]:
+        """Return part files that may hold rows in ``[start, end)``."""
+
+        start_ns, end_ns = _as_ns(start), _as_ns(end)
+        series_dir = _series_dir(self.root, kind, symbol, interval)
+        if not series_dir.exists():
+            return []
+        selected: list[tuple[int, Path]] = []
+        for day_dir in series_dir.glob("date=*"):
+            day = _label_day(day_dir.name)
+            if start_ns is not None and (day + 1) * _DAY_NS <= start_ns:
+                continue
+            if end_ns is not None and day * _DAY_NS >= end_ns:
+                continue
+            for path in day_dir.glob("part-*"):
+                if path.suffix not in (".arrow", ".parquet"):
+                    continue
+                first, last = (int(value) for value in path.stem.split("-")[1:3])
+                if start_ns is not None and last < start_ns:
+                    continue
+                if end_ns is not None and first >= end_ns:
+                    continue
+                selected.append((first, path))
+        return [path for _, path in sorted(selected)]
+
+    def _read(
+        self,
+        kind: Kind,
+        symbol: str,
+        interval: str | None,
+        start: datetime | str | int | None,
+        end: datetime | str | int | None,
+        columns: Sequence[str],
+    ) -> dict[str, np.ndarray]:
+        start_ns, end_ns = _as_ns(start), _as_ns(end)
+        columns = list(dict.fromkeys(["timestamp", *columns]))
+        chunks: dict[str, list[np.ndarray]] = {name: [] for name in columns}
+        for path in self.parts(kind, symbol, interval, start_ns, end_ns):
+            table = self._open(path, columns, start_ns, end_ns)
+            timestamps = _column(table, "timestamp")
+            lo = 0 if start_ns is None else int(np.searchsorted(timestamps, start_ns, "left"))
+            hi = len(timestamps) if end_ns is None else int(
+                np.searchsorted(timestamps, end_ns, "left")
+            )
+            for name in columns:
+                chunks[name].append(_column(table, name)[lo:hi])
+        result: dict[str, np.ndarray] = {}
+        for name, parts in chunks.items():
+            dtype = np.int64 if name == "timestamp" else np.float64
+            if not parts:
+                result[name] = np.empty(0, dtype=dtype)
+            elif len(parts) == 1:
+                result[name] = parts[0]
+            else:
+                result[name] = np.concatenate(parts)
+        return result
+
+    @staticmethod
+    def _open(
+        path: Path,
+        columns: Sequence[str],
+        start_ns: int | None,
+        end_ns: int | None,
+    ) -> "pa.Table":
+        names = list(columns)
+        if path.suffix == ".arrow":
+            source = pa.memory_map(str(path), "r")
+            return pa_ipc.open_file(source).read_all().select(names)
+        filters = []
+        if start_ns is not None:
+            filters.append(("timestamp", ">=", pa.scalar(start_ns, pa.timestamp("ns", tz="UTC"))))
+        if end_ns is not None:
+            filters.append(("timestamp", "<", pa.scalar(end_ns, pa.timestamp("ns", tz="UTC"))))
+        return pq.read_table(path, columns=names, filters=filters or None, memory_map=True)
+
+
+def _column(table: "pa.Table", name: str) -> np.ndarray:
+    column = table.column(name)
+    if column.num_chunks == 1:
+        array = column.chunk(0)
+    else:
+        array = column.combine_chunks()
+    if name == "timestamp":
+        array = array.view(pa.int64())
+    return array.to_numpy(zero_copy_only=array.null_count == 0)
+
+
+async def export_candles(
+    session_factory: Any,
+    writer: ArchiveWriter,
+    *,
+    batch_size: int = 50_000,
+    revision_lag: timedelta = timedelta(minutes=5),
+) -> dict[tuple[str, str], int]:
+    """Export new and revised ``candles`` rows per series, returning rows written.
+
+    Rows opening after the watermark are appended. Rows at or before it whose
+    ``updated_at`` is newer than the series' revision mark (less
+    ``revision_lag``, covering transactions that commit after a later one) are
+    merged into the archive with :meth:`ArchiveWriter.revise_candles`.
+    """
+
+    async with session_factory() as session:
+        series = (await session.execute(select(Candle.symbol, Candle.interval).distinct())).all()
+    exported: dict[tuple[str, str], int] = {}
+    for symbol, interval in series:
+        in_series = (Candle.symbol == symbol, Candle.interval == interval)
+        revised_after = writer.revision_mark("candles", symbol, interval)
+        # Rows appended by this run are current; only older ones can be stale.
+        through = writer.watermark("candles", symbol, interval)
+        async with session_factory() as session:
+            newest = await session.scalar(select(func.max(Candle.updated_at)).where(*in_series))
+        total = 0
+        while True:
+            after = writer.watermark("candles", symbol, interval)
+            statement = select(*_CANDLE_SELECT).where(*in_series).order_by(Candle.opened_at)
+            if after is not None:
+                statement = statement.where(Candle.opened_at > _from_ns(after))
+            rows = await _fetch(session_factory, statement.limit(batch_size))
+            if not rows:
+                break
+            writer.write_candles(symbol, interval, _candle_columns(rows))
+            total += len(rows)
+            if len(rows) < batch_size:
+                break
+
+        if revised_after is not None and through is not None:
+            since = _from_ns(revised_after) - revision_lag
+            cursor = None
+            while True:
+                statement = (
+                    select(*_CANDLE_SELECT)
+                    .where(
+                        *in_series,
+                        Candle.updated_at > since,
+                        Candle.opened_at <= _from_ns(through),
+                    )
+                    .order_by(Candle.opened_at)
+                )
+                if cursor is not None:
+                    statement = statement.where(Candle.opened_at > cursor)
+                rows = await _fetch(session_factory, statement.limit(batch_size))
+                if not rows:
+                    break
+                writer.revise_candles(symbol, interval, _candle_columns(rows))
+                total += len(rows)
+                cursor = rows[-1][0]
+                if len(rows) < batch_size:
+                    break
+        if newest is not None:
+            writer.store_revision_mark("candles", symbol, interval, to_epoch_ns(newest))
+        exported[(symbol, interval)] = total
+    return exported
+
+
+_CANDLE_SELECT = (
+    Candle.opened_at,
+    Candle.open,
+    Candle.high,
+    Candle.low,
+    Candle.close,
+    Candle.volume,
+)
+
+
+async def _fetch(session_factory: Any, statement: Any) -> list[Any]:
+    async with session_factory() as session:
+        return (await session.execute(statement)).all()
+
+
+def _candle_columns(rows: Sequence[Any]) -> dict[str, Any]:
+    columns = dict(zip(CANDLE_COLUMNS, zip(*rows)))
+    columns["timestamp"] = [to_epoch_ns(value) for value in columns["timestamp"]]
+    return columns
+
+
+async def export_ticks(
+    session_factory: Any,
+    writer: ArchiveWriter,
+    *,
+    batch_size: int = 200_000,
+) -> dict[str, int]:
+    """Export new ``ticks`` rows per symbol, returning rows written."""
+
+    async with session_factory() as session:
+        symbols = (await session.scalars(select(Tick.symbol).distinct())).all()
+    exported: dict[str, int] = {}
+    for symbol in symbols:
+        total = 0
+        while True:
+            after = writer.watermark("ticks", symbol)
+            statement = (
+                select(Tick.occurred_at, Tick.price, Tick.size)
+                .where(Tick.symbol == symbol)
+                .order_by(Tick.occurred_at)
+                .limit(batch_size)
+            )
+            if after is not None:
+                statement = statement.where(Tick.occurred_at > _from_ns(after))
+            async with session_factory() as session:
+                rows = (await session.execute(statement)).all()
+            if not rows:
+                break
+            columns = dict(zip(TICK_COLUMNS, zip(*rows)))
+            columns["timestamp"] = [to_epoch_ns(value) for value in columns["timestamp"]]
+            writer.write_ticks(symbol, columns)
+            total += len(rows)
+            if len(rows) < batch_size:
+                break
+        exported[symbol] = total
+    return exported
+
+
+def _from_ns(value: int) -> datetime:
+    seconds, nanos = divmod(value, 1_000_000_000)
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(microsecond=nanos // 1_000)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Command line entry point for incremental archive exports."""
+
+    parser = argparse.ArgumentParser(prog="python -m autotrade.market_data.archive")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    export = subcommands.add_parser("export", help="export new rows from the database")
+    export.add_argument("--root", required=True, help="archive root directory")
+    export.add_argument("--format", choices=sorted(_SUFFIX), default="arrow")
+    export.add_argument("--kind", choices=("candles", "ticks", "all"), default="all")
+    args = parser.parse_args(argv)
+
+    from autotrade.core.eventloop import run as run_loop
+    from autotrade.db.session import get_async_session
+
+    async def run() -> None:
+        session_factory = get_async_session()
+        writer = ArchiveWriter(args.root, format=args.format)
+        if args.kind in ("candles", "all"):
+            for (symbol, interval), rows in (await export_candles(session_factory, writer)).items():
+                print(f"candles {symbol} {interval}: {rows} rows")
+        if args.kind in ("ticks", "all"):
+            for symbol, rows in (await export_ticks(session_factory, writer)).items():
+                print(f"ticks {symbol}: {rows} rows")
+
+    run_loop(run())
+    return 0
+
+
+__all__ = [
+    "CANDLE_COLUMNS",
+    "TICK_COLUMNS",
+    "ArchiveReader",
+    "ArchiveWriter",
+    "export_candles",
+    "export_ticks",
+    "main",
+]
+
+
+if __name__ == "__main__":  # pragma: no cover - command line entry point
+    raise SystemExit(main())
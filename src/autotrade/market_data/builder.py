@@ -0,0 +1,374 @@
+"""Incremental multi-interval OHLCV candles built from trades.
+
+:class:`CandleBuilder` keeps one open bucket per ``(symbol, interval)`` (two
+while a late trade for the previous bucket is still expected) and updates
+every configured interval with a handful of comparisons per trade, so
+deriving 1m through 1d candles never re-reads ticks.
+
+Trades may arrive late or out of order. A bucket stays open until the newest
+trade seen for its symbol (or the clock passed to :meth:`CandleBuilder.advance`)
+is ``grace`` past the bucket's end; trades for a bucket that has already been
+closed are counted as late and dropped. Open and close prices follow trade
+timestamps rather than arrival order, so a trade delivered out of order
+inside the grace window yields the same candle as an ordered feed.
+
+:func:`build_candles` is the vectorized batch equivalent used to rebuild an
+interval from archived ticks (see :func:`rebuild_from_archive`); for the same
+trades both paths produce identical candles.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping, Sequence
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from autotrade.core.metrics import counter
+from autotrade.core.records import CandleRecord, TickRecord
+
+from .intervals import Interval, get_interval
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .archive import ArchiveReader, ArchiveWriter
+
+DEFAULT_INTERVALS: tuple[str, ...] = ("1m", "3m", "5m", "15m", "60m", "240m", "1d")
+
+_BUILT = counter(
+    "autotrade_candles_built_total", "Candles closed by the trade candle builder.", ("interval",)
+)
+_LATE = counter(
+    "autotrade_candle_late_trades_total",
+    "Trades dropped because their candle had already closed.",
+    ("interval",),
+)
+
+# Bucket layout: [open, high, low, close, volume, first_ts, last_ts]
+_OPEN, _HIGH, _LOW, _CLOSE, _VOLUME, _FIRST, _LAST = range(7)
+_NEVER = 2**63
+
+
+class _Series:
+    __slots__ = ("buckets", "closed_until", "deadline")
+
+    def __init__(self) -> None:
+        self.buckets: dict[int, list[Any]] = {}
+        self.closed_until = -_NEVER
+        self.deadline = _NEVER
+
+
+def parse_partial(value: bool | str) -> bool | tuple[str, ...]:
+    """Parse ``CANDLE_PARTIAL_UPDATES``: ``true``/``false`` or interval names.
+
+    Interval names are normalized, so ``"4h"`` yields ``("240m",)``.
+    """
+
+    if isinstance(value, bool):
+        return value
+    text = value.strip().lower()
+    if text in {"", "0", "false", "no", "off"}:
+        return False
+    if text in {"1", "true", "yes", "on"}:
+        return True
+    return tuple(get_interval(name.strip()).name for name in text.split(",") if name.strip())
+
+
+def publishes_partial(partial: bool | Iterable[str], interval: str) -> bool:
+    """Whether in-progress ``interval`` candles are tracked under ``partial``."""
+
+    if isinstance(partial, bool):
+        return partial
+    return get_interval(interval).name in {get_interval(name).name for name in partial}
+
+
+class CandleBuilder:
+    """Aggregate trades into candles for several intervals at once.
+
+    Parameters
+    ----------
+    intervals:
+        Interval names (see :mod:`autotrade.market_data.intervals`).
+    grace:
+        Seconds a bucket stays open after its end for late trades.
+    partial:
+        Track updated open buckets so :meth:`in_progress` can report them:
+        ``True`` for every interval or the names of the intervals to track.
+    source:
+        ``source`` of the emitted :class:`~autotrade.core.records.CandleRecord`.
+    """
+
+    def __init__(
+        self,
+        intervals: Iterable[str] = DEFAULT_INTERVALS,
+        *,
+        grace: float = 2.0,
+        partial: bool | Iterable[str] = False,
+        source: str = "upbit",
+    ) -> None:
+        self.intervals: tuple[Interval, ...] = tuple(get_interval(name) for name in intervals)
+        if not self.intervals:
+            raise ValueError("at least one interval is required")
+        if grace < 0:
+            raise ValueError("grace must not be negative")
+        self.grace_ns = int(grace * 1_000_000_000)
+        if not isinstance(partial, bool):
+            partial = tuple(partial)
+        tracked = [publishes_partial(partial, interval.name) for interval in self.intervals]
+        # (index, length, offset, length + grace, tracked) per interval for the hot loop.
+        self._spans = tuple(
+            (index, interval.ns, interval.offset, interval.ns + self.grace_ns, tracked[index])
+            for index, interval in enumerate(self.intervals)
+        )
+        self.partial = any(tracked)
+        self.source = source
+        self.late = 0
+        self._series: dict[str, list[_Series]] = {}
+        self._watermark: dict[str, int] = {}
+        self._closed: list[CandleRecord] = []
+        self._dirty: dict[tuple[str, int, int], None] = {}
+
+    def add(self, tick: TickRecord) -> None:
+        """Apply one trade to every interval."""
+
+        symbol, ts, price, size = tick
+        series = self._series.get(symbol)
+        if series is None:
+            series = self._series[symbol] = [_Series() for _ in self.intervals]
+        mark = self._watermark.get(symbol)
+        if mark is None or ts > mark:
+            self._watermark[symbol] = mark = ts
+        dirty = self._dirty if self.partial else None
+        for index, ns, offset, span, track in self._spans:
+            state = series[index]
+            opened = ts - (ts - offset) % ns
+            deadline = opened + span
+            if deadline <= mark or opened < state.closed_until:
+                self.late += 1
+                _LATE.labels(self.intervals[index].name).inc()
+                continue
+            bucket = state.buckets.get(opened)
+            if bucket is None:
+                state.buckets[opened] = [price, price, price, price, size, ts, ts]
+                if deadline < state.deadline:
+                    state.deadline = deadline
+            else:
+                if price > bucket[_HIGH]:
+                    bucket[_HIGH] = price
+                elif price < bucket[_LOW]:
+                    bucket[_LOW] = price
+                if ts < bucket[_FIRST]:
+                    bucket[_OPEN] = price
+                    bucket[_FIRST] = ts
+                if ts >= bucket[_LAST]:
+                    bucket[_CLOSE] = price
+                    bucket[_LAST] = ts
+                bucket[_VOLUME] += size
+            if dirty is not None and track:
+                dirty[symbol, index, opened] = None
+            if state.deadline <= mark:
+                self._close(symbol, self.intervals[index], state, mark)
+
+    def update(self, ticks: Iterable[TickRecord]) -> list[CandleRecord]:
+        """Apply ``ticks`` and return the candles they closed."""
+
+        add = self.add
+        for tick in ticks:
+            add(tick)
+        return self.drain()
+
+    @property
+    def symbols(self) -> list[str]:
+        """Markets that have received at least one trade."""
+
+        return list(self._series)
+
+    def advance(self, now_ns: int, symbols: Iterable[str] | None = None) -> list[CandleRecord]:
+        """Close buckets whose grace window ended before ``now_ns``.
+
+        Quiet markets receive no trade that would close their last bucket;
+        call this periodically with the current time. ``symbols`` limits the
+        sweep to those markets.
+        """
+
+        every = self._series
+        for symbol in every if symbols is None else symbols:
+            series = every.get(symbol)
+            if series is None:
+                continue
+            for interval, state in zip(self.intervals, series):
+                if state.deadline <= now_ns:
+                    self._close(symbol, interval, state, now_ns)
+        return self.drain()
+
+    def discard(self, symbol: str) -> tuple[int, int] | None:
+        """Drop the open buckets of ``symbol`` without emitting them.
+
+        Returns the ``(start_ns, end_ns)`` span the dropped buckets covered
+        (``None`` if there were none) so it can be backfilled. Trades for the
+        span are counted as late afterwards.
+        """
+
+        span: tuple[int, int] | None = None
+        for interval, state in zip(self.intervals, self._series.get(symbol, ())):
+            if not state.buckets:
+                continue
+            start, end = min(state.buckets), max(state.buckets) + interval.ns
+            if span is not None:
+                start, end = min(start, span[0]), max(end, span[1])
+            span = start, end
+            state.buckets.clear()
+            state.closed_until = max(state.closed_until, end)
+            state.deadline = _NEVER
+        return span
+
+    def flush(self) -> list[CandleRecord]:
+        """Close every open bucket (for shutdown or the end of a replay)."""
+
+        return self.advance(_NEVER)
+
+    def drain(self) -> list[CandleRecord]:
+        """Return and forget the candles closed since the last call."""
+
+        closed, self._closed = self._closed, []
+        return closed
+
+    def in_progress(self) -> list[CandleRecord]:
+        """Return open candles updated since the last call (``partial`` only)."""
+
+        dirty, self._dirty = self._dirty, {}
+        records = []
+        for symbol, index, opened in dirty:
+            bucket = self._series[symbol][index].buckets.get(opened)
+            if bucket is not None:
+                records.append(self._record(symbol, self.intervals[index], opened, bucket))
+        return records
+
+    def _close(self, symbol: str, interval: Interval, state: _Series, mark: int) -> None:
+        limit = mark - interval.ns - self.grace_ns
+        buckets = state.buckets
+        for opened in sorted(buckets):
+            if opened > limit:
+                state.deadline = opened + interval.ns + self.grace_ns
+                break
+            self._closed.append(self._record(symbol, interval, opened, buckets.pop(opened)))
+            state.closed_until = opened + interval.ns
+            _BUILT.labels(interval.name).inc()
+        else:
+            state.deadline = _NEVER
+
+    def _record(
+        self, symbol: str, interval: Interval, opened: int, bucket: list[Any]
+    ) -> CandleRecord:
+        return CandleRecord(
+            symbol,
+            interval.name,
+            opened,
+            bucket[_OPEN],
+            bucket[_HIGH],
+            bucket[_LOW],
+            bucket[_CLOSE],
+            bucket[_VOLUME],
+            self.source,
+        )
+
+
+def build_candles(
+    timestamps: Sequence[int] | np.ndarray,
+    prices: Sequence[float] | np.ndarray,
+    sizes: Sequence[float] | np.ndarray,
+    interval: str | Interval,
+) -> dict[str, np.ndarray]:
+    """Aggregate trade columns into candle columns for ``interval``.
+
+    Returns arrays keyed like :data:`~autotrade.market_data.archive.CANDLE_COLUMNS`
+    (``timestamp`` holds each candle's opening time). Unsorted input is
+    stably sorted first.
+    """
+
+    if isinstance(interval, str):
+        interval = get_interval(interval)
+    ts = np.asarray(timestamps, dtype=np.int64)
+    price = np.asarray(prices, dtype=np.float64)
+    size = np.asarray(sizes, dtype=np.float64)
+    if ts.size == 0:
+        empty = np.empty(0, dtype=np.float64)
+        return {
+            "timestamp": np.empty(0, dtype=np.int64),
+            **{name: empty.copy() for name in ("open", "high", "low", "close", "volume")},
+        }
+    if np.any(ts[1:] < ts[:-1]):
+        order = np.argsort(ts, kind="stable")
+        ts, price, size = ts[order], price[order], size[order]
+    opened = ts - (ts - interval.offset) % interval.ns
+    starts = np.concatenate(([0], np.flatnonzero(opened[1:] != opened[:-1]) + 1))
+    stops = np.append(starts[1:], ts.size)
+    return {
+        "timestamp": opened[starts],
+        "open": price[starts],
+        "high": np.maximum.reduceat(price, starts),
+        "low": np.minimum.reduceat(price, starts),
+        "close": price[stops - 1],
+        "volume": np.add.reduceat(size, starts),
+    }
+
+
+def candle_records(
+    symbol: str,
+    interval: str,
+    columns: Mapping[str, np.ndarray],
+    *,
+    source: str = "upbit",
+) -> list[CandleRecord]:
+    """Convert :func:`build_candles` output into records (e.g. for upserts)."""
+
+    return [
+        CandleRecord(symbol, interval, *row, source)
+        for row in zip(
+            columns["timestamp"].tolist(),
+            columns["open"].tolist(),
+            columns["high"].tolist(),
+            columns["low"].tolist(),
+            columns["close"].tolist(),
+            columns["volume"].tolist(),
+        )
+    ]
+
+
+def rebuild_from_archive(
+    reader: "ArchiveReader",
+    symbol: str,
+    interval: str,
+    start: int | None = None,
+    end: int | None = None,
+    *,
+    writer: "ArchiveWriter | None" = None,
+) -> dict[str, np.ndarray]:
+    """Rebuild ``interval`` candles for ``symbol`` from archived ticks.
+
+    ``start``/``end`` (epoch nanoseconds) are widened to whole candles so the
+    first and last candle are complete. With ``writer`` the candles are also
+    archived; the writer only appends candles newer than the series watermark.
+    """
+
+    spec = get_interval(interval)
+    ticks = reader.read_ticks(
+        symbol,
+        None if start is None else spec.floor(start),
+        None if end is None else spec.ceil(end),
+        columns=("price", "size"),
+    )
+    columns = build_candles(ticks["timestamp"], ticks["price"], ticks["size"], spec)
+    if writer is not None:
+        writer.write_candles(symbol, spec.name, columns)
+    return columns
+
+
+__all__ = [
+    "CandleBuilder",
+    "DEFAULT_INTERVALS",
+    "build_candles",
+    "candle_records",
+    "parse_partial",
+    "publishes_partial",
+    "rebuild_from_archive",
+]
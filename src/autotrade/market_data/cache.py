@@ -0,0 +1,375 @@
+"""Redis read-through cache for recent candles and indicators.
+
+Each ``(symbol, interval)`` series lives in a Redis sorted set scored by the
+candle open time (epoch microseconds). Members are fixed-width packed records so
+a read of the last ``N`` candles is a single ``ZRANGE`` without JSON decoding.
+The ingest engine writes every published candle through the cache and the
+backfill sink writes each committed page. Strategy warm-up and
+``/chart/history`` read through it and only query the ``candles`` table on a
+miss, on ranges longer than the cache or when Redis is unavailable.
+
+Indicator series computed from the cached candles
+(:meth:`CandleCache.get_indicator`) are stored next to them as packed float64
+values tagged with the last candle they were computed from, so processes
+reading the same ``(symbol, interval, indicator)`` share one computation per
+candle update. Live strategies keep their streaming indicator state in
+process, in :class:`~autotrade.services.strategy.indicators.IndicatorCache`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import struct
+from array import array
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, TypeVar
+from zoneinfo import ZoneInfo
+
+from autotrade.core.config import Settings, get_settings
+from autotrade.core.schemas import CandlePayload
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from redis.asyncio import Redis
+
+T = TypeVar("T")
+
+CandleLoader = Callable[[str, str, int], Awaitable[Sequence[CandlePayload]]]
+"""Async callable returning the latest ``limit`` candles in ascending order."""
+
+IndicatorFunction = Callable[[Sequence[CandlePayload]], Sequence[float]]
+"""Callable computing one value per candle of an ascending candle series."""
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_RECORD = struct.Struct("<q5d")
+# Candle count, then the open time and OHLCV of the last candle used.
+_INDICATOR_VERSION = struct.Struct("<qq5d")
+
+
+def _to_micros(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def pack_candle(payload: CandlePayload) -> bytes:
+    """Pack ``payload`` into the fixed-width cache record."""
+
+    return _RECORD.pack(
+        _to_micros(payload.timestamp_utc),
+        payload.open,
+        payload.high,
+        payload.low,
+        payload.close,
+        payload.volume,
+    )
+
+
+def unpack_candle(
+    record: bytes, symbol: str, interval: str, zone: ZoneInfo
+) -> CandlePayload:
+    """Rebuild a :class:`CandlePayload` from a packed cache record.
+
+    Compiled ``model_validate`` measures faster than the pure Python
+    ``model_construct`` for this flat payload, so records are re-validated.
+    """
+
+    micros, open_, high, low, close, volume = _RECORD.unpack(record)
+    opened_at = _EPOCH + timedelta(microseconds=micros)
+    return CandlePayload.model_validate(
+        {
+            "symbol": symbol,
+            "interval": interval,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+            "timestamp_utc": opened_at,
+            "timestamp_kst": opened_at.astimezone(zone),
+        }
+    )
+
+
+@dataclass(slots=True)
+class CacheStats:
+    """Hit/miss counters exposed for observability."""
+
+    hits: int = 0
+    misses: int = 0
+    loads: int = 0
+    coalesced: int = 0
+    indicator_hits: int = 0
+    indicator_misses: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls sharing a key into one in-flight task."""
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Task[Any]] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Await ``func`` once per ``key`` regardless of concurrent callers."""
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so a cancelled waiter does not cancel the shared load.
+        return await asyncio.shield(task)
+
+
+class CandleCache:
+    """Read-through cache of the most recent candles per ``(symbol, interval)``.
+
+    Parameters
+    ----------
+    client:
+        ``redis.asyncio.Redis`` compatible client.
+    loader:
+        Fallback used on a miss, typically :func:`database_loader`.
+    capacity:
+        Maximum number of candles retained per series. Defaults to
+        ``Settings.candle_cache_capacity``.
+    namespace:
+        Key prefix, defaulting to ``Settings.message_namespace``.
+    """
+
+    def __init__(
+        self,
+        client: Redis,
+        loader: CandleLoader,
+        *,
+        capacity: int | None = None,
+        namespace: str | None = None,
+    ) -> None:
+        config = get_settings()
+        self._client = client
+        self._loader = loader
+        self._capacity = capacity or config.candle_cache_capacity
+        prefix = config.message_namespace if namespace is None else namespace
+        self._prefix = f"{prefix.strip()}.cache.candles" if prefix.strip() else "cache.candles"
+        self._zone = ZoneInfo(config.timezone)
+        self._flight = SingleFlight()
+        self.stats = CacheStats()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def key(self, symbol: str, interval: str) -> str:
+        """Return the Redis key holding the ``symbol``/``interval`` series."""
+
+        return f"{self._prefix}.{symbol}.{interval}"
+
+    async def get_recent(
+        self, symbol: str, interval: str, limit: int
+    ) -> list[CandlePayload]:
+        """Return up to ``limit`` most recent candles in ascending order.
+
+        Requests larger than the cache capacity bypass Redis and go straight to
+        the loader.
+        """
+
+        if limit <= 0:
+            return []
+        if limit > self._capacity:
+            self.stats.misses += 1
+            return list(await self._loader(symbol, interval, limit))
+
+        cached = await self._read(symbol, interval, limit)
+        if cached is not None:
+            self.stats.hits += 1
+            return cached
+
+        self.stats.misses += 1
+        flight_key = (symbol, interval)
+        if flight_key in self._flight:
+            self.stats.coalesced += 1
+        series = await self._flight.run(
+            flight_key, lambda: self._fill(symbol, interval)
+        )
+        return series[-limit:]
+
+    async def get_indicator(
+        self,
+        symbol: str,
+        interval: str,
+        name: str,
+        compute: IndicatorFunction,
+        *,
+        limit: int | None = None,
+    ) -> list[float]:
+        """Return ``compute`` applied to the latest ``limit`` candles.
+
+        ``name`` identifies the indicator and its parameters (e.g.
+        ``"atr:20"``). The result is cached in Redis until the series gains or
+        changes a candle; concurrent misses share one computation.
+        """
+
+        candles = await self.get_recent(symbol, interval, limit or self._capacity)
+        if not candles:
+            return []
+        last = candles[-1]
+        version = _INDICATOR_VERSION.pack(
+            len(candles),
+            _to_micros(last.timestamp_utc),
+            last.open,
+            last.high,
+            last.low,
+            last.close,
+            last.volume,
+        )
+        key = f"{self.key(symbol, interval)}.indicators.{name}"
+        blob = await self._client.get(key)
+        if blob is not None and blob[: _INDICATOR_VERSION.size] == version:
+            self.stats.indicator_hits += 1
+            values = array("d")
+            values.frombytes(blob[_INDICATOR_VERSION.size :])
+            return values.tolist()
+
+        self.stats.indicator_misses += 1
+
+        async def fill() -> list[float]:
+            values = array("d", compute(candles))
+            await self._client.set(key, version + values.tobytes())
+            return values.tolist()
+
+        return await self._flight.run((key, version), fill)
+
+    async def write(self, payload: CandlePayload) -> None:
+        """Insert or replace a single candle in its cached series."""
+
+        await self.write_many([payload])
+
+    async def write_many(self, payloads: Sequence[CandlePayload]) -> None:
+        """Insert or replace candles, trimming each series to capacity."""
+
+        if not payloads:
+            return
+        pipe = self._client.pipeline(transaction=True)
+        touched: set[str] = set()
+        for payload in payloads:
+            key = self.key(payload.symbol, payload.interval)
+            score = _to_micros(payload.timestamp_utc)
+            pipe.zremrangebyscore(key, score, score)
+            pipe.zadd(key, {pack_candle(payload): score})
+            touched.add(key)
+        for key in touched:
+            pipe.zremrangebyrank(key, 0, -(self._capacity + 1))
+        await pipe.execute()
+
+    async def invalidate(self, symbol: str, interval: str) -> None:
+        """Drop the cached series so the next read reloads it."""
+
+        key = self.key(symbol, interval)
+        await self._client.delete(key, f"{key}.warm")
+
+    async def _read(
+        self, symbol: str, interval: str, limit: int
+    ) -> list[CandlePayload] | None:
+        key = self.key(symbol, interval)
+        pipe = self._client.pipeline(transaction=False)
+        pipe.zrange(key, -limit, -1)
+        pipe.exists(f"{key}.warm")
+        records, warm = await pipe.execute()
+        # A series fed only by ingest writes may be missing older history; it
+        # is authoritative only once it has been filled from the database.
+        if not warm:
+            return None
+        return [unpack_candle(record, symbol, interval, self._zone) for record in records]
+
+    async def _fill(self, symbol: str, interval: str) -> list[CandlePayload]:
+        self.stats.loads += 1
+        series = list(await self._loader(symbol, interval, self._capacity))
+        key = self.key(symbol, interval)
+        pipe = self._client.pipeline(transaction=True)
+        if series:
+            # Only replace the loaded range so candles written by ingest while
+            # the query was running are kept.
+            scores = [_to_micros(item.timestamp_utc) for item in series]
+            pipe.zremrangebyscore(key, scores[0], scores[-1])
+            pipe.zadd(
+                key, {pack_candle(item): score for item, score in zip(series, scores)}
+            )
+            pipe.zremrangebyrank(key, 0, -(self._capacity + 1))
+        pipe.set(f"{key}.warm", 1)
+        pipe.zrange(key, -self._capacity, -1)
+        *_, records = await pipe.execute()
+        return [unpack_candle(record, symbol, interval, self._zone) for record in records]
+
+
+def database_loader(session_factory: Any) -> CandleLoader:
+    """Return a :data:`CandleLoader` reading from the ``candles`` table."""
+
+    from autotrade.db.candles import fetch_recent_candles
+
+    zone = ZoneInfo(get_settings().timezone)
+
+    async def load(symbol: str, interval: str, limit: int) -> list[CandlePayload]:
+        async with session_factory() as session:
+            rows = await fetch_recent_candles(session, symbol, interval, limit)
+        return [
+            CandlePayload.model_validate(
+                {
+                    "symbol": row.symbol,
+                    "interval": row.interval,
+                    "open": row.open,
+                    "high": row.high,
+                    "low": row.low,
+                    "close": row.close,
+                    "volume": row.volume,
+                    "timestamp_utc": row.opened_at,
+                    "timestamp_kst": row.opened_at.astimezone(zone),
+                }
+            )
+            for row in rows
+        ]
+
+    return load
+
+
+def build_candle_cache(
+    session_factory: Any, config: Settings | None = None
+) -> CandleCache:
+    """Instantiate a :class:`CandleCache` backed by Redis and the database."""
+
+    try:
+        from redis.asyncio import Redis
+    except ModuleNotFoundError:  # pragma: no cover - requires redis package
+        raise ModuleNotFoundError(
+            "The 'redis' package is required for CandleCache operations."
+        ) from None
+    cfg = config or get_settings()
+    kwargs = dict(cfg.redis_connection_kwargs)
+    client = Redis.from_url(str(kwargs.pop("url")), **kwargs)
+    return CandleCache(
+        client,
+        database_loader(session_factory),
+        capacity=cfg.candle_cache_capacity,
+        namespace=cfg.message_namespace,
+    )
+
+
+__all__ = [
+    "CacheStats",
+    "CandleCache",
+    "CandleLoader",
+    "IndicatorFunction",
+    "SingleFlight",
+    "build_candle_cache",
+    "database_loader",
+    "pack_candle",
+    "unpack_candle",
+]
@@ -0,0 +1,204 @@
+"""Run-length encoded coverage of ingested candle buckets.
+
+A :class:`Coverage` records which candle slots of one ``(symbol, interval)``
+series have been ingested as a sorted list of disjoint, non-adjacent
+half-open runs ``[start, end)`` of slot numbers (slot ``k`` opens at
+``k * interval.ns + interval.offset``). A fully ingested year of 1m candles
+is a single run, and every query is a ``bisect`` plus a walk over the runs
+inside the queried range:
+
+* :meth:`Coverage.is_complete` is ``O(log runs)``;
+* :meth:`Coverage.gaps` is ``O(log runs + gaps)`` and returns ranges in the
+  same ``[start_ns, end_ns)`` form as
+  :func:`~autotrade.services.market_ingest.backfill.find_gaps`.
+
+Coverage is persisted per series in the ``candle_coverage`` table as the
+packed run array (see :meth:`Coverage.to_bytes`) and merged on every
+:func:`~autotrade.db.candles.upsert_candles`.
+"""
+
+from __future__ import annotations
+
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+
+from .intervals import Interval, get_interval
+
+
+class Coverage:
+    """Covered candle slots of one series.
+
+    Parameters
+    ----------
+    interval:
+        Interval (or its name) defining the slot grid.
+    runs:
+        Optional initial ``(start_slot, end_slot)`` runs in any order.
+    """
+
+    __slots__ = ("interval", "_starts", "_ends")
+
+    def __init__(
+        self, interval: Interval | str, runs: Iterable[tuple[int, int]] = ()
+    ) -> None:
+        self.interval = get_interval(interval) if isinstance(interval, str) else interval
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+        for start, end in sorted(runs):
+            self._add_slots(start, end)
+
+    def __len__(self) -> int:
+        """Return the number of runs."""
+
+        return len(self._starts)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Coverage):
+            return NotImplemented
+        return (self.interval, self._starts, self._ends) == (
+            other.interval,
+            other._starts,
+            other._ends,
+        )
+
+    def __repr__(self) -> str:
+        return f"Coverage({self.interval.name!r}, runs={len(self)}, slots={self.slots})"
+
+    @property
+    def slots(self) -> int:
+        """Total number of covered slots."""
+
+        return sum(self._ends) - sum(self._starts)
+
+    def runs(self) -> list[tuple[int, int]]:
+        """Return the runs as ``(start_slot, end_slot)`` pairs."""
+
+        return list(zip(self._starts, self._ends))
+
+    def spans(self) -> list[tuple[int, int]]:
+        """Return the runs as ``[start_ns, end_ns)`` ranges."""
+
+        to_ns = self._to_ns
+        return [(to_ns(start), to_ns(end)) for start, end in zip(self._starts, self._ends)]
+
+    def add(self, open_times: Iterable[int]) -> None:
+        """Mark the buckets containing ``open_times`` (epoch ns) as covered."""
+
+        interval = self.interval
+        slots = sorted({(ts - interval.offset) // interval.ns for ts in open_times})
+        if not slots:
+            return
+        start = previous = slots[0]
+        for slot in slots[1:]:
+            if slot != previous + 1:
+                self._add_slots(start, previous + 1)
+                start = slot
+            previous = slot
+        self._add_slots(start, previous + 1)
+
+    def add_range(self, start_ns: int, end_ns: int) -> None:
+        """Mark every bucket opening in ``[start_ns, end_ns)`` as covered."""
+
+        lo, hi = self._slot_range(start_ns, end_ns)
+        if lo < hi:
+            self._add_slots(lo, hi)
+
+    def update(self, other: "Coverage") -> None:
+        """Merge the runs of ``other`` (same interval) into this coverage."""
+
+        if other.interval != self.interval:
+            raise ValueError("cannot merge coverage of different intervals")
+        for start, end in zip(other._starts, other._ends):
+            self._add_slots(start, end)
+
+    def gaps(self, start_ns: int, end_ns: int) -> list[tuple[int, int]]:
+        """Return the uncovered ``[start, end)`` ranges of openings in the range."""
+
+        lo, hi = self._slot_range(start_ns, end_ns)
+        starts, ends = self._starts, self._ends
+        to_ns = self._to_ns
+        gaps: list[tuple[int, int]] = []
+        cursor = lo
+        index = bisect_right(ends, lo)
+        while cursor < hi and index < len(starts) and starts[index] < hi:
+            if starts[index] > cursor:
+                gaps.append((to_ns(cursor), to_ns(starts[index])))
+            cursor = ends[index]
+            index += 1
+        if cursor < hi:
+            gaps.append((to_ns(cursor), to_ns(hi)))
+        return gaps
+
+    def is_complete(self, start_ns: int, end_ns: int) -> bool:
+        """Return whether every bucket opening in the range is covered."""
+
+        lo, hi = self._slot_range(start_ns, end_ns)
+        if lo >= hi:
+            return True
+        index = bisect_right(self._starts, lo) - 1
+        return index >= 0 and self._ends[index] >= hi
+
+    def completeness(self, start_ns: int, end_ns: int) -> float:
+        """Return the covered fraction of the buckets opening in the range."""
+
+        lo, hi = self._slot_range(start_ns, end_ns)
+        if lo >= hi:
+            return 1.0
+        starts, ends = self._starts, self._ends
+        covered = 0
+        index = bisect_right(ends, lo)
+        while index < len(starts) and starts[index] < hi:
+            covered += min(ends[index], hi) - max(starts[index], lo)
+            index += 1
+        return covered / (hi - lo)
+
+    def to_bytes(self) -> bytes:
+        """Pack the runs as little-endian int64 ``start, end`` pairs."""
+
+        packed = array("q")
+        for start, end in zip(self._starts, self._ends):
+            packed.append(start)
+            packed.append(end)
+        if sys.byteorder == "big":  # pragma: no cover - little-endian hosts
+            packed.byteswap()
+        return packed.tobytes()
+
+    @classmethod
+    def from_bytes(cls, interval: Interval | str, data: bytes | None) -> "Coverage":
+        """Return the coverage packed by :meth:`to_bytes`."""
+
+        coverage = cls(interval)
+        if data:
+            packed = array("q")
+            packed.frombytes(data)
+            if sys.byteorder == "big":  # pragma: no cover - little-endian hosts
+                packed.byteswap()
+            coverage._starts = packed[0::2].tolist()
+            coverage._ends = packed[1::2].tolist()
+        return coverage
+
+    def _add_slots(self, lo: int, hi: int) -> None:
+        starts, ends = self._starts, self._ends
+        # Runs touching [lo, hi) (including adjacent ones) are merged.
+        first = bisect_left(ends, lo)
+        last = bisect_right(starts, hi)
+        if first < last:
+            lo = min(lo, starts[first])
+            hi = max(hi, ends[last - 1])
+        starts[first:last] = [lo]
+        ends[first:last] = [hi]
+
+    def _slot_range(self, start_ns: int, end_ns: int) -> tuple[int, int]:
+        interval = self.interval
+        return (
+            -((interval.offset - start_ns) // interval.ns),
+            -((interval.offset - end_ns) // interval.ns),
+        )
+
+    def _to_ns(self, slot: int) -> int:
+        return slot * self.interval.ns + self.interval.offset
+
+
+__all__ = ["Coverage"]
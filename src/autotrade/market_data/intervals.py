@@ -0,0 +1,85 @@
+"""Candle interval definitions shared by backfill, aggregation and coverage.
+
+Intervals are fixed-length spans in epoch nanoseconds aligned to the Unix
+epoch, which matches Upbit's candle boundaries: minute and hour candles open
+on UTC multiples of their length, day candles at 00:00 UTC (09:00 KST) and
+week candles on Monday 00:00 UTC. Monthly candles have no fixed length and are
+not supported here.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+_SECOND = 1_000_000_000
+_MINUTE = 60 * _SECOND
+_DAY = 1_440 * _MINUTE
+# 1970-01-01 was a Thursday; weeks open on Monday.
+_WEEK_OFFSET = 4 * _DAY
+
+
+@dataclass(frozen=True, slots=True)
+class Interval:
+    """A candle interval.
+
+    Parameters
+    ----------
+    name:
+        Canonical name used in ``Candle.interval`` and event payloads.
+    ns:
+        Length in nanoseconds.
+    path:
+        Upbit REST path (relative to ``/v1/candles/``).
+    offset:
+        Alignment offset from the epoch in nanoseconds.
+    """
+
+    name: str
+    ns: int
+    path: str
+    offset: int = 0
+
+    def floor(self, ts_ns: int) -> int:
+        """Return the opening time of the candle containing ``ts_ns``."""
+
+        return ts_ns - (ts_ns - self.offset) % self.ns
+
+    def ceil(self, ts_ns: int) -> int:
+        """Return the first candle opening time at or after ``ts_ns``."""
+
+        return self.floor(ts_ns + self.ns - 1)
+
+    def slots(self, start_ns: int, end_ns: int) -> int:
+        """Return the number of candle openings in ``[start_ns, end_ns)``."""
+
+        if end_ns <= start_ns:
+            return 0
+        return (self.ceil(end_ns) - self.ceil(start_ns)) // self.ns
+
+
+INTERVALS: dict[str, Interval] = {
+    interval.name: interval
+    for interval in (
+        Interval("1s", _SECOND, "seconds"),
+        *(
+            Interval(f"{unit}m", unit * _MINUTE, f"minutes/{unit}")
+            for unit in (1, 3, 5, 10, 15, 30, 60, 240)
+        ),
+        Interval("1d", _DAY, "days"),
+        Interval("1w", 7 * _DAY, "weeks", _WEEK_OFFSET),
+    )
+}
+
+_ALIASES = {"1h": "60m", "4h": "240m"}
+
+
+def get_interval(name: str) -> Interval:
+    """Return the :class:`Interval` called ``name`` (``1h``/``4h`` accepted)."""
+
+    try:
+        return INTERVALS[_ALIASES.get(name, name)]
+    except KeyError:
+        raise ValueError(f"Unsupported candle interval {name!r}") from None
+
+
+__all__ = ["INTERVALS", "Interval", "get_interval"]
@@ -0,0 +1,378 @@
+"""Local L2 order books maintained from exchange snapshots and deltas.
+
+Each side of a :class:`OrderBook` keeps its price levels in two parallel
+sorted Python lists (best level first), so a price lookup is a ``bisect``,
+the best level is index ``0`` and the top ``n`` levels are a slice. Depth and
+VWAP queries use cumulative size and notional prefixes that are only as long
+as the deepest query needed: a change at level ``i`` truncates them to ``i``
+entries and the next query extends them just past the levels it reads, so a
+top-of-book update followed by a shallow query costs a few levels rather than
+a rebuild. A fill-size query is then a ``bisect`` over cumulative size.
+
+Complexity, for ``n`` levels on a side: a price lookup is O(log n), adding or
+removing a level is an O(log n) search plus an O(n) list memmove, and a query
+reaching ``k`` levels past the shallowest change since the last query costs
+O(k), so a top-of-book change followed by a full-depth query is O(n). This is
+deliberately not the O(log n) of a Fenwick tree or an order-statistic tree:
+prices are not on a fixed tick grid to index, and the memmove stays cheaper
+than pure Python tree updates at the depths we keep. ``scaling`` in
+``benchmarks/bench_orderbook.py`` measured 0.6 us per level change at 15
+levels and 1.7 us at 1,500 (9 us at 15,000), with shallow queries nearly
+flat. Only full-depth queries grow linearly (35 us at 150 levels, 365 us at
+1,500). Upbit sends 15 levels, so books deeper than a few thousand levels or
+hot paths querying the whole side should revisit this.
+
+Books accept full snapshots and incremental deltas. Deltas carry a sequence
+number; a missing sequence marks the book stale, further deltas are ignored
+and the ``on_resync`` callback of :class:`OrderBooks` is asked to fetch a new
+snapshot. Upbit's ``orderbook`` channel sends a full snapshot of the top
+levels in every message (no deltas), so :meth:`OrderBooks.apply_messages`
+applies them as snapshots and only drops messages older than the book.
+"""
+
+from __future__ import annotations
+
+import logging
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any, Literal
+
+from autotrade.core.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+Side = Literal["bid", "ask"]
+Level = tuple[float, float]
+
+_GAPS = counter(
+    "autotrade_orderbook_sequence_gaps_total", "Order book deltas received out of sequence."
+)
+
+
+class SequenceGap(ValueError):
+    """Raised when a delta does not follow the book's last sequence number."""
+
+
+class BookSide:
+    """One side of a book as parallel sorted price/size lists.
+
+    Bids are keyed by the negated price so both sides sort best-first in
+    ascending key order.
+    """
+
+    __slots__ = ("_sign", "_keys", "_sizes", "_cum_size", "_cum_notional")
+
+    def __init__(self, side: Side) -> None:
+        self._sign = -1.0 if side == "bid" else 1.0
+        self._keys: list[float] = []
+        self._sizes: list[float] = []
+        # Prefix sums over the first len(_cum_size) levels, extended on demand.
+        self._cum_size: list[float] = []
+        self._cum_notional: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def replace(self, levels: Iterable[Level]) -> None:
+        """Replace all levels; zero-size levels are skipped."""
+
+        sign = self._sign
+        pairs = sorted((sign * price, size) for price, size in levels if size > 0)
+        self._keys = [key for key, _ in pairs]
+        self._sizes = [size for _, size in pairs]
+        self._cum_size = []
+        self._cum_notional = []
+
+    def set(self, price: float, size: float) -> None:
+        """Set the size at ``price``; a size of ``0`` removes the level."""
+
+        key = self._sign * price
+        keys = self._keys
+        index = bisect_left(keys, key)
+        if index < len(keys) and keys[index] == key:
+            if size > 0:
+                self._sizes[index] = size
+            else:
+                del keys[index]
+                del self._sizes[index]
+        elif size > 0:
+            keys.insert(index, key)
+            self._sizes.insert(index, size)
+        else:
+            return
+        if index < len(self._cum_size):
+            del self._cum_size[index:]
+            del self._cum_notional[index:]
+
+    def best(self) -> Level | None:
+        """Return the best ``(price, size)`` or ``None`` when empty."""
+
+        if not self._keys:
+            return None
+        return self._sign * self._keys[0], self._sizes[0]
+
+    def size_at(self, price: float) -> float:
+        """Return the resting size at ``price`` (``0.0`` if there is none)."""
+
+        key = self._sign * price
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            return self._sizes[index]
+        return 0.0
+
+    def levels(self, n: int | None = None) -> list[Level]:
+        """Return the top ``n`` levels (all by default), best first."""
+
+        sign = self._sign
+        keys, sizes = self._keys[:n], self._sizes[:n]
+        return [(sign * key, size) for key, size in zip(keys, sizes)]
+
+    def depth(self, n: int) -> float:
+        """Return the total size resting on the top ``n`` levels."""
+
+        if n <= 0 or not self._keys:
+            return 0.0
+        n = min(n, len(self._keys))
+        if len(self._cum_size) < n:
+            self._extend(n)
+        return self._cum_size[n - 1]
+
+    def depth_to(self, price: float) -> float:
+        """Return the total size at prices at least as good as ``price``."""
+
+        count = bisect_right(self._keys, self._sign * price)
+        return self.depth(count)
+
+    def vwap(self, quantity: float) -> tuple[float, float]:
+        """Return ``(average price, filled quantity)`` for taking ``quantity``.
+
+        The filled quantity is smaller than requested when the side is too
+        thin; the average price is ``nan`` when nothing can be filled.
+        """
+
+        if quantity <= 0 or not self._keys:
+            return float("nan"), 0.0
+        cum_size, cum_notional = self._cum_size, self._cum_notional
+        if not cum_size or cum_size[-1] < quantity:
+            self._extend(len(self._keys), quantity)
+        index = bisect_left(cum_size, quantity)
+        if index >= len(cum_size):
+            # Only reached once every level is summed.
+            return cum_notional[-1] / cum_size[-1], cum_size[-1]
+        before_size = cum_size[index - 1] if index else 0.0
+        before_notional = cum_notional[index - 1] if index else 0.0
+        price = self._sign * self._keys[index]
+        notional = before_notional + (quantity - before_size) * price
+        return notional / quantity, quantity
+
+    def _extend(self, count: int, quantity: float = float("inf")) -> None:
+        """Extend the prefix sums to ``count`` levels or past ``quantity``."""
+
+        cum_size, cum_notional = self._cum_size, self._cum_notional
+        index = len(cum_size)
+        size_total = cum_size[-1] if index else 0.0
+        notional_total = cum_notional[-1] if index else 0.0
+        keys, sizes, sign = self._keys, self._sizes, self._sign
+        while index < count and size_total < quantity:
+            size = sizes[index]
+            size_total += size
+            notional_total += sign * keys[index] * size
+            cum_size.append(size_total)
+            cum_notional.append(notional_total)
+            index += 1
+
+
+class OrderBook:
+    """L2 order book for one market.
+
+    Parameters
+    ----------
+    symbol:
+        Market code such as ``KRW-BTC``.
+    """
+
+    __slots__ = ("symbol", "bids", "asks", "sequence", "ts_ns", "stale")
+
+    def __init__(self, symbol: str) -> None:
+        self.symbol = symbol
+        self.bids = BookSide("bid")
+        self.asks = BookSide("ask")
+        self.sequence: int | None = None
+        self.ts_ns: int | None = None
+        self.stale = True
+
+    def apply_snapshot(
+        self,
+        bids: Iterable[Level],
+        asks: Iterable[Level],
+        *,
+        sequence: int | None = None,
+        ts_ns: int | None = None,
+    ) -> None:
+        """Replace the book with a full snapshot and clear the stale flag."""
+
+        self.bids.replace(bids)
+        self.asks.replace(asks)
+        self.sequence = sequence
+        self.ts_ns = ts_ns
+        self.stale = False
+
+    def apply_delta(
+        self,
+        changes: Iterable[tuple[Side, float, float]],
+        *,
+        sequence: int,
+        ts_ns: int | None = None,
+    ) -> None:
+        """Apply ``(side, price, size)`` level changes (size ``0`` deletes).
+
+        Raises
+        ------
+        SequenceGap
+            If ``sequence`` does not directly follow the last applied one. The
+            book is marked stale and stays unchanged.
+        """
+
+        if self.stale or self.sequence is None or sequence != self.sequence + 1:
+            self.stale = True
+            raise SequenceGap(
+                f"{self.symbol}: delta {sequence} does not follow {self.sequence}"
+            )
+        bids, asks = self.bids, self.asks
+        for side, price, size in changes:
+            (bids if side == "bid" else asks).set(price, size)
+        self.sequence = sequence
+        if ts_ns is not None:
+            self.ts_ns = ts_ns
+
+    def best_bid(self) -> Level | None:
+        return self.bids.best()
+
+    def best_ask(self) -> Level | None:
+        return self.asks.best()
+
+    def mid(self) -> float | None:
+        """Return the mid price, or ``None`` unless both sides have levels."""
+
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+    def spread(self) -> float | None:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def vwap(self, side: Literal["buy", "sell"], quantity: float) -> tuple[float, float]:
+        """Return ``(average price, filled)`` for a market order of ``quantity``.
+
+        Buys take liquidity from the asks and sells from the bids.
+        """
+
+        return (self.asks if side == "buy" else self.bids).vwap(quantity)
+
+    def slippage(self, side: Literal["buy", "sell"], quantity: float) -> float | None:
+        """Return the expected slippage of a market order versus the touch.
+
+        The result is a fraction of the best price (``0.001`` = 10 bps) and is
+        positive when the fill is worse than the touch. ``None`` is returned
+        when the book cannot fill ``quantity``.
+        """
+
+        book_side = self.asks if side == "buy" else self.bids
+        best = book_side.best()
+        price, filled = book_side.vwap(quantity)
+        if best is None or filled < quantity:
+            return None
+        return (price - best[0]) / best[0] if side == "buy" else (best[0] - price) / best[0]
+
+
+class OrderBooks:
+    """Order books for many markets, fed by the ingest engine.
+
+    Parameters
+    ----------
+    on_resync:
+        Called with the symbol whenever a book needs a fresh snapshot (a
+        sequence gap in deltas). It is typically wired to a REST snapshot
+        fetch such as :func:`~autotrade.services.market_ingest.upbit.fetch_orderbooks`
+        whose result is passed back to :meth:`apply_messages`.
+    """
+
+    def __init__(self, *, on_resync: Callable[[str], Any] | None = None) -> None:
+        self.books: dict[str, OrderBook] = {}
+        self.on_resync = on_resync
+        self.gaps = 0
+
+    def __getitem__(self, symbol: str) -> OrderBook:
+        return self.books[symbol]
+
+    def __contains__(self, symbol: object) -> bool:
+        return symbol in self.books
+
+    def __len__(self) -> int:
+        return len(self.books)
+
+    def book(self, symbol: str) -> OrderBook:
+        """Return the book for ``symbol``, creating an empty stale one."""
+
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol)
+        return book
+
+    def apply_delta(
+        self,
+        symbol: str,
+        changes: Iterable[tuple[Side, float, float]],
+        *,
+        sequence: int,
+        ts_ns: int | None = None,
+    ) -> bool:
+        """Apply a delta; returns ``False`` (and requests a resync) on a gap."""
+
+        book = self.book(symbol)
+        was_stale = book.stale
+        try:
+            book.apply_delta(changes, sequence=sequence, ts_ns=ts_ns)
+        except SequenceGap as exc:
+            if not was_stale:
+                self.gaps += 1
+                _GAPS.inc()
+                logger.warning("Order book resync required: %s", exc)
+                if self.on_resync is not None:
+                    self.on_resync(symbol)
+            return False
+        return True
+
+    def apply_messages(self, messages: Sequence[dict[str, Any]]) -> int:
+        """Apply Upbit ``orderbook`` documents (WebSocket or REST) as snapshots.
+
+        Messages older than the current book are skipped. Returns the number
+        of books updated.
+        """
+
+        applied = 0
+        for message in messages:
+            try:
+                symbol = message.get("code") or message["market"]
+                ts_ns = message["timestamp"] * 1_000_000
+                units = message["orderbook_units"]
+            except (KeyError, TypeError):
+                logger.warning("Skipping malformed order book message: %r", message)
+                continue
+            book = self.book(symbol)
+            if book.ts_ns is not None and ts_ns < book.ts_ns:
+                continue
+            book.apply_snapshot(
+                [(unit["bid_price"], unit["bid_size"]) for unit in units],
+                [(unit["ask_price"], unit["ask_size"]) for unit in units],
+                ts_ns=ts_ns,
+            )
+            applied += 1
+        return applied
+
+
+__all__ = ["BookSide", "OrderBook", "OrderBooks", "SequenceGap"]
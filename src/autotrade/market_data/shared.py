@@ -0,0 +1,299 @@
+"""Shared-memory candle series for multi-process consumers.
+
+A producer process owns a :class:`SharedMarketDataStore`, a
+:class:`~autotrade.market_data.store.MarketDataStore` whose rings live in
+``multiprocessing.shared_memory`` segments (one per ``(symbol, interval)``).
+Worker processes attach with :class:`SharedMarketDataView` and read zero-copy
+NumPy views without pickling candle history, so adding workers does not
+multiply memory use.
+
+Consistency is provided by a seqlock: the producer bumps a version counter to
+an odd value before mutating a segment and back to even afterwards. Readers run
+their computation against the views and retry when the version changed
+underneath them. The scheme relies on stores becoming visible in program order,
+which holds for CPython on x86-64; it is not a substitute for a lock on weakly
+ordered architectures. A producer that dies mid-write leaves the counter odd:
+readers give up with :class:`TimeoutError` after ``timeout`` seconds, and the
+next producer attaching to the segment resets the counter to even.
+"""
+
+from __future__ import annotations
+
+import gc
+import re
+import sys
+import threading
+import time
+from collections.abc import Callable
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, TypeVar
+
+import numpy as np
+
+from autotrade.core.config import get_settings
+
+from .store import FIELDS, CandleRing, CandleWindow, MarketDataStore
+
+T = TypeVar("T")
+
+_HEADER_SLOTS = 4  # seq, capacity, field count, reserved
+_HEADER_BYTES = 8 * _HEADER_SLOTS
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def segment_name(symbol: str, interval: str, prefix: str | None = None) -> str:
+    """Return the shared memory segment name for ``symbol``/``interval``."""
+
+    if prefix is None:
+        prefix = get_settings().message_namespace
+    raw = f"{prefix}-md-{symbol}-{interval}" if prefix else f"md-{symbol}-{interval}"
+    return _UNSAFE_CHARS.sub("_", raw)
+
+
+_ATTACH_LOCK = threading.Lock()
+
+
+def _attach(name: str) -> SharedMemory:
+    # Attaching normally registers the segment with the resource tracker, which
+    # would unlink it when the worker exits. Only the producer owns segments,
+    # so readers attach untracked.
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    # Older versions have no ``track`` flag: registration is suppressed while
+    # the segment is mapped, under a lock so concurrent attaches from other
+    # threads cannot restore the patched function out of order.
+    with _ATTACH_LOCK:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None  # type: ignore[assignment]
+        try:
+            return SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register  # type: ignore[assignment]
+
+
+def _release(ring: Any) -> None:
+    """Drop the NumPy views ``ring`` holds on its segment."""
+
+    ring._meta = ring._timestamps = ring._values = None
+
+
+def _close_segment(shm: SharedMemory) -> None:
+    """Unmap ``shm`` once no view of it is left.
+
+    Views kept alive only by reference cycles (e.g. a traceback holding a
+    window) are collected before giving up.
+    """
+
+    try:
+        shm.close()
+    except BufferError:
+        gc.collect()
+        try:
+            shm.close()
+        except BufferError:
+            raise BufferError(
+                f"Views of segment {shm.name!r} are still alive; "
+                "copy data out of reads before closing"
+            ) from None
+
+
+class SharedCandleRing(CandleRing):
+    """:class:`CandleRing` hosted in shared memory and guarded by a seqlock."""
+
+    __slots__ = ("_seq",)
+
+    def __init__(self, capacity: int, buffer: memoryview) -> None:
+        super().__init__(capacity, buffer=buffer, offset=_HEADER_BYTES)
+        self._seq = np.ndarray((1,), dtype=np.int64, buffer=buffer)
+
+    @property
+    def version(self) -> int:
+        return int(self._seq[0])
+
+    def append(self, timestamp: int, values: tuple[float, ...]) -> None:
+        self._seq[0] += 1
+        try:
+            super().append(timestamp, values)
+        finally:
+            self._seq[0] += 1
+
+    def replace_last(self, values: tuple[float, ...]) -> None:
+        self._seq[0] += 1
+        try:
+            super().replace_last(values)
+        finally:
+            self._seq[0] += 1
+
+    def _release(self) -> None:
+        self._seq = None  # type: ignore[assignment]
+        _release(self)
+
+
+class SharedMarketDataStore(MarketDataStore):
+    """Producer-side store publishing every series into shared memory.
+
+    Existing segments with a matching capacity are reused so readers that are
+    already attached keep working across producer restarts.
+    """
+
+    def __init__(self, capacity: int = 1024, *, prefix: str | None = None) -> None:
+        super().__init__(capacity)
+        self.prefix = get_settings().message_namespace if prefix is None else prefix
+        self._segments: dict[tuple[str, str], SharedMemory] = {}
+
+    def _create_ring(self, symbol: str, interval: str) -> CandleRing:
+        name = segment_name(symbol, interval, self.prefix)
+        size = _HEADER_BYTES + CandleRing.nbytes(self.capacity)
+        try:
+            shm = SharedMemory(name=name, create=True, size=size)
+            header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+            header[:] = (0, self.capacity, len(FIELDS), 0)
+            del header
+        except FileExistsError:
+            shm = SharedMemory(name=name)
+            header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+            capacity = int(header[1])
+            if capacity == self.capacity and header[0] & 1:
+                # The previous producer died mid-write; the slot it was
+                # writing may be torn but readers can make progress again.
+                header[0] += 1
+            del header
+            if capacity != self.capacity:
+                shm.close()
+                raise ValueError(
+                    f"Segment {name!r} exists with capacity {capacity}, "
+                    f"expected {self.capacity}"
+                ) from None
+        self._segments[(symbol, interval)] = shm
+        return SharedCandleRing(self.capacity, shm.buf)
+
+    def segment_names(self) -> dict[tuple[str, str], str]:
+        """Return the segment name of every published series."""
+
+        return {key: shm.name for key, shm in self._segments.items()}
+
+    def close(self, *, unlink: bool = False) -> None:
+        """Release local mappings, optionally removing the segments."""
+
+        for ring in self._series.values():
+            ring._release()  # type: ignore[attr-defined]
+        self._series.clear()
+        segments = list(self._segments.values())
+        self._segments.clear()
+        for shm in segments:
+            try:
+                _close_segment(shm)
+            finally:
+                if unlink:
+                    shm.unlink()
+
+    def __enter__(self) -> "SharedMarketDataStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close(unlink=True)
+
+
+class SharedCandleReader:
+    """Read-only attachment to one shared candle series."""
+
+    def __init__(self, name: str, *, timeout: float = 1.0) -> None:
+        self.name = name
+        self.timeout = timeout
+        self._shm = _attach(name)
+        header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=self._shm.buf)
+        self._seq = header[0:1]
+        self._ring = CandleRing(int(header[1]), buffer=self._shm.buf, offset=_HEADER_BYTES)
+
+    @property
+    def version(self) -> int:
+        """Current seqlock value; odd while the producer is writing."""
+
+        return int(self._seq[0])
+
+    def read(self, func: Callable[[CandleWindow], T], n: int | None = None) -> T:
+        """Apply ``func`` to zero-copy views of a consistent window.
+
+        ``func`` may run more than once if the producer writes concurrently and
+        must not let the views escape: only its return value is guaranteed to
+        be derived from a consistent snapshot.
+        """
+
+        seq = self._seq
+        deadline = time.monotonic() + self.timeout
+        while True:
+            before = int(seq[0])
+            if before & 1:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(
+                        f"{self.name!r} has been mid-write for over {self.timeout}s; "
+                        "its producer may have crashed"
+                    )
+                time.sleep(0)
+                continue
+            try:
+                result = func(self._ring.window(n))
+            except Exception:
+                if int(seq[0]) != before:
+                    continue
+                raise
+            if int(seq[0]) == before:
+                return result
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Could not obtain a consistent read of {self.name!r}")
+
+    def snapshot(self, n: int | None = None) -> CandleWindow:
+        """Return a consistent copy of the latest ``n`` candles."""
+
+        return self.read(lambda window: CandleWindow(*(col.copy() for col in window)), n)
+
+    def close(self) -> None:
+        if self._ring is None:
+            return
+        self._seq = None  # type: ignore[assignment]
+        _release(self._ring)
+        self._ring = None  # type: ignore[assignment]
+        _close_segment(self._shm)
+
+
+class SharedMarketDataView:
+    """Worker-side registry attaching to producer segments on first use."""
+
+    def __init__(self, prefix: str | None = None) -> None:
+        self.prefix = get_settings().message_namespace if prefix is None else prefix
+        self._readers: dict[tuple[str, str], SharedCandleReader] = {}
+
+    def reader(self, symbol: str, interval: str) -> SharedCandleReader:
+        key = (symbol, interval)
+        reader = self._readers.get(key)
+        if reader is None:
+            reader = self._readers[key] = SharedCandleReader(
+                segment_name(symbol, interval, self.prefix)
+            )
+        return reader
+
+    def read(
+        self,
+        symbol: str,
+        interval: str,
+        func: Callable[[CandleWindow], T],
+        n: int | None = None,
+    ) -> T:
+        """Shortcut for ``reader(symbol, interval).read(func, n)``."""
+
+        return self.reader(symbol, interval).read(func, n)
+
+    def close(self) -> None:
+        for reader in self._readers.values():
+            reader.close()
+        self._readers.clear()
+
+
+__all__ = [
+    "SharedCandleReader",
+    "SharedCandleRing",
+    "SharedMarketDataStore",
+    "SharedMarketDataView",
+    "segment_name",
+]
@@ -0,0 +1,261 @@
+"""In-process columnar market data store backed by NumPy ring buffers.
+
+Every ``(symbol, interval)`` series is a :class:`CandleRing`: fixed-capacity
+timestamp and OHLCV columns using a mirrored layout. Each slot is written twice
+(at ``i`` and ``i + capacity``) so the most recent ``n`` candles always occupy
+one contiguous slice and can be returned as zero-copy NumPy views. Chart,
+strategy and risk code running in the same process share one
+:class:`MarketDataStore` instead of keeping private Python lists.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from autotrade.core.clock import to_epoch_ns
+from autotrade.core.records import CandleRecord
+from autotrade.core.schemas import CandlePayload
+from autotrade.messaging.base import EventBusProtocol, StreamMessage
+from autotrade.messaging.events import EventName, resolve_stream_name
+
+FIELDS: tuple[str, ...] = ("open", "high", "low", "close", "volume")
+"""Order of the value columns held by :class:`CandleRing`."""
+
+_META_SLOTS = 2  # head, size
+
+
+class CandleWindow(NamedTuple):
+    """Read-only column views over the most recent candles of a series."""
+
+    timestamps: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+
+class CandleRing:
+    """Fixed-capacity OHLCV ring buffer with contiguous window views.
+
+    Parameters
+    ----------
+    capacity:
+        Maximum number of candles retained.
+    buffer:
+        Optional writable buffer (for example a shared memory segment) to host
+        the ring. It must provide at least :meth:`nbytes` bytes from
+        ``offset``. When omitted private NumPy arrays are allocated.
+    offset:
+        Byte offset of the ring inside ``buffer``.
+    """
+
+    __slots__ = ("capacity", "_meta", "_timestamps", "_values")
+
+    def __init__(self, capacity: int, *, buffer: Any = None, offset: int = 0) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        slots = 2 * capacity
+        if buffer is None:
+            self._meta = np.zeros(_META_SLOTS, dtype=np.int64)
+            self._timestamps = np.zeros(slots, dtype=np.int64)
+            self._values = np.zeros((len(FIELDS), slots), dtype=np.float64)
+            return
+        self._meta = np.ndarray((_META_SLOTS,), dtype=np.int64, buffer=buffer, offset=offset)
+        offset += self._meta.nbytes
+        self._timestamps = np.ndarray((slots,), dtype=np.int64, buffer=buffer, offset=offset)
+        offset += self._timestamps.nbytes
+        self._values = np.ndarray(
+            (len(FIELDS), slots), dtype=np.float64, buffer=buffer, offset=offset
+        )
+
+    @staticmethod
+    def nbytes(capacity: int) -> int:
+        """Return the number of bytes required to host a ring of ``capacity``."""
+
+        return 8 * (_META_SLOTS + 2 * capacity * (1 + len(FIELDS)))
+
+    def __len__(self) -> int:
+        return int(self._meta[1])
+
+    @property
+    def last_timestamp(self) -> int | None:
+        """Epoch nanoseconds of the newest candle, or ``None`` when empty."""
+
+        if not self._meta[1]:
+            return None
+        head = int(self._meta[0])
+        return int(self._timestamps[head - 1 + self.capacity])
+
+    def append(self, timestamp: int, values: tuple[float, ...]) -> None:
+        """Append a new candle in O(1), evicting the oldest when full."""
+
+        head = int(self._meta[0])
+        mirror = head + self.capacity
+        self._timestamps[head] = self._timestamps[mirror] = timestamp
+        self._values[:, head] = self._values[:, mirror] = values
+        self._meta[0] = (head + 1) % self.capacity
+        if self._meta[1] < self.capacity:
+            self._meta[1] += 1
+
+    def replace_last(self, values: tuple[float, ...]) -> None:
+        """Overwrite the newest candle in place (in-progress bucket updates)."""
+
+        if not self._meta[1]:
+            raise IndexError("replace_last() on an empty ring")
+        last = (int(self._meta[0]) - 1) % self.capacity
+        self._values[:, last] = self._values[:, last + self.capacity] = values
+
+    def update(self, timestamp: int, values: tuple[float, ...]) -> bool:
+        """Append or replace depending on ``timestamp``.
+
+        Returns ``False`` and leaves the ring untouched when ``timestamp`` is
+        older than the newest candle.
+        """
+
+        last = self.last_timestamp
+        if last is None or timestamp > last:
+            self.append(timestamp, values)
+        elif timestamp == last:
+            self.replace_last(values)
+        else:
+            return False
+        return True
+
+    def window(self, n: int | None = None) -> CandleWindow:
+        """Return zero-copy views over the most recent ``n`` candles.
+
+        Views alias the ring, so they observe later updates to the same slots;
+        consume them before yielding control to code that appends.
+        """
+
+        size = int(self._meta[1])
+        n = size if n is None else min(n, size)
+        stop = int(self._meta[0]) + self.capacity
+        start = stop - n
+        columns = [self._timestamps[start:stop]]
+        columns.extend(self._values[index, start:stop] for index in range(len(FIELDS)))
+        for column in columns:
+            column.flags.writeable = False
+        return CandleWindow(*columns)
+
+
+class MarketDataStore:
+    """Registry of :class:`CandleRing` series keyed by ``(symbol, interval)``."""
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.capacity = capacity
+        self._series: dict[tuple[str, str], CandleRing] = {}
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self._series
+
+    def keys(self) -> list[tuple[str, str]]:
+        return list(self._series)
+
+    def series(self, symbol: str, interval: str) -> CandleRing:
+        """Return the ring for ``symbol``/``interval``, creating it on demand."""
+
+        key = (symbol, interval)
+        ring = self._series.get(key)
+        if ring is None:
+            ring = self._series[key] = self._create_ring(symbol, interval)
+        return ring
+
+    def _create_ring(self, symbol: str, interval: str) -> CandleRing:
+        return CandleRing(self.capacity)
+
+    def update(
+        self,
+        symbol: str,
+        interval: str,
+        timestamp: int,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+    ) -> bool:
+        """Append or replace one candle; see :meth:`CandleRing.update`."""
+
+        return self.series(symbol, interval).update(
+            timestamp, (open, high, low, close, volume)
+        )
+
+    def update_payload(self, payload: CandlePayload) -> bool:
+        """Apply a :class:`CandlePayload` to its series."""
+
+        return self.update(
+            payload.symbol,
+            payload.interval,
+            to_epoch_ns(payload.timestamp_utc),
+            payload.open,
+            payload.high,
+            payload.low,
+            payload.close,
+            payload.volume,
+        )
+
+    def update_record(self, record: CandleRecord) -> bool:
+        """Apply a :class:`CandleRecord` to its series."""
+
+        return self.series(record.symbol, record.interval).update(
+            record.ts_ns,
+            (record.open, record.high, record.low, record.close, record.volume),
+        )
+
+    def apply_message(self, message: StreamMessage | Mapping[str, Any]) -> bool:
+        """Apply a decoded ``market.candle.ingested`` bus message.
+
+        Messages for other events are ignored and return ``False``.
+        """
+
+        data = message.data if isinstance(message, StreamMessage) else message
+        if data.get("name") != EventName.MARKET_CANDLE_INGESTED.value:
+            return False
+        payload = data["payload"]
+        return self.update(
+            payload["symbol"],
+            payload["interval"],
+            to_epoch_ns(payload["timestamp_utc"]),
+            payload["open"],
+            payload["high"],
+            payload["low"],
+            payload["close"],
+            payload["volume"],
+        )
+
+    def window(self, symbol: str, interval: str, n: int | None = None) -> CandleWindow:
+        """Return zero-copy views over the latest ``n`` candles of a series."""
+
+        return self.series(symbol, interval).window(n)
+
+    async def follow(
+        self,
+        bus: EventBusProtocol,
+        *,
+        stream: str | None = None,
+        last_id: str = "$",
+        count: int = 256,
+        block: int = 1_000,
+    ) -> None:
+        """Keep the store current by tailing the candle stream until cancelled."""
+
+        stream = stream or resolve_stream_name(EventName.MARKET_CANDLE_INGESTED)
+        while True:
+            messages = await bus.read({stream: last_id}, count=count, block=block)
+            for message in messages:
+                self.apply_message(message)
+                last_id = message.message_id
+
+
+__all__ = [
+    "FIELDS",
+    "CandleRing",
+    "CandleWindow",
+    "MarketDataStore",
+]
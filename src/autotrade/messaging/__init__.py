@@ -1,17 +1,52 @@
-"""Messaging primitives for the AutoTrade system."""
+"""Messaging primitives for the AutoTrade system.
 
-from .base import EventBusProtocol, StreamMessage
-from .envelope import EventEnvelope
-from .events import EventName, STREAM_DEFINITIONS, resolve_stream_name
-from .redis import RedisEventBus, build_redis_bus
+Names are resolved lazily so importing the package does not load Redis or
+SQLAlchemy until the bus or outbox is actually used.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from autotrade.core.lazy import lazy_exports
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .base import EventBusProtocol, StreamMessage
+    from .envelope import EventEnvelope
+    from .events import EventName, STREAM_DEFINITIONS, resolve_stream_name
+    from .outbox import OutboxRelay, enqueue_event
+    from .payloads import PayloadDecoder, decode_payload
+    from .redis import RedisEventBus, build_redis_bus
 
 __all__ = [
     "EventBusProtocol",
     "EventEnvelope",
     "EventName",
     "STREAM_DEFINITIONS",
+    "OutboxRelay",
+    "PayloadDecoder",
     "StreamMessage",
     "RedisEventBus",
     "build_redis_bus",
+    "decode_payload",
+    "enqueue_event",
     "resolve_stream_name",
 ]
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "EventBusProtocol": ".base",
+        "StreamMessage": ".base",
+        "EventEnvelope": ".envelope",
+        "EventName": ".events",
+        "STREAM_DEFINITIONS": ".events",
+        "resolve_stream_name": ".events",
+        "OutboxRelay": ".outbox",
+        "enqueue_event": ".outbox",
+        "PayloadDecoder": ".payloads",
+        "decode_payload": ".payloads",
+        "RedisEventBus": ".redis",
+        "build_redis_bus": ".redis",
+    },
+)
@@ -21,9 +21,17 @@ class EventBusProtocol(Protocol):
     """Interface implemented by message bus adapters."""
 
     async def publish(
-        self, stream: str, data: Mapping[str, Any] | EventEnvelope
+        self, stream: str, data: Mapping[str, Any] | EventEnvelope | str
     ) -> str:
-        """Publish ``data`` to ``stream`` returning the Redis message id."""
+        """Publish ``data`` to ``stream`` returning the Redis message id.
+
+        A ``str`` is treated as an already encoded event document.
+        """
+
+    async def publish_many(
+        self, items: Sequence[tuple[str, Mapping[str, Any] | EventEnvelope | str]]
+    ) -> list[str]:
+        """Publish ``(stream, data)`` pairs in one round trip, preserving order."""
 
     async def create_consumer_group(
         self, stream: str, group: str, *, mkstream: bool = True, id: str = "$"
@@ -4,13 +4,14 @@ from __future__ import annotations
 
 from enum import Enum
 
-from autotrade.core.config import settings
+from autotrade.core.config import get_settings
 
 
 class EventName(str, Enum):
     """Enumerates canonical event identifiers for the platform."""
 
     MARKET_CANDLE_INGESTED = "market.candle.ingested"
+    MARKET_TICK_INGESTED = "market.tick.ingested"
     STRATEGY_SIGNAL_CREATED = "strategy.signal.created"
     POSITION_OPEN_REQUESTED = "position.open.requested"
     POSITION_OPEN_FILLED = "position.open.filled"
@@ -25,6 +26,7 @@ class EventName(str, Enum):
 
 STREAM_DEFINITIONS: dict[EventName, str] = {
     EventName.MARKET_CANDLE_INGESTED: "market.candles",
+    EventName.MARKET_TICK_INGESTED: "market.ticks",
     EventName.STRATEGY_SIGNAL_CREATED: "strategy.signals",
     EventName.POSITION_OPEN_REQUESTED: "positions.lifecycle",
     EventName.POSITION_OPEN_FILLED: "positions.lifecycle",
@@ -42,5 +44,5 @@ def resolve_stream_name(event: EventName) -> str:
     """Return the fully-qualified stream name for ``event`` using settings."""
 
     base_stream = STREAM_DEFINITIONS[event]
-    return settings.namespaced_stream(base_stream)
+    return get_settings().namespaced_stream(base_stream)
 
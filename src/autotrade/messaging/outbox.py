@@ -0,0 +1,150 @@
+"""Transactional outbox writer and batched relay to the event bus.
+
+Services add their domain rows (``Signal``, ``Order``, ``RiskLimitBreach`` …)
+and call :func:`enqueue_event` inside the same :func:`session_scope`, so the
+event is committed atomically with the state change and no Redis round trip is
+made inside the business transaction::
+
+    async with session_scope(session_factory) as session:
+        session.add(signal)
+        enqueue_event(session, envelope)
+
+:class:`OutboxRelay` drains pending rows in id order with
+``SELECT ... FOR UPDATE SKIP LOCKED``, publishes each batch through one
+pipelined :meth:`RedisEventBus.publish_many` call and deletes (or marks) the
+rows before committing. Several relays can run in parallel because locked rows
+are skipped rather than waited on. Delivery is at-least-once: a crash between
+publishing and committing re-sends the batch, so consumers must be idempotent.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Mapping
+from typing import Any
+
+try:  # pragma: no cover - optional dependency import
+    from sqlalchemy import delete, select, update
+except ModuleNotFoundError:  # pragma: no cover - fallback for tests
+    def _missing(*args: Any, **kwargs: Any):  # type: ignore
+        raise RuntimeError("SQLAlchemy is required for the outbox relay")
+
+    delete = select = update = _missing  # type: ignore
+
+from autotrade.core.clock import now
+from autotrade.db.models.outbox import OutboxEvent
+from autotrade.db.session import session_scope
+
+from .base import EventBusProtocol
+from .envelope import EventEnvelope
+from .events import EventName, resolve_stream_name
+from .redis import encode_event
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_event(
+    session: Any,
+    data: EventEnvelope | Mapping[str, Any],
+    *,
+    stream: str | None = None,
+) -> OutboxEvent:
+    """Stage ``data`` for publication as part of ``session``'s transaction.
+
+    ``stream`` defaults to the namespaced stream of the envelope's event name.
+    """
+
+    if isinstance(data, EventEnvelope):
+        name = EventName(data.name)
+    else:
+        name = EventName(data["name"])
+    row = OutboxEvent(
+        stream=stream or resolve_stream_name(name),
+        event_name=name.value,
+        body=encode_event(data),
+    )
+    session.add(row)
+    return row
+
+
+class OutboxRelay:
+    """Publish committed outbox rows to the bus in batches.
+
+    Parameters
+    ----------
+    session_factory:
+        ``async_sessionmaker`` used for each drain transaction.
+    bus:
+        Event bus exposing ``publish_many``.
+    batch_size:
+        Maximum number of rows claimed per transaction.
+    poll_interval:
+        Seconds to sleep when the outbox is empty.
+    delete_sent:
+        Delete published rows (default) instead of stamping ``sent_at``.
+    """
+
+    def __init__(
+        self,
+        session_factory: Any,
+        bus: EventBusProtocol,
+        *,
+        batch_size: int = 500,
+        poll_interval: float = 0.2,
+        delete_sent: bool = True,
+    ) -> None:
+        self._session_factory = session_factory
+        self._bus = bus
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.delete_sent = delete_sent
+
+    def claim_statement(self) -> Any:
+        """Return the ``SELECT ... FOR UPDATE SKIP LOCKED`` claim query."""
+
+        return (
+            select(OutboxEvent)
+            .where(OutboxEvent.sent_at.is_(None))
+            .order_by(OutboxEvent.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+
+    async def drain_once(self) -> int:
+        """Publish one batch of pending rows, returning how many were sent."""
+
+        async with session_scope(self._session_factory) as session:
+            rows = (await session.scalars(self.claim_statement())).all()
+            if not rows:
+                return 0
+            await self._bus.publish_many([(row.stream, row.body) for row in rows])
+            ids = [row.id for row in rows]
+            if self.delete_sent:
+                await session.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(ids)))
+            else:
+                await session.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_(ids))
+                    .values(sent_at=now().utc)
+                )
+        return len(rows)
+
+    async def run(self, stop: asyncio.Event | None = None) -> None:
+        """Drain continuously until ``stop`` is set or the task is cancelled."""
+
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                sent = await self.drain_once()
+            except Exception:  # pragma: no cover - keep relaying after transient errors
+                logger.exception("Outbox relay batch failed")
+                sent = 0
+            if sent < self.batch_size:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+
+__all__ = ["OutboxRelay", "enqueue_event"]
@@ -0,0 +1,307 @@
+"""Event payload decoding with a trusted fast path.
+
+Payloads arriving from outside the system (exchange feeds, HTTP requests) are
+fully validated through a cached :class:`pydantic.TypeAdapter` per schema
+model. Payloads produced by our own services and read back from the bus were
+validated when they were built, so consumers decode them with
+``trusted=True``: the models are assembled directly from their field values
+and only ISO timestamps are parsed, skipping constraint checks entirely.
+Consumers that read bus dictionaries without building models at all (the
+strategy engine) call :meth:`PayloadDecoder.sample` instead.
+
+To catch contract drift between producers and consumers, :class:`PayloadDecoder`
+still fully validates one in every ``sample_rate`` trusted payloads
+(``PAYLOAD_VALIDATION_SAMPLE_RATE``). A sampled payload that fails validation
+is logged and counted in :attr:`DecodeStats.drift`; the trusted result is
+returned so a single bad message does not stall the consumer.
+
+Raw JSON documents are decoded with :meth:`PayloadDecoder.decode_json`, which
+validates straight from the bytes in pydantic-core. That is several times
+faster than ``json.loads`` followed by either path, so it has no trusted
+variant.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import typing
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+
+from autotrade.core.compat import BaseModel
+from autotrade.core.config import get_settings
+from autotrade.core.schemas import (
+    AIParameterApplication,
+    AIParameterProposal,
+    CandlePayload,
+    PositionLifecycleEvent,
+    RiskLimitBreach,
+    StrategySignal,
+)
+
+from .envelope import EventEnvelope
+from .events import EventName
+
+try:  # pragma: no cover - optional dependency import
+    from pydantic import TypeAdapter
+except ModuleNotFoundError:  # pragma: no cover - compat shim in minimal envs
+    TypeAdapter = None  # type: ignore[assignment,misc]
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_MODELS: dict[EventName, type[BaseModel]] = {
+    EventName.MARKET_CANDLE_INGESTED: CandlePayload,
+    EventName.STRATEGY_SIGNAL_CREATED: StrategySignal,
+    EventName.POSITION_OPEN_REQUESTED: PositionLifecycleEvent,
+    EventName.POSITION_OPEN_FILLED: PositionLifecycleEvent,
+    EventName.POSITION_OPEN_FAILED: PositionLifecycleEvent,
+    EventName.POSITION_CLOSE_REQUESTED: PositionLifecycleEvent,
+    EventName.POSITION_CLOSE_FILLED: PositionLifecycleEvent,
+    EventName.POSITION_CLOSE_FAILED: PositionLifecycleEvent,
+    EventName.RISK_LIMIT_BREACHED: RiskLimitBreach,
+    EventName.AI_PARAM_UPDATE_PROPOSED: AIParameterProposal,
+    EventName.AI_PARAM_UPDATE_APPLIED: AIParameterApplication,
+}
+
+_new = object.__new__
+_set = object.__setattr__
+
+
+@lru_cache(maxsize=None)
+def _adapter(model: type) -> Any:
+    """Return the cached ``TypeAdapter`` for ``model`` (``None`` without pydantic)."""
+
+    return None if TypeAdapter is None else TypeAdapter(model)
+
+
+def validate(model: type[BaseModel], data: Mapping[str, Any]) -> BaseModel:
+    """Fully validate ``data`` as ``model``."""
+
+    adapter = _adapter(model)
+    if adapter is None:  # pragma: no cover - compat shim
+        return model.model_validate(data)
+    return adapter.validate_python(data)
+
+
+@lru_cache(maxsize=None)
+def _datetime_fields(model: type) -> tuple[str, ...]:
+    """Return the names of ``model`` fields annotated as ``datetime``."""
+
+    hints = typing.get_type_hints(model)
+    return tuple(
+        name
+        for name, hint in hints.items()
+        if hint is datetime or datetime in typing.get_args(hint)
+    )
+
+
+@lru_cache(maxsize=None)
+def _optional_defaults(model: type) -> tuple[tuple[str, Any], ...] | None:
+    """Return ``(name, default)`` pairs for ``model``'s optional fields.
+
+    ``None`` means the model cannot use the direct construction path (compat
+    shim, default factories or private attributes).
+    """
+
+    fields = getattr(model, "model_fields", None)
+    if not isinstance(fields, dict) or "__pydantic_fields_set__" not in getattr(
+        model, "__slots__", ()
+    ):
+        return None
+    if getattr(model, "__private_attributes__", None):
+        return None
+    if any(info.default_factory is not None for info in fields.values()):
+        return None
+    return tuple(
+        (name, info.default) for name, info in fields.items() if not info.is_required()
+    )
+
+
+def construct_trusted(model: type[BaseModel], data: Mapping[str, Any]) -> BaseModel:
+    """Build ``model`` from ``data`` without validation.
+
+    ISO-8601 strings in ``datetime`` fields are parsed so that JSON decoded
+    bus payloads produce the same attribute types as validated ones. Pydantic
+    v2's ``model_construct`` is implemented in Python and measures slower than
+    compiled validation for these flat payloads, so instances are assembled
+    the way it does internally, from cached field defaults. ``data`` is
+    trusted to contain only model fields.
+    """
+
+    values = dict(data)
+    for name in _datetime_fields(model):
+        value = values.get(name)
+        if value.__class__ is str:
+            values[name] = datetime.fromisoformat(value)
+    optional = _optional_defaults(model)
+    if optional is None:
+        return model.model_construct(**values)
+    fields_set = set(values)
+    for name, default in optional:
+        if name not in values:
+            values[name] = default
+    instance = _new(model)
+    _set(instance, "__dict__", values)
+    _set(instance, "__pydantic_fields_set__", fields_set)
+    _set(instance, "__pydantic_extra__", None)
+    _set(instance, "__pydantic_private__", None)
+    return instance
+
+
+@dataclass(slots=True)
+class DecodeStats:
+    """Counters describing how payloads were decoded."""
+
+    trusted: int = 0
+    validated: int = 0
+    sampled: int = 0
+    drift: int = 0
+
+
+class PayloadDecoder:
+    """Decode event payloads into their schema models.
+
+    Parameters
+    ----------
+    sample_rate:
+        Fully validate one in this many trusted payloads. ``1`` validates every
+        payload, ``0`` disables sampling. Defaults to
+        ``Settings.payload_validation_sample_rate``.
+    """
+
+    def __init__(self, sample_rate: int | None = None) -> None:
+        if sample_rate is None:
+            sample_rate = get_settings().payload_validation_sample_rate
+        if sample_rate < 0:
+            raise ValueError("sample_rate must be non-negative")
+        self.sample_rate = sample_rate
+        self.stats = DecodeStats()
+        self._countdown = sample_rate
+
+    @staticmethod
+    def model_for(name: EventName | str) -> type[BaseModel]:
+        """Return the payload model registered for ``name``."""
+
+        # ``EventName`` is a ``str`` enum, so raw names hash to the same keys.
+        try:
+            return PAYLOAD_MODELS[name]  # type: ignore[index]
+        except KeyError:
+            raise ValueError(f"Unknown event name {name!r}") from None
+
+    def decode(
+        self,
+        name: EventName | str,
+        data: Mapping[str, Any] | BaseModel,
+        *,
+        trusted: bool = False,
+    ) -> BaseModel:
+        """Return ``data`` as the payload model of event ``name``.
+
+        ``trusted`` selects the construction fast path for payloads produced by
+        our own services; untrusted payloads are always fully validated.
+        """
+
+        model = self.model_for(name)
+        if isinstance(data, model):
+            return data
+        if not trusted:
+            self.stats.validated += 1
+            return validate(model, data)
+        sampled = self._sample(name, model, data)
+        return sampled if sampled is not None else construct_trusted(model, data)
+
+    def decode_json(self, name: EventName | str, raw: str | bytes) -> BaseModel:
+        """Validate the JSON payload document ``raw`` as event ``name``."""
+
+        model = self.model_for(name)
+        self.stats.validated += 1
+        adapter = _adapter(model)
+        if adapter is None:  # pragma: no cover - compat shim
+            return model.model_validate(json.loads(raw))
+        return adapter.validate_json(raw)
+
+    def sample(self, name: EventName | str, data: Mapping[str, Any]) -> bool:
+        """Account for a trusted payload used without building its model.
+
+        One in ``sample_rate`` calls fully validates ``data``; returns
+        ``False`` only when that validation reports drift.
+        """
+
+        drift = self.stats.drift
+        self._sample(name, self.model_for(name), data)
+        return self.stats.drift == drift
+
+    def decode_envelope(
+        self, data: Mapping[str, Any], *, trusted: bool = True
+    ) -> EventEnvelope:
+        """Decode a bus message (``EventEnvelope.as_message`` shape)."""
+
+        if not trusted:
+            envelope = EventEnvelope.model_validate(data)
+            envelope.payload = self.decode(envelope.name, envelope.payload_dict())
+            return envelope
+        name = EventName(data["name"])
+        envelope = construct_trusted(EventEnvelope, data)
+        envelope.name = name
+        envelope.payload = self.decode(name, data["payload"], trusted=True)
+        return envelope
+
+    def _sample(
+        self, name: EventName | str, model: type[BaseModel], data: Mapping[str, Any]
+    ) -> BaseModel | None:
+        self.stats.trusted += 1
+        if not self.sample_rate:
+            return None
+        self._countdown -= 1
+        if self._countdown > 0:
+            return None
+        self._countdown = self.sample_rate
+        self.stats.sampled += 1
+        try:
+            return validate(model, data)
+        except ValueError as exc:  # pydantic.ValidationError subclasses ValueError
+            self.stats.drift += 1
+            logger.error(
+                "Trusted %s payload failed sampled validation: %s",
+                EventName(name).value,
+                exc,
+            )
+            return None
+
+
+_decoder: PayloadDecoder | None = None
+
+
+def get_decoder() -> PayloadDecoder:
+    """Return the process-wide :class:`PayloadDecoder`."""
+
+    global _decoder
+    if _decoder is None:
+        _decoder = PayloadDecoder()
+    return _decoder
+
+
+def decode_payload(
+    name: EventName | str,
+    data: Mapping[str, Any] | BaseModel,
+    *,
+    trusted: bool = False,
+) -> BaseModel:
+    """Decode ``data`` with the process-wide decoder; see :meth:`PayloadDecoder.decode`."""
+
+    return get_decoder().decode(name, data, trusted=trusted)
+
+
+__all__ = [
+    "DecodeStats",
+    "PAYLOAD_MODELS",
+    "PayloadDecoder",
+    "construct_trusted",
+    "decode_payload",
+    "get_decoder",
+    "validate",
+]
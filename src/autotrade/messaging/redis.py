@@ -3,28 +3,64 @@
 from __future__ import annotations
 
 import json
+import time
 from datetime import datetime
-from typing import Any, Mapping, Sequence
-
-try:  # pragma: no cover - exercised when redis is available
-    from redis.asyncio import Redis  # type: ignore
-    from redis.exceptions import ResponseError  # type: ignore
-    _redis_missing: Exception | None = None
-except ModuleNotFoundError:  # pragma: no cover - executed in minimal test envs
-    Redis = Any  # type: ignore
-
-    class ResponseError(Exception):  # type: ignore
-        """Fallback exception used when redis-py is not installed."""
-
-    _redis_missing = ModuleNotFoundError(
-        "The 'redis' package is required for RedisEventBus operations."
-    )
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Mapping, Sequence
 
+from autotrade.core.clock import now_ns
 from autotrade.core.config import Settings, get_settings
+from autotrade.core.metrics import counter, histogram
 
 from .base import EventBusProtocol, StreamMessage
 from .envelope import EventEnvelope
 
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from redis.asyncio import Redis
+
+
+class _MissingResponseError(Exception):
+    """Fallback exception used when redis-py is not installed."""
+
+
+@lru_cache(maxsize=None)
+def _response_error() -> type[Exception]:
+    # redis-py is imported on first use so importing the bus module stays cheap.
+    try:
+        from redis.exceptions import ResponseError
+    except ModuleNotFoundError:  # pragma: no cover - executed in minimal test envs
+        return _MissingResponseError
+    return ResponseError
+
+
+def __getattr__(name: str) -> Any:
+    if name == "ResponseError":
+        return _response_error()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_PUBLISH_SECONDS = histogram(
+    "autotrade_bus_publish_seconds",
+    "Round trip of publish/publish_many calls to Redis.",
+    ("operation",),
+)
+_PUBLISHED = counter(
+    "autotrade_bus_messages_published_total", "Messages published.", ("stream",)
+)
+_READ_SECONDS = histogram(
+    "autotrade_bus_read_seconds",
+    "Round trip of read/read_group calls, including blocking time.",
+    ("operation",),
+)
+_CONSUMED = counter(
+    "autotrade_bus_messages_consumed_total", "Messages read.", ("stream",)
+)
+_CONSUME_LAG = histogram(
+    "autotrade_bus_consume_lag_seconds",
+    "Time from a message being added to the stream until it was read.",
+    ("stream",),
+)
+
 
 def _serialize(value: Any) -> Any:
     if isinstance(value, datetime):
@@ -32,12 +68,20 @@ def _serialize(value: Any) -> Any:
     raise TypeError(f"Unsupported type {type(value)!r} for JSON serialization")
 
 
-def _encode_message(data: Mapping[str, Any] | EventEnvelope) -> dict[str, str]:
+def encode_event(data: Mapping[str, Any] | EventEnvelope) -> str:
+    """Return the JSON document stored in the ``event`` field of a message."""
+
     if isinstance(data, EventEnvelope):
         payload = data.as_message()
     else:
         payload = dict(data)
-    return {"event": json.dumps(payload, default=_serialize)}
+    return json.dumps(payload, default=_serialize)
+
+
+def _encode_message(data: Mapping[str, Any] | EventEnvelope | str) -> dict[str, str]:
+    if isinstance(data, str):
+        return {"event": data}
+    return {"event": encode_event(data)}
 
 
 def _decode_message(fields: Mapping[bytes | str, bytes | str]) -> Mapping[str, Any]:
@@ -54,6 +98,20 @@ def _decode_message(fields: Mapping[bytes | str, bytes | str]) -> Mapping[str, A
     return json.loads(event_field)
 
 
+def _decode_id(message_id: bytes | str) -> str:
+    if isinstance(message_id, bytes):
+        return message_id.decode()
+    return str(message_id)
+
+
+def _id_milliseconds(message_id: bytes | str) -> int | None:
+    head = message_id.split(b"-" if isinstance(message_id, bytes) else "-", 1)[0]
+    try:
+        return int(head)
+    except ValueError:
+        return None
+
+
 class RedisEventBus(EventBusProtocol):
     """Event bus backed by Redis Streams."""
 
@@ -61,20 +119,35 @@ class RedisEventBus(EventBusProtocol):
         self._client = client
 
     async def publish(
-        self, stream: str, data: Mapping[str, Any] | EventEnvelope
+        self, stream: str, data: Mapping[str, Any] | EventEnvelope | str
     ) -> str:
         encoded = _encode_message(data)
+        start = time.perf_counter_ns()
         message_id = await self._client.xadd(stream, encoded)
-        if isinstance(message_id, bytes):
-            return message_id.decode()
-        return str(message_id)
+        _PUBLISH_SECONDS.labels("publish").record(time.perf_counter_ns() - start)
+        _PUBLISHED.labels(stream).inc()
+        return _decode_id(message_id)
+
+    async def publish_many(
+        self, items: Sequence[tuple[str, Mapping[str, Any] | EventEnvelope | str]]
+    ) -> list[str]:
+        if not items:
+            return []
+        pipe = self._client.pipeline(transaction=False)
+        for stream, data in items:
+            pipe.xadd(stream, _encode_message(data))
+            _PUBLISHED.labels(stream).inc()
+        start = time.perf_counter_ns()
+        message_ids = await pipe.execute()
+        _PUBLISH_SECONDS.labels("publish_many").record(time.perf_counter_ns() - start)
+        return [_decode_id(message_id) for message_id in message_ids]
 
     async def create_consumer_group(
         self, stream: str, group: str, *, mkstream: bool = True, id: str = "$"
     ) -> None:
         try:
             await self._client.xgroup_create(stream, group, id=id, mkstream=mkstream)
-        except ResponseError as exc:  # pragma: no cover - defensive branch
+        except _response_error() as exc:  # pragma: no cover - defensive branch
             if "BUSYGROUP" not in str(exc):
                 raise
 
@@ -85,7 +158,9 @@ class RedisEventBus(EventBusProtocol):
         count: int = 1,
         block: int | None = None,
     ) -> Sequence[StreamMessage]:
+        start = time.perf_counter_ns()
         response = await self._client.xread(streams=streams, count=count, block=block)
+        _READ_SECONDS.labels("read").record(time.perf_counter_ns() - start)
         return self._format_stream_response(response)
 
     async def read_group(
@@ -97,6 +172,7 @@ class RedisEventBus(EventBusProtocol):
         count: int = 1,
         block: int | None = None,
     ) -> Sequence[StreamMessage]:
+        start = time.perf_counter_ns()
         response = await self._client.xreadgroup(
             groupname=group,
             consumername=consumer,
@@ -104,6 +180,7 @@ class RedisEventBus(EventBusProtocol):
             count=count,
             block=block,
         )
+        _READ_SECONDS.labels("read_group").record(time.perf_counter_ns() - start)
         return self._format_stream_response(response)
 
     async def acknowledge(
@@ -115,8 +192,17 @@ class RedisEventBus(EventBusProtocol):
         messages: list[StreamMessage] = []
         if not response:
             return messages
+        received_ms = now_ns() // 1_000_000
         for stream_name, entries in response:
             stream_str = stream_name.decode() if isinstance(stream_name, bytes) else stream_name
+            if entries:
+                _CONSUMED.labels(stream_str).inc(len(entries))
+                # Stream ids start with the millisecond Redis added the entry.
+                lag = _CONSUME_LAG.labels(stream_str)
+                for message_id, _ in entries:
+                    added_ms = _id_milliseconds(message_id)
+                    if added_ms is not None:
+                        lag.record(max(received_ms - added_ms, 0) * 1_000_000)
             for message_id, fields in entries:
                 message_id_str = (
                     message_id.decode() if isinstance(message_id, bytes) else message_id
@@ -131,12 +217,17 @@ class RedisEventBus(EventBusProtocol):
 def build_redis_bus(config: Settings | None = None) -> RedisEventBus:
     """Instantiate a :class:`RedisEventBus` using application settings."""
 
-    if _redis_missing is not None:  # pragma: no cover - requires redis package
-        raise _redis_missing
+    try:
+        from redis.asyncio import Redis
+    except ModuleNotFoundError:  # pragma: no cover - requires redis package
+        raise ModuleNotFoundError(
+            "The 'redis' package is required for RedisEventBus operations."
+        ) from None
     cfg = config or get_settings()
-    client = Redis(**cfg.redis_connection_kwargs)
+    kwargs = dict(cfg.redis_connection_kwargs)
+    client = Redis.from_url(str(kwargs.pop("url")), **kwargs)
     return RedisEventBus(client)
 
 
-__all__ = ["RedisEventBus", "build_redis_bus", "ResponseError"]
+__all__ = ["RedisEventBus", "build_redis_bus", "encode_event", "ResponseError"]
 
@@ -0,0 +1,23 @@
+"""Strategy backtests over columnar candle arrays."""
+
+from .data import (
+    coverage_of,
+    from_columns,
+    from_records,
+    load_archive,
+    load_csv,
+    load_database,
+)
+from .engine import BacktestResult, Backtester, Trade
+
+__all__ = [
+    "BacktestResult",
+    "Backtester",
+    "Trade",
+    "coverage_of",
+    "from_columns",
+    "from_records",
+    "load_archive",
+    "load_csv",
+    "load_database",
+]
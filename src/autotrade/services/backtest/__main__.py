@@ -0,0 +1,120 @@
+"""Backtest a strategy from the command line.
+
+Usage: ``python -m autotrade.services.backtest volatility_breakout --symbol
+KRW-BTC (--csv FILE | --archive ROOT | --database [--require-complete])
+[--start ISO] [--end ISO] [--params JSON]``. Prints a summary and, with
+``--trades FILE``, writes the trades as CSV. ``--require-complete`` refuses
+to run when the stored coverage has gaps in the tested period.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+from collections.abc import Sequence
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m autotrade.services.backtest")
+    parser.add_argument("strategy", help="strategy kind, e.g. volatility_breakout")
+    parser.add_argument("--symbol", required=True)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="CSV file with timestamp and OHLCV columns")
+    source.add_argument("--archive", help="root of the market data archive")
+    source.add_argument("--database", action="store_true", help="read the candles table")
+    parser.add_argument(
+        "--require-complete",
+        action="store_true",
+        help="with --database, fail when the stored candles have gaps",
+    )
+    parser.add_argument("--start", help="first candle opening time (ISO-8601)")
+    parser.add_argument("--end", help="end of the tested period, exclusive (ISO-8601)")
+    parser.add_argument("--params", default="{}", help="strategy params as JSON")
+    parser.add_argument("--capital", default="1000000")
+    parser.add_argument("--fee", default="0.0005")
+    parser.add_argument("--slippage", default="0")
+    parser.add_argument("--mode", choices=("auto", "vectorized", "stepwise"), default="auto")
+    parser.add_argument("--trades", help="write the trades to this CSV file")
+    args = parser.parse_args(argv)
+
+    import numpy as np
+
+    from autotrade.core.clock import from_ns, to_epoch_ns
+    from autotrade.core.fixedpoint import to_decimal
+    from autotrade.services.strategy.base import StrategySpec
+
+    from .data import load_archive, load_csv, load_database
+    from .engine import Backtester
+
+    if args.require_complete and not args.database:
+        parser.error("--require-complete needs --database")
+    spec = StrategySpec.create(0, args.strategy, json.loads(args.params))
+    start_ns = to_epoch_ns(args.start) if args.start else None
+    end_ns = to_epoch_ns(args.end) if args.end else None
+    if args.csv:
+        candles = load_csv(args.csv)
+        if start_ns is not None or end_ns is not None:
+            timestamps = candles.timestamps
+            lo = 0 if start_ns is None else int(np.searchsorted(timestamps, start_ns))
+            hi = len(timestamps) if end_ns is None else int(np.searchsorted(timestamps, end_ns))
+            candles = type(candles)(*(column[lo:hi] for column in candles))
+    elif args.archive:
+        candles = load_archive(args.archive, args.symbol, spec.interval, start_ns, end_ns)
+    else:
+        if start_ns is None or end_ns is None:
+            parser.error("--database needs --start and --end")
+
+        from autotrade.core.eventloop import run
+        from autotrade.db.session import get_async_session, session_scope
+
+        async def load():
+            async with session_scope(get_async_session()) as session:
+                return await load_database(
+                    session,
+                    args.symbol,
+                    spec.interval,
+                    start_ns,
+                    end_ns,
+                    require_complete=args.require_complete,
+                )
+
+        try:
+            candles = run(load())
+        except ValueError as exc:
+            parser.exit(1, f"{exc}\n")
+
+    backtester = Backtester(
+        spec, capital=args.capital, fee=args.fee, slippage=args.slippage, mode=args.mode
+    )
+    result = backtester.run(args.symbol, candles, start_ns=start_ns, end_ns=end_ns)
+    print(
+        f"{args.symbol} {spec.kind} ({result.mode}): {len(candles.timestamps)} candles, "
+        f"{len(result.trades)} trades, return {result.total_return:.2%}, "
+        f"max drawdown {result.max_drawdown:.2%}, win rate {result.win_rate:.1%}, "
+        f"{len(result.gaps)} gaps"
+    )
+    if args.trades:
+        with open(args.trades, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(
+                ["entry_at", "exit_at", "entry_price", "exit_price", "quantity", "fees", "pnl", "reason"]
+            )
+            for trade in result.trades:
+                writer.writerow(
+                    [
+                        from_ns(trade.entry_ts).isoformat(),
+                        from_ns(trade.exit_ts).isoformat(),
+                        to_decimal(trade.entry_price),
+                        to_decimal(trade.exit_price),
+                        to_decimal(trade.quantity),
+                        to_decimal(trade.fees),
+                        to_decimal(trade.pnl),
+                        trade.reason,
+                    ]
+                )
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - command line entry point
+    raise SystemExit(main())
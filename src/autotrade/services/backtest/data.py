@@ -0,0 +1,167 @@
+"""Candle loaders returning the columnar arrays backtests run on.
+
+Every loader returns a :class:`~autotrade.market_data.store.CandleWindow` of
+contiguous NumPy columns (int64 epoch nanosecond timestamps, float64 OHLCV)
+sorted by opening time, whatever the source:
+
+* :func:`load_archive` reads the Arrow/Parquet archive (zero-copy when the
+  range falls in one part file);
+* :func:`load_csv` reads a CSV export with a header row;
+* :func:`load_database` queries the ``candles`` table after checking the
+  series' stored coverage.
+
+:func:`coverage_of` turns loaded timestamps into a
+:class:`~autotrade.market_data.coverage.Coverage` so the backtester can report
+the gaps of any source.
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+
+from autotrade.core.clock import to_epoch_ns
+from autotrade.market_data.coverage import Coverage
+from autotrade.market_data.intervals import Interval, get_interval
+from autotrade.market_data.store import FIELDS, CandleWindow
+
+
+def from_columns(columns: Mapping[str, Any]) -> CandleWindow:
+    """Build a window from ``timestamp``/OHLCV columns, e.g. an archive read.
+
+    Rows are sorted by timestamp when they are not already.
+    """
+
+    timestamps = np.ascontiguousarray(columns["timestamp"], dtype=np.int64)
+    values = [np.ascontiguousarray(columns[name], dtype=np.float64) for name in FIELDS]
+    if len(timestamps) > 1 and (np.diff(timestamps) < 0).any():
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = timestamps[order]
+        values = [column[order] for column in values]
+    return CandleWindow(timestamps, *values)
+
+
+def load_archive(
+    root: str | os.PathLike[str],
+    symbol: str,
+    interval: str,
+    start: datetime | str | int | None = None,
+    end: datetime | str | int | None = None,
+) -> CandleWindow:
+    """Read the candles opening in ``[start, end)`` from the archive at ``root``."""
+
+    from autotrade.market_data.archive import ArchiveReader
+
+    return from_columns(ArchiveReader(root).read_candles(symbol, interval, start, end))
+
+
+def load_csv(path: str | os.PathLike[str], *, timestamp: str = "timestamp") -> CandleWindow:
+    """Read candles from a CSV file with a header row.
+
+    The ``timestamp`` column holds epoch nanoseconds or ISO-8601 strings; the
+    ``open``, ``high``, ``low``, ``close`` and ``volume`` columns may appear in
+    any order among other columns.
+    """
+
+    with open(path, newline="") as handle:
+        header = next(csv.reader(handle))
+    index = {name.strip(): position for position, name in enumerate(header)}
+    missing = [name for name in (timestamp, *FIELDS) if name not in index]
+    if missing:
+        raise ValueError(f"{os.fspath(path)} has no {', '.join(missing)} column")
+    values = np.loadtxt(
+        path,
+        delimiter=",",
+        skiprows=1,
+        usecols=[index[name] for name in FIELDS],
+        dtype=np.float64,
+        ndmin=2,
+    )
+    raw = np.loadtxt(
+        path, delimiter=",", skiprows=1, usecols=index[timestamp], dtype=str, ndmin=1
+    )
+    try:
+        timestamps = raw.astype(np.int64)
+    except ValueError:
+        timestamps = np.fromiter((to_epoch_ns(value) for value in raw), np.int64, len(raw))
+    return from_columns(
+        {"timestamp": timestamps, **{name: values[:, i] for i, name in enumerate(FIELDS)}}
+    )
+
+
+async def load_database(
+    session: Any,
+    symbol: str,
+    interval: str,
+    start_ns: int,
+    end_ns: int,
+    *,
+    require_complete: bool = False,
+) -> CandleWindow:
+    """Query the candles opening in ``[start_ns, end_ns)`` from the ``candles`` table.
+
+    With ``require_complete`` the stored coverage is checked first and a
+    ``ValueError`` listing the gaps is raised before any candle is loaded.
+    """
+
+    from autotrade.db.candles import fetch_candles, load_coverage
+
+    if require_complete:
+        coverage = await load_coverage(session, symbol, interval)
+        gaps = (
+            [(start_ns, end_ns)] if coverage is None else coverage.gaps(start_ns, end_ns)
+        )
+        if gaps:
+            raise ValueError(f"{symbol} {interval} candles are incomplete: {gaps[:5]}")
+    rows = await fetch_candles(session, symbol, interval, start_ns, end_ns)
+    return from_records(rows)
+
+
+def from_records(rows: Sequence[Any]) -> CandleWindow:
+    """Build a window from :class:`~autotrade.core.records.CandleRecord` rows."""
+
+    return from_columns(
+        {
+            "timestamp": np.fromiter((row.ts_ns for row in rows), np.int64, len(rows)),
+            **{
+                name: np.fromiter((getattr(row, name) for row in rows), np.float64, len(rows))
+                for name in FIELDS
+            },
+        }
+    )
+
+
+def coverage_of(timestamps: np.ndarray, interval: Interval | str) -> Coverage:
+    """Return the coverage of the candle slots opening at ``timestamps``.
+
+    Runs are found with NumPy, so millions of candles cost milliseconds.
+    """
+
+    spec = get_interval(interval) if isinstance(interval, str) else interval
+    slots = (np.asarray(timestamps, dtype=np.int64) - spec.offset) // spec.ns
+    if not len(slots):
+        return Coverage(spec)
+    steps = np.diff(slots)
+    if (steps < 0).any():
+        slots = np.sort(slots)
+        steps = np.diff(slots)
+    # Duplicates (steps of 0) do not break a run.
+    breaks = np.flatnonzero(steps > 1) + 1
+    starts = slots[np.concatenate(([0], breaks))]
+    ends = slots[np.concatenate((breaks - 1, [len(slots) - 1]))] + 1
+    return Coverage(spec, zip(starts.tolist(), ends.tolist()))
+
+
+__all__ = [
+    "coverage_of",
+    "from_columns",
+    "from_records",
+    "load_archive",
+    "load_csv",
+    "load_database",
+]
@@ -0,0 +1,419 @@
+"""Backtests of strategies over columnar candle arrays.
+
+:class:`Backtester` runs one :class:`~autotrade.services.strategy.base.StrategySpec`
+over a :class:`~autotrade.market_data.store.CandleWindow` of a symbol, holding
+at most one long position at a time (Upbit spot has no shorts):
+
+* **vectorized** -- strategies implementing
+  :meth:`~autotrade.services.strategy.base.StrategyLogic.signals` produce
+  every entry with NumPy. The simulation then jumps from trade to trade: the
+  next entry is a ``searchsorted`` into the entry indices and the exit is
+  the first candle reaching the take-profit or stop-loss, found by scanning
+  growing slices. Python work scales with trades, not candles.
+* **stepwise** -- other strategies (path-dependent ones such as the turtle
+  or grid) are evaluated candle by candle on zero-copy window slices, as the
+  live engine would see them.
+
+Both modes share the execution model. Buys fill at the decision's entry
+price and exits at the stop or target, or at the open when the candle gaps
+through it. A candle reaching both levels is assumed to hit the stop first.
+Fills are adjusted by ``slippage``, snapped to the market's tick table (up
+for buys, down for sells) and sized in whole lots. Fees are charged on
+notional as on Upbit. Amounts are fixed-point and fills go through a
+:class:`~autotrade.services.position.ledger.PositionLedger`, so results
+reconcile with live ``Order``/``Position`` accounting. Positions still open
+at the end are closed at the last close.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Literal
+
+import numpy as np
+
+from autotrade.core.fixedpoint import (
+    SCALE,
+    MarketSpec,
+    div,
+    get_market_spec,
+    mul,
+    to_fixed,
+    to_float,
+)
+from autotrade.market_data.intervals import get_interval
+from autotrade.market_data.store import CandleWindow
+from autotrade.services.position.ledger import PositionLedger, PositionState
+from autotrade.services.strategy.base import Decision, StrategyLogic, StrategySpec
+from autotrade.services.strategy.indicators import IndicatorCache
+
+from .data import coverage_of
+
+logger = logging.getLogger(__name__)
+
+Mode = Literal["auto", "vectorized", "stepwise"]
+ExitReason = Literal["take_profit", "stop_loss", "signal", "end"]
+
+_SCAN = 64  # candles checked by the first exit scan of a trade
+
+
+@dataclass(frozen=True, slots=True)
+class Trade:
+    """A closed round trip; prices, quantity and amounts are fixed-point."""
+
+    entry_index: int
+    exit_index: int
+    entry_ts: int
+    exit_ts: int
+    entry_price: int
+    exit_price: int
+    quantity: int
+    fees: int
+    slippage: int
+    """Quote amount lost to slippage and tick rounding on both fills."""
+    pnl: int
+    """Realized P&L net of fees."""
+    reason: ExitReason
+
+
+@dataclass(slots=True)
+class BacktestResult:
+    """Trades and equity curve of one backtest run."""
+
+    symbol: str
+    interval: str
+    mode: Literal["vectorized", "stepwise"]
+    capital: int
+    timestamps: np.ndarray
+    equity: np.ndarray
+    """Account value in the quote currency at each candle's close."""
+    trades: list[Trade]
+    position: PositionState
+    gaps: list[tuple[int, int]] = field(default_factory=list)
+    """Missing ``[start, end)`` candle ranges inside the tested period."""
+
+    @property
+    def final_equity(self) -> float:
+        return float(self.equity[-1]) if len(self.equity) else to_float(self.capital)
+
+    @property
+    def total_return(self) -> float:
+        return self.final_equity / to_float(self.capital) - 1
+
+    @property
+    def max_drawdown(self) -> float:
+        """Largest peak-to-trough fall of the equity curve, as a fraction."""
+
+        if not len(self.equity):
+            return 0.0
+        peaks = np.maximum.accumulate(self.equity)
+        return float((1 - self.equity / peaks).max())
+
+    @property
+    def win_rate(self) -> float:
+        if not self.trades:
+            return 0.0
+        return sum(trade.pnl > 0 for trade in self.trades) / len(self.trades)
+
+
+class _Account:
+    """Cash, ledger and the open trade of one backtest."""
+
+    def __init__(
+        self,
+        symbol: str,
+        candles: CandleWindow,
+        spec: MarketSpec,
+        capital: int,
+        fee: int,
+        slippage: int,
+        fraction: int,
+    ) -> None:
+        self.symbol = symbol
+        self.candles = candles
+        self.spec = spec
+        self.cash = capital
+        self.fee = fee
+        self.slippage = slippage
+        self.fraction = fraction
+        self.ledger = PositionLedger()
+        self.trades: list[Trade] = []
+        # (candle index, cash change, quantity change) for the equity curve.
+        self.flows: list[tuple[int, int, int]] = []
+        self.entry: tuple[int, int, int, int, int] | None = None
+        self.take_profit = self.stop_loss = 0.0
+
+    def _fill(self, raw: float, side: Literal["buy", "sell"]) -> tuple[int, int]:
+        reference = to_fixed(raw)
+        if side == "buy":
+            price = self.spec.round_price(reference + mul(reference, self.slippage), "up")
+            return price, price - reference
+        price = self.spec.round_price(reference - mul(reference, self.slippage), "down")
+        return price, reference - price
+
+    @property
+    def funded(self) -> bool:
+        """Whether the cash still covers the market's minimum order."""
+
+        return mul(self.cash, self.fraction) > max(self.spec.min_notional, 0)
+
+    def buy(self, index: int, decision: Decision) -> bool:
+        """Open a position at ``decision``; returns ``False`` if it cannot be filled."""
+
+        if not decision.entry_price > 0:
+            return False
+        price, slipped = self._fill(decision.entry_price, "buy")
+        budget = mul(self.cash, self.fraction)
+        quantity = self.spec.round_quantity(div(budget, price + mul(price, self.fee)))
+        if not self.spec.is_valid_order(price, quantity):
+            return False
+        notional = mul(price, quantity)
+        fee = mul(notional, self.fee)
+        self.cash -= notional + fee
+        self.ledger.apply_fill(self.symbol, "buy", price, quantity, fee)
+        self.flows.append((index, -(notional + fee), quantity))
+        self.entry = (index, price, quantity, fee, mul(slipped, quantity))
+        self.take_profit, self.stop_loss = decision.take_profit, decision.stop_loss
+        return True
+
+    def sell(self, index: int, raw: float, reason: ExitReason) -> Trade:
+        """Close the open position at ``raw`` (before slippage)."""
+
+        assert self.entry is not None
+        entry_index, entry_price, quantity, entry_fee, entry_slippage = self.entry
+        price, slipped = self._fill(raw, "sell")
+        notional = mul(price, quantity)
+        fee = mul(notional, self.fee)
+        self.cash += notional - fee
+        realized = self.ledger.apply_fill(self.symbol, "sell", price, quantity, fee)
+        self.flows.append((index, notional - fee, -quantity))
+        timestamps = self.candles.timestamps
+        trade = Trade(
+            entry_index=entry_index,
+            exit_index=index,
+            entry_ts=int(timestamps[entry_index]),
+            exit_ts=int(timestamps[index]),
+            entry_price=entry_price,
+            exit_price=price,
+            quantity=quantity,
+            fees=entry_fee + fee,
+            slippage=entry_slippage + mul(slipped, quantity),
+            pnl=realized - entry_fee - fee,
+            reason=reason,
+        )
+        self.trades.append(trade)
+        self.entry = None
+        return trade
+
+    def exit_at(self, index: int) -> tuple[float, ExitReason] | None:
+        """Return the stop or target fill reached by candle ``index``, if any."""
+
+        candles = self.candles
+        if candles.low[index] <= self.stop_loss:
+            return min(float(candles.open[index]), self.stop_loss), "stop_loss"
+        if candles.high[index] >= self.take_profit:
+            return max(float(candles.open[index]), self.take_profit), "take_profit"
+        return None
+
+    def close_out(self) -> None:
+        if self.entry is not None:
+            last = len(self.candles.timestamps) - 1
+            self.sell(last, float(self.candles.close[last]), "end")
+
+    def equity(self, capital: int) -> np.ndarray:
+        size = len(self.candles.timestamps)
+        cash = np.zeros(size)
+        quantity = np.zeros(size)
+        for index, cash_change, quantity_change in self.flows:
+            cash[index] += cash_change
+            quantity[index] += quantity_change
+        cash = (capital + np.cumsum(cash)) / SCALE
+        return cash + np.cumsum(quantity) / SCALE * self.candles.close
+
+
+def _first_exit(candles: CandleWindow, start: int, take_profit: float, stop_loss: float) -> int:
+    """Index of the first candle from ``start`` reaching either level, or ``-1``."""
+
+    high, low = candles.high, candles.low
+    size = len(high)
+    scan = _SCAN
+    while start < size:
+        stop = min(size, start + scan)
+        hits = (high[start:stop] >= take_profit) | (low[start:stop] <= stop_loss)
+        first = int(hits.argmax())
+        if hits[first]:
+            return start + first
+        start = stop
+        scan *= 4
+    return -1
+
+
+class Backtester:
+    """Run a strategy over the candles of one symbol.
+
+    Parameters
+    ----------
+    strategy:
+        Strategy to test; a fresh instance is built for every run.
+    capital:
+        Starting cash in the quote currency (default 1,000,000 KRW).
+    fee:
+        Fee rate charged on the notional of every fill (default Upbit KRW
+        ``0.0005``).
+    slippage:
+        Adverse price move applied to every fill, as a fraction.
+    fraction:
+        Share of the available cash committed to each entry.
+    mode:
+        ``"vectorized"``, ``"stepwise"`` or ``"auto"`` (vectorized when the
+        strategy supports it).
+    """
+
+    def __init__(
+        self,
+        strategy: StrategySpec,
+        *,
+        capital: float | str = 1_000_000,
+        fee: float | str = "0.0005",
+        slippage: float | str = 0,
+        fraction: float | str = 1,
+        mode: Mode = "auto",
+    ) -> None:
+        self.strategy = strategy
+        self.capital = to_fixed(capital)
+        self.fee = to_fixed(fee)
+        self.slippage = to_fixed(slippage)
+        self.fraction = to_fixed(fraction)
+        if not 0 < self.fraction <= SCALE:
+            raise ValueError("fraction must be in (0, 1]")
+        self.mode = mode
+
+    def run(
+        self,
+        symbol: str,
+        candles: CandleWindow,
+        *,
+        start_ns: int | None = None,
+        end_ns: int | None = None,
+    ) -> BacktestResult:
+        """Backtest ``candles`` of ``symbol`` (sorted by opening time).
+
+        Missing candles between ``start_ns`` and ``end_ns`` (default: the
+        first and last candle) are reported in :attr:`BacktestResult.gaps`
+        and logged; the run goes ahead on the candles available.
+        """
+
+        logic = self.strategy.build()
+        vectorized = self.mode == "vectorized" or (self.mode == "auto" and logic.vectorized)
+        gaps = self._gaps(symbol, candles, start_ns, end_ns)
+        account = _Account(
+            symbol,
+            candles,
+            get_market_spec(symbol),
+            self.capital,
+            self.fee,
+            self.slippage,
+            self.fraction,
+        )
+        if len(candles.timestamps):
+            if vectorized:
+                self._run_vectorized(logic, account)
+            else:
+                self._run_stepwise(logic, account)
+            account.close_out()
+        return BacktestResult(
+            symbol=symbol,
+            interval=self.strategy.interval,
+            mode="vectorized" if vectorized else "stepwise",
+            capital=self.capital,
+            timestamps=candles.timestamps,
+            equity=account.equity(self.capital),
+            trades=account.trades,
+            position=account.ledger.position(symbol),
+            gaps=gaps,
+        )
+
+    def _gaps(
+        self, symbol: str, candles: CandleWindow, start_ns: int | None, end_ns: int | None
+    ) -> list[tuple[int, int]]:
+        timestamps = candles.timestamps
+        if start_ns is None and end_ns is None and not len(timestamps):
+            return []
+        interval = get_interval(self.strategy.interval)
+        coverage = coverage_of(timestamps, interval)
+        start = int(timestamps[0]) if start_ns is None else start_ns
+        end = int(timestamps[-1]) + interval.ns if end_ns is None else end_ns
+        gaps = coverage.gaps(start, end)
+        if gaps:
+            logger.warning(
+                "Backtest of %s %s: %d gaps in the candles, first %s",
+                symbol,
+                interval.name,
+                len(gaps),
+                gaps[0],
+            )
+        return gaps
+
+    @staticmethod
+    def _run_vectorized(logic: StrategyLogic, account: _Account) -> None:
+        candles = account.candles
+        signals = logic.signals(candles)
+        entries = np.flatnonzero(signals.entry)
+        start = 0
+        while True:
+            position = int(np.searchsorted(entries, start))
+            if position == len(entries):
+                return
+            index = int(entries[position])
+            decision = Decision(
+                "buy",
+                float(signals.entry_price[index]),
+                float(signals.take_profit[index]),
+                float(signals.stop_loss[index]),
+            )
+            if not account.buy(index, decision):
+                if not account.funded:
+                    return
+                start = index + 1
+                continue
+            exit_index = _first_exit(candles, index + 1, decision.take_profit, decision.stop_loss)
+            if exit_index < 0:
+                return
+            price, reason = account.exit_at(exit_index)
+            account.sell(exit_index, price, reason)
+            # No re-entry on the candle that closed the trade.
+            start = exit_index + 1
+
+    def _run_stepwise(self, logic: StrategyLogic, account: _Account) -> None:
+        candles = account.candles
+        symbol = account.symbol
+        lookback = logic.lookback
+        indicators = IndicatorCache()
+        columns = tuple(candles)
+        exited = -1
+        for index in range(len(candles.timestamps)):
+            if account.entry is not None and account.entry[0] < index:
+                hit = account.exit_at(index)
+                if hit is not None:
+                    account.sell(index, *hit)
+                    exited = index
+            first = max(index + 1 - lookback, 0)
+            window = CandleWindow(*(column[first : index + 1] for column in columns))
+            result = logic.evaluate(symbol, window, indicators)
+            if result is None:
+                continue
+            decisions: Sequence[Decision] = (
+                (result,) if isinstance(result, Decision) else result
+            )
+            for decision in decisions:
+                if decision.side == "buy":
+                    if account.entry is None and exited != index:
+                        account.buy(index, decision)
+                elif account.entry is not None:
+                    account.sell(index, decision.entry_price, "signal")
+                    exited = index
+
+
+__all__ = ["BacktestResult", "Backtester", "Trade"]
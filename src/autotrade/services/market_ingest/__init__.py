@@ -0,0 +1,41 @@
+"""Market data ingest service (Upbit WebSocket feeds onto the event bus)."""
+
+from .backfill import (
+    BackfillReport,
+    BackfillScheduler,
+    GapBackfiller,
+    PageRequest,
+    RateLimiter,
+    backfill,
+    find_gaps,
+    plan_requests,
+)
+from .engine import DEFAULT_CHANNELS, Gap, IngestEngine, IngestStats, shard_markets
+from .upbit import (
+    fetch_krw_markets,
+    fetch_orderbooks,
+    parse_frames,
+    split_messages,
+    subscription_message,
+)
+
+__all__ = [
+    "BackfillReport",
+    "BackfillScheduler",
+    "DEFAULT_CHANNELS",
+    "Gap",
+    "GapBackfiller",
+    "IngestEngine",
+    "IngestStats",
+    "PageRequest",
+    "RateLimiter",
+    "backfill",
+    "fetch_krw_markets",
+    "fetch_orderbooks",
+    "find_gaps",
+    "parse_frames",
+    "plan_requests",
+    "shard_markets",
+    "split_messages",
+    "subscription_message",
+]
@@ -0,0 +1,90 @@
+"""Run the Upbit ingest engine against the configured Redis bus.
+
+Usage: ``python -m autotrade.services.market_ingest [--markets KRW-BTC,...]
+[--channels trade] [--no-build-candles]``. All KRW markets are ingested by
+default and candles for ``Settings.candle_intervals`` are built from trades.
+Gaps detected after reconnects are queued onto one backfill scheduler (HTTP
+client and rate limiter) and filled into the ``candles`` table. Published and
+backfilled candles are written through to the Redis candle cache.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections.abc import Sequence
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m autotrade.services.market_ingest")
+    parser.add_argument("--markets", help="comma separated market codes (default: all KRW)")
+    parser.add_argument("--channels", default="trade")
+    parser.add_argument(
+        "--build-candles",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="build candles from trades (default: on)",
+    )
+    args = parser.parse_args(argv)
+
+    import asyncio
+
+    import httpx
+
+    from autotrade.core.config import get_settings
+    from autotrade.core.eventloop import run
+    from autotrade.core.logging import configure_logging
+    from autotrade.db.session import get_async_session
+    from autotrade.market_data.builder import CandleBuilder, parse_partial
+    from autotrade.market_data.cache import build_candle_cache
+    from autotrade.market_data.intervals import get_interval
+    from autotrade.messaging.redis import build_redis_bus
+
+    from .backfill import BackfillScheduler, GapBackfiller, database_sink
+    from .engine import Gap, IngestEngine
+    from .upbit import fetch_krw_markets
+
+    async def ingest() -> None:
+        session_factory = get_async_session()
+        minute = get_interval("1m")
+        cache = build_candle_cache(session_factory)
+        client = httpx.AsyncClient(timeout=10.0)
+        backfiller = GapBackfiller(
+            session_factory, BackfillScheduler(client, database_sink(session_factory, cache))
+        )
+
+        def on_gap(gap: Gap) -> None:
+            backfiller.submit(
+                gap.symbol, minute.name, minute.floor(gap.start_ns), minute.floor(gap.end_ns)
+            )
+
+        settings = get_settings()
+        builder = None
+        if args.build_candles:
+            builder = CandleBuilder(
+                settings.candle_intervals.split(","),
+                grace=settings.candle_grace,
+                partial=parse_partial(settings.candle_partial_updates),
+            )
+        markets = args.markets.split(",") if args.markets else await fetch_krw_markets()
+        engine = IngestEngine(
+            build_redis_bus(),
+            markets,
+            channels=args.channels.split(","),
+            on_gap=on_gap,
+            builder=builder,
+            cache=cache,
+        )
+        backfilling = asyncio.create_task(backfiller.run())
+        try:
+            await engine.run()
+        finally:
+            backfilling.cancel()
+            await client.aclose()
+
+    configure_logging()
+    run(ingest())
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - command line entry point
+    raise SystemExit(main())
@@ -0,0 +1,566 @@
+"""Rate-limit-aware REST backfill of missing candles.
+
+A backfill runs in three steps:
+
+1. :func:`detect_gaps` reads the series' run-length encoded coverage
+   (:class:`~autotrade.market_data.coverage.Coverage`) and returns the
+   missing ranges without scanning the ``candles`` table. Series stored
+   before coverage was tracked are scanned once to build it;
+   :func:`find_gaps` does the same from a list of opening times.
+2. :func:`plan_requests` covers those ranges with the fewest Upbit candle
+   pages (at most 200 candles ending at ``to``). It walks backwards from the
+   latest gap and extends each page over every gap it can reach. For
+   fixed-length windows this greedy choice is optimal.
+3. :class:`BackfillScheduler` fetches the pages with several concurrent
+   workers that share one :class:`RateLimiter`. Each page's candles are
+   streamed to a sink as soon as they arrive; :func:`database_sink` bulk
+   upserts them, records the page's whole span as covered and writes the
+   candles through to the Redis candle cache.
+
+:class:`RateLimiter` is a token bucket refilled at the configured rate. It
+also obeys Upbit's ``Remaining-Req`` header (``group=candles; min=..;
+sec=N``): tokens never exceed what the server says is left in the current
+second, and ``sec=0`` or an HTTP 429 pauses every worker for the rest of the
+window.
+
+:func:`backfill` runs one batch of ranges to completion. Long-running
+services report gaps to a :class:`GapBackfiller` instead, which queues them
+onto one HTTP client, scheduler and rate limiter built at startup.
+
+Upbit does not publish candles for periods without trades, so gaps in
+illiquid markets may come back empty; such pages are counted in
+:attr:`BackfillReport.empty_pages`. Because the fetched span is marked as
+covered, those buckets are not requested again by later backfills.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from autotrade.core.clock import from_ns, now_ns, to_epoch_ns
+from autotrade.core.config import get_settings
+from autotrade.core.metrics import counter
+from autotrade.core.records import CandleRecord
+from autotrade.market_data.coverage import Coverage
+from autotrade.market_data.intervals import Interval, get_interval
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from autotrade.market_data.cache import CandleCache
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 200
+"""Maximum candles Upbit returns per request."""
+
+_REQUESTS = counter(
+    "autotrade_backfill_requests_total", "Backfill REST requests by HTTP status.", ("status",)
+)
+_CANDLES = counter("autotrade_backfill_candles_total", "Candles received by backfills.")
+
+Sink = Callable[["PageRequest", list[CandleRecord]], Awaitable[Any]]
+
+
+class PageRequest(NamedTuple):
+    """One paged candle request: the ``count`` candles opening before ``to_ns``."""
+
+    symbol: str
+    interval: str
+    to_ns: int
+    count: int
+
+
+def find_gaps(
+    open_times: Iterable[int], interval: Interval, start_ns: int, end_ns: int
+) -> list[tuple[int, int]]:
+    """Return missing ``[start, end)`` ranges of candle openings.
+
+    ``open_times`` are the stored opening times (epoch ns, ascending). Only
+    openings in ``[start_ns, end_ns)`` on the interval grid are expected.
+    """
+
+    step = interval.ns
+    expected = interval.ceil(start_ns)
+    stop = interval.ceil(end_ns)
+    gaps: list[tuple[int, int]] = []
+    for opened in open_times:
+        slot = interval.floor(opened)
+        if slot < expected:
+            continue
+        if slot >= stop:
+            break
+        if slot > expected:
+            gaps.append((expected, slot))
+        expected = slot + step
+    if expected < stop:
+        gaps.append((expected, stop))
+    return gaps
+
+
+def plan_requests(
+    symbol: str,
+    interval: Interval,
+    gaps: Sequence[tuple[int, int]],
+    *,
+    page_size: int = PAGE_SIZE,
+) -> list[PageRequest]:
+    """Cover ``gaps`` with the fewest pages of at most ``page_size`` candles."""
+
+    step = interval.ns
+    span = page_size * step
+    # Latest gap first; gaps are disjoint so this also orders their starts.
+    pending = sorted(gaps, key=lambda gap: gap[1], reverse=True)
+    requests: list[PageRequest] = []
+    index = 0
+    while index < len(pending):
+        end = pending[index][1]
+        floor = end - span
+        last = index
+        while last + 1 < len(pending) and pending[last + 1][1] > floor:
+            last += 1
+        lowest = max(pending[last][0], floor)
+        requests.append(PageRequest(symbol, interval.name, end, (end - lowest) // step))
+        if pending[last][0] < floor:
+            # The page ends inside this gap; continue with its remainder.
+            pending[last] = (pending[last][0], floor)
+            index = last
+        else:
+            index = last + 1
+    return requests
+
+
+def parse_remaining_req(header: str | None) -> dict[str, str]:
+    """Parse ``Remaining-Req: group=candles; min=1800; sec=9`` into a mapping."""
+
+    if not header:
+        return {}
+    fields = {}
+    for part in header.split(";"):
+        key, _, value = part.strip().partition("=")
+        if key:
+            fields[key] = value.strip()
+    return fields
+
+
+class RateLimiter:
+    """Async token bucket shared by concurrent REST workers.
+
+    Parameters
+    ----------
+    rate:
+        Tokens (requests) added per second.
+    burst:
+        Bucket capacity; defaults to ``rate``.
+    window:
+        Length in seconds of the server's counting window, used when the
+        server reports no remaining requests.
+    """
+
+    def __init__(self, rate: float, burst: int | None = None, *, window: float = 1.0) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = float(burst or max(int(rate), 1))
+        self.window = window
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent (FIFO across waiters)."""
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def observe(self, remaining: int | None) -> None:
+        """Clamp tokens to the server-reported requests left in this window."""
+
+        if remaining is None:
+            return
+        self._refill(time.monotonic())
+        if remaining <= 0:
+            self.pause(self.window)
+        else:
+            self._tokens = min(self._tokens, float(remaining))
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for ``seconds`` (e.g. after HTTP 429)."""
+
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = now
+
+
+def candles_from_response(
+    document: Sequence[Mapping[str, Any]], interval: str
+) -> list[CandleRecord]:
+    """Convert an Upbit candle response (newest first) to ascending records."""
+
+    records = [
+        CandleRecord(
+            item["market"],
+            interval,
+            to_epoch_ns(item["candle_date_time_utc"]),
+            item["opening_price"],
+            item["high_price"],
+            item["low_price"],
+            item["trade_price"],
+            item["candle_acc_trade_volume"],
+        )
+        for item in document
+    ]
+    records.sort(key=lambda record: record.ts_ns)
+    return records
+
+
+@dataclass(slots=True)
+class BackfillReport:
+    """Outcome of a backfill run."""
+
+    requests: int = 0
+    candles: int = 0
+    empty_pages: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    failed: list[PageRequest] = field(default_factory=list)
+
+
+class BackfillScheduler:
+    """Fetch candle pages concurrently under a shared rate limit.
+
+    Parameters
+    ----------
+    client:
+        ``httpx.AsyncClient`` used for requests.
+    sink:
+        Awaited with each fetched page and its records (ascending, possibly
+        empty); see :func:`database_sink`.
+    limiter:
+        Shared :class:`RateLimiter`; defaults to ``Settings.backfill_rate_limit``
+        requests per second.
+    concurrency:
+        Number of worker tasks; defaults to ``Settings.backfill_concurrency``.
+    base_url:
+        REST API root; defaults to ``Settings.upbit_rest_url``.
+    max_attempts:
+        Attempts per page for transport errors and 5xx responses.
+    max_rate_limited:
+        HTTP 429 responses tolerated per page; each one pauses the limiter
+        before the page is retried.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        sink: Sink,
+        *,
+        limiter: RateLimiter | None = None,
+        concurrency: int | None = None,
+        base_url: str | None = None,
+        max_attempts: int = 3,
+        max_rate_limited: int = 10,
+    ) -> None:
+        settings = get_settings()
+        self.client = client
+        self.sink = sink
+        self.limiter = limiter or RateLimiter(settings.backfill_rate_limit)
+        self.concurrency = concurrency or settings.backfill_concurrency
+        self.base_url = (base_url or settings.upbit_rest_url).rstrip("/")
+        self.max_attempts = max_attempts
+        self.max_rate_limited = max_rate_limited
+
+    async def run(self, requests: Iterable[PageRequest]) -> BackfillReport:
+        """Fetch every page, streaming records to the sink as pages complete."""
+
+        report = BackfillReport()
+        pending: asyncio.Queue[PageRequest] = asyncio.Queue()
+        for request in requests:
+            pending.put_nowait(request)
+        # Bounded so slow writes apply back-pressure to the fetchers.
+        results: asyncio.Queue[tuple[PageRequest, list[CandleRecord]] | None] = asyncio.Queue(
+            maxsize=self.concurrency * 2
+        )
+
+        async def worker() -> None:
+            while True:
+                try:
+                    request = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                records = await self._fetch(request, report)
+                if records is not None:
+                    await results.put((request, records))
+
+        async def writer() -> None:
+            while (page := await results.get()) is not None:
+                await self.sink(*page)
+
+        writing = asyncio.create_task(writer())
+        fetching = asyncio.ensure_future(
+            asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        )
+        try:
+            await asyncio.wait({writing, fetching}, return_when=asyncio.FIRST_COMPLETED)
+            if writing.done():  # the sink failed; stop fetching pages
+                fetching.cancel()
+                writing.result()
+            await fetching
+            await results.put(None)
+            await writing
+        finally:
+            fetching.cancel()
+            writing.cancel()
+        return report
+
+    async def _fetch(
+        self, request: PageRequest, report: BackfillReport
+    ) -> list[CandleRecord] | None:
+        interval = get_interval(request.interval)
+        url = f"{self.base_url}/v1/candles/{interval.path}"
+        params = {
+            "market": request.symbol,
+            "to": from_ns(request.to_ns).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "count": request.count,
+        }
+        attempts = throttled = 0
+        while True:
+            await self.limiter.acquire()
+            report.requests += 1
+            try:
+                response = await self.client.get(url, params=params)
+            except Exception as exc:  # httpx.TransportError and timeouts
+                status: int | str = type(exc).__name__
+                response = None
+            else:
+                status = response.status_code
+                remaining = parse_remaining_req(response.headers.get("Remaining-Req")).get("sec")
+                self.limiter.observe(int(remaining) if remaining is not None else None)
+            _REQUESTS.labels(status).inc()
+
+            if response is not None and status == 200:
+                records = candles_from_response(response.json(), interval.name)
+                if not records:
+                    report.empty_pages += 1
+                report.candles += len(records)
+                _CANDLES.inc(len(records))
+                return records
+            if status == 429:
+                report.rate_limited += 1
+                self.limiter.pause(self.limiter.window)
+                throttled += 1
+                if throttled < self.max_rate_limited:
+                    continue
+                logger.error("Backfill request %s was rate limited %d times", request, throttled)
+                report.failed.append(request)
+                return None
+            attempts += 1
+            retryable = response is None or status >= 500
+            if not retryable or attempts >= self.max_attempts:
+                logger.error("Backfill request %s failed with %s", request, status)
+                report.failed.append(request)
+                return None
+            report.retries += 1
+            await asyncio.sleep(0.5 * 2 ** (attempts - 1))
+
+
+def database_sink(session_factory: Any, cache: CandleCache | None = None) -> Sink:
+    """Return a sink upserting each page and marking its span as covered.
+
+    The span excludes the bucket still in progress, which is only covered
+    once it has closed. With ``cache`` the committed candles are written
+    through to it; cache failures are logged and leave the page stored.
+    """
+
+    from autotrade.db.candles import merge_coverage, upsert_candles
+    from autotrade.db.session import session_scope
+
+    async def sink(request: PageRequest, records: list[CandleRecord]) -> None:
+        interval = get_interval(request.interval)
+        closed = interval.floor(now_ns())
+        covered = Coverage(interval)
+        covered.add_range(request.to_ns - request.count * interval.ns, min(request.to_ns, closed))
+        # Sparse markets return candles from before the page span as well.
+        covered.add(record.ts_ns for record in records if record.ts_ns < closed)
+        async with session_scope(session_factory) as session:
+            if records:
+                await upsert_candles(session, records, coverage=False)
+            if len(covered):
+                await merge_coverage(session, request.symbol, interval.name, covered)
+        if cache is not None and records:
+            try:
+                await cache.write_many([record.to_payload() for record in records])
+            except Exception:
+                logger.exception(
+                    "Writing %d backfilled %s candles to the cache failed",
+                    len(records),
+                    request.symbol,
+                )
+
+    return sink
+
+
+async def detect_gaps(
+    session_factory: Any, symbol: str, interval: Interval, start_ns: int, end_ns: int
+) -> list[tuple[int, int]]:
+    """Return the ranges of ``symbol`` candles not yet ingested."""
+
+    from autotrade.db.candles import load_coverage, rebuild_coverage
+    from autotrade.db.session import session_scope
+
+    async with session_scope(session_factory) as session:
+        coverage = await load_coverage(session, symbol, interval.name)
+        if coverage is None:
+            coverage = await rebuild_coverage(session, symbol, interval.name)
+    return coverage.gaps(start_ns, end_ns)
+
+
+async def plan_backfill(
+    session_factory: Any,
+    symbols: Iterable[str],
+    intervals: Iterable[str],
+    start_ns: int,
+    end_ns: int,
+) -> list[PageRequest]:
+    """Return the pages covering every gap of each ``(symbol, interval)``."""
+
+    requests: list[PageRequest] = []
+    for name in intervals:
+        interval = get_interval(name)
+        for symbol in symbols:
+            gaps = await detect_gaps(session_factory, symbol, interval, start_ns, end_ns)
+            requests.extend(plan_requests(symbol, interval, gaps))
+    return requests
+
+
+async def backfill(
+    session_factory: Any,
+    symbols: Iterable[str],
+    intervals: Iterable[str],
+    start_ns: int,
+    end_ns: int,
+    *,
+    client: Any = None,
+    **scheduler_options: Any,
+) -> BackfillReport:
+    """Detect, plan and fill candle gaps for every ``(symbol, interval)``."""
+
+    requests = await plan_backfill(session_factory, symbols, intervals, start_ns, end_ns)
+    if not requests:
+        return BackfillReport()
+    logger.info("Backfilling %d candle pages", len(requests))
+
+    import httpx
+
+    owned = client is None
+    client = client or httpx.AsyncClient(timeout=10.0)
+    try:
+        scheduler = BackfillScheduler(client, database_sink(session_factory), **scheduler_options)
+        return await scheduler.run(requests)
+    finally:
+        if owned:
+            await client.aclose()
+
+
+class GapBackfiller:
+    """Queue gaps found at runtime onto one long-lived :class:`BackfillScheduler`.
+
+    :meth:`submit` is cheap and synchronous so it can be called from ingest
+    callbacks; :meth:`run` drains the queue, planning every gap queued so far
+    as one batch, so all backfills share the scheduler's HTTP client and rate
+    limiter.
+
+    Parameters
+    ----------
+    session_factory:
+        Async session factory used to read coverage (and by the scheduler's
+        sink, typically :func:`database_sink`).
+    scheduler:
+        Scheduler fetching the planned pages.
+    """
+
+    def __init__(self, session_factory: Any, scheduler: BackfillScheduler) -> None:
+        self.session_factory = session_factory
+        self.scheduler = scheduler
+        self._pending: asyncio.Queue[tuple[str, str, int, int]] = asyncio.Queue()
+
+    def submit(self, symbol: str, interval: str, start_ns: int, end_ns: int) -> None:
+        """Queue the ``[start_ns, end_ns)`` range of ``symbol`` candles."""
+
+        self._pending.put_nowait((symbol, interval, start_ns, end_ns))
+
+    async def run(self) -> None:
+        """Backfill queued gaps until cancelled; failed batches are logged."""
+
+        while True:
+            batch = [await self._pending.get()]
+            while not self._pending.empty():
+                batch.append(self._pending.get_nowait())
+            try:
+                report = await self.drain(batch)
+            except Exception:
+                logger.exception("Backfill of %d gaps failed", len(batch))
+            else:
+                if report.failed:
+                    logger.warning("Backfill left %d pages unfilled", len(report.failed))
+
+    async def drain(self, gaps: Iterable[tuple[str, str, int, int]]) -> BackfillReport:
+        """Plan and fetch ``gaps`` (``(symbol, interval, start_ns, end_ns)``).
+
+        Missing ranges of the same series are planned together so nearby
+        gaps share pages.
+        """
+
+        missing: dict[tuple[str, str], list[tuple[int, int]]] = {}
+        for symbol, name, start_ns, end_ns in gaps:
+            interval = get_interval(name)
+            missing.setdefault((symbol, interval.name), []).extend(
+                await detect_gaps(self.session_factory, symbol, interval, start_ns, end_ns)
+            )
+        requests: list[PageRequest] = []
+        for (symbol, name), ranges in missing.items():
+            interval = get_interval(name)
+            merged = Coverage(interval)
+            for start_ns, end_ns in ranges:
+                merged.add_range(start_ns, end_ns)
+            requests.extend(plan_requests(symbol, interval, merged.spans()))
+        if not requests:
+            return BackfillReport()
+        logger.info("Backfilling %d candle pages", len(requests))
+        return await self.scheduler.run(requests)
+
+
+__all__ = [
+    "BackfillReport",
+    "BackfillScheduler",
+    "GapBackfiller",
+    "PAGE_SIZE",
+    "PageRequest",
+    "RateLimiter",
+    "backfill",
+    "candles_from_response",
+    "database_sink",
+    "detect_gaps",
+    "find_gaps",
+    "parse_remaining_req",
+    "plan_backfill",
+    "plan_requests",
+]
@@ -0,0 +1,546 @@
+"""Multiplexed WebSocket ingest engine publishing market data to the bus.
+
+:class:`IngestEngine` splits the market list into shards of
+``markets_per_connection`` and keeps one WebSocket connection per shard, each
+subscribed to every configured channel for its markets. Connection readers
+only append raw frames to a shared buffer; a single pump task swaps the buffer
+out, parses everything that accumulated in one pass (see
+:func:`~autotrade.services.market_ingest.upbit.parse_frames`) and publishes
+the resulting events with one ``publish_many`` round trip. Batches therefore
+grow with load and shrink to single frames when the feed is quiet.
+
+Reliability:
+
+* Dropped connections are re-established with jittered exponential backoff
+  and the shard's subscription is sent again.
+* Trades replayed after a resubscription are dropped as duplicates. Each
+  market remembers the last ``dedupe_window`` ``sequential_id`` values, so
+  trades arriving out of order are still accepted; ids older than the window
+  count as duplicates.
+* The first new trade of each market after a reconnect is compared with the
+  last one seen before it. The window in between is reported as a
+  :class:`Gap` to ``on_gap`` so it can be backfilled from the REST API.
+* The frame buffer holds at most ``max_buffer`` frames. While the pump is
+  stuck (e.g. retrying an unavailable bus) further frames are dropped and
+  counted, and the affected markets are treated as reconnected so the hole
+  is reported as a gap.
+* Exceptions raised by ``handlers`` or ``on_gap`` are logged and do not stop
+  the pump. A market whose candles fail to close on the builder clock is
+  logged, its open buckets are dropped and their span is reported as a
+  :class:`Gap`; the other markets still close.
+
+Trades are published as ``market.tick.ingested`` and candle updates as
+``market.candle.ingested`` (coalesced to the latest update per candle within
+a batch). With a :class:`~autotrade.market_data.builder.CandleBuilder` the
+engine also derives candles for every configured interval from the accepted
+trades and publishes them as they close. With a
+:class:`~autotrade.market_data.cache.CandleCache` every published candle is
+also written through to Redis; cache failures are logged and do not hold up
+publishing. Ticker and orderbook messages are handed to ``handlers``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import logging
+import random
+from collections import deque
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from datetime import tzinfo
+from typing import TYPE_CHECKING, Any
+
+from autotrade.core.clock import from_ns, get_zone, now, now_ns
+from autotrade.core.config import get_settings
+from autotrade.core.metrics import counter, histogram
+from autotrade.core.records import CandleRecord, TickRecord
+from autotrade.market_data.builder import CandleBuilder
+from autotrade.messaging.base import EventBusProtocol
+from autotrade.messaging.events import EventName, resolve_stream_name
+
+from .upbit import Frame, parse_frames, split_messages, subscription_message
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from autotrade.market_data.cache import CandleCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNELS: tuple[str, ...] = ("trade", "candle.1m")
+
+_FRAMES = counter("autotrade_ingest_frames_total", "WebSocket frames received.")
+_DUPLICATES = counter(
+    "autotrade_ingest_duplicate_trades_total", "Trades dropped as already seen."
+)
+_DROPPED = counter(
+    "autotrade_ingest_dropped_frames_total", "Frames dropped because the buffer was full."
+)
+_GAPS = counter("autotrade_ingest_gaps_total", "Per-market gaps detected after reconnects.")
+_RECONNECTS = counter("autotrade_ingest_reconnects_total", "WebSocket reconnections.")
+_BATCH_FRAMES = histogram(
+    "autotrade_ingest_batch_frames",
+    "Frames parsed per ingest batch.",
+    scale=1,
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Gap:
+    """Window of possibly missed trades for one market (epoch nanoseconds).
+
+    Gaps reported for candles that failed to close span the dropped buckets
+    instead.
+    """
+
+    symbol: str
+    start_ns: int
+    """Execution time of the last trade received before the disconnect."""
+    end_ns: int
+    """Execution time of the first trade received after the reconnect."""
+
+
+@dataclass(slots=True)
+class IngestStats:
+    """Counters describing the engine's progress."""
+
+    frames: int = 0
+    batches: int = 0
+    trades: int = 0
+    candles: int = 0
+    duplicates: int = 0
+    gaps: int = 0
+    reconnects: int = 0
+    published: int = 0
+    errors: int = 0
+    dropped: int = 0
+
+
+class _Reconnected:
+    """Buffer marker: frames after it may follow missed frames.
+
+    Inserted after a reconnect and after frames were dropped from a full
+    buffer.
+    """
+
+    __slots__ = ("markets",)
+
+    def __init__(self, markets: Sequence[str]) -> None:
+        self.markets = markets
+
+
+class _RecentIds:
+    """The last ``size`` trade ids of one market, for duplicate detection.
+
+    Ids at or below the newest id evicted from the window are too old to
+    tell apart and are reported as seen.
+    """
+
+    __slots__ = ("_ids", "_order", "_floor")
+
+    def __init__(self, size: int) -> None:
+        self._ids: set[int] = set()
+        self._order: deque[int] = deque(maxlen=size)
+        self._floor: int | None = None
+
+    def add(self, seq: int) -> bool:
+        """Record ``seq``; returns ``False`` if it was already seen."""
+
+        if seq in self._ids or (self._floor is not None and seq <= self._floor):
+            return False
+        order = self._order
+        if len(order) == order.maxlen:
+            evicted = order[0]
+            self._ids.discard(evicted)
+            if self._floor is None or evicted > self._floor:
+                self._floor = evicted
+        order.append(seq)
+        self._ids.add(seq)
+        return True
+
+
+def shard_markets(markets: Sequence[str], size: int) -> list[list[str]]:
+    """Split ``markets`` into consecutive shards of at most ``size`` markets."""
+
+    if size < 1:
+        raise ValueError("size must be at least 1")
+    ordered = sorted(dict.fromkeys(markets))
+    return [ordered[start : start + size] for start in range(0, len(ordered), size)]
+
+
+def _default_connect(url: str) -> Any:
+    try:
+        from websockets.asyncio.client import connect
+    except ModuleNotFoundError:  # pragma: no cover - requires websockets package
+        raise ModuleNotFoundError(
+            "The 'websockets' package is required for the market ingest engine."
+        ) from None
+    return connect(url, max_size=2**22, ping_interval=20, ping_timeout=20)
+
+
+class IngestEngine:
+    """Stream Upbit market data for many markets onto the event bus.
+
+    Parameters
+    ----------
+    bus:
+        Event bus receiving tick and candle events.
+    markets:
+        Market codes such as ``KRW-BTC``.
+    channels:
+        Upbit channels to subscribe (``trade``, ``candle.1m``, ``ticker``,
+        ``orderbook``, ...).
+    url:
+        WebSocket endpoint; defaults to ``Settings.upbit_ws_url``.
+    markets_per_connection:
+        Shard size; defaults to ``Settings.ingest_markets_per_connection``.
+    connect:
+        ``connect(url)`` returning an async context manager yielding a
+        WebSocket; defaults to :func:`websockets.asyncio.client.connect`.
+    handlers:
+        Callbacks receiving the decoded messages of other channels per batch,
+        keyed by channel (e.g. ``{"orderbook": book.apply_messages}``).
+    on_gap:
+        Called (or awaited) with each detected :class:`Gap`.
+    builder:
+        Optional candle builder fed with every accepted trade. Closed candles
+        (and in-progress ones when the builder tracks them) are published;
+        quiet markets are closed by the clock every ``builder_tick`` seconds.
+    cache:
+        Optional candle cache receiving every published candle.
+    max_batch:
+        Maximum events per ``publish_many`` call; readers also yield to the
+        pump once this many frames are buffered.
+    max_buffer:
+        Frames buffered for the pump before new frames are dropped.
+    dedupe_window:
+        Recent trade ids remembered per market for duplicate detection.
+    """
+
+    def __init__(
+        self,
+        bus: EventBusProtocol,
+        markets: Sequence[str],
+        *,
+        channels: Sequence[str] = DEFAULT_CHANNELS,
+        url: str | None = None,
+        markets_per_connection: int | None = None,
+        connect: Callable[[str], Any] | None = None,
+        handlers: Mapping[str, Callable[[list[dict[str, Any]]], Any]] | None = None,
+        on_gap: Callable[[Gap], Any] | None = None,
+        builder: CandleBuilder | None = None,
+        builder_tick: float = 1.0,
+        cache: CandleCache | None = None,
+        producer: str = "market_ingest",
+        max_batch: int = 1000,
+        max_buffer: int = 100_000,
+        dedupe_window: int = 1024,
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 30.0,
+        zone: tzinfo | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.bus = bus
+        self.channels = tuple(channels)
+        self.url = url or settings.upbit_ws_url
+        self.shards = shard_markets(
+            markets, markets_per_connection or settings.ingest_markets_per_connection
+        )
+        self.handlers = dict(handlers or {})
+        self.on_gap = on_gap
+        self.builder = builder
+        self.builder_tick = builder_tick
+        self.cache = cache
+        self.producer = producer
+        self.max_batch = max_batch
+        self.max_buffer = max_buffer
+        self.dedupe_window = dedupe_window
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.stats = IngestStats()
+        self._connect = connect or _default_connect
+        self._zone = zone or get_zone()
+        self._tick_stream = resolve_stream_name(EventName.MARKET_TICK_INGESTED)
+        self._candle_stream = resolve_stream_name(EventName.MARKET_CANDLE_INGESTED)
+        self._buffer: list[Frame | _Reconnected] = []
+        self._wakeup = asyncio.Event()
+        self._seen: dict[str, _RecentIds] = {}
+        self._last_ts: dict[str, int] = {}
+        self._resumed: set[str] = set()
+        self.connected = 0
+
+    async def run(self) -> None:
+        """Run all connections and the publishing pump until cancelled."""
+
+        tasks = [
+            asyncio.create_task(self._connection(index, shard), name=f"ingest-ws-{index}")
+            for index, shard in enumerate(self.shards)
+        ]
+        tasks.append(asyncio.create_task(self._pump(), name="ingest-pump"))
+        if self.builder is not None:
+            tasks.append(asyncio.create_task(self._close_candles(), name="ingest-candles"))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _connection(self, index: int, markets: list[str]) -> None:
+        delay = self.reconnect_delay
+        subscribed = False
+        request = subscription_message(markets, self.channels)
+        wakeup = self._wakeup
+        max_batch = self.max_batch
+        max_buffer = self.max_buffer
+        while True:
+            try:
+                async with self._connect(self.url) as websocket:
+                    await websocket.send(request)
+                    if subscribed:
+                        self.stats.reconnects += 1
+                        _RECONNECTS.inc()
+                        self._buffer.append(_Reconnected(markets))
+                    subscribed = True
+                    delay = self.reconnect_delay
+                    self.connected += 1
+                    dropping = False
+                    try:
+                        async for frame in websocket:
+                            buffer = self._buffer
+                            if len(buffer) >= max_buffer:
+                                if not dropping:
+                                    dropping = True
+                                    logger.warning(
+                                        "Ingest buffer full; dropping frames of WebSocket %d",
+                                        index,
+                                    )
+                                self.stats.dropped += 1
+                                _DROPPED.inc()
+                                await asyncio.sleep(0)
+                                continue
+                            if dropping:
+                                dropping = False
+                                buffer.append(_Reconnected(markets))
+                            buffer.append(frame)
+                            wakeup.set()
+                            if len(buffer) >= max_batch:
+                                # Frames already queued by the socket are read
+                                # without suspending; let the pump drain them.
+                                await asyncio.sleep(0)
+                    finally:
+                        self.connected -= 1
+                logger.warning("Upbit WebSocket %d closed; reconnecting", index)
+            except Exception as exc:  # OS, timeout, websockets protocol/closed errors
+                logger.warning("Upbit WebSocket %d dropped: %r; reconnecting", index, exc)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _pump(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            pending, self._buffer = self._buffer, []
+            try:
+                await self.process(pending)
+            except Exception:
+                logger.exception("Processing %d ingest frames failed", len(pending))
+
+    async def _close_candles(self) -> None:
+        while True:
+            await asyncio.sleep(self.builder_tick)
+            await self._advance(now_ns())
+
+    async def _advance(self, mark: int) -> int:
+        """Close the builder's due candles per market and publish them."""
+
+        builder = self.builder
+        closed: list[CandleRecord] = []
+        gaps: list[Gap] = []
+        for symbol in builder.symbols:
+            try:
+                closed.extend(builder.advance(mark, (symbol,)))
+            except Exception:
+                logger.exception("Closing %s candles failed", symbol)
+                self.stats.errors += 1
+                closed.extend(builder.drain())
+                span = builder.discard(symbol)
+                if span is not None:
+                    gaps.append(Gap(symbol, *span))
+        for gap in gaps:
+            await self._report_gap(gap)
+        if not closed:
+            return 0
+        items = self._candle_items(self._envelope(), closed)
+        await self._publish(items)
+        self.stats.candles += len(items)
+        self.stats.published += len(items)
+        await self._write_through(closed)
+        return len(items)
+
+    async def process(self, items: Sequence[Frame | _Reconnected]) -> int:
+        """Parse and publish buffered frames; returns the events published."""
+
+        published = 0
+        start = 0
+        for position, item in enumerate(items):
+            if isinstance(item, _Reconnected):
+                published += await self._process_frames(items[start:position])
+                self._resumed.update(m for m in item.markets if m in self._last_ts)
+                start = position + 1
+        published += await self._process_frames(items[start:])
+        return published
+
+    async def _process_frames(self, frames: Sequence[Frame]) -> int:
+        if not frames:
+            return 0
+        self.stats.frames += len(frames)
+        self.stats.batches += 1
+        _FRAMES.inc(len(frames))
+        _BATCH_FRAMES.record(len(frames))
+        batch = split_messages(parse_frames(frames))
+        self.stats.errors += batch.errors
+
+        envelope = self._envelope()
+        builder = self.builder
+        items: list[tuple[str, str]] = []
+        gaps: list[Gap] = []
+        tick_name = EventName.MARKET_TICK_INGESTED.value
+        seen = self._seen
+        last_ts = self._last_ts
+        for seq, tick in batch.trades:
+            symbol = tick.symbol
+            recent = seen.get(symbol)
+            if recent is None:
+                recent = seen[symbol] = _RecentIds(self.dedupe_window)
+            if not recent.add(seq):
+                self.stats.duplicates += 1
+                _DUPLICATES.inc()
+                continue
+            if symbol in self._resumed:
+                self._resumed.discard(symbol)
+                gaps.append(Gap(symbol, last_ts[symbol], tick.ts_ns))
+            if tick.ts_ns > last_ts.get(symbol, tick.ts_ns - 1):
+                last_ts[symbol] = tick.ts_ns
+            if builder is not None:
+                builder.add(tick)
+            envelope["name"] = tick_name
+            envelope["payload"] = self._tick_payload(tick)
+            items.append((self._tick_stream, json.dumps(envelope)))
+        self.stats.trades += len(items)
+
+        # Upbit pushes the in-progress candle on every trade; keep the latest.
+        latest: dict[tuple[str, str, int], CandleRecord] = {}
+        candles = batch.candles
+        if builder is not None:
+            candles = candles + builder.drain()
+            if builder.partial:
+                candles += builder.in_progress()
+        for candle in candles:
+            latest[candle.symbol, candle.interval, candle.ts_ns] = candle
+        items.extend(self._candle_items(envelope, latest.values()))
+        self.stats.candles += len(latest)
+
+        for channel, messages in batch.other.items():
+            handler = self.handlers.get(channel)
+            if handler is not None:
+                try:
+                    result = handler(messages)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception:
+                    logger.exception("Ingest %s handler failed", channel)
+        for gap in gaps:
+            await self._report_gap(gap)
+        for start in range(0, len(items), self.max_batch):
+            await self._publish(items[start : start + self.max_batch])
+        self.stats.published += len(items)
+        await self._write_through(list(latest.values()))
+        return len(items)
+
+    async def _publish(self, items: list[tuple[str, str]]) -> None:
+        delay = self.reconnect_delay
+        while True:
+            try:
+                await self.bus.publish_many(items)
+                return
+            except Exception as exc:  # keep the batch and retry until the bus recovers
+                logger.error("Publishing %d ingest events failed: %s; retrying", len(items), exc)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _write_through(self, candles: Sequence[CandleRecord]) -> None:
+        if self.cache is None or not candles:
+            return
+        try:
+            await self.cache.write_many([candle.to_payload(self._zone) for candle in candles])
+        except Exception:
+            logger.exception("Writing %d candles to the cache failed", len(candles))
+
+    async def _report_gap(self, gap: Gap) -> None:
+        self.stats.gaps += 1
+        _GAPS.inc()
+        logger.info(
+            "Possible trade gap for %s between %d and %d",
+            gap.symbol,
+            gap.start_ns,
+            gap.end_ns,
+        )
+        if self.on_gap is not None:
+            try:
+                result = self.on_gap(gap)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Gap callback failed for %s", gap.symbol)
+
+    def _envelope(self) -> dict[str, Any]:
+        snapshot = now()
+        return {
+            "version": "1.0.0",
+            "producer": self.producer,
+            "produced_at_utc": snapshot.utc.isoformat(),
+            "produced_at_kst": snapshot.kst.isoformat(),
+            "correlation_id": None,
+            "causation_id": None,
+        }
+
+    def _candle_items(
+        self, envelope: dict[str, Any], candles: Iterable[CandleRecord]
+    ) -> list[tuple[str, str]]:
+        envelope["name"] = EventName.MARKET_CANDLE_INGESTED.value
+        items = []
+        for candle in candles:
+            envelope["payload"] = self._candle_payload(candle)
+            items.append((self._candle_stream, json.dumps(envelope)))
+        return items
+
+    def _tick_payload(self, tick: TickRecord) -> dict[str, Any]:
+        executed_at = from_ns(tick.ts_ns)
+        return {
+            "symbol": tick.symbol,
+            "price": tick.price,
+            "size": tick.size,
+            "timestamp_utc": executed_at.isoformat(),
+            "timestamp_kst": executed_at.astimezone(self._zone).isoformat(),
+            "source": "upbit",
+        }
+
+    def _candle_payload(self, candle: CandleRecord) -> dict[str, Any]:
+        opened_at = from_ns(candle.ts_ns)
+        return {
+            "symbol": candle.symbol,
+            "interval": candle.interval,
+            "open": candle.open,
+            "high": candle.high,
+            "low": candle.low,
+            "close": candle.close,
+            "volume": candle.volume,
+            "timestamp_utc": opened_at.isoformat(),
+            "timestamp_kst": opened_at.astimezone(self._zone).isoformat(),
+            "source": candle.source,
+        }
+
+
+__all__ = ["DEFAULT_CHANNELS", "Gap", "IngestEngine", "IngestStats", "shard_markets"]
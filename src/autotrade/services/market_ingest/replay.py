@@ -0,0 +1,123 @@
+"""Local WebSocket server replaying recorded Upbit frames.
+
+Recordings are JSON lines of ``{"t": <seconds since start>, "frame": {...}}``.
+:class:`ReplayServer` serves them on localhost so the ingest engine can be
+tested and benchmarked without touching the exchange. Each connection waits
+for a subscription request and then replays, in recorded order, the frames of
+the markets it subscribed to, compressed in time by ``speed`` (``0`` sends as
+fast as possible).
+
+``drop_after`` closes each shard's first connection after that many frames.
+The next connection resumes ``overlap`` frames earlier, which imitates how
+Upbit resends recent trades after a resubscription.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Any
+
+Recording = list[tuple[float, bytes]]
+
+
+def load_recording(path: str | Path) -> Recording:
+    """Read a JSON-lines recording into ``(offset_seconds, frame)`` pairs."""
+
+    frames: Recording = []
+    with open(path, "rb") as handle:
+        for line in handle:
+            if line.strip():
+                entry = json.loads(line)
+                frames.append((float(entry["t"]), json.dumps(entry["frame"]).encode()))
+    return frames
+
+
+def save_recording(path: str | Path, frames: Iterable[tuple[float, Any]]) -> None:
+    """Write ``(offset_seconds, message)`` pairs as a JSON-lines recording."""
+
+    with open(path, "w", encoding="utf-8") as handle:
+        for offset, frame in frames:
+            message = json.loads(frame) if isinstance(frame, (bytes, str)) else frame
+            handle.write(json.dumps({"t": offset, "frame": message}) + "\n")
+
+
+class ReplayServer:
+    """Serve a recording over WebSocket on ``host`` (random free port).
+
+    Parameters
+    ----------
+    frames:
+        ``(offset_seconds, frame)`` pairs sorted by offset.
+    speed:
+        Time compression factor; ``0`` disables pacing.
+    drop_after:
+        Close each shard's first connection after this many frames.
+    overlap:
+        Frames replayed again after a dropped connection.
+    """
+
+    def __init__(
+        self,
+        frames: Sequence[tuple[float, bytes]],
+        *,
+        speed: float = 0.0,
+        drop_after: int | None = None,
+        overlap: int = 1,
+        host: str = "127.0.0.1",
+    ) -> None:
+        self.frames = [(offset, json.loads(frame)["code"], frame) for offset, frame in frames]
+        self.speed = speed
+        self.drop_after = drop_after
+        self.overlap = overlap
+        self.host = host
+        self.connections = 0
+        self.subscriptions: list[Any] = []
+        self._resume: dict[frozenset[str], int] = {}
+        self._server: Any = None
+        self.url = ""
+
+    async def __aenter__(self) -> "ReplayServer":
+        from websockets.asyncio.server import serve
+
+        self._server = await serve(self._handle, self.host, 0, max_size=2**22)
+        port = next(iter(self._server.sockets)).getsockname()[1]
+        self.url = f"ws://{self.host}:{port}"
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, websocket: Any) -> None:
+        self.connections += 1
+        request = json.loads(await websocket.recv())
+        self.subscriptions.append(request)
+        codes = frozenset(
+            code for item in request if "codes" in item for code in item["codes"]
+        )
+        selected = [(offset, frame) for offset, code, frame in self.frames if code in codes]
+        first = codes not in self._resume
+        start = self._resume.get(codes, 0)
+        stop = len(selected)
+        if first and self.drop_after is not None:
+            stop = min(stop, self.drop_after)
+            self._resume[codes] = max(stop - self.overlap, 0)
+        elif first:
+            self._resume[codes] = 0
+
+        previous = selected[start][0] if start < len(selected) else 0.0
+        for offset, frame in selected[start:stop]:
+            if self.speed > 0 and offset > previous:
+                await asyncio.sleep((offset - previous) / self.speed)
+            previous = offset
+            await websocket.send(frame)
+        if stop < len(selected):
+            await websocket.close()
+            return
+        await websocket.wait_closed()
+
+
+__all__ = ["Recording", "ReplayServer", "load_recording", "save_recording"]
@@ -0,0 +1,183 @@
+"""Upbit WebSocket protocol helpers: subscriptions and batch frame parsing.
+
+Upbit pushes one JSON document per WebSocket frame (``DEFAULT`` format).
+:func:`parse_frames` decodes a whole batch of frames with a single
+``json.loads`` call over a synthesized JSON array, which is several times
+cheaper than decoding frames one by one; a malformed frame makes the batch
+fall back to per-frame decoding so only that frame is lost.
+
+:func:`split_messages` then converts the decoded documents into compact
+records: trades become :class:`~autotrade.core.records.TickRecord` (paired
+with Upbit's per-market ``sequential_id``), ``candle.*`` updates become
+:class:`~autotrade.core.records.CandleRecord` and everything else (ticker,
+orderbook) is grouped by channel for pluggable handlers.
+"""
+
+from __future__ import annotations
+
+import json
+import uuid
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from autotrade.core.clock import to_epoch_ns
+from autotrade.core.config import get_settings
+from autotrade.core.logging import get_throttled_logger
+from autotrade.core.records import CandleRecord, TickRecord
+
+UPBIT_WS_URL = "wss://api.upbit.com/websocket/v1"
+
+_throttled = get_throttled_logger(__name__, per_second=1, burst=5)
+
+Frame = bytes | str
+
+
+def subscription_message(
+    markets: Sequence[str], channels: Iterable[str], *, ticket: str | None = None
+) -> str:
+    """Return the subscription request for ``markets`` on ``channels``."""
+
+    codes = list(markets)
+    request: list[dict[str, Any]] = [{"ticket": ticket or f"autotrade-{uuid.uuid4().hex}"}]
+    request.extend({"type": channel, "codes": codes} for channel in channels)
+    request.append({"format": "DEFAULT"})
+    return json.dumps(request)
+
+
+def parse_frames(frames: Sequence[Frame]) -> list[dict[str, Any]]:
+    """Decode a batch of frames, dropping (and logging) malformed ones."""
+
+    if not frames:
+        return []
+    parts = [frame if isinstance(frame, bytes) else frame.encode() for frame in frames]
+    try:
+        messages = json.loads(b"[" + b",".join(parts) + b"]")
+    except ValueError:
+        messages = []
+        for part in parts:
+            try:
+                messages.append(json.loads(part))
+            except ValueError:
+                _throttled.warning("Dropping malformed Upbit frame: %r", part[:200])
+    return messages
+
+
+def _interval(channel: str) -> str:
+    # "candle.1m" -> "1m"
+    return channel.partition(".")[2]
+
+
+@dataclass(slots=True)
+class ParsedBatch:
+    """Records decoded from one batch of frames, in arrival order."""
+
+    trades: list[tuple[int, TickRecord]] = field(default_factory=list)
+    candles: list[CandleRecord] = field(default_factory=list)
+    other: dict[str, list[dict[str, Any]]] = field(default_factory=dict)
+    errors: int = 0
+
+
+def split_messages(messages: Iterable[dict[str, Any]]) -> ParsedBatch:
+    """Route decoded Upbit documents into trades, candles and other channels."""
+
+    batch = ParsedBatch()
+    trades = batch.trades
+    candles = batch.candles
+    for message in messages:
+        kind = message.get("type")
+        try:
+            if kind == "trade":
+                trades.append(
+                    (
+                        message["sequential_id"],
+                        TickRecord(
+                            message["code"],
+                            message["trade_timestamp"] * 1_000_000,
+                            message["trade_price"],
+                            message["trade_volume"],
+                        ),
+                    )
+                )
+            elif kind is not None and kind.startswith("candle."):
+                candles.append(
+                    CandleRecord(
+                        message["code"],
+                        _interval(kind),
+                        to_epoch_ns(message["candle_date_time_utc"]),
+                        message["opening_price"],
+                        message["high_price"],
+                        message["low_price"],
+                        message["trade_price"],
+                        message["candle_acc_trade_volume"],
+                    )
+                )
+            elif kind is not None:
+                batch.other.setdefault(kind, []).append(message)
+            else:
+                batch.errors += 1
+                _throttled.error("Upbit WebSocket error frame: %s", message.get("error", message))
+        except (KeyError, TypeError, ValueError) as exc:
+            batch.errors += 1
+            _throttled.warning("Skipping malformed Upbit %s message: %r", kind, exc)
+    return batch
+
+
+async def fetch_krw_markets(client: Any = None) -> list[str]:
+    """Return all KRW market codes listed on Upbit.
+
+    ``client`` is an optional ``httpx.AsyncClient`` (tests pass one built on a
+    mock transport).
+    """
+
+    import httpx
+
+    owned = client is None
+    client = client or httpx.AsyncClient(timeout=10.0)
+    try:
+        response = await client.get(
+            f"{get_settings().upbit_rest_url.rstrip('/')}/v1/market/all",
+            params={"isDetails": "false"},
+        )
+        response.raise_for_status()
+        return sorted(
+            item["market"] for item in response.json() if item["market"].startswith("KRW-")
+        )
+    finally:
+        if owned:
+            await client.aclose()
+
+
+async def fetch_orderbooks(markets: Sequence[str], client: Any = None) -> list[dict[str, Any]]:
+    """Return REST order book snapshots for ``markets``.
+
+    The documents have the WebSocket ``orderbook`` layout (keyed by
+    ``market`` instead of ``code``) and can be passed straight to
+    :meth:`autotrade.market_data.orderbook.OrderBooks.apply_messages`.
+    """
+
+    import httpx
+
+    owned = client is None
+    client = client or httpx.AsyncClient(timeout=10.0)
+    try:
+        response = await client.get(
+            f"{get_settings().upbit_rest_url.rstrip('/')}/v1/orderbook",
+            params={"markets": ",".join(markets)},
+        )
+        response.raise_for_status()
+        return response.json()
+    finally:
+        if owned:
+            await client.aclose()
+
+
+__all__ = [
+    "ParsedBatch",
+    "UPBIT_WS_URL",
+    "fetch_krw_markets",
+    "fetch_orderbooks",
+    "parse_frames",
+    "split_messages",
+    "subscription_message",
+]
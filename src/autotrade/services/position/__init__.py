@@ -0,0 +1,5 @@
+"""Position tracking service components."""
+
+from .ledger import PositionLedger, PositionState
+
+__all__ = ["PositionLedger", "PositionState"]
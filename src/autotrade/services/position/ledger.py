@@ -0,0 +1,159 @@
+"""Exact position, P&L and exposure accounting in fixed-point integers.
+
+:class:`PositionLedger` tracks one net position per symbol using average-cost
+accounting. Every amount is a fixed-point ``int`` (see
+:mod:`autotrade.core.fixedpoint`): summing thousands of fills neither drifts
+like ``float`` nor pays for ``Decimal`` arithmetic. Values are converted to
+``Decimal`` only when leaving the ledger (:meth:`PositionState.as_decimal`,
+database writes).
+
+Fill amounts (the cost of an opened quantity, the cost basis and proceeds of
+a closed one) are rounded half away from zero, so a short position rounds
+exactly like the mirrored long one.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Literal
+
+from autotrade.core.fixedpoint import SCALE, div, mul, to_decimal, to_fixed
+
+Side = Literal["buy", "sell"]
+
+
+def _round_half_away(numerator: int, denominator: int) -> int:
+    """Return ``numerator / denominator`` rounded half away from zero.
+
+    Unlike floor division the result is symmetric in sign: negating the
+    numerator or the denominator negates the result.
+    """
+
+    if denominator < 0:
+        numerator, denominator = -numerator, -denominator
+    quotient = (2 * abs(numerator) + denominator) // (2 * denominator)
+    return quotient if numerator >= 0 else -quotient
+
+
+@dataclass(slots=True)
+class PositionState:
+    """Net position in one symbol.
+
+    ``quantity`` is signed (negative when short) and ``cost`` is the signed
+    quote amount paid for the open quantity at its average entry price.
+    """
+
+    symbol: str
+    quantity: int = 0
+    cost: int = 0
+    realized_pnl: int = 0
+    fees: int = 0
+
+    @property
+    def average_price(self) -> int:
+        return div(self.cost, self.quantity) if self.quantity else 0
+
+    def unrealized_pnl(self, mark: int) -> int:
+        return mul(mark, self.quantity) - self.cost
+
+    def as_decimal(self) -> dict[str, Decimal | str]:
+        """Return the state with exact ``Decimal`` amounts for persistence/APIs."""
+
+        return {
+            "symbol": self.symbol,
+            "quantity": to_decimal(self.quantity),
+            "average_price": to_decimal(self.average_price),
+            "realized_pnl": to_decimal(self.realized_pnl),
+            "fees": to_decimal(self.fees),
+        }
+
+
+class PositionLedger:
+    """Average-cost ledger of net positions keyed by symbol."""
+
+    def __init__(self) -> None:
+        self._positions: dict[str, PositionState] = {}
+
+    def __contains__(self, symbol: object) -> bool:
+        return symbol in self._positions
+
+    def position(self, symbol: str) -> PositionState:
+        """Return the state for ``symbol``, creating a flat one if needed."""
+
+        state = self._positions.get(symbol)
+        if state is None:
+            state = self._positions[symbol] = PositionState(symbol)
+        return state
+
+    def positions(self) -> list[PositionState]:
+        return list(self._positions.values())
+
+    def apply_fill(
+        self, symbol: str, side: Side, price: int, quantity: int, fee: int = 0
+    ) -> int:
+        """Apply a fill and return the P&L it realized (before fees).
+
+        Fills reducing the position realize P&L against the average entry
+        price; a fill larger than the open quantity flips the position and
+        opens the remainder at ``price``.
+        """
+
+        if quantity <= 0:
+            raise ValueError("fill quantity must be positive")
+        state = self.position(symbol)
+        signed = quantity if side == "buy" else -quantity
+        state.fees += fee
+        realized = 0
+        if state.quantity and (state.quantity > 0) != (signed > 0):
+            closing = min(abs(signed), abs(state.quantity))
+            closing_signed = closing if state.quantity > 0 else -closing
+            # Cost basis of the closed part, proportional to the open quantity.
+            basis = _round_half_away(state.cost * closing_signed, state.quantity)
+            realized = _round_half_away(price * closing_signed, SCALE) - basis
+            state.cost -= basis
+            state.quantity -= closing_signed
+            signed += closing_signed
+            if state.quantity == 0:
+                state.cost = 0
+        if signed:
+            state.quantity += signed
+            state.cost += _round_half_away(price * signed, SCALE)
+        state.realized_pnl += realized
+        return realized
+
+    def apply_order(self, symbol: str, side: Side, order: Any, fee: Any = 0) -> int:
+        """Apply a filled ``Order`` row (``Numeric`` price/quantity columns)."""
+
+        return self.apply_fill(
+            symbol,
+            side,
+            to_fixed(order.price),
+            to_fixed(order.quantity),
+            to_fixed(fee),
+        )
+
+    def unrealized_pnl(self, marks: Mapping[str, int]) -> int:
+        """Total unrealized P&L for positions with a mark price in ``marks``."""
+
+        return sum(
+            state.unrealized_pnl(marks[symbol])
+            for symbol, state in self._positions.items()
+            if state.quantity and symbol in marks
+        )
+
+    def exposure(self, marks: Mapping[str, int]) -> tuple[int, int]:
+        """Return ``(gross, net)`` notional exposure at ``marks``."""
+
+        gross = net = 0
+        for symbol, state in self._positions.items():
+            if not state.quantity or symbol not in marks:
+                continue
+            notional = mul(marks[symbol], state.quantity)
+            gross += abs(notional)
+            net += notional
+        return gross, net
+
+
+__all__ = ["PositionLedger", "PositionState"]
@@ -0,0 +1,31 @@
+"""Strategy service components."""
+
+from .base import Decision, Signals, StrategyLogic, StrategySpec, load_strategies, register
+from .engine import StrategyEngine, StrategyStats
+from .grid import Grid, GridLevels
+from .indicators import Indicator, IndicatorCache
+from .rolling import RollingMax, RollingMin, RollingSum, RollingVariance
+from .turtle import Turtle, TurtleBreakout
+from .volatility_breakout import VolatilityBreakout
+
+__all__ = [
+    "Decision",
+    "Grid",
+    "GridLevels",
+    "Indicator",
+    "IndicatorCache",
+    "RollingMax",
+    "RollingMin",
+    "RollingSum",
+    "RollingVariance",
+    "Signals",
+    "StrategyEngine",
+    "StrategyLogic",
+    "StrategySpec",
+    "StrategyStats",
+    "Turtle",
+    "TurtleBreakout",
+    "VolatilityBreakout",
+    "load_strategies",
+    "register",
+]
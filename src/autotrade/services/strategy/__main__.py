@@ -0,0 +1,50 @@
+"""Run the strategy engine against the configured Redis bus.
+
+Usage: ``python -m autotrade.services.strategy [--workers N] [--markets
+KRW-BTC,...]``. Active rows of the ``strategies`` table are evaluated for
+every market on the candle stream; the lookback of each series is loaded
+through the Redis candle cache (falling back to the ``candles`` table) for
+``--markets`` (all KRW markets by default) first.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections.abc import Sequence
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m autotrade.services.strategy")
+    parser.add_argument("--markets", help="comma separated markets to warm up (default: all KRW)")
+    parser.add_argument("--workers", type=int, help="worker processes for heavy strategies")
+    args = parser.parse_args(argv)
+
+    import logging
+
+    from autotrade.core.eventloop import run
+    from autotrade.core.logging import configure_logging
+    from autotrade.db.session import get_async_session
+    from autotrade.market_data.cache import build_candle_cache
+    from autotrade.messaging.redis import build_redis_bus
+    from autotrade.services.market_ingest.upbit import fetch_krw_markets
+
+    from .base import load_strategies
+    from .engine import StrategyEngine
+
+    async def serve() -> None:
+        session_factory = get_async_session()
+        specs = await load_strategies(session_factory)
+        logging.getLogger(__name__).info("Running %d strategies", len(specs))
+        engine = StrategyEngine(build_redis_bus(), specs, workers=args.workers)
+        markets = args.markets.split(",") if args.markets else await fetch_krw_markets()
+        cache = build_candle_cache(session_factory)
+        await engine.warm_up(session_factory, markets, cache=cache)
+        await engine.run()
+
+    configure_logging()
+    run(serve())
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - command line entry point
+    raise SystemExit(main())
@@ -0,0 +1,227 @@
+"""Strategy interface, registry and ``strategies`` table loading.
+
+A row of the ``strategies`` table is turned into a :class:`StrategySpec`; its
+``kind`` selects a registered :class:`StrategyLogic` subclass (the row name is
+used when ``params`` has no ``kind``), so several rows can run the same logic
+with different parameters.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, ClassVar, Literal, NamedTuple
+
+import numpy as np
+
+from autotrade.market_data.intervals import get_interval
+from autotrade.market_data.store import CandleWindow
+
+from .indicators import IndicatorCache
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from autotrade.db.models.strategy import Strategy
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Decision:
+    """Trade idea returned by :meth:`StrategyLogic.evaluate`."""
+
+    side: Literal["buy", "sell"]
+    entry_price: float
+    take_profit: float
+    stop_loss: float
+    confidence: float = 1.0
+
+
+class Signals(NamedTuple):
+    """Column-wise buys returned by :meth:`StrategyLogic.signals`.
+
+    ``entry`` marks the candles a buy is emitted on; the price columns hold the
+    buy's decision prices there (other rows are unspecified).
+    """
+
+    entry: np.ndarray
+    entry_price: np.ndarray
+    take_profit: np.ndarray
+    stop_loss: np.ndarray
+
+
+class StrategyLogic:
+    """Base class of strategy implementations.
+
+    One instance serves every symbol of a strategy inside a process; state
+    that must survive between candles (e.g. the last bucket a signal was
+    emitted for) is kept per symbol by the subclass.
+
+    Parameters
+    ----------
+    params:
+        The strategy row's ``params`` payload.
+    """
+
+    kind: ClassVar[str]
+    heavy: ClassVar[bool] = False
+    """Evaluate in the worker pool rather than on the event loop by default."""
+    interval: ClassVar[str] = "1m"
+    """Candle interval evaluated unless ``params["interval"]`` overrides it."""
+    vectorized: ClassVar[bool] = False
+    """Whether :meth:`signals` is implemented (backtests then skip the stepwise loop)."""
+    partial: ClassVar[bool] = False
+    """Whether :meth:`evaluate` acts on the candle in progress, which needs
+    ingest to publish in-progress updates for the interval
+    (``CANDLE_PARTIAL_UPDATES``)."""
+
+    def __init__(self, params: Mapping[str, Any]) -> None:
+        self.params = dict(params)
+
+    @property
+    def lookback(self) -> int:
+        """Number of most recent candles :meth:`evaluate` needs."""
+
+        return 1
+
+    def update_params(self, params: Mapping[str, Any]) -> None:
+        """Apply new ``params`` (e.g. from the AI service) to a running strategy.
+
+        The default re-initializes the strategy, dropping per-symbol state;
+        subclasses that can adjust incrementally override it.
+        """
+
+        self.__init__(params)  # type: ignore[misc]
+
+    def evaluate(
+        self, symbol: str, window: CandleWindow, indicators: IndicatorCache
+    ) -> Decision | Sequence[Decision] | None:
+        """Return the decisions for the latest candle of ``window``, if any.
+
+        The last candle may still be in progress. ``indicators`` is shared by
+        every strategy evaluated in the same process. Strategies that can act
+        on several levels at once (e.g. grids) return a sequence.
+        """
+
+        raise NotImplementedError
+
+    def signals(self, candles: CandleWindow) -> Signals:
+        """Return the buys :meth:`evaluate` emits on each closed candle of ``candles``.
+
+        Only strategies whose signals do not depend on fills or on their own
+        earlier signals can implement this; it must agree with
+        :meth:`evaluate` candle for candle.
+        """
+
+        raise NotImplementedError
+
+
+STRATEGY_KINDS: dict[str, type[StrategyLogic]] = {}
+
+
+def register(cls: type[StrategyLogic]) -> type[StrategyLogic]:
+    """Class decorator adding a :class:`StrategyLogic` to :data:`STRATEGY_KINDS`."""
+
+    STRATEGY_KINDS[cls.kind] = cls
+    return cls
+
+
+@dataclass(frozen=True, slots=True)
+class StrategySpec:
+    """Picklable description of one active strategy.
+
+    ``symbols`` of ``None`` evaluates every symbol seen on the candle stream.
+    """
+
+    id: str
+    name: str
+    kind: str
+    params: Mapping[str, Any] = field(default_factory=dict)
+    interval: str = "1m"
+    symbols: frozenset[str] | None = None
+    heavy: bool = False
+    version: str = "1.0.0"
+
+    @classmethod
+    def create(
+        cls, id: Any, name: str, params: Mapping[str, Any] | None = None, version: str = "1.0.0"
+    ) -> "StrategySpec":
+        """Build a spec, resolving ``kind``, ``interval``, ``symbols`` and ``heavy``.
+
+        Raises ``ValueError`` for unknown kinds or intervals.
+        """
+
+        params = dict(params or {})
+        kind = params.get("kind", name)
+        try:
+            logic = STRATEGY_KINDS[kind]
+        except KeyError:
+            raise ValueError(f"Unknown strategy kind {kind!r}") from None
+        interval = get_interval(params.get("interval", logic.interval)).name
+        symbols = params.get("symbols")
+        return cls(
+            id=str(id),
+            name=name,
+            kind=kind,
+            params=params,
+            interval=interval,
+            symbols=frozenset(s.upper() for s in symbols) if symbols else None,
+            heavy=bool(params.get("heavy", logic.heavy)),
+            version=version,
+        )
+
+    @classmethod
+    def from_row(cls, row: "Strategy") -> "StrategySpec":
+        return cls.create(row.id, row.name, row.params, row.version)
+
+    def accepts(self, symbol: str) -> bool:
+        return self.symbols is None or symbol in self.symbols
+
+    def build(self) -> StrategyLogic:
+        """Instantiate the strategy logic."""
+
+        return STRATEGY_KINDS[self.kind](self.params)
+
+
+async def load_strategies(session_factory: Any) -> list[StrategySpec]:
+    """Return a spec for every active row of the ``strategies`` table.
+
+    Rows with an unknown kind or invalid parameters are skipped with a warning.
+    """
+
+    from sqlalchemy import select
+
+    from autotrade.db.models.strategy import Strategy
+    from autotrade.db.session import session_scope
+
+    async with session_scope(session_factory) as session:
+        rows = list(await session.scalars(select(Strategy).where(Strategy.active.is_(True))))
+    specs = []
+    for row in rows:
+        try:
+            specs.append(StrategySpec.from_row(row))
+        except ValueError as exc:
+            logger.warning("Skipping strategy %r: %s", row.name, exc)
+    return specs
+
+
+def lookbacks(specs: Iterable[StrategySpec]) -> dict[str, int]:
+    """Return the largest lookback needed per interval."""
+
+    needed: dict[str, int] = {}
+    for spec in specs:
+        lookback = spec.build().lookback
+        needed[spec.interval] = max(needed.get(spec.interval, 0), lookback)
+    return needed
+
+
+__all__ = [
+    "Decision",
+    "STRATEGY_KINDS",
+    "Signals",
+    "StrategyLogic",
+    "StrategySpec",
+    "load_strategies",
+    "lookbacks",
+    "register",
+]
@@ -0,0 +1,602 @@
+"""Strategy engine evaluating every active strategy on incoming candles.
+
+:class:`StrategyEngine` reads ``market.candle.ingested`` through a consumer
+group, applies each batch to a :class:`~autotrade.market_data.store.MarketDataStore`
+and evaluates the strategies subscribed to every updated ``(symbol,
+interval)`` series once per batch, however many updates the series received.
+
+Light strategies run on the event loop against zero-copy store windows.
+Heavy ones (``StrategyLogic.heavy`` or ``params["heavy"]``) run in worker
+processes: the store is then a
+:class:`~autotrade.market_data.shared.SharedMarketDataStore` the workers read
+without pickling candle history, and symbols are sharded over single-process
+pools by hash, so each symbol's strategy state always lives in the same worker.
+Inline work overlaps with the workers.
+
+:meth:`StrategyEngine.apply_parameters` hands new parameters to a running
+strategy (inline and in every worker) through
+:meth:`~.base.StrategyLogic.update_params`, so e.g. grids re-center without
+losing their resting orders.
+
+Signals from a batch are published as ``strategy.signal.created`` with one
+``publish_many`` call; if the bus keeps failing they are dropped and counted
+after a few attempts rather than stopping the engine. Batches taking longer than ``budget`` seconds from read
+to publish are counted and logged with the inline strategy that used most of
+the time. Because reads take every pending candle and evaluate each series
+once, a backlog shrinks the work per candle instead of growing the queue.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import time
+import zlib
+from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import TYPE_CHECKING, Any
+
+from autotrade.core.clock import now, now_ns, to_epoch_ns
+from autotrade.core.config import get_settings
+from autotrade.core.metrics import counter, histogram
+from autotrade.market_data.builder import parse_partial, publishes_partial
+from autotrade.market_data.shared import SharedMarketDataStore, SharedMarketDataView
+from autotrade.market_data.store import CandleWindow, MarketDataStore
+from autotrade.messaging.base import EventBusProtocol, StreamMessage
+from autotrade.messaging.events import EventName, resolve_stream_name
+from autotrade.messaging.payloads import PayloadDecoder
+
+from .base import Decision, StrategyLogic, StrategySpec
+from .indicators import IndicatorCache
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from autotrade.market_data.cache import CandleCache
+
+logger = logging.getLogger(__name__)
+
+_EVALUATION = histogram(
+    "autotrade_strategy_evaluation_seconds",
+    "Time to evaluate one strategy for one symbol.",
+    ("strategy",),
+)
+_BATCH = histogram(
+    "autotrade_strategy_batch_seconds", "Candle batch read to signals published."
+)
+_SIGNAL_LATENCY = histogram(
+    "autotrade_strategy_signal_latency_seconds",
+    "Candle event production to publication of the signal it triggered.",
+)
+_SIGNALS = counter("autotrade_strategy_signals_total", "Signals published.", ("strategy",))
+_ERRORS = counter(
+    "autotrade_strategy_errors_total", "Strategy evaluations that raised.", ("strategy",)
+)
+_UNPUBLISHED = counter(
+    "autotrade_strategy_unpublished_signals_total",
+    "Signals dropped after publishing them failed.",
+)
+_OVER_BUDGET = counter(
+    "autotrade_strategy_budget_exceeded_total",
+    "Candle batches processed slower than the latency budget.",
+)
+
+Job = tuple[str, str, str]
+"""``(strategy id, symbol, interval)`` evaluated by a worker."""
+Outcome = tuple[str, str, Decision | Sequence[Decision] | None, int, str | None]
+"""``(strategy id, symbol, decision, elapsed ns, error)``."""
+
+
+@dataclass(slots=True)
+class StrategyStats:
+    """Counters describing the engine's progress."""
+
+    batches: int = 0
+    candles: int = 0
+    evaluations: int = 0
+    offloaded: int = 0
+    signals: int = 0
+    errors: int = 0
+    over_budget: int = 0
+    unpublished: int = 0
+
+
+def _tail(window: CandleWindow, n: int) -> CandleWindow:
+    if len(window.timestamps) <= n:
+        return window
+    return CandleWindow(*(column[-n:] for column in window))
+
+
+# -- worker processes ------------------------------------------------------
+
+
+class _Worker:
+    def __init__(self, prefix: str, specs: Sequence[StrategySpec]) -> None:
+        self.view = SharedMarketDataView(prefix)
+        self.indicators = IndicatorCache()
+        self.strategies = {spec.id: spec.build() for spec in specs}
+        self.lookback = {key: logic.lookback for key, logic in self.strategies.items()}
+
+
+_worker: _Worker | None = None
+
+
+def _init_worker(prefix: str, specs: Sequence[StrategySpec]) -> None:
+    global _worker
+    _worker = _Worker(prefix, specs)
+
+
+def _apply_params(strategy_id: str, params: Mapping[str, Any]) -> None:
+    worker = _worker
+    assert worker is not None, "worker not initialized"
+    logic = worker.strategies[strategy_id]
+    logic.update_params(params)
+    worker.lookback[strategy_id] = logic.lookback
+
+
+def _evaluate_jobs(jobs: Sequence[Job]) -> list[Outcome]:
+    """Evaluate ``jobs`` inside a worker; jobs for one series are contiguous."""
+
+    worker = _worker
+    assert worker is not None, "worker not initialized"
+    needed: dict[tuple[str, str], int] = {}
+    for strategy_id, symbol, interval in jobs:
+        lookback = worker.lookback[strategy_id]
+        if lookback > needed.get((symbol, interval), 0):
+            needed[symbol, interval] = lookback
+
+    outcomes: list[Outcome] = []
+    window: CandleWindow | None = None
+    series: tuple[str, str] | None = None
+    for strategy_id, symbol, interval in jobs:
+        start = time.perf_counter_ns()
+        try:
+            if series != (symbol, interval):
+                series = (symbol, interval)
+                window = worker.view.reader(symbol, interval).snapshot(needed[series])
+            decision = worker.strategies[strategy_id].evaluate(
+                symbol, _tail(window, worker.lookback[strategy_id]), worker.indicators
+            )
+            error = None
+        except Exception as exc:  # reported to the engine, which logs and counts it
+            series = None
+            decision, error = None, repr(exc)
+        outcomes.append((strategy_id, symbol, decision, time.perf_counter_ns() - start, error))
+    return outcomes
+
+
+# -- engine ----------------------------------------------------------------
+
+
+class StrategyEngine:
+    """Evaluate strategies for every symbol on the candle stream.
+
+    Parameters
+    ----------
+    bus:
+        Event bus providing candles and receiving signals.
+    strategies:
+        Active strategies, usually from :func:`~autotrade.services.strategy.base.load_strategies`.
+    workers:
+        Worker processes for heavy strategies; defaults to
+        ``Settings.strategy_workers``. ``0`` evaluates everything inline.
+    budget:
+        Seconds allowed from reading a candle batch to publishing its signals
+        before the batch is reported as over budget; defaults to
+        ``Settings.strategy_latency_budget``.
+    capacity:
+        Candles kept per series; defaults to ``Settings.candle_cache_capacity``
+        (at least the largest strategy lookback).
+    group / consumer:
+        Consumer group and consumer name on the candle stream.
+    max_batch:
+        Candle messages read per batch.
+    publish_attempts:
+        Attempts to publish a batch's signals before they are dropped.
+    """
+
+    def __init__(
+        self,
+        bus: EventBusProtocol,
+        strategies: Iterable[StrategySpec],
+        *,
+        workers: int | None = None,
+        budget: float | None = None,
+        capacity: int | None = None,
+        group: str = "strategy",
+        consumer: str | None = None,
+        producer: str = "strategy",
+        max_batch: int = 1000,
+        block: int = 1000,
+        publish_attempts: int = 3,
+    ) -> None:
+        settings = get_settings()
+        self.bus = bus
+        self.specs = {spec.id: spec for spec in strategies}
+        self.workers = settings.strategy_workers if workers is None else workers
+        self.budget = settings.strategy_latency_budget if budget is None else budget
+        self.group = group
+        self.consumer = consumer or f"strategy-{os.getpid()}"
+        self.producer = producer
+        self.max_batch = max_batch
+        self.block = block
+        self.publish_attempts = publish_attempts
+        self.stats = StrategyStats()
+        # Candle payloads are applied straight from the bus dictionaries; the
+        # decoder only validates a sample of them to detect contract drift.
+        self.decoder = PayloadDecoder()
+        self.indicators = IndicatorCache()
+        self._candle_stream = resolve_stream_name(EventName.MARKET_CANDLE_INGESTED)
+        self._signal_stream = resolve_stream_name(EventName.STRATEGY_SIGNAL_CREATED)
+
+        self._logic: dict[str, StrategyLogic] = {
+            key: spec.build() for key, spec in self.specs.items()
+        }
+        self._lookback = {key: logic.lookback for key, logic in self._logic.items()}
+        self._by_interval: dict[str, list[StrategySpec]] = {}
+        for spec in self.specs.values():
+            self._by_interval.setdefault(spec.interval, []).append(spec)
+        partial = parse_partial(settings.candle_partial_updates)
+        for key, spec in self.specs.items():
+            if self._logic[key].partial and not publishes_partial(partial, spec.interval):
+                logger.warning(
+                    "Strategy %s evaluates in-progress %s candles, which "
+                    "CANDLE_PARTIAL_UPDATES does not publish",
+                    spec.name,
+                    spec.interval,
+                )
+        self.offloaded: set[str] = set()
+        heavy = {key for key, spec in self.specs.items() if spec.heavy}
+        if heavy and not self.workers:
+            logger.warning("No strategy workers configured; heavy strategies run inline")
+        elif self.workers:
+            self.offloaded = heavy
+
+        capacity = max(
+            capacity or settings.candle_cache_capacity, max(self._lookback.values(), default=1)
+        )
+        self._prefix = f"{settings.message_namespace}-strategy-{os.getpid()}"
+        self.store: MarketDataStore = (
+            SharedMarketDataStore(capacity, prefix=self._prefix)
+            if self.workers
+            else MarketDataStore(capacity)
+        )
+        self._pools: list[ProcessPoolExecutor | None] = [None] * self.workers
+
+    # -- lifecycle ---------------------------------------------------------
+
+    async def run(self) -> None:
+        """Consume candles and publish signals until cancelled."""
+
+        stream = self._candle_stream
+        await self.bus.create_consumer_group(stream, self.group)
+        try:
+            while True:
+                messages = await self.bus.read_group(
+                    self.group,
+                    self.consumer,
+                    {stream: ">"},
+                    count=self.max_batch,
+                    block=self.block,
+                )
+                if not messages:
+                    continue
+                await self.process(messages)
+                await self.bus.acknowledge(
+                    stream, self.group, [message.message_id for message in messages]
+                )
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Stop the workers and release shared memory segments."""
+
+        for pool in self._pools:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+        self._pools = [None] * self.workers
+        if isinstance(self.store, SharedMarketDataStore):
+            self.store.close(unlink=True)
+
+    async def warm_up(
+        self,
+        session_factory: Any,
+        symbols: Iterable[str],
+        *,
+        cache: CandleCache | None = None,
+    ) -> int:
+        """Load each series' lookback; returns candles loaded.
+
+        With ``cache`` the series are read through the Redis candle cache
+        (which loads misses from the database itself). If the cache fails, the
+        remaining series are read from the ``candles`` table directly.
+        """
+
+        from autotrade.db.candles import fetch_recent_candles
+        from autotrade.db.session import session_scope
+
+        needed: dict[str, int] = {}
+        for key, spec in self.specs.items():
+            needed[spec.interval] = max(needed.get(spec.interval, 0), self._lookback[key])
+        symbols = list(symbols)
+        series = [
+            (symbol, interval, lookback)
+            for interval, lookback in needed.items()
+            for symbol in symbols
+        ]
+        loaded = 0
+        if cache is not None:
+            for position, (symbol, interval, lookback) in enumerate(series):
+                try:
+                    payloads = await cache.get_recent(symbol, interval, lookback)
+                except Exception as exc:
+                    logger.warning(
+                        "Candle cache read failed (%r); warming up from the database", exc
+                    )
+                    series = series[position:]
+                    break
+                for payload in payloads:
+                    self.store.update(
+                        symbol,
+                        interval,
+                        to_epoch_ns(payload.timestamp_utc),
+                        payload.open,
+                        payload.high,
+                        payload.low,
+                        payload.close,
+                        payload.volume,
+                    )
+                loaded += len(payloads)
+            else:
+                return loaded
+        async with session_scope(session_factory) as session:
+            for symbol, interval, lookback in series:
+                rows = await fetch_recent_candles(session, symbol, interval, lookback)
+                for row in rows:
+                    self.store.update(
+                        symbol,
+                        interval,
+                        to_epoch_ns(row.opened_at),
+                        row.open,
+                        row.high,
+                        row.low,
+                        row.close,
+                        row.volume,
+                    )
+                loaded += len(rows)
+        return loaded
+
+    async def apply_parameters(self, strategy_id: Any, params: Mapping[str, Any]) -> None:
+        """Apply new ``params`` to a running strategy.
+
+        The candle interval, symbols and placement (``heavy``) are fixed when
+        the engine starts; changes to them are ignored with a warning. Raises
+        ``KeyError`` for unknown strategies.
+        """
+
+        strategy_id = str(strategy_id)
+        spec = self.specs[strategy_id]
+        params = dict(params)
+        if spec.kind != spec.name:
+            params.setdefault("kind", spec.kind)
+        updated = StrategySpec.create(strategy_id, spec.name, params, spec.version)
+        if (updated.kind, updated.interval, updated.symbols, updated.heavy) != (
+            spec.kind,
+            spec.interval,
+            spec.symbols,
+            spec.heavy,
+        ):
+            logger.warning(
+                "Strategy %s: kind, interval, symbols and heavy changes need a restart",
+                spec.name,
+            )
+        self.specs[strategy_id] = spec = dataclasses.replace(spec, params=updated.params)
+        logic = self._logic[strategy_id]
+        logic.update_params(spec.params)
+        self._lookback[strategy_id] = logic.lookback
+        if strategy_id not in self.offloaded:
+            return
+        # Pools started later pick the new params up from ``self.specs``; a
+        # pool runs its tasks in order, so later batches see the update.
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(pool, _apply_params, strategy_id, dict(spec.params))
+                for pool in self._pools
+                if pool is not None
+            )
+        )
+
+    # -- evaluation --------------------------------------------------------
+
+    async def process(self, messages: Sequence[StreamMessage | Mapping[str, Any]]) -> int:
+        """Apply a candle batch, evaluate strategies and publish; returns signals."""
+
+        received = time.perf_counter_ns()
+        produced: dict[tuple[str, str], int | None] = {}
+        for message in messages:
+            data = message.data if isinstance(message, StreamMessage) else message
+            if not self.store.apply_message(data):
+                continue
+            self.stats.candles += 1
+            payload = data["payload"]
+            self.decoder.sample(EventName.MARKET_CANDLE_INGESTED, payload)
+            key = (payload["symbol"], payload["interval"])
+            if key not in produced:
+                stamp = data.get("produced_at_utc")
+                produced[key] = to_epoch_ns(stamp) if stamp else None
+
+        inline: list[tuple[str, str, str]] = []
+        shards: dict[int, list[Job]] = {}
+        for symbol, interval in produced:
+            for spec in self._by_interval.get(interval, ()):
+                if not spec.accepts(symbol):
+                    continue
+                if spec.id in self.offloaded:
+                    shard = zlib.crc32(symbol.encode()) % self.workers
+                    shards.setdefault(shard, []).append((spec.id, symbol, interval))
+                else:
+                    inline.append((spec.id, symbol, interval))
+
+        loop = asyncio.get_running_loop()
+        futures = {
+            shard: loop.run_in_executor(self._pool(shard), _evaluate_jobs, jobs)
+            for shard, jobs in shards.items()
+        }
+        outcomes = self._evaluate_inline(inline)
+        inline_ns: dict[str, int] = {}
+        for strategy_id, _, _, elapsed, _ in outcomes:
+            inline_ns[strategy_id] = inline_ns.get(strategy_id, 0) + elapsed
+        for shard, future in futures.items():
+            try:
+                outcomes.extend(await future)
+            except Exception as exc:  # e.g. BrokenProcessPool; restart the worker
+                logger.error("Strategy worker %d failed: %r", shard, exc)
+                self.stats.errors += len(shards[shard])
+                self._restart(shard)
+        self.stats.offloaded += sum(len(jobs) for jobs in shards.values())
+
+        items = self._signal_items(outcomes, produced)
+        if items and not await self._publish(items):
+            items = []
+        self.stats.batches += 1
+        self.stats.signals += len(items)
+
+        elapsed = time.perf_counter_ns() - received
+        _BATCH.record(elapsed)
+        if self.budget and elapsed > self.budget * 1e9:
+            self._over_budget(elapsed, inline_ns)
+        return len(items)
+
+    async def _publish(self, items: list[tuple[str, str]]) -> bool:
+        """Publish ``items``, retrying briefly; returns whether they were sent.
+
+        Signals go stale quickly, so after ``publish_attempts`` failures the
+        batch is logged and dropped rather than stalling candle processing.
+        """
+
+        for attempt in range(1, self.publish_attempts + 1):
+            try:
+                await self.bus.publish_many(items)
+                return True
+            except Exception as exc:
+                if attempt == self.publish_attempts:
+                    logger.error("Dropping %d strategy signals: %r", len(items), exc)
+                    break
+                logger.warning("Publishing %d strategy signals failed: %r; retrying", len(items), exc)
+                await asyncio.sleep(0.05 * 2 ** (attempt - 1))
+        self.stats.unpublished += len(items)
+        _UNPUBLISHED.inc(len(items))
+        return False
+
+    def _evaluate_inline(self, jobs: Sequence[tuple[str, str, str]]) -> list[Outcome]:
+        store = self.store
+        indicators = self.indicators
+        outcomes: list[Outcome] = []
+        for strategy_id, symbol, interval in jobs:
+            start = time.perf_counter_ns()
+            try:
+                window = store.window(symbol, interval, self._lookback[strategy_id])
+                decision = self._logic[strategy_id].evaluate(symbol, window, indicators)
+                error = None
+            except Exception as exc:
+                logger.exception("Strategy %s failed for %s", self.specs[strategy_id].name, symbol)
+                decision, error = None, repr(exc)
+            outcomes.append((strategy_id, symbol, decision, time.perf_counter_ns() - start, error))
+        return outcomes
+
+    def _signal_items(
+        self, outcomes: Sequence[Outcome], produced: Mapping[tuple[str, str], int | None]
+    ) -> list[tuple[str, str]]:
+        snapshot = now()
+        created_utc = snapshot.utc.isoformat()
+        created_kst = snapshot.kst.isoformat()
+        envelope: dict[str, Any] = {
+            "name": EventName.STRATEGY_SIGNAL_CREATED.value,
+            "version": "1.0.0",
+            "producer": self.producer,
+            "produced_at_utc": created_utc,
+            "produced_at_kst": created_kst,
+            "correlation_id": None,
+            "causation_id": None,
+        }
+        published = now_ns()
+        items: list[tuple[str, str]] = []
+        for strategy_id, symbol, decision, elapsed, error in outcomes:
+            spec = self.specs[strategy_id]
+            self.stats.evaluations += 1
+            _EVALUATION.labels(spec.name).record(elapsed)
+            if error is not None:
+                self.stats.errors += 1
+                _ERRORS.labels(spec.name).inc()
+                logger.warning("Strategy %s failed for %s: %s", spec.name, symbol, error)
+                continue
+            if decision is None:
+                continue
+            decisions = (decision,) if isinstance(decision, Decision) else decision
+            if not decisions:
+                continue
+            for decision in decisions:
+                envelope["payload"] = {
+                    "strategy_id": strategy_id,
+                    "symbol": symbol,
+                    "side": decision.side,
+                    "entry_price": decision.entry_price,
+                    "take_profit": decision.take_profit,
+                    "stop_loss": decision.stop_loss,
+                    "confidence": decision.confidence,
+                    "parameters": dict(spec.params),
+                    "created_at_utc": created_utc,
+                    "created_at_kst": created_kst,
+                }
+                items.append((self._signal_stream, json.dumps(envelope)))
+            _SIGNALS.labels(spec.name).inc(len(decisions))
+            candle_produced = produced.get((symbol, spec.interval))
+            if candle_produced is not None:
+                _SIGNAL_LATENCY.record(published - candle_produced)
+        return items
+
+    def _over_budget(self, elapsed: int, inline_ns: Mapping[str, int]) -> None:
+        self.stats.over_budget += 1
+        _OVER_BUDGET.inc()
+        slowest = max(inline_ns, key=inline_ns.__getitem__, default=None)
+        if slowest is None:
+            logger.warning(
+                "Strategy batch took %.3fs (budget %.3fs)", elapsed / 1e9, self.budget
+            )
+            return
+        # Strategies are not moved automatically: their per-symbol state lives
+        # in the process evaluating them and would be lost.
+        logger.warning(
+            "Strategy batch took %.3fs (budget %.3fs); %s spent %.3fs on the event loop"
+            " and may need params.heavy",
+            elapsed / 1e9,
+            self.budget,
+            self.specs[slowest].name,
+            inline_ns[slowest] / 1e9,
+        )
+
+    # -- workers -----------------------------------------------------------
+
+    def _pool(self, shard: int) -> ProcessPoolExecutor:
+        pool = self._pools[shard]
+        if pool is None:
+            pool = self._pools[shard] = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._prefix, list(self.specs.values())),
+            )
+        return pool
+
+    def _restart(self, shard: int) -> None:
+        pool = self._pools[shard]
+        self._pools[shard] = None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = ["StrategyEngine", "StrategyStats"]
@@ -0,0 +1,380 @@
+"""Grid trading levels with indexed crossing detection.
+
+:class:`GridLevels` holds the level prices of one symbol as a sorted list of
+fixed-point ints (snapped to the market's tick table, see
+:class:`~autotrade.core.fixedpoint.MarketSpec`) plus a ``price -> side`` map
+of resting orders. A price update bisects the previous and the new price
+into the level list and visits only the levels in between, so a tick costs
+``O(log levels + crossings)`` however large the grid is.
+
+Order flow follows the classic grid: buys rest below the price; a filled buy
+places a sell one level up and a filled sell places a buy one level down.
+
+:meth:`GridLevels.recenter` applies new parameters (e.g. from the AI service)
+incrementally. Levels present in both grids keep their orders. Orders on
+dropped levels are cancelled; sells are moved to the lowest free levels
+above the price so their inventory keeps an exit, and any that find no free
+level are reported as stranded. New levels below the price get buys.
+"""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Literal
+
+from autotrade.core.fixedpoint import MarketSpec, get_market_spec, to_fixed, to_float
+from autotrade.market_data.store import CandleWindow
+
+from .base import Decision, StrategyLogic, register
+from .indicators import IndicatorCache
+
+Side = Literal["buy", "sell"]
+
+
+@dataclass(frozen=True, slots=True)
+class GridFill:
+    """A resting order crossed by the price (fixed-point prices)."""
+
+    price: int
+    side: Side
+    counter: int | None
+    """Level of the opposite order placed in response, if any."""
+
+
+@dataclass(slots=True)
+class GridChanges:
+    """Orders to place and cancel after seeding or re-centering a grid."""
+
+    placed: list[tuple[int, Side]] = field(default_factory=list)
+    cancelled: list[tuple[int, Side]] = field(default_factory=list)
+    stranded: list[int] = field(default_factory=list)
+    """Cancelled sell levels that could not be moved to a free level."""
+
+
+class GridLevels:
+    """Sorted grid levels of one symbol and their resting orders.
+
+    Parameters
+    ----------
+    symbol:
+        Market code; selects the tick table used to snap level prices.
+    center:
+        Fixed-point price the grid is centered on.
+    step:
+        Fixed-point distance between levels, or the ratio between adjacent
+        levels (e.g. ``0.005``) when ``geometric``.
+    levels:
+        Levels on each side of the center.
+    geometric:
+        Space levels by a constant ratio instead of a constant distance.
+    spec:
+        Tick table; defaults to :func:`~autotrade.core.fixedpoint.get_market_spec`.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        center: int,
+        step: int | float,
+        levels: int,
+        *,
+        geometric: bool = False,
+        spec: MarketSpec | None = None,
+    ) -> None:
+        if levels < 1:
+            raise ValueError("levels must be at least 1")
+        if step <= 0:
+            raise ValueError("step must be positive")
+        self.symbol = symbol
+        self.spec = spec or get_market_spec(symbol)
+        self.step = step
+        self.levels = levels
+        self.geometric = geometric
+        self.center = center
+        self._anchor = center
+        self.prices: list[int] = self._build(center)
+        self._orders: dict[int, Side] = {}
+        self.last: int | None = None
+
+    def _build(self, center: int) -> list[int]:
+        # Levels are derived from whole steps away from a fixed anchor, so
+        # moving the center by whole steps reproduces the shared levels exactly.
+        round_price = self.spec.round_price
+        if self.geometric:
+            ratio = math.log1p(self.step)
+            offset = round(math.log(center / self._anchor) / ratio)
+            raw = (
+                self._anchor * math.exp((offset + index) * ratio)
+                for index in range(-self.levels, self.levels + 1)
+            )
+            prices = {round_price(int(price)) for price in raw}
+        else:
+            step = int(self.step)
+            base = self._anchor + round((center - self._anchor) / step) * step
+            prices = {
+                round_price(base + index * step)
+                for index in range(-self.levels, self.levels + 1)
+            }
+        return sorted(price for price in prices if price > 0)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @property
+    def orders(self) -> Mapping[int, Side]:
+        """Read-only ``price -> side`` view of the resting orders."""
+
+        return MappingProxyType(self._orders)
+
+    def resting(self, side: Side | None = None) -> list[int]:
+        """Sorted prices of resting orders, optionally of one side."""
+
+        return sorted(
+            price for price, rest in self._orders.items() if side is None or rest == side
+        )
+
+    def seed(self, price: int) -> GridChanges:
+        """Start at ``price`` with a buy on every level below it."""
+
+        self.last = price
+        changes = GridChanges()
+        for level in self.prices[: bisect_left(self.prices, price)]:
+            if level not in self._orders:
+                self._orders[level] = "buy"
+                changes.placed.append((level, "buy"))
+        return changes
+
+    def on_price(self, price: int) -> list[GridFill]:
+        """Fill the resting orders crossed since the previous price.
+
+        A buy fills when the price trades at or below its level and a sell
+        at or above. Fills are returned in the order the price crossed them.
+        """
+
+        last = self.last
+        self.last = price
+        if last is None or price == last:
+            return []
+        prices = self.prices
+        orders = self._orders
+        fills: list[GridFill] = []
+        if price < last:
+            for index in range(bisect_left(prices, last) - 1, bisect_left(prices, price) - 1, -1):
+                level = prices[index]
+                if orders.get(level) != "buy":
+                    continue
+                del orders[level]
+                counter = prices[index + 1] if index + 1 < len(prices) else None
+                if counter is not None and counter not in orders:
+                    orders[counter] = "sell"
+                else:
+                    counter = None
+                fills.append(GridFill(level, "buy", counter))
+        else:
+            for index in range(bisect_right(prices, last), bisect_right(prices, price)):
+                level = prices[index]
+                if orders.get(level) != "sell":
+                    continue
+                del orders[level]
+                counter = prices[index - 1] if index > 0 else None
+                if counter is not None and counter not in orders:
+                    orders[counter] = "buy"
+                else:
+                    counter = None
+                fills.append(GridFill(level, "sell", counter))
+        return fills
+
+    def recenter(
+        self,
+        center: int | None = None,
+        *,
+        step: int | float | None = None,
+        levels: int | None = None,
+    ) -> GridChanges:
+        """Move the grid, keeping the orders of levels both grids share."""
+
+        if step is not None and step != self.step:
+            if step <= 0:
+                raise ValueError("step must be positive")
+            self.step = step
+            self._anchor = center if center is not None else self.center
+        if levels is not None:
+            if levels < 1:
+                raise ValueError("levels must be at least 1")
+            self.levels = levels
+        if center is not None:
+            self.center = center
+        prices = self._build(self.center)
+        kept = set(prices)
+        old = set(self.prices)
+        self.prices = prices
+
+        changes = GridChanges()
+        orders = self._orders
+        stranded = []
+        for level in sorted(level for level in orders if level not in kept):
+            side = orders.pop(level)
+            changes.cancelled.append((level, side))
+            if side == "sell":
+                stranded.append(level)
+        if self.last is None:
+            changes.stranded = stranded
+            return changes
+        below = bisect_left(prices, self.last)
+        for level in prices[:below]:
+            if level not in old and level not in orders:
+                orders[level] = "buy"
+                changes.placed.append((level, "buy"))
+        stranded.reverse()
+        for level in prices[bisect_right(prices, self.last) :]:
+            if not stranded:
+                break
+            if level not in orders:
+                orders[level] = "sell"
+                changes.placed.append((level, "sell"))
+                stranded.pop()
+        changes.stranded = sorted(stranded)
+        return changes
+
+
+def _stop_loss(params: Mapping[str, Any]) -> float:
+    stop_loss = float(params.get("stop_loss", 0.05))
+    if not 0 < stop_loss < 1:
+        raise ValueError("stop_loss must be between 0 and 1")
+    return stop_loss
+
+
+def _candle_path(
+    open_: float, high: float, low: float, close: float, seen: tuple[float, float] | None
+) -> list[float]:
+    """Prices a candle is assumed to have traded through, in order.
+
+    The extreme against the candle's direction comes first (open, low, high,
+    close for a rising candle). With ``seen`` (the high and low of an earlier
+    update of the same candle) only new extremes and the close are walked.
+    """
+
+    extremes = [low, high] if close >= open_ else [high, low]
+    if seen is None:
+        return [open_, *extremes, close]
+    seen_high, seen_low = seen
+    return [price for price in extremes if price > seen_high or price < seen_low] + [close]
+
+
+def _grid_options(params: Mapping[str, Any]) -> tuple[int | float, int, bool]:
+    levels = int(params.get("levels", 50))
+    if "step_pct" in params:
+        return float(params["step_pct"]), levels, True
+    return to_fixed(params.get("step", 1000)), levels, False
+
+
+@register
+class Grid(StrategyLogic):
+    """Grid strategy on the price range of every evaluated candle.
+
+    Each symbol's grid is centered on ``params["center"]`` or the first price
+    seen. Each candle is walked from its open through both extremes (the one
+    against its direction first) to its close, so levels touched inside a
+    candle fill even when it closes back across them; repeated updates of
+    the candle in progress only walk its new extremes. Every crossed resting
+    order becomes a signal: a filled buy targets its counter sell, a filled
+    sell its counter buy. Stops sit ``stop_loss`` (a fraction) beyond the
+    grid's outermost level.
+
+    Parameters (``params``)
+    -----------------------
+    levels:
+        Levels on each side of the center (default ``50``).
+    step / step_pct:
+        Absolute level spacing in the quote currency (default ``1000``), or a
+        ratio for a geometric grid.
+    center:
+        Grid center price; re-centering only moves grids when it changes.
+    stop_loss:
+        Fraction in ``(0, 1)``; default ``0.05``.
+    """
+
+    kind = "grid"
+    interval = "1m"
+
+    def __init__(self, params: Mapping[str, Any]) -> None:
+        super().__init__(params)
+        self.step, self.levels, self.geometric = _grid_options(self.params)
+        self.stop_loss = _stop_loss(self.params)
+        self.grids: dict[str, GridLevels] = {}
+        # Opening time, high and low of the last candle walked per symbol.
+        self._walked: dict[str, tuple[int, float, float]] = {}
+
+    def update_params(self, params: Mapping[str, Any]) -> None:
+        """Re-center every grid in place, keeping orders on shared levels."""
+
+        stop_loss = _stop_loss(params)
+        previous = self.params
+        self.params = dict(params)
+        step, levels, geometric = _grid_options(self.params)
+        self.stop_loss = stop_loss
+        if geometric != self.geometric:
+            self.step, self.levels, self.geometric = step, levels, geometric
+            self.grids.clear()
+            return
+        self.step, self.levels = step, levels
+        center = self.params.get("center")
+        moved = center is not None and center != previous.get("center")
+        for grid in self.grids.values():
+            grid.recenter(to_fixed(center) if moved else None, step=step, levels=levels)
+
+    def evaluate(
+        self, symbol: str, window: CandleWindow, indicators: IndicatorCache
+    ) -> list[Decision] | None:
+        if not len(window.timestamps):
+            return None
+        opened = int(window.timestamps[-1])
+        open_, high, low, close = (
+            float(column[-1]) for column in (window.open, window.high, window.low, window.close)
+        )
+        walked = self._walked.get(symbol)
+        self._walked[symbol] = (
+            (opened, max(high, walked[1]), min(low, walked[2]))
+            if walked is not None and walked[0] == opened
+            else (opened, high, low)
+        )
+        price = to_fixed(close)
+        grid = self.grids.get(symbol)
+        if grid is None:
+            center = self.params.get("center")
+            grid = self.grids[symbol] = GridLevels(
+                symbol,
+                to_fixed(center) if center is not None else price,
+                self.step,
+                self.levels,
+                geometric=self.geometric,
+            )
+            grid.seed(price)
+            return None
+        seen = walked[1:] if walked is not None and walked[0] == opened else None
+        fills = [
+            fill
+            for point in _candle_path(open_, high, low, close, seen)
+            for fill in grid.on_price(to_fixed(point))
+        ]
+        if not fills:
+            return None
+        floor = to_float(grid.prices[0]) * (1 - self.stop_loss)
+        ceiling = to_float(grid.prices[-1]) * (1 + self.stop_loss)
+        decisions = []
+        for fill in fills:
+            entry = to_float(fill.price)
+            if fill.side == "buy":
+                target = to_float(fill.counter) if fill.counter is not None else ceiling
+                decisions.append(Decision("buy", entry, target, floor))
+            else:
+                target = to_float(fill.counter) if fill.counter is not None else floor
+                decisions.append(Decision("sell", entry, target, ceiling))
+        return decisions
+
+
+__all__ = ["Grid", "GridChanges", "GridFill", "GridLevels"]
@@ -0,0 +1,610 @@
+"""Technical indicators with matching batch and streaming implementations.
+
+Every indicator exists twice:
+
+* a function computing it over whole NumPy columns (``sma``, ``ema``,
+  ``atr``, ``donchian``, ``bollinger``, ``volatility``,
+  ``volatility_range``) for backtests and warm-ups, and
+* an :class:`Indicator` subclass updated in amortized ``O(1)`` per closed
+  candle for live strategies, built on the :mod:`.rolling` primitives.
+
+Positions without enough history are ``nan`` in both. Windowed indicators
+(SMA, Bollinger, volatility, Donchian) are vectorized over
+``sliding_window_view``; the streaming versions keep running accumulators,
+so the two agree to floating-point rounding. The recursive filters (EMA,
+Wilder's ATR) cannot be vectorized exactly, so their batch functions run the
+same scalar recurrence as the streaming classes and agree bit for bit.
+
+:class:`IndicatorCache` shares indicator state between strategies: one
+``ATR(20)`` per ``(symbol, interval)`` is updated once per candle no matter
+how many strategies read it, and batch results are memoized per series
+window.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, ClassVar
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from autotrade.core.metrics import counter
+from autotrade.market_data.store import CandleWindow
+
+from .rolling import RollingMax, RollingMin, RollingSum, RollingVariance
+
+_NAN = float("nan")
+
+_CACHE_LOOKUPS = counter(
+    "autotrade_indicator_cache_lookups_total", "Indicator cache lookups.", ("result",)
+)
+_CACHE_HIT = _CACHE_LOOKUPS.labels("hit")
+_CACHE_MISS = _CACHE_LOOKUPS.labels("miss")
+
+
+def _check_period(period: int) -> None:
+    if period < 1:
+        raise ValueError("period must be at least 1")
+
+
+def _column(values: Any) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def _windows(values: np.ndarray, period: int) -> np.ndarray:
+    return sliding_window_view(values, period) if len(values) >= period else np.empty((0, period))
+
+
+def _pad(result: np.ndarray, period: int, size: int) -> np.ndarray:
+    out = np.full(size, np.nan)
+    out[period - 1 :] = result
+    return out
+
+
+# -- batch -----------------------------------------------------------------
+
+
+def sma(values: Any, period: int) -> np.ndarray:
+    """Simple moving average over ``period`` values."""
+
+    _check_period(period)
+    values = _column(values)
+    return _pad(_windows(values, period).mean(axis=1), period, len(values))
+
+
+def ema(values: Any, period: int) -> np.ndarray:
+    """Exponential moving average with ``alpha = 2 / (period + 1)``.
+
+    The first value is the SMA of the first ``period`` values.
+    """
+
+    _check_period(period)
+    state = EMA(period)
+    update = state._push
+    return np.fromiter((update(value) for value in _column(values).tolist()), np.float64)
+
+
+def true_range(high: Any, low: Any, close: Any) -> np.ndarray:
+    """True range; the first candle uses ``high - low``."""
+
+    high, low, close = _column(high), _column(low), _column(close)
+    ranges = high - low
+    if len(close) > 1:
+        previous = close[:-1]
+        ranges[1:] = np.maximum(
+            ranges[1:], np.maximum(np.abs(high[1:] - previous), np.abs(low[1:] - previous))
+        )
+    return ranges
+
+
+def atr(high: Any, low: Any, close: Any, period: int) -> np.ndarray:
+    """Average true range with Wilder's smoothing (seeded with a plain mean)."""
+
+    _check_period(period)
+    state = ATR(period)
+    update = state._push
+    return np.fromiter(
+        (update(value) for value in true_range(high, low, close).tolist()), np.float64
+    )
+
+
+def donchian(high: Any, low: Any, period: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Donchian channel ``(upper, lower, middle)`` over the last ``period`` candles."""
+
+    _check_period(period)
+    high, low = _column(high), _column(low)
+    upper = _pad(_windows(high, period).max(axis=1), period, len(high))
+    lower = _pad(_windows(low, period).min(axis=1), period, len(low))
+    return upper, lower, (upper + lower) / 2
+
+
+def bollinger(
+    close: Any, period: int, k: float = 2.0
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bollinger bands ``(upper, middle, lower)`` using the population stdev."""
+
+    _check_period(period)
+    close = _column(close)
+    windows = _windows(close, period)
+    middle = _pad(windows.mean(axis=1), period, len(close))
+    width = k * _pad(windows.std(axis=1), period, len(close))
+    return middle + width, middle, middle - width
+
+
+def volatility(close: Any, period: int) -> np.ndarray:
+    """Sample standard deviation of the last ``period`` log returns."""
+
+    if period < 2:
+        raise ValueError("period must be at least 2")
+    close = _column(close)
+    out = np.full(len(close), np.nan)
+    if len(close) > period:
+        returns = np.log(close[1:] / close[:-1])
+        out[period:] = _windows(returns, period).std(axis=1, ddof=1)
+    return out
+
+
+def volatility_range(high: Any, low: Any, k: float = 0.5) -> np.ndarray:
+    """Breakout distance ``k * (high - low)`` set by each candle.
+
+    Volatility breakout enters the *next* candle once the price exceeds its
+    open plus this value.
+    """
+
+    return k * (_column(high) - _column(low))
+
+
+# -- streaming -------------------------------------------------------------
+
+
+class Indicator:
+    """Streaming indicator updated once per closed candle.
+
+    Subclasses implement :meth:`update` and :meth:`compute` (the batch
+    equivalent over full columns) and expose the latest result as
+    :attr:`value`.
+    """
+
+    __slots__ = ("value",)
+
+    name: ClassVar[str]
+
+    value: Any
+
+    @property
+    def params(self) -> tuple[Any, ...]:
+        raise NotImplementedError
+
+    @property
+    def key(self) -> tuple[Any, ...]:
+        """``(name, *params)``; equal keys compute identical series."""
+
+        return (self.name, *self.params)
+
+    @property
+    def ready(self) -> bool:
+        """Whether enough candles were seen for a defined value."""
+
+        value = self.value
+        first = value[0] if isinstance(value, tuple) else value
+        return not math.isnan(first)
+
+    def update(
+        self, open: float, high: float, low: float, close: float, volume: float
+    ) -> Any:
+        """Apply a closed candle and return the new value."""
+
+        raise NotImplementedError
+
+    def compute(self, window: CandleWindow) -> Any:
+        """Return the batch result over ``window`` (same shape as :attr:`value`)."""
+
+        raise NotImplementedError
+
+    def prime(self, window: CandleWindow) -> Any:
+        """Replay ``window`` into a fresh indicator and return the last value."""
+
+        update = self.update
+        for row in zip(
+            window.open.tolist(),
+            window.high.tolist(),
+            window.low.tolist(),
+            window.close.tolist(),
+            window.volume.tolist(),
+        ):
+            update(*row)
+        return self.value
+
+    def __repr__(self) -> str:
+        params = ", ".join(map(repr, self.params))
+        return f"{type(self).__name__}({params})"
+
+
+class SMA(Indicator):
+    """Simple moving average of closes."""
+
+    __slots__ = ("period", "_sum")
+
+    name = "sma"
+
+    def __init__(self, period: int) -> None:
+        _check_period(period)
+        self.period = period
+        self._sum = RollingSum(period)
+        self.value = _NAN
+
+    @property
+    def params(self) -> tuple[Any, ...]:
+        return (self.period,)
+
+    def update(self, open: float, high: float, low: float, close: float, volume: float) -> float:
+        self.value = self._sum.push(close) / self.period
+        return self.value
+
+    def compute(self, window: CandleWindow) -> np.ndarray:
+        return sma(window.close, self.period)
+
+
+class EMA(Indicator):
+    """Exponential moving average of closes (SMA seeded)."""
+
+    __slots__ = ("period", "alpha", "_count", "_sum")
+
+    name = "ema"
+
+    def __init__(self, period: int) -> None:
+        _check_period(period)
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self._count = 0
+        self._sum = 0.0
+        self.value = _NAN
+
+    @property
+    def params(self) -> tuple[Any, ...]:
+        return (self.period,)
+
+    def _push(self, value: float) -> float:
+        if self._count < self.period:
+            self._count += 1
+            self._sum += value
+            if self._count == self.period:
+                self.value = self._sum / self.period
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+    def update(self, open: float, high: float, low: float, close: float, volume: float) -> float:
+        return self._push(close)
+
+    def compute(self, window: CandleWindow) -> np.ndarray:
+        return ema(window.close, self.period)
+
+
+class ATR(Indicator):
+    """Average true range with Wilder's smoothing."""
+
+    __slots__ = ("period", "_count", "_sum", "_previous_close")
+
+    name = "atr"
+
+    def __init__(self, period: int) -> None:
+        _check_period(period)
+        self.period = period
+        self._count = 0
+        self._sum = 0.0
+        self._previous_close: float | None = None
+        self.value = _NAN
+
+    @property
+    def params(self) -> tuple[Any, ...]:
+        return (self.period,)
+
+    def _push(self, true_range: float) -> float:
+        period = self.period
+        if self._count < period:
+            self._count += 1
+            self._sum += true_range
+            if self._count == period:
+                self.value = self._sum / period
+        else:
+            self.value = (self.value * (period - 1) + true_range) / period
+        return self.value
+
+    def update(self, open: float, high: float, low: float, close: float, volume: float) -> float:
+        previous = self._previous_close
+        self._previous_close = close
+        if previous is None:
+            return self._push(high - low)
+        return self._push(max(high - low, abs(high - previous), abs(low - previous)))
+
+    def compute(self, window: CandleWindow) -> np.ndarray:
+        return atr(window.high, window.low, window.close, self.period)
+
+
+class Donchian(Indicator):
+    """Donchian channel ``(upper, lower, middle)`` of highs and lows."""
+
+    __slots__ = ("period", "_upper", "_lower")
+
+    name = "donchian"
+
+    def __init__(self, period: int) -> None:
+        _check_period(period)
+        self.period = period
+        self._upper = RollingMax(period)
+        self._lower = RollingMin(period)
+        self.value = (_NAN, _NAN, _NAN)
+
+    @property
+    def params(self) -> tuple[Any, ...]:
+        return (self.period,)
+
+    def update(
+        self, open: float, high: float, low: float, close: float, volume: float
+    ) -> tuple[float, float, float]:
+        upper = self._upper.push(high)
+        lower = self._lower.push(low)
+        self.value = (upper, lower, (upper + lower) / 2)
+        return self.value
+
+    def compute(self, window: CandleWindow) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return donchian(window.high, window.low, self.period)
+
+
+class Bollinger(Indicator):
+    """Bollinger bands ``(upper, middle, lower)`` of closes."""
+
+    __slots__ = ("period", "k", "_stats")
+
+    name = "bollinger"
+
+    def __init__(self, period: int, k: float = 2.0) -> None:
+        _check_period(period)
+        self.period = period
+        self.k = k
+        self._stats = RollingVariance(period)
+        self.value = (_NAN, _NAN, _NAN)
+
+    @property
+    def params(self) -> tuple[Any, ...]:
+        return (self.period, self.k)
+
+    def update(
+        self, open: float, high: float, low: float, close: float, volume: float
+    ) -> tuple[float, float, float]:
+        stats = self._stats
+        stats.push(close)
+        if stats.full:
+            width = self.k * stats.std
+            self.value = (stats.mean + width, stats.mean, stats.mean - width)
+        return self.value
+
+    def compute(self, window: CandleWindow) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return bollinger(window.close, self.period, self.k)
+
+
+class Volatility(Indicator):
+    """Sample standard deviation of the last ``period`` log returns."""
+
+    __slots__ = ("period", "_stats", "_previous_close")
+
+    name = "volatility"
+
+    def __init__(self, period: int) -> None:
+        if period < 2:
+            raise ValueError("period must be at least 2")
+        self.period = period
+        self._stats = RollingVariance(period, ddof=1)
+        self._previous_close: float | None = None
+        self.value = _NAN
+
+    @property
+    def params(self) -> tuple[Any, ...]:
+        return (self.period,)
+
+    def update(self, open: float, high: float, low: float, close: float, volume: float) -> float:
+        previous = self._previous_close
+        self._previous_close = close
+        if previous is not None:
+            self.value = math.sqrt(self._stats.push(math.log(close / previous)))
+        return self.value
+
+    def compute(self, window: CandleWindow) -> np.ndarray:
+        return volatility(window.close, self.period)
+
+
+class VolatilityRange(Indicator):
+    """Breakout distance ``k * (high - low)`` for the candle after the last one."""
+
+    __slots__ = ("k",)
+
+    name = "volatility_range"
+
+    def __init__(self, k: float = 0.5) -> None:
+        self.k = k
+        self.value = _NAN
+
+    @property
+    def params(self) -> tuple[Any, ...]:
+        return (self.k,)
+
+    def update(self, open: float, high: float, low: float, close: float, volume: float) -> float:
+        self.value = self.k * (high - low)
+        return self.value
+
+    def compute(self, window: CandleWindow) -> np.ndarray:
+        return volatility_range(window.high, window.low, self.k)
+
+
+INDICATORS: dict[str, type[Indicator]] = {
+    cls.name: cls for cls in (SMA, EMA, ATR, Donchian, Bollinger, Volatility, VolatilityRange)
+}
+
+
+def create(name: str, *params: Any) -> Indicator:
+    """Return a new streaming indicator, e.g. ``create("atr", 20)``."""
+
+    try:
+        cls = INDICATORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown indicator {name!r}") from None
+    return cls(*params)
+
+
+# -- cache -----------------------------------------------------------------
+
+
+class IndicatorCache:
+    """Indicators shared by every strategy of a process.
+
+    Streaming indicators are keyed by ``(symbol, interval, name, *params)``:
+    :meth:`get` returns the same instance to every caller and :meth:`update`
+    advances each of them once per candle timestamp. :meth:`compute` memoizes
+    batch results per series window.
+    """
+
+    def __init__(self) -> None:
+        self._streaming: dict[tuple[str, str], dict[tuple[Any, ...], Indicator]] = {}
+        # Last candle timestamp applied to each streaming indicator (``None``
+        # until its first candle) and to each series through :meth:`update`.
+        self._applied: dict[tuple[str, str], dict[tuple[Any, ...], int | None]] = {}
+        self._last_update: dict[tuple[str, str], int] = {}
+        self._batch: dict[tuple[Any, ...], tuple[tuple[Any, ...], Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        symbol: str,
+        interval: str,
+        name: str,
+        *params: Any,
+        history: CandleWindow | None = None,
+    ) -> Indicator:
+        """Return the shared streaming indicator, creating it on first use.
+
+        A new indicator is primed with ``history`` (the closed candles so far)
+        when given and then counts as updated up to the last history candle,
+        so forwarding that candle again does not apply it twice. Without
+        history it starts with the series' next candle. Each indicator keeps
+        its own watermark, so priming one never makes the others skip
+        candles.
+        """
+
+        key = (symbol, interval)
+        series = self._streaming.setdefault(key, {})
+        indicator = create(name, *params)
+        shared = series.get(indicator.key)
+        if shared is not None:
+            self.hits += 1
+            _CACHE_HIT.inc()
+            return shared
+        self.misses += 1
+        _CACHE_MISS.inc()
+        applied = self._last_update.get(key)
+        if history is not None:
+            indicator.prime(history)
+            if len(history.timestamps):
+                applied = int(history.timestamps[-1])
+        self._applied.setdefault(key, {})[indicator.key] = applied
+        series[indicator.key] = indicator
+        return indicator
+
+    def update(
+        self,
+        symbol: str,
+        interval: str,
+        timestamp: int,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+    ) -> bool:
+        """Apply a closed candle to every indicator of the series.
+
+        Indicators skip timestamps at or before the last candle they applied,
+        so several consumers may forward the same candle. Returns whether the
+        candle was applied to any indicator (or, for a series without
+        indicators, whether it was new).
+        """
+
+        key = (symbol, interval)
+        last = self._last_update.get(key)
+        fresh = last is None or timestamp > last
+        if fresh:
+            self._last_update[key] = timestamp
+        series = self._streaming.get(key)
+        if not series:
+            return fresh
+        marks = self._applied[key]
+        applied = False
+        for name, indicator in series.items():
+            mark = marks[name]
+            if mark is not None and timestamp <= mark:
+                continue
+            indicator.update(open, high, low, close, volume)
+            marks[name] = timestamp
+            applied = True
+        return applied
+
+    def compute(
+        self, symbol: str, interval: str, name: str, *params: Any, window: CandleWindow
+    ) -> Any:
+        """Return the batch result for ``window``, reusing an identical request.
+
+        Results are keyed by the series, the indicator and the window's length
+        and last candle (which may still be in progress); treat returned
+        arrays as read-only.
+        """
+
+        indicator = create(name, *params)
+        key = (symbol, interval, *indicator.key)
+        size = len(window.timestamps)
+        version: tuple[Any, ...] = (size,)
+        if size:
+            version += (int(window.timestamps[-1]), *(float(column[-1]) for column in window[1:]))
+        cached = self._batch.get(key)
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            _CACHE_HIT.inc()
+            return cached[1]
+        self.misses += 1
+        _CACHE_MISS.inc()
+        result = indicator.compute(window)
+        self._batch[key] = (version, result)
+        return result
+
+    def discard(self, symbol: str, interval: str) -> None:
+        """Forget every indicator of a series (e.g. when a market is delisted)."""
+
+        self._streaming.pop((symbol, interval), None)
+        self._applied.pop((symbol, interval), None)
+        self._last_update.pop((symbol, interval), None)
+        for key in [key for key in self._batch if key[:2] == (symbol, interval)]:
+            del self._batch[key]
+
+
+__all__ = [
+    "ATR",
+    "Bollinger",
+    "Donchian",
+    "EMA",
+    "INDICATORS",
+    "Indicator",
+    "IndicatorCache",
+    "SMA",
+    "Volatility",
+    "VolatilityRange",
+    "atr",
+    "bollinger",
+    "create",
+    "donchian",
+    "ema",
+    "sma",
+    "true_range",
+    "volatility",
+    "volatility_range",
+]
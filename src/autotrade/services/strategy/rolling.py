@@ -0,0 +1,198 @@
+"""Fixed-window rolling statistics with amortized ``O(1)`` updates.
+
+* :class:`RollingMax` / :class:`RollingMin` keep a monotonic deque of
+  ``(index, value)`` candidates: a new value evicts every older candidate it
+  dominates, so each value enters and leaves the deque once and the extreme
+  is always at the front.
+* :class:`RollingSum` keeps a running sum that is recomputed with
+  :func:`math.fsum` once per ``period`` pushes, bounding rounding drift on
+  endless streams.
+* :class:`RollingVariance` updates the window mean and sum of squared
+  deviations with Welford's add/remove recurrences, avoiding the
+  cancellation of ``E[x²] - E[x]²`` at KRW price levels.
+
+``push`` returns the statistic over the last ``period`` values, or ``nan``
+until that many values have been pushed.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+
+_NAN = float("nan")
+
+
+def _check_period(period: int) -> None:
+    if period < 1:
+        raise ValueError("period must be at least 1")
+
+
+class RollingMax:
+    """Maximum of the last ``period`` values."""
+
+    __slots__ = ("period", "_items", "_count")
+
+    def __init__(self, period: int) -> None:
+        _check_period(period)
+        self.period = period
+        self._items: deque[tuple[int, float]] = deque()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return min(self._count, self.period)
+
+    @property
+    def full(self) -> bool:
+        return self._count >= self.period
+
+    @property
+    def value(self) -> float:
+        return self._items[0][1] if self._count >= self.period else _NAN
+
+    def push(self, value: float) -> float:
+        items = self._items
+        while items and items[-1][1] <= value:
+            items.pop()
+        items.append((self._count, value))
+        self._count += 1
+        if items[0][0] < self._count - self.period:
+            items.popleft()
+        return items[0][1] if self._count >= self.period else _NAN
+
+
+class RollingMin:
+    """Minimum of the last ``period`` values."""
+
+    __slots__ = ("period", "_items", "_count")
+
+    def __init__(self, period: int) -> None:
+        _check_period(period)
+        self.period = period
+        self._items: deque[tuple[int, float]] = deque()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return min(self._count, self.period)
+
+    @property
+    def full(self) -> bool:
+        return self._count >= self.period
+
+    @property
+    def value(self) -> float:
+        return self._items[0][1] if self._count >= self.period else _NAN
+
+    def push(self, value: float) -> float:
+        items = self._items
+        while items and items[-1][1] >= value:
+            items.pop()
+        items.append((self._count, value))
+        self._count += 1
+        if items[0][0] < self._count - self.period:
+            items.popleft()
+        return items[0][1] if self._count >= self.period else _NAN
+
+
+class RollingSum:
+    """Sum of the last ``period`` values."""
+
+    __slots__ = ("period", "_window", "_sum", "_until_refresh")
+
+    def __init__(self, period: int) -> None:
+        _check_period(period)
+        self.period = period
+        self._window: deque[float] = deque()
+        self._sum = 0.0
+        self._until_refresh = period
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    @property
+    def full(self) -> bool:
+        return len(self._window) == self.period
+
+    @property
+    def value(self) -> float:
+        return self._sum if len(self._window) == self.period else _NAN
+
+    @property
+    def mean(self) -> float:
+        return self.value / self.period
+
+    def push(self, value: float) -> float:
+        window = self._window
+        window.append(value)
+        if len(window) > self.period:
+            self._sum += value - window.popleft()
+        else:
+            self._sum += value
+        self._until_refresh -= 1
+        if not self._until_refresh:
+            self._until_refresh = self.period
+            self._sum = math.fsum(window)
+        return self._sum if len(window) == self.period else _NAN
+
+
+class RollingVariance:
+    """Mean and variance of the last ``period`` values.
+
+    Parameters
+    ----------
+    period:
+        Window length.
+    ddof:
+        Delta degrees of freedom: ``0`` for the population variance, ``1``
+        for the sample variance.
+    """
+
+    __slots__ = ("period", "ddof", "_window", "_mean", "_m2")
+
+    def __init__(self, period: int, ddof: int = 0) -> None:
+        _check_period(period)
+        if not 0 <= ddof < period:
+            raise ValueError("ddof must be in [0, period)")
+        self.period = period
+        self.ddof = ddof
+        self._window: deque[float] = deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    @property
+    def full(self) -> bool:
+        return len(self._window) == self.period
+
+    @property
+    def mean(self) -> float:
+        return self._mean if len(self._window) == self.period else _NAN
+
+    @property
+    def value(self) -> float:
+        if len(self._window) < self.period:
+            return _NAN
+        return max(self._m2, 0.0) / (self.period - self.ddof)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.value)
+
+    def push(self, value: float) -> float:
+        window = self._window
+        window.append(value)
+        if len(window) > self.period:
+            old = window.popleft()
+            mean = self._mean + (value - old) / self.period
+            self._m2 += (value - old) * (value - mean + old - self._mean)
+            self._mean = mean
+        else:
+            delta = value - self._mean
+            self._mean += delta / len(window)
+            self._m2 += delta * (value - self._mean)
+        return self.value
+
+
+__all__ = ["RollingMax", "RollingMin", "RollingSum", "RollingVariance"]
@@ -0,0 +1,177 @@
+"""Turtle trading channel breakouts (long only, as Upbit spot has no shorts).
+
+:class:`TurtleBreakout` tracks one symbol: it enters when a candle's high
+exceeds the highest high of the previous ``entry`` closed candles and exits
+when a later candle's low falls below the lowest low of the previous ``exit``
+closed candles. Channels are :class:`~.rolling.RollingMax` /
+:class:`~.rolling.RollingMin` windows, so each candle costs amortized
+``O(1)`` however long the channels are (20/10 for system 1, 55/20 for
+system 2).
+
+:class:`Turtle` wraps it as a :class:`~.base.StrategyLogic` for the strategy
+engine.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Mapping
+from typing import Any, Literal
+
+from autotrade.market_data.store import CandleWindow
+
+from .base import Decision, StrategyLogic, register
+from .indicators import ATR, IndicatorCache
+from .rolling import RollingMax, RollingMin
+
+
+class TurtleBreakout:
+    """Entry/exit channel state of one symbol.
+
+    Parameters
+    ----------
+    entry:
+        Candles in the breakout (entry) channel.
+    exit:
+        Candles in the exit channel.
+    atr:
+        Period of the ATR used for stops (the turtles' ``N``).
+    """
+
+    __slots__ = ("entry", "exit", "long", "_highs", "_lows", "_atr")
+
+    def __init__(self, entry: int = 20, exit: int = 10, atr: int = 20) -> None:
+        self.entry = entry
+        self.exit = exit
+        self.long = False
+        self._highs = RollingMax(entry)
+        self._lows = RollingMin(exit)
+        self._atr = ATR(atr)
+
+    @property
+    def entry_level(self) -> float:
+        """Highest high of the last ``entry`` closed candles (``nan`` before)."""
+
+        return self._highs.value
+
+    @property
+    def exit_level(self) -> float:
+        """Lowest low of the last ``exit`` closed candles (``nan`` before)."""
+
+        return self._lows.value
+
+    @property
+    def atr(self) -> float:
+        return self._atr.value
+
+    def check(self, high: float, low: float) -> Literal["entry", "exit"] | None:
+        """Test a candle (possibly in progress) against the closed channels.
+
+        Crossing a level flips :attr:`long`, so a breakout is reported once.
+        """
+
+        if self.long:
+            if low < self._lows.value:
+                self.long = False
+                return "exit"
+        elif high > self._highs.value:
+            self.long = True
+            return "entry"
+        return None
+
+    def close(self, open: float, high: float, low: float, close: float, volume: float) -> None:
+        """Add a closed candle to the channels."""
+
+        self._highs.push(high)
+        self._lows.push(low)
+        self._atr.update(open, high, low, close, volume)
+
+    def update(
+        self, open: float, high: float, low: float, close: float, volume: float
+    ) -> Literal["entry", "exit"] | None:
+        """:meth:`check` then :meth:`close` a finished candle."""
+
+        signal = self.check(high, low)
+        self.close(open, high, low, close, volume)
+        return signal
+
+
+@register
+class Turtle(StrategyLogic):
+    """Turtle breakout on the engine's candle windows.
+
+    Each evaluation first closes the candles that precede the window's last
+    one and were not closed yet, then checks the last candle against the
+    channels. Entries are signalled at the channel level with the stop
+    ``stop_atr`` ATRs below and the target ``target_atr`` ATRs above. Exits
+    are ``sell`` signals carrying the exit level as every price.
+
+    Parameters (``params``)
+    -----------------------
+    entry / exit / atr:
+        Channel and ATR lengths (defaults ``20``, ``10``, ``20``).
+    stop_atr / target_atr:
+        Stop and target distances in ATRs (defaults ``2.0`` and ``4.0``).
+    """
+
+    kind = "turtle"
+    interval = "1d"
+
+    def __init__(self, params: Mapping[str, Any]) -> None:
+        super().__init__(params)
+        self.entry = int(self.params.get("entry", 20))
+        self.exit = int(self.params.get("exit", 10))
+        self.atr = int(self.params.get("atr", 20))
+        self.stop_atr = float(self.params.get("stop_atr", 2.0))
+        self.target_atr = float(self.params.get("target_atr", 4.0))
+        self._systems: dict[str, TurtleBreakout] = {}
+        self._closed: dict[str, int] = {}
+
+    @property
+    def lookback(self) -> int:
+        return max(self.entry, self.exit, self.atr) + 1
+
+    def evaluate(
+        self, symbol: str, window: CandleWindow, indicators: IndicatorCache
+    ) -> Decision | None:
+        system = self._systems.get(symbol)
+        if system is None:
+            system = self._systems[symbol] = TurtleBreakout(self.entry, self.exit, self.atr)
+        timestamps = window.timestamps
+        size = len(timestamps)
+        if not size:
+            return None
+
+        closed = self._closed.get(symbol)
+        start = size - 1
+        while start > 0 and (closed is None or int(timestamps[start - 1]) > closed):
+            start -= 1
+        for index in range(start, size - 1):
+            system.close(
+                float(window.open[index]),
+                float(window.high[index]),
+                float(window.low[index]),
+                float(window.close[index]),
+                float(window.volume[index]),
+            )
+        if start < size - 1:
+            self._closed[symbol] = int(timestamps[-2])
+
+        entry_level, exit_level, atr = system.entry_level, system.exit_level, system.atr
+        signal = system.check(float(window.high[-1]), float(window.low[-1]))
+        if signal == "exit":
+            return Decision("sell", exit_level, exit_level, exit_level)
+        if signal == "entry":
+            if math.isnan(atr) or entry_level - self.stop_atr * atr <= 0:
+                system.long = False
+                return None
+            return Decision(
+                "buy",
+                entry_level,
+                entry_level + self.target_atr * atr,
+                entry_level - self.stop_atr * atr,
+            )
+        return None
+
+
+__all__ = ["Turtle", "TurtleBreakout"]
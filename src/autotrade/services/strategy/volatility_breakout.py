@@ -0,0 +1,89 @@
+"""Volatility breakout: buy when price clears the open plus part of the last range."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any
+
+import numpy as np
+
+from autotrade.market_data.store import CandleWindow
+
+from .base import Decision, Signals, StrategyLogic, register
+from .indicators import IndicatorCache
+
+
+@register
+class VolatilityBreakout(StrategyLogic):
+    """Larry Williams style breakout on the candle in progress.
+
+    The entry level is ``open + k * (previous high - previous low)``; once the
+    current candle's high reaches it a buy is emitted (at most once per
+    candle). Confidence is the previous candle's body-to-range ratio, i.e.
+    one minus its noise ratio.
+
+    The strategy needs in-progress candle updates (``partial``): ingest
+    publishes them for ``1d`` by default (``CANDLE_PARTIAL_UPDATES``). With
+    closed candles only, breakouts would be reported after the day ended.
+
+    Parameters (``params``)
+    -----------------------
+    k:
+        Fraction of the previous range added to the open (default ``0.5``).
+    take_profit / stop_loss:
+        Exit distances as fractions of the entry price (defaults ``0.02`` and
+        ``0.01``).
+    """
+
+    kind = "volatility_breakout"
+    interval = "1d"
+    vectorized = True
+    partial = True
+
+    def __init__(self, params: Mapping[str, Any]) -> None:
+        super().__init__(params)
+        self.k = float(self.params.get("k", 0.5))
+        self.take_profit = float(self.params.get("take_profit", 0.02))
+        self.stop_loss = float(self.params.get("stop_loss", 0.01))
+        self._signaled: dict[str, int] = {}
+
+    @property
+    def lookback(self) -> int:
+        return 2
+
+    def evaluate(
+        self, symbol: str, window: CandleWindow, indicators: IndicatorCache
+    ) -> Decision | None:
+        if len(window.timestamps) < 2:
+            return None
+        opened = int(window.timestamps[-1])
+        if self._signaled.get(symbol) == opened:
+            return None
+        high, low = float(window.high[-2]), float(window.low[-2])
+        entry = float(window.open[-1]) + self.k * (high - low)
+        if entry <= 0 or float(window.high[-1]) < entry:
+            return None
+        self._signaled[symbol] = opened
+        body = abs(float(window.close[-2]) - float(window.open[-2]))
+        confidence = body / (high - low) if high > low else 0.0
+        return Decision(
+            "buy",
+            entry,
+            entry * (1 + self.take_profit),
+            entry * (1 - self.stop_loss),
+            min(max(confidence, 0.0), 1.0),
+        )
+
+    def signals(self, candles: CandleWindow) -> Signals:
+        previous_range = np.empty_like(candles.high)
+        previous_range[:1] = np.nan
+        np.subtract(candles.high[:-1], candles.low[:-1], out=previous_range[1:])
+        # Same operations in the same order as evaluate(), so prices match exactly.
+        entry = candles.open + self.k * previous_range
+        return Signals(
+            (entry > 0) & (candles.high >= entry),
+            entry, entry * (1 + self.take_profit), entry * (1 - self.stop_loss)
+        )
+
+
+__all__ = ["VolatilityBreakout"]
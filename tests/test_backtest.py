@@ -0,0 +1,219 @@
+"""Tests for the backtester, its execution model and candle loaders."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from autotrade.core.clock import from_ns
+from autotrade.core.fixedpoint import mul, to_fixed
+from autotrade.core.records import CandleRecord
+from autotrade.market_data.store import CandleWindow
+from autotrade.services.backtest import (
+    Backtester,
+    coverage_of,
+    from_records,
+    load_archive,
+    load_csv,
+)
+from autotrade.services.strategy import StrategySpec
+
+DAY = 86_400 * 10**9
+T0 = 1_704_067_200_000_000_000  # 2024-01-01T00:00:00Z
+
+
+def _window(rows) -> CandleWindow:
+    """Daily candles from ``(open, high, low, close)`` rows."""
+
+    columns = np.array(rows, dtype=np.float64).T
+    timestamps = T0 + np.arange(len(rows), dtype=np.int64) * DAY
+    return CandleWindow(timestamps, *columns, np.ones(len(rows)))
+
+
+def _random_candles(size: int, seed: int, sigma: float = 0.02) -> CandleWindow:
+    rng = np.random.default_rng(seed)
+    close = 50_000_000 * np.exp(np.cumsum(rng.normal(0, sigma, size)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, sigma, size))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, sigma, size))
+    timestamps = T0 + np.arange(size, dtype=np.int64) * DAY
+    return CandleWindow(timestamps, open_, high, low, close, np.ones(size))
+
+
+def _breakout(**params) -> StrategySpec:
+    return StrategySpec.create(
+        1, "volatility_breakout", {"k": 0.5, "take_profit": 0.03, "stop_loss": 0.02, **params}
+    )
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_vectorized_and_stepwise_runs_agree(seed):
+    candles = _random_candles(3_000, seed)
+    vectorized = Backtester(_breakout(), slippage="0.001").run("KRW-BTC", candles)
+    stepwise = Backtester(_breakout(), slippage="0.001", mode="stepwise").run("KRW-BTC", candles)
+
+    assert (vectorized.mode, stepwise.mode) == ("vectorized", "stepwise")
+    assert len(vectorized.trades) > 50
+    assert vectorized.trades == stepwise.trades
+    assert np.array_equal(vectorized.equity, stepwise.equity)
+    reasons = {trade.reason for trade in vectorized.trades}
+    assert {"take_profit", "stop_loss"} <= reasons
+
+
+def test_fills_fees_and_ledger_reconcile():
+    candles = _window(
+        [
+            (102.0, 110.0, 100.0, 108.0),
+            (100.0, 106.0, 99.0, 105.5),  # entry at 100 + 0.5 * 10 = 105
+            (105.5, 106.0, 104.0, 105.0),
+            (105.0, 109.0, 104.5, 108.5),  # target 105 * 1.03 = 108.15
+        ]
+    )
+    result = Backtester(_breakout(), capital=100_000, fee="0.001").run("KRW-TEST", candles)
+
+    [trade] = result.trades
+    assert (trade.entry_index, trade.exit_index, trade.reason) == (1, 3, "take_profit")
+    # Prices snap to the 0.01 KRW tick between 10 and 100 KRW and 0.1 KRW above.
+    assert trade.entry_price == to_fixed("105") and trade.exit_price == to_fixed("108.1")
+    fees = mul(mul(trade.entry_price, trade.quantity), to_fixed("0.001")) + mul(
+        mul(trade.exit_price, trade.quantity), to_fixed("0.001")
+    )
+    assert trade.fees == fees and trade.slippage == mul(to_fixed("0.05"), trade.quantity)
+    assert result.position.quantity == 0
+    assert trade.pnl == result.position.realized_pnl - result.position.fees
+    assert result.final_equity == pytest.approx((result.capital + trade.pnl) / 1e8)
+    assert result.equity[0] == 100_000 and result.total_return > 0
+
+
+def test_stop_wins_ties_and_gaps_fill_at_the_open():
+    spec = _breakout(take_profit=0.02, stop_loss=0.02)
+    both = _window(
+        [
+            (102.0, 110.0, 100.0, 108.0),
+            (100.0, 106.0, 99.0, 105.5),
+            (105.0, 120.0, 90.0, 100.0),  # reaches target and stop
+        ]
+    )
+    [trade] = Backtester(spec, capital=100_000, fee=0).run("KRW-TEST", both).trades
+    assert trade.reason == "stop_loss" and trade.exit_price == to_fixed("102.9")
+
+    gap = _window(
+        [
+            (102.0, 110.0, 100.0, 108.0),
+            (100.0, 106.0, 99.0, 105.5),
+            (95.0, 96.0, 94.0, 95.5),  # opens below the 102.9 stop
+        ]
+    )
+    [trade] = Backtester(spec, capital=100_000, fee=0).run("KRW-TEST", gap).trades
+    assert trade.exit_price == to_fixed("95") and trade.pnl < 0
+
+
+def test_open_positions_close_at_the_end_and_unfunded_entries_are_skipped():
+    candles = _window([(102.0, 110.0, 100.0, 108.0), (100.0, 106.0, 99.0, 105.5)])
+    [trade] = Backtester(_breakout(), capital=100_000).run("KRW-TEST", candles).trades
+    assert trade.reason == "end" and trade.exit_price == to_fixed("105.5")
+
+    # Below Upbit's 5,000 KRW minimum order nothing is traded.
+    result = Backtester(_breakout(), capital=4_000).run("KRW-TEST", candles)
+    assert result.trades == [] and list(result.equity) == [4_000.0, 4_000.0]
+    with pytest.raises(ValueError):
+        Backtester(_breakout(), fraction=0)
+
+
+def test_path_dependent_strategies_run_stepwise():
+    candles = _random_candles(1_500, 4)
+    spec = StrategySpec.create(2, "turtle", {"entry": 20, "exit": 10, "atr": 20})
+    result = Backtester(spec, fee=0).run("KRW-BTC", candles)
+
+    assert result.mode == "stepwise" and len(result.trades) > 10
+    assert {trade.reason for trade in result.trades} <= {"signal", "stop_loss", "take_profit", "end"}
+    assert "signal" in {trade.reason for trade in result.trades}
+    with pytest.raises(NotImplementedError):
+        Backtester(spec, mode="vectorized").run("KRW-BTC", candles)
+
+
+def test_gaps_are_reported_from_the_candles():
+    candles = _random_candles(10, 5)
+    kept = np.r_[0:3, 5:10]
+    holed = CandleWindow(*(column[kept] for column in candles))
+    result = Backtester(_breakout()).run("KRW-BTC", holed, end_ns=T0 + 12 * DAY)
+    assert result.gaps == [(T0 + 3 * DAY, T0 + 5 * DAY), (T0 + 10 * DAY, T0 + 12 * DAY)]
+
+    coverage = coverage_of(np.array([T0 + DAY, T0, T0, T0 + 3 * DAY]), "1d")
+    assert coverage.runs() == [(T0 // DAY, T0 // DAY + 2), (T0 // DAY + 3, T0 // DAY + 4)]
+
+
+def test_csv_and_record_loaders(tmp_path):
+    candles = _random_candles(5, 6)
+    rows = list(zip(candles.timestamps.tolist(), *(column.tolist() for column in candles[1:])))
+    by_ns = tmp_path / "ns.csv"
+    by_ns.write_text(
+        "timestamp,open,high,low,close,volume\n"
+        + "".join(",".join(map(repr, row)) + "\n" for row in rows)
+    )
+    by_iso = tmp_path / "iso.csv"
+    by_iso.write_text(
+        "symbol,volume,close,low,high,open,timestamp\n"
+        + "".join(
+            f"KRW-BTC,{v!r},{c!r},{l!r},{h!r},{o!r},{from_ns(ts).isoformat()}\n"
+            for ts, o, h, l, c, v in reversed(rows)
+        )
+    )
+    for path in (by_ns, by_iso):
+        loaded = load_csv(path)
+        for expected, actual in zip(candles, loaded):
+            assert np.array_equal(expected, actual)
+
+    records = [CandleRecord("KRW-BTC", "1d", *row) for row in rows]
+    assert all(np.array_equal(a, b) for a, b in zip(candles, from_records(records)))
+    with pytest.raises(ValueError):
+        load_csv(by_ns, timestamp="opened_at")
+
+
+def test_archive_loader(tmp_path):
+    pytest.importorskip("pyarrow")
+    from autotrade.market_data.archive import ArchiveWriter
+
+    candles = _random_candles(40, 7)
+    columns = {
+        "timestamp": candles.timestamps,
+        **{name: getattr(candles, name) for name in ("open", "high", "low", "close", "volume")},
+    }
+    ArchiveWriter(tmp_path).write_candles("KRW-BTC", "1d", columns)
+    loaded = load_archive(tmp_path, "KRW-BTC", "1d", T0 + 10 * DAY, T0 + 20 * DAY)
+    assert np.array_equal(loaded.timestamps, candles.timestamps[10:20])
+    assert np.array_equal(loaded.close, candles.close[10:20])
+
+
+def test_cli_passes_require_complete_to_the_database_loader(monkeypatch, capsys):
+    import contextlib
+
+    from autotrade.db import session as session_module
+    from autotrade.services.backtest import __main__ as cli
+    from autotrade.services.backtest import data as data_module
+
+    calls = []
+
+    async def fake_load(session, symbol, interval, start_ns, end_ns, *, require_complete=False):
+        calls.append(require_complete)
+        if require_complete:
+            raise ValueError(f"{symbol} {interval} candles are incomplete: [(1, 2)]")
+        return _random_candles(5, 9)
+
+    @contextlib.asynccontextmanager
+    async def fake_scope(factory):
+        yield None
+
+    monkeypatch.setattr(data_module, "load_database", fake_load)
+    monkeypatch.setattr(session_module, "get_async_session", lambda: None)
+    monkeypatch.setattr(session_module, "session_scope", fake_scope)
+    argv = ["volatility_breakout", "--symbol", "KRW-BTC", "--database"]
+    argv += ["--start", "2024-01-01", "--end", "2024-01-06"]
+
+    assert cli.main(argv) == 0
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main([*argv, "--require-complete"])
+    assert exit_info.value.code == 1 and calls == [False, True]
+    assert "incomplete" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        cli.main(["turtle", "--symbol", "KRW-BTC", "--csv", "x.csv", "--require-complete"])
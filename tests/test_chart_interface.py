@@ -35,3 +35,73 @@ def test_chart_stream_emits_events():
     assert payload["symbol"] == "BTC"
     assert "timestamp" in payload
     assert "price" in payload
+
+
+class _FakeCandleCache:
+    capacity = 10
+
+    def __init__(self, payloads):
+        self.payloads = payloads
+        self.limits: list[int] = []
+
+    async def get_recent(self, symbol, interval, limit):
+        self.limits.append(limit)
+        return self.payloads[-limit:]
+
+
+def test_chart_history_reads_recent_ranges_from_the_candle_cache(monkeypatch):
+    from contextlib import asynccontextmanager
+
+    import autotrade.db.candles as candles_db
+    import autotrade.db.session as session_db
+    from autotrade.app.routes import chart
+    from autotrade.core.clock import from_ns, now_ns
+    from autotrade.core.records import CandleRecord
+    from autotrade.market_data.coverage import Coverage
+    from autotrade.market_data.intervals import get_interval
+
+    minute = get_interval("1m")
+    current = minute.floor(now_ns())
+    payloads = [
+        CandleRecord("KRW-BTC", "1m", current - offset * minute.ns, 1.0, 2.0, 0.5, 1.5, 1.0)
+        .to_payload()
+        for offset in (4, 3, 2, 1, 0)
+    ]
+    cache = _FakeCandleCache(payloads)
+    database: list[int] = []
+
+    @asynccontextmanager
+    async def scope(session_factory):
+        yield None
+
+    async def load_coverage(session, symbol, interval):
+        covered = Coverage(minute)
+        covered.add_range(current - 10 * minute.ns, current)
+        return covered
+
+    async def fetch_candles(session, symbol, interval, start_ns, end_ns):
+        database.append(start_ns)
+        return []
+
+    monkeypatch.setattr(session_db, "session_scope", scope)
+    monkeypatch.setattr(candles_db, "load_coverage", load_coverage)
+    monkeypatch.setattr(candles_db, "fetch_candles", fetch_candles)
+    app.dependency_overrides[chart.get_session_factory] = lambda: None
+    app.dependency_overrides[chart.get_candle_cache] = lambda: cache
+    try:
+        start = from_ns(current - 3 * minute.ns).isoformat()
+        recent = client.get("/chart/history", params={"symbol": "krw-btc", "start": start})
+        longer = from_ns(current - 20 * minute.ns).isoformat()
+        fallback = client.get("/chart/history", params={"symbol": "KRW-BTC", "start": longer})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert recent.status_code == 200
+    # Three closed candles; the in-progress one is outside ``[start, now)``.
+    timestamps = [candle["timestamp"] for candle in recent.json()["candles"]]
+    assert timestamps == [
+        from_ns(current - offset * minute.ns).isoformat() for offset in (3, 2, 1)
+    ]
+    assert cache.limits == [4]
+    # Twenty slots do not fit in the ten-candle cache.
+    assert fallback.status_code == 200 and database == [current - 20 * minute.ns]
@@ -12,3 +12,75 @@ def test_now_returns_aware_timestamps():
     assert snapshot.kst.utcoffset().total_seconds() == 9 * 3600
     # Ensure the two timestamps represent the same instant
     assert snapshot.utc.timestamp() == snapshot.kst.timestamp()
+
+
+def test_now_ns_tracks_wall_clock():
+    import time
+
+    from autotrade.core.clock import SystemClock
+
+    clock = SystemClock()
+
+    assert abs(clock.now_ns() - time.time_ns()) < 50_000_000
+
+
+def test_now_ns_does_not_run_backwards_when_reanchored(monkeypatch):
+    import time
+
+    from autotrade.core.clock import SystemClock
+
+    clock = SystemClock(reanchor_interval=0)
+    first = clock.now_ns()
+    # The host clock is stepped back by a second before the next re-anchor.
+    real_time_ns = time.time_ns
+    monkeypatch.setattr(time, "time_ns", lambda: real_time_ns() - 1_000_000_000)
+    time.sleep(0.001)
+
+    assert clock.now_ns() == first
+    mono, wall = clock._anchor
+    assert wall < first
+
+
+def test_simulated_clock_drives_now_and_sleep():
+    import asyncio
+
+    from autotrade.core.clock import SimulatedClock, use_clock
+
+    start = 1_700_000_000 * 1_000_000_000
+    clock = SimulatedClock(start)
+
+    async def scenario():
+        woke: list[int] = []
+
+        async def sleeper():
+            await clock.sleep(5)
+            woke.append(now().ns)
+
+        task = asyncio.create_task(sleeper())
+        await asyncio.sleep(0)
+        clock.advance(4)
+        await asyncio.sleep(0)
+        assert not woke
+        clock.advance(2)
+        await task
+        return woke
+
+    with use_clock(clock):
+        assert now().ns == start
+        woke = asyncio.run(scenario())
+
+    assert woke == [start + 6_000_000_000]
+    assert now().ns != start
+
+
+def test_to_datetime64_applies_zone_offset():
+    import numpy as np
+
+    from autotrade.core.clock import to_datetime64
+
+    values = np.array([0, 3_600_000_000_000], dtype=np.int64)
+
+    utc, local = to_datetime64(values)
+
+    assert utc[0] == np.datetime64("1970-01-01T00:00:00", "ns")
+    assert local[1] == np.datetime64("1970-01-01T10:00:00", "ns")
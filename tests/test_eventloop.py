@@ -0,0 +1,87 @@
+"""Tests for event loop selection and the loop lag monitor."""
+
+import asyncio
+import logging
+import time
+
+import pytest
+
+from autotrade.core import eventloop
+from autotrade.core.eventloop import LoopLagMonitor, loop_factory, run, uvicorn_loop
+from autotrade.core.metrics import render
+
+
+def test_loop_factory_selects_implementation():
+    assert loop_factory("asyncio") is asyncio.new_event_loop
+    assert uvicorn_loop("asyncio") == "asyncio"
+    uvloop = pytest.importorskip("uvloop")
+    assert loop_factory("uvloop") is uvloop.new_event_loop
+    assert uvicorn_loop("uvloop") == "uvloop"
+
+    async def loop_type() -> str:
+        return type(asyncio.get_running_loop()).__module__
+
+    assert run(loop_type(), kind="uvloop").startswith("uvloop")
+
+
+def test_loop_factory_falls_back_without_uvloop(monkeypatch, caplog):
+    import builtins
+
+    real_import = builtins.__import__
+
+    def fake_import(name, *args, **kwargs):
+        if name == "uvloop":
+            raise ModuleNotFoundError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", fake_import)
+    with caplog.at_level(logging.WARNING, logger=eventloop.__name__):
+        assert loop_factory("uvloop") is asyncio.new_event_loop
+    assert "uvloop is not installed" in caplog.text
+
+
+def test_monitor_records_lag_and_logs_blocking_stack(caplog):
+    def blocking_call() -> None:
+        time.sleep(0.3)
+
+    async def offender() -> None:
+        await asyncio.sleep(0.05)
+        blocking_call()
+
+    async def main() -> LoopLagMonitor:
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.1)
+        probe = asyncio.create_task(monitor.run())
+        await asyncio.create_task(offender(), name="offender")
+        await asyncio.sleep(0.05)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return monitor
+
+    with caplog.at_level(logging.WARNING, logger=eventloop.__name__):
+        monitor = asyncio.run(main())
+
+    assert monitor.stalls == 1
+    assert monitor.max_lag >= 200_000_000
+    record = next(r for r in caplog.records if "Event loop blocked" in r.getMessage())
+    assert record.task == "offender"
+    assert "blocking_call" in record.getMessage()
+    assert "autotrade_event_loop_lag_seconds_count" in render()
+    assert "autotrade_event_loop_stalls_total" in render()
+
+
+def test_monitor_without_threshold_has_no_watchdog():
+    async def main() -> LoopLagMonitor:
+        monitor = LoopLagMonitor(interval=0.01, threshold=0)
+        probe = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.05)
+        time.sleep(0.05)
+        await asyncio.sleep(0.02)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return monitor
+
+    monitor = asyncio.run(main())
+    assert monitor.stalls == 0
+    assert monitor.max_lag >= 30_000_000
@@ -0,0 +1,59 @@
+"""Tests for fixed-point prices, quantities and market specs."""
+
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+
+from autotrade.core.fixedpoint import (
+    SCALE,
+    div,
+    dot,
+    get_market_spec,
+    mul,
+    mul_div,
+    to_decimal,
+    to_fixed,
+)
+
+
+def test_conversions_are_exact_at_boundaries():
+    assert to_fixed(Decimal("12345.12345678")) == 1_234_512_345_678
+    assert to_fixed("0.1") == to_fixed(0.1) == 10_000_000
+    assert to_fixed(3) == 3 * SCALE
+    assert to_fixed("0.000000005") == 0  # half-even
+    assert to_decimal(to_fixed("98765.4321")) == Decimal("98765.43210000")
+    with pytest.raises(ValueError):
+        to_fixed("abc")
+
+
+def test_summing_fills_does_not_drift():
+    fills = [to_fixed("0.1")] * 10
+
+    assert sum(fills) == to_fixed(1)
+    assert sum([0.1] * 10) != 1.0
+
+
+def test_mul_floors_and_div_rounds_half_even():
+    price, quantity = to_fixed("50000000"), to_fixed("0.00012345")
+
+    assert to_decimal(mul(price, quantity)) == Decimal("6172.50000000")
+    assert mul(to_fixed("0.00000001"), to_fixed("0.99")) == 0
+    assert mul(to_fixed("-0.00000001"), to_fixed("0.5")) == -1
+    assert mul_div(to_fixed(10), 2, 3) == 666_666_666
+    assert div(to_fixed(1), to_fixed(3)) == 33_333_333
+    assert div(to_fixed(2), to_fixed(3)) == 66_666_667
+    assert dot([to_fixed("0.00000001")] * 2, [to_fixed("0.5")] * 2) == 1
+
+
+def test_upbit_krw_market_spec_snaps_prices_to_ticks():
+    spec = get_market_spec("KRW-BTC")
+
+    assert spec.tick_size(to_fixed(95_000_000)) == to_fixed(1000)
+    assert spec.tick_size(to_fixed(150_000)) == to_fixed(50)
+    assert spec.tick_size(to_fixed("0.5")) == to_fixed("0.0001")
+    assert spec.round_price(to_fixed(95_000_499)) == to_fixed(95_000_000)
+    assert spec.round_price(to_fixed(95_000_001), "up") == to_fixed(95_001_000)
+    assert spec.is_valid_order(to_fixed(95_000_000), to_fixed("0.0001"))
+    assert not spec.is_valid_order(to_fixed(95_000_000), to_fixed("0.00001"))
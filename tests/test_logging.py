@@ -0,0 +1,107 @@
+"""Tests for queued, structured and throttled logging."""
+
+from __future__ import annotations
+
+import io
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from autotrade.core.logging import (
+    ThrottledLogger,
+    bind_event,
+    configure_logging,
+    shutdown_logging,
+)
+from autotrade.messaging import EventEnvelope, EventName
+
+
+@pytest.fixture(autouse=True)
+def _restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+class _SlowStream(io.StringIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.writer_threads: set[str] = set()
+
+    def write(self, text: str) -> int:
+        self.writer_threads.add(threading.current_thread().name)
+        time.sleep(0.05)
+        return super().write(text)
+
+
+def _json_lines(stream: io.StringIO) -> list[dict]:
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_queued_json_logging_includes_correlation_ids():
+    stream = io.StringIO()
+    configure_logging(logging.DEBUG, fmt="json", queued=True, stream=stream)
+    now = datetime.now(tz=timezone.utc)
+    envelope = EventEnvelope(
+        name=EventName.MARKET_CANDLE_INGESTED,
+        producer="tests",
+        produced_at_utc=now,
+        produced_at_kst=now,
+        payload={},
+        correlation_id="corr-1",
+        causation_id="cause-1",
+    )
+
+    with bind_event(envelope):
+        logging.getLogger("autotrade.test").info("handled %s", "candle", extra={"symbol": "KRW-BTC"})
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logging.getLogger("autotrade.test").exception("failed")
+    shutdown_logging()
+
+    first, second = _json_lines(stream)
+    assert first["message"] == "handled candle"
+    assert first["correlation_id"] == "corr-1" and first["causation_id"] == "cause-1"
+    assert first["symbol"] == "KRW-BTC"
+    assert "correlation_id" not in second
+    assert "RuntimeError: boom" in second["exc"]
+
+
+def test_queued_logging_does_not_block_caller_on_slow_output():
+    stream = _SlowStream()
+    configure_logging(logging.INFO, fmt="text", queued=True, stream=stream)
+    logger = logging.getLogger("autotrade.test")
+
+    start = time.perf_counter()
+    for index in range(10):
+        logger.info("tick %d", index)
+    elapsed = time.perf_counter() - start
+    shutdown_logging()
+
+    assert elapsed < 0.25
+    assert stream.getvalue().count("tick") == 10
+    assert threading.current_thread().name not in stream.writer_threads
+
+
+def test_throttled_logger_samples_and_rate_limits(caplog):
+    caplog.set_level(logging.DEBUG, logger="autotrade.hot")
+    sampled = ThrottledLogger(logging.getLogger("autotrade.hot"), every=10)
+    for index in range(25):
+        sampled.debug("price %s", index)
+
+    limited = ThrottledLogger(logging.getLogger("autotrade.hot"), per_second=0.001, burst=2)
+    for index in range(5):
+        limited.info("book update %s", index)
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages == ["price 0", "price 10", "price 20", "book update 0", "book update 1"]
+    assert caplog.records[1].suppressed == 9
+    assert caplog.records[1].funcName == "test_throttled_logger_samples_and_rate_limits"
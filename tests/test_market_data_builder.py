@@ -0,0 +1,210 @@
+"""Tests for the incremental trade candle builder and its batch equivalent."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+
+import numpy as np
+import pytest
+
+from autotrade.core.records import CandleRecord, TickRecord
+from autotrade.market_data.builder import (
+    CandleBuilder,
+    build_candles,
+    candle_records,
+    parse_partial,
+)
+from autotrade.services.market_ingest import IngestEngine
+
+_SECOND = 1_000_000_000
+_MINUTE = 60 * _SECOND
+T0 = 1_704_067_200_000_000_000  # 2024-01-01T00:00:00Z
+
+
+def _ticks(count: int, seed: int = 7) -> list[TickRecord]:
+    rng = random.Random(seed)
+    ts = T0
+    ticks = []
+    for _ in range(count):
+        ts += rng.randrange(1, 20) * _SECOND
+        ticks.append(TickRecord("KRW-BTC", ts, float(rng.randrange(90, 110)), rng.random()))
+    return ticks
+
+
+def _batch(ticks: list[TickRecord], interval: str) -> list[CandleRecord]:
+    columns = build_candles(
+        [t.ts_ns for t in ticks], [t.price for t in ticks], [t.size for t in ticks], interval
+    )
+    return candle_records("KRW-BTC", interval, columns)
+
+
+def _by_key(records: list[CandleRecord]) -> dict[tuple[str, int], CandleRecord]:
+    return {(record.interval, record.ts_ns): record for record in records}
+
+
+def test_streaming_matches_vectorized_rebuild_for_every_interval():
+    ticks = _ticks(3_000)
+    builder = CandleBuilder(("1m", "5m", "60m", "1d"), grace=0)
+    closed = builder.update(ticks) + builder.flush()
+
+    expected = [candle for name in ("1m", "5m", "60m", "1d") for candle in _batch(ticks, name)]
+    built, wanted = _by_key(closed), _by_key(expected)
+    assert built.keys() == wanted.keys()
+    for key, candle in wanted.items():
+        assert built[key][:7] == candle[:7]
+        assert built[key].volume == pytest.approx(candle.volume)
+
+
+def test_out_of_order_trades_within_grace_give_the_ordered_result():
+    ticks = _ticks(2_000)
+    shuffled = ticks[:]
+    # Swap neighbours: every trade arrives at most one position late (< 20s).
+    for index in range(0, len(shuffled) - 1, 2):
+        shuffled[index], shuffled[index + 1] = shuffled[index + 1], shuffled[index]
+
+    builder = CandleBuilder(("1m", "15m"), grace=30)
+    closed = builder.update(shuffled) + builder.flush()
+
+    assert builder.late == 0
+    expected = _by_key(_batch(ticks, "1m") + _batch(ticks, "15m"))
+    assert {key: candle[:7] for key, candle in _by_key(closed).items()} == {
+        key: candle[:7] for key, candle in expected.items()
+    }
+
+
+def test_candles_close_after_grace_and_late_trades_are_dropped():
+    builder = CandleBuilder(("1m",), grace=5)
+    builder.add(TickRecord("KRW-BTC", T0 + 10 * _SECOND, 100.0, 1.0))
+    builder.add(TickRecord("KRW-BTC", T0 + 62 * _SECOND, 101.0, 1.0))
+    assert builder.drain() == []  # still inside the grace window
+    builder.add(TickRecord("KRW-BTC", T0 + 50 * _SECOND, 99.0, 2.0))  # late but accepted
+    builder.add(TickRecord("KRW-BTC", T0 + 65 * _SECOND, 102.0, 1.0))
+
+    (candle,) = builder.drain()
+    assert candle == CandleRecord("KRW-BTC", "1m", T0, 100.0, 100.0, 99.0, 99.0, 3.0)
+
+    builder.add(TickRecord("KRW-BTC", T0 + 59 * _SECOND, 1.0, 1.0))
+    assert builder.late == 1 and builder.drain() == []
+
+    # A quiet market is closed by the clock.
+    assert builder.advance(T0 + 2 * _MINUTE) == []
+    (candle,) = builder.advance(T0 + 2 * _MINUTE + 5 * _SECOND)
+    assert candle.ts_ns == T0 + _MINUTE and candle.close == 102.0
+
+
+def test_advance_can_be_limited_to_markets_and_buckets_discarded():
+    builder = CandleBuilder(("1m", "3m"), grace=0)
+    builder.add(TickRecord("KRW-BTC", T0 + _SECOND, 100.0, 1.0))
+    builder.add(TickRecord("KRW-ETH", T0 + _MINUTE + _SECOND, 10.0, 1.0))
+
+    assert builder.symbols == ["KRW-BTC", "KRW-ETH"]
+    closed = builder.advance(T0 + 3 * _MINUTE, ("KRW-BTC",))
+    assert [(c.symbol, c.interval) for c in closed] == [("KRW-BTC", "1m"), ("KRW-BTC", "3m")]
+
+    assert builder.discard("KRW-ETH") == (T0, T0 + 3 * _MINUTE)
+    assert builder.discard("KRW-ETH") is None
+    assert builder.advance(T0 + 3 * _MINUTE) == []
+    # Only the dropped 3m bucket is still open at 00:02.
+    builder.add(TickRecord("KRW-ETH", T0 + 2 * _MINUTE, 11.0, 1.0))
+    assert builder.late == 1
+
+
+def test_in_progress_updates_report_each_touched_bucket_once():
+    builder = CandleBuilder(("1m", "3m"), partial=True)
+    for offset, price in ((1, 10.0), (2, 12.0), (3, 11.0)):
+        builder.add(TickRecord("KRW-ETH", T0 + offset * _SECOND, price, 1.0))
+
+    updates = builder.in_progress()
+    assert [(c.interval, c.high, c.close, c.volume) for c in updates] == [
+        ("1m", 12.0, 11.0, 3.0),
+        ("3m", 12.0, 11.0, 3.0),
+    ]
+    assert builder.in_progress() == []
+
+
+def test_in_progress_updates_can_be_limited_to_some_intervals():
+    builder = CandleBuilder(("1m", "1d"), partial=parse_partial("1d"))
+    builder.add(TickRecord("KRW-ETH", T0 + _SECOND, 10.0, 1.0))
+
+    assert builder.partial
+    assert [c.interval for c in builder.in_progress()] == ["1d"]
+    assert parse_partial("4h, 1d") == ("240m", "1d")
+    assert parse_partial("false") is False and parse_partial("true") is True
+    assert not CandleBuilder(("1m",), partial=parse_partial("1d")).partial
+
+
+def test_build_candles_sorts_and_handles_empty_input():
+    columns = build_candles([3 * _MINUTE, _MINUTE, 2 * _MINUTE + 1], [3.0, 1.0, 2.0], [1, 1, 1], "1m")
+    assert columns["timestamp"].tolist() == [_MINUTE, 2 * _MINUTE, 3 * _MINUTE]
+    assert columns["close"].tolist() == [1.0, 2.0, 3.0]
+    assert build_candles(np.empty(0), [], [], "5m")["timestamp"].size == 0
+
+
+def test_engine_publishes_built_candles():
+    class RecordingBus:
+        def __init__(self) -> None:
+            self.items: list[tuple[str, dict]] = []
+
+        async def publish_many(self, items):
+            self.items.extend((stream, json.loads(data)) for stream, data in items)
+
+    base_ms = T0 // 1_000_000
+    frames = [
+        json.dumps(
+            {
+                "type": "trade",
+                "code": "KRW-BTC",
+                "trade_timestamp": base_ms + offset_ms,
+                "trade_price": price,
+                "trade_volume": 1.0,
+                "sequential_id": seq,
+            }
+        )
+        for seq, (offset_ms, price) in enumerate(((1_000, 100.0), (30_000, 105.0), (61_000, 101.0)))
+    ]
+    bus = RecordingBus()
+    engine = IngestEngine(bus, ["KRW-BTC"], builder=CandleBuilder(("1m",), grace=0))
+
+    asyncio.run(engine.process(frames))
+
+    candles = [event["payload"] for stream, event in bus.items if event["name"] == "market.candle.ingested"]
+    assert candles == [
+        {
+            "symbol": "KRW-BTC",
+            "interval": "1m",
+            "open": 100.0,
+            "high": 105.0,
+            "low": 100.0,
+            "close": 105.0,
+            "volume": 2.0,
+            "timestamp_utc": "2024-01-01T00:00:00+00:00",
+            "timestamp_kst": "2024-01-01T09:00:00+09:00",
+            "source": "upbit",
+        }
+    ]
+
+
+def test_rebuild_from_archive(tmp_path):
+    pytest.importorskip("pyarrow")
+    from autotrade.market_data.archive import ArchiveReader, ArchiveWriter
+    from autotrade.market_data.builder import rebuild_from_archive
+
+    ticks = _ticks(500)
+    writer = ArchiveWriter(tmp_path)
+    writer.write_ticks(
+        "KRW-BTC",
+        {
+            "timestamp": [t.ts_ns for t in ticks],
+            "price": [t.price for t in ticks],
+            "size": [t.size for t in ticks],
+        },
+    )
+
+    reader = ArchiveReader(tmp_path)
+    columns = rebuild_from_archive(reader, "KRW-BTC", "5m", writer=writer)
+
+    assert candle_records("KRW-BTC", "5m", columns) == _batch(ticks, "5m")
+    stored = reader.read_candles("KRW-BTC", "5m")
+    assert stored["timestamp"].tolist() == columns["timestamp"].tolist()
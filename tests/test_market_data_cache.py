@@ -0,0 +1,189 @@
+"""Tests for the Redis candle and indicator read-through cache."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from autotrade.core.schemas import CandlePayload
+from autotrade.market_data.cache import CandleCache
+
+
+class _FakePipeline:
+    def __init__(self, redis: "_FakeRedis") -> None:
+        self._redis = redis
+        self._commands: list[tuple[str, tuple]] = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self._commands.append((name, args))
+            return self
+
+        return queue
+
+    async def execute(self):
+        results = [getattr(self._redis, name)(*args) for name, args in self._commands]
+        return [await result for result in results]
+
+
+class _FakeRedis:
+    """Sorted-set subset of redis-py's asyncio client."""
+
+    def __init__(self) -> None:
+        self.zsets: dict[str, dict[bytes, float]] = {}
+        self.strings: dict[str, object] = {}
+
+    def pipeline(self, transaction: bool = True) -> _FakePipeline:
+        return _FakePipeline(self)
+
+    def _ordered(self, key):
+        return sorted(self.zsets.get(key, {}).items(), key=lambda item: item[1])
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrange(self, key, start, stop):
+        members = [member for member, _ in self._ordered(key)]
+        stop = len(members) if stop == -1 else stop + 1
+        return members[max(len(members) + start, 0) if start < 0 else start : stop]
+
+    async def zremrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        for member, score in list(zset.items()):
+            if low <= score <= high:
+                del zset[member]
+
+    async def zremrangebyrank(self, key, start, stop):
+        ordered = self._ordered(key)
+        stop = max(len(ordered) + stop + 1, 0) if stop < 0 else stop + 1
+        for member, _ in ordered[start:stop]:
+            del self.zsets[key][member]
+
+    async def set(self, key, value):
+        self.strings[key] = value
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def exists(self, key):
+        return int(key in self.strings)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.zsets.pop(key, None)
+            self.strings.pop(key, None)
+
+
+def _candle(minute: int, close: float = 1.0) -> CandlePayload:
+    opened = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=minute)
+    return CandlePayload(
+        symbol="KRW-BTC",
+        interval="1m",
+        open=1.0,
+        high=2.0,
+        low=0.5,
+        close=close,
+        volume=3.0,
+        timestamp_utc=opened,
+        timestamp_kst=opened,
+    )
+
+
+def test_miss_loads_once_then_hits():
+    calls: list[int] = []
+
+    async def loader(symbol, interval, limit):
+        calls.append(limit)
+        await asyncio.sleep(0)
+        return [_candle(minute) for minute in range(5)]
+
+    cache = CandleCache(_FakeRedis(), loader, capacity=10, namespace="t")
+
+    async def scenario():
+        first = await asyncio.gather(
+            *(cache.get_recent("KRW-BTC", "1m", 3) for _ in range(4))
+        )
+        second = await cache.get_recent("KRW-BTC", "1m", 3)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert calls == [10]
+    assert cache.stats.misses == 4
+    assert cache.stats.coalesced == 3
+    assert cache.stats.hits == 1
+    assert [c.timestamp_utc for c in second] == [c.timestamp_utc for c in first[0]]
+    assert second[-1].timestamp_utc == _candle(4).timestamp_utc
+    assert second[-1].timestamp_kst.utcoffset() == timedelta(hours=9)
+
+
+def test_write_replaces_bucket_and_trims_to_capacity():
+    async def loader(symbol, interval, limit):
+        return [_candle(minute) for minute in range(3)]
+
+    cache = CandleCache(_FakeRedis(), loader, capacity=3, namespace="t")
+
+    async def scenario():
+        await cache.get_recent("KRW-BTC", "1m", 3)
+        await cache.write(_candle(3, close=5.0))
+        await cache.write(_candle(3, close=6.0))
+        return await cache.get_recent("KRW-BTC", "1m", 3)
+
+    series = asyncio.run(scenario())
+
+    assert [c.timestamp_utc for c in series] == [
+        _candle(minute).timestamp_utc for minute in (1, 2, 3)
+    ]
+    assert series[-1].close == 6.0
+    assert cache.stats.loads == 1
+
+
+def test_ingest_writes_alone_do_not_warm_the_cache():
+    async def loader(symbol, interval, limit):
+        return [_candle(minute) for minute in range(2)]
+
+    cache = CandleCache(_FakeRedis(), loader, capacity=5, namespace="t")
+
+    async def scenario():
+        await cache.write(_candle(2))
+        return await cache.get_recent("KRW-BTC", "1m", 5)
+
+    series = asyncio.run(scenario())
+
+    assert [c.timestamp_utc for c in series] == [
+        _candle(minute).timestamp_utc for minute in range(3)
+    ]
+    assert cache.stats.misses == 1
+
+
+def test_indicators_are_cached_until_the_series_changes():
+    async def loader(symbol, interval, limit):
+        return [_candle(minute, float(minute)) for minute in range(4)]
+
+    calls: list[int] = []
+
+    def running_sum(candles):
+        calls.append(len(candles))
+        total, values = 0.0, []
+        for candle in candles:
+            total += candle.close
+            values.append(total)
+        return values
+
+    cache = CandleCache(_FakeRedis(), loader, capacity=10, namespace="t")
+
+    async def scenario():
+        concurrent = await asyncio.gather(
+            *(cache.get_indicator("KRW-BTC", "1m", "sum", running_sum) for _ in range(3))
+        )
+        cached = await cache.get_indicator("KRW-BTC", "1m", "sum", running_sum)
+        await cache.write(_candle(3, 10.0))  # the last candle is revised
+        revised = await cache.get_indicator("KRW-BTC", "1m", "sum", running_sum)
+        return concurrent, cached, revised
+
+    concurrent, cached, revised = asyncio.run(scenario())
+
+    assert concurrent == [[0.0, 1.0, 3.0, 6.0]] * 3 and cached == concurrent[0]
+    assert revised == [0.0, 1.0, 3.0, 13.0]
+    assert calls == [4, 4]
+    assert (cache.stats.indicator_hits, cache.stats.indicator_misses) == (1, 4)
@@ -0,0 +1,142 @@
+"""Tests for the run-length encoded candle coverage index."""
+
+from __future__ import annotations
+
+import random
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from autotrade.app.main import app
+from autotrade.app.routes.chart import get_session_factory
+from autotrade.core.records import CandleRecord
+from autotrade.market_data.coverage import Coverage
+from autotrade.market_data.intervals import get_interval
+
+MINUTE = get_interval("1m")
+M = MINUTE.ns
+T0 = 1_704_067_200_000_000_000  # 2024-01-01T00:00:00Z
+
+
+def _naive_gaps(covered: set[int], lo: int, hi: int) -> list[tuple[int, int]]:
+    gaps: list[tuple[int, int]] = []
+    for slot in range(lo, hi):
+        if slot in covered:
+            continue
+        if gaps and gaps[-1][1] == slot:
+            gaps[-1] = (gaps[-1][0], slot + 1)
+        else:
+            gaps.append((slot, slot + 1))
+    return gaps
+
+
+def test_random_updates_match_a_set_model():
+    rng = random.Random(5)
+    coverage = Coverage("1m")
+    covered: set[int] = set()
+    base = T0 // M
+    for _ in range(300):
+        if rng.random() < 0.5:
+            slots = [rng.randrange(0, 2_000) for _ in range(rng.randrange(1, 20))]
+            coverage.add(T0 + slot * M + rng.randrange(M) for slot in slots)
+            covered.update(slots)
+        else:
+            lo = rng.randrange(0, 2_000)
+            hi = lo + rng.randrange(0, 80)
+            coverage.add_range(T0 + lo * M, T0 + hi * M)
+            covered.update(range(lo, hi))
+
+        lo = rng.randrange(0, 2_000)
+        hi = lo + rng.randrange(1, 500)
+        expected = [(T0 + a * M, T0 + b * M) for a, b in _naive_gaps(covered, lo, hi)]
+        assert coverage.gaps(T0 + lo * M, T0 + hi * M) == expected
+        assert coverage.is_complete(T0 + lo * M, T0 + hi * M) == (not expected)
+        assert coverage.completeness(T0 + lo * M, T0 + hi * M) == sum(
+            1 for slot in range(lo, hi) if slot in covered
+        ) / (hi - lo)
+
+    runs = coverage.runs()
+    assert all(end < next_start for (_, end), (next_start, _) in zip(runs, runs[1:]))
+    assert coverage.slots == len(covered)
+    assert {slot - base for start, end in runs for slot in range(start, end)} == covered
+
+
+def test_ranges_snap_to_the_interval_grid_and_round_trip():
+    week = get_interval("1w")
+    coverage = Coverage(week)
+    monday = T0  # 2024-01-01 was a Monday
+    coverage.add([monday + 3 * week.ns + 123])
+    coverage.add_range(monday - 2 * week.ns, monday + week.ns - 1)
+
+    # Buckets *opening* in the range are covered, including the one at ``monday``.
+    assert coverage.spans() == [
+        (monday - 2 * week.ns, monday + week.ns),
+        (monday + 3 * week.ns, monday + 4 * week.ns),
+    ]
+    assert coverage.gaps(monday - week.ns + 1, monday + 4 * week.ns) == [
+        (monday + week.ns, monday + 3 * week.ns)
+    ]
+    assert Coverage.from_bytes(week, coverage.to_bytes()) == coverage
+    assert Coverage.from_bytes("1m", None).gaps(T0, T0 + 2 * M) == [(T0, T0 + 2 * M)]
+
+
+def test_a_year_of_minutes_is_one_run():
+    coverage = Coverage("1m")
+    for day in range(365):
+        coverage.add_range(T0 + day * 1_440 * M, T0 + (day + 1) * 1_440 * M)
+    coverage.add([T0 + 10 * 1_440 * M])  # already covered
+
+    assert len(coverage) == 1 and len(coverage.to_bytes()) == 16
+    assert coverage.is_complete(T0, T0 + 365 * 1_440 * M)
+
+
+class _Session:
+    def __init__(self, runs: bytes | None) -> None:
+        self.runs = runs
+
+    async def scalar(self, statement):
+        return self.runs
+
+    async def scalars(self, statement):
+        return [
+            CandleRecord("KRW-BTC", "1m", T0 + i * M, 1.0, 2.0, 0.5, 1.5, 3.0).to_orm()
+            for i in (0, 1, 3)
+        ]
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+def test_chart_history_flags_and_refuses_incomplete_ranges():
+    coverage = Coverage("1m")
+    coverage.add([T0, T0 + M, T0 + 3 * M])
+    app.dependency_overrides[get_session_factory] = lambda: lambda: _Session(coverage.to_bytes())
+    client = TestClient(app)
+    params = {"symbol": "krw-btc", "start": "2024-01-01T00:00:00Z", "end": "2024-01-01T00:04:00Z"}
+    try:
+        body = client.get("/chart/history", params=params).json()
+        refused = client.get("/chart/history", params={**params, "strict": "true"})
+        complete = client.get(
+            "/chart/history", params={**params, "end": "2024-01-01T00:02:00Z", "strict": "true"}
+        )
+        too_long = client.get("/chart/history", params={**params, "end": "2024-02-01T00:00:00Z"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert body["symbol"] == "KRW-BTC" and body["complete"] is False
+    assert body["completeness"] == 0.75
+    assert body["gaps"] == [
+        {"start": "2024-01-01T00:02:00+00:00", "end": "2024-01-01T00:03:00+00:00"}
+    ]
+    assert [candle["timestamp"] for candle in body["candles"]][0] == datetime(
+        2024, 1, 1, tzinfo=timezone.utc
+    ).isoformat()
+    assert refused.status_code == 409 and refused.json()["detail"]["gaps"] == body["gaps"]
+    assert complete.status_code == 200 and complete.json()["complete"] is True
+    assert too_long.status_code == 400
@@ -0,0 +1,153 @@
+"""Tests for the sorted-array L2 order book."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+
+import httpx
+import pytest
+
+from autotrade.market_data.orderbook import OrderBook, OrderBooks, SequenceGap
+from autotrade.services.market_ingest import fetch_orderbooks
+
+
+def _naive_vwap(levels: dict[float, float], quantity: float, reverse: bool) -> tuple[float, float]:
+    remaining, notional = quantity, 0.0
+    for price in sorted(levels, reverse=reverse):
+        take = min(remaining, levels[price])
+        notional += take * price
+        remaining -= take
+        if remaining <= 0:
+            break
+    filled = quantity - max(remaining, 0.0)
+    return (notional / filled if filled else math.nan), filled
+
+
+def test_random_deltas_match_a_dict_model():
+    rng = random.Random(3)
+    book = OrderBook("KRW-BTC")
+    book.apply_snapshot([(99.0, 1.0)], [(101.0, 1.0)], sequence=0)
+    model = {"bid": {99.0: 1.0}, "ask": {101.0: 1.0}}
+
+    for sequence in range(1, 2_000):
+        changes = []
+        for _ in range(rng.randrange(1, 5)):
+            side = rng.choice(("bid", "ask"))
+            price = float(rng.randrange(80, 100) if side == "bid" else rng.randrange(101, 121))
+            size = rng.choice((0.0, rng.uniform(0.1, 5)))
+            changes.append((side, price, size))
+            if size:
+                model[side][price] = size
+            else:
+                model[side].pop(price, None)
+        book.apply_delta(changes, sequence=sequence)
+
+        if sequence % 50 == 0:
+            bids = sorted(model["bid"].items(), reverse=True)
+            asks = sorted(model["ask"].items())
+            assert book.bids.levels() == bids and book.asks.levels() == asks
+            assert book.best_bid() == (bids[0] if bids else None)
+            assert book.asks.depth(5) == pytest.approx(sum(size for _, size in asks[:5]))
+            quantity = rng.uniform(0.5, 30)
+            for side, levels, reverse in (("buy", model["ask"], False), ("sell", model["bid"], True)):
+                price, filled = book.vwap(side, quantity)
+                expected_price, expected_filled = _naive_vwap(levels, quantity, reverse)
+                assert filled == pytest.approx(expected_filled)
+                assert price == pytest.approx(expected_price, nan_ok=True)
+
+
+def test_partial_prefix_sums_follow_interleaved_updates():
+    rng = random.Random(8)
+    book = OrderBook("KRW-BTC")
+    book.apply_snapshot([], [(101.0 + i, 1.0) for i in range(30)], sequence=0)
+    model = {101.0 + i: 1.0 for i in range(30)}
+
+    for sequence in range(1, 1_000):
+        price = float(rng.randrange(101, 135))
+        size = rng.choice((0.0, rng.uniform(0.1, 3)))
+        book.apply_delta([("ask", price, size)], sequence=sequence)
+        if size:
+            model[price] = size
+        else:
+            model.pop(price, None)
+        # Shallow and deep queries alternate so the prefixes are often partial.
+        asks = sorted(model.items())
+        n = rng.randrange(1, 40)
+        assert book.asks.depth(n) == pytest.approx(sum(size for _, size in asks[:n]))
+        quantity = rng.uniform(0.1, 60)
+        assert book.vwap("buy", quantity) == pytest.approx(
+            _naive_vwap(model, quantity, False), nan_ok=True
+        )
+
+
+def test_queries_on_a_small_book():
+    book = OrderBook("KRW-BTC")
+    book.apply_snapshot([(99.0, 2.0), (100.0, 1.0)], [(102.0, 3.0), (101.0, 1.0)])
+
+    assert book.best_bid() == (100.0, 1.0) and book.best_ask() == (101.0, 1.0)
+    assert book.mid() == 100.5 and book.spread() == 1.0
+    assert book.bids.depth_to(99.0) == 3.0 and book.asks.depth_to(101.5) == 1.0
+    assert book.asks.size_at(102.0) == 3.0 and book.asks.size_at(103.0) == 0.0
+    assert book.vwap("buy", 2.0) == (101.5, 2.0)
+    assert book.slippage("buy", 2.0) == pytest.approx(0.5 / 101)
+    assert book.slippage("sell", 3.0) == pytest.approx((100 - 298 / 3) / 100)
+    assert book.slippage("buy", 10.0) is None
+
+
+def test_sequence_gap_marks_book_stale_and_requests_one_resync():
+    requested: list[str] = []
+    books = OrderBooks(on_resync=requested.append)
+    books.book("KRW-ETH").apply_snapshot([(10.0, 1.0)], [(11.0, 1.0)], sequence=5)
+
+    assert books.apply_delta("KRW-ETH", [("bid", 10.0, 2.0)], sequence=6)
+    assert not books.apply_delta("KRW-ETH", [("bid", 10.0, 9.0)], sequence=8)
+    assert not books.apply_delta("KRW-ETH", [("bid", 10.0, 9.0)], sequence=9)
+
+    book = books["KRW-ETH"]
+    assert book.stale and book.bids.best() == (10.0, 2.0)
+    assert requested == ["KRW-ETH"] and books.gaps == 1
+    with pytest.raises(SequenceGap):
+        book.apply_delta([], sequence=10)
+
+    book.apply_snapshot([(10.0, 4.0)], [(11.0, 1.0)], sequence=20)
+    assert books.apply_delta("KRW-ETH", [("ask", 11.0, 0.0)], sequence=21)
+    assert book.best_ask() is None
+
+
+def _upbit_orderbook(timestamp: int, bid: float, key: str = "code") -> dict:
+    return {
+        "type": "orderbook",
+        key: "KRW-BTC",
+        "timestamp": timestamp,
+        "orderbook_units": [
+            {"ask_price": bid + 2, "bid_price": bid, "ask_size": 1.0, "bid_size": 2.0},
+            {"ask_price": bid + 3, "bid_price": bid - 1, "ask_size": 0.5, "bid_size": 0.0},
+        ],
+    }
+
+
+def test_upbit_messages_apply_as_snapshots_in_timestamp_order():
+    books = OrderBooks()
+
+    assert books.apply_messages([_upbit_orderbook(2_000, 100.0), _upbit_orderbook(1_000, 90.0)]) == 1
+    book = books["KRW-BTC"]
+    assert book.bids.levels() == [(100.0, 2.0)]
+    assert book.asks.levels() == [(102.0, 1.0), (103.0, 0.5)]
+    assert book.ts_ns == 2_000_000_000 and not book.stale
+
+
+def test_fetch_orderbooks_feeds_books():
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/v1/orderbook"
+        assert request.url.params["markets"] == "KRW-BTC"
+        return httpx.Response(200, json=[_upbit_orderbook(5_000, 50.0, key="market")])
+
+    async def scenario() -> list[dict]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await fetch_orderbooks(["KRW-BTC"], client)
+
+    books = OrderBooks()
+    books.apply_messages(asyncio.run(scenario()))
+    assert books["KRW-BTC"].best_bid() == (50.0, 2.0)
@@ -0,0 +1,91 @@
+"""Tests for shared-memory candle segments."""
+
+from __future__ import annotations
+
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker
+
+import pytest
+
+from autotrade.market_data.shared import SharedMarketDataStore, SharedMarketDataView
+
+
+def _worker_close_sum(prefix: str) -> tuple[float, int]:
+    view = SharedMarketDataView(prefix)
+    try:
+        return view.read(
+            "KRW-BTC", "1m", lambda window: (float(window.close.sum()), len(window.close))
+        )
+    finally:
+        view.close()
+
+
+def test_worker_process_reads_producer_segment_without_copying():
+    prefix = f"t{uuid.uuid4().hex[:8]}"
+    with SharedMarketDataStore(capacity=4, prefix=prefix) as store:
+        for step in range(6):
+            store.update("KRW-BTC", "1m", step, 1.0, 1.0, 1.0, float(step), 1.0)
+
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            total, count = pool.submit(_worker_close_sum, prefix).result(timeout=30)
+
+        assert count == 4
+        assert total == 2.0 + 3.0 + 4.0 + 5.0
+
+
+def test_version_counter_advances_by_two_per_write():
+    prefix = f"t{uuid.uuid4().hex[:8]}"
+    with SharedMarketDataStore(capacity=4, prefix=prefix) as store:
+        store.update("KRW-ETH", "1m", 1, 1.0, 1.0, 1.0, 1.0, 1.0)
+        view = SharedMarketDataView(prefix)
+        reader = view.reader("KRW-ETH", "1m")
+        before = reader.version
+
+        store.update("KRW-ETH", "1m", 1, 1.0, 2.0, 1.0, 2.0, 1.0)
+        store.update("KRW-ETH", "1m", 2, 2.0, 2.0, 2.0, 2.0, 1.0)
+
+        assert reader.version == before + 4
+        snapshot = reader.snapshot()
+        assert snapshot.timestamps.tolist() == [1, 2]
+        assert snapshot.high.tolist() == [2.0, 2.0]
+        view.close()
+
+
+def test_crashed_writer_times_out_readers_until_the_next_producer_attaches():
+    prefix = f"t{uuid.uuid4().hex[:8]}"
+    with SharedMarketDataStore(capacity=4, prefix=prefix) as store:
+        store.update("KRW-XRP", "1m", 1, 1.0, 1.0, 1.0, 1.0, 1.0)
+        # Simulate a producer dying between the two version bumps.
+        store.series("KRW-XRP", "1m")._seq[0] += 1
+        store.close()
+
+        view = SharedMarketDataView(prefix)
+        reader = view.reader("KRW-XRP", "1m")
+        reader.timeout = 0.05
+        with pytest.raises(TimeoutError, match="mid-write"):
+            reader.snapshot()
+
+        restarted = SharedMarketDataStore(capacity=4, prefix=prefix)
+        restarted.update("KRW-XRP", "1m", 2, 2.0, 2.0, 2.0, 2.0, 1.0)
+        assert reader.version % 2 == 0
+        assert reader.snapshot().timestamps.tolist() == [1, 2]
+        view.close()
+        view.close()
+        restarted.close(unlink=True)
+
+
+def test_concurrent_attaches_leave_the_resource_tracker_untouched():
+    prefix = f"t{uuid.uuid4().hex[:8]}"
+    register = resource_tracker.register
+    with SharedMarketDataStore(capacity=4, prefix=prefix) as store:
+        symbols = [f"KRW-T{index}" for index in range(8)]
+        for symbol in symbols:
+            store.update(symbol, "1m", 1, 1.0, 1.0, 1.0, 1.0, 1.0)
+        view = SharedMarketDataView(prefix)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            readers = list(pool.map(lambda symbol: view.reader(symbol, "1m"), symbols))
+
+        assert all(reader.version == 2 for reader in readers)
+        assert resource_tracker.register is register
+        view.close()
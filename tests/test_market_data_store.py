@@ -0,0 +1,71 @@
+"""Tests for the in-process NumPy ring-buffer market data store."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from autotrade.core.clock import to_epoch_ns
+from autotrade.market_data.store import CandleRing, MarketDataStore
+from autotrade.messaging.base import StreamMessage
+
+
+def test_ring_window_is_contiguous_zero_copy_view_after_wrap():
+    ring = CandleRing(4)
+    for step in range(7):
+        ring.append(step, (step, step + 1, step - 1, step + 0.5, 10.0 * step))
+
+    window = ring.window(3)
+
+    assert window.timestamps.tolist() == [4, 5, 6]
+    assert window.close.tolist() == [4.5, 5.5, 6.5]
+    assert window.close.base is not None  # a view, not a copy
+    assert window.close.flags.c_contiguous
+    with pytest.raises(ValueError):
+        window.close[0] = 1.0
+    assert len(ring) == 4
+    assert ring.window().timestamps.tolist() == [3, 4, 5, 6]
+
+
+def test_ring_update_replaces_same_bucket_and_rejects_stale():
+    ring = CandleRing(3)
+    assert ring.update(10, (1, 1, 1, 1, 1))
+    assert ring.update(10, (1, 2, 1, 2, 5))
+    assert not ring.update(5, (9, 9, 9, 9, 9))
+
+    window = ring.window()
+    assert window.timestamps.tolist() == [10]
+    assert window.high.tolist() == [2.0]
+    assert window.volume.tolist() == [5.0]
+
+
+def test_store_applies_candle_ingested_messages():
+    store = MarketDataStore(capacity=8)
+    opened = datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc)
+    message = StreamMessage(
+        stream="autotrade.market.candles",
+        message_id="1-0",
+        data={
+            "name": "market.candle.ingested",
+            "payload": {
+                "symbol": "KRW-BTC",
+                "interval": "1m",
+                "open": 1.0,
+                "high": 2.0,
+                "low": 0.5,
+                "close": 1.5,
+                "volume": 3.0,
+                "timestamp_utc": opened.isoformat(),
+                "timestamp_kst": opened.isoformat(),
+            },
+        },
+    )
+
+    assert store.apply_message(message)
+    assert not store.apply_message({"name": "strategy.signal.created", "payload": {}})
+
+    window = store.window("KRW-BTC", "1m")
+    assert window.timestamps.tolist() == [to_epoch_ns(opened)]
+    assert np.shares_memory(window.close, store.window("KRW-BTC", "1m").close)
@@ -0,0 +1,348 @@
+"""Tests for the Upbit WebSocket ingest engine against a local replay server."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from autotrade.core.schemas import CandlePayload, TickPayload
+from autotrade.market_data.builder import CandleBuilder
+from autotrade.messaging.events import EventName, resolve_stream_name
+from autotrade.services.market_ingest import (
+    IngestEngine,
+    fetch_krw_markets,
+    parse_frames,
+    shard_markets,
+    split_messages,
+    subscription_message,
+)
+from autotrade.services.market_ingest.engine import _Reconnected
+from autotrade.services.market_ingest.replay import (
+    ReplayServer,
+    load_recording,
+    save_recording,
+)
+
+BASE_MS = 1_704_067_200_000  # 2024-01-01T00:00:00Z
+
+
+def _trade(code: str, seq: int, offset_ms: int, price: float = 100.0) -> dict:
+    return {
+        "type": "trade",
+        "code": code,
+        "trade_timestamp": BASE_MS + offset_ms,
+        "trade_price": price,
+        "trade_volume": 0.5,
+        "ask_bid": "BID",
+        "sequential_id": seq,
+        "stream_type": "REALTIME",
+    }
+
+
+def _candle(code: str, close: float) -> dict:
+    return {
+        "type": "candle.1m",
+        "code": code,
+        "candle_date_time_utc": "2024-01-01T00:00:00",
+        "opening_price": 100.0,
+        "high_price": 110.0,
+        "low_price": 90.0,
+        "trade_price": close,
+        "candle_acc_trade_volume": 3.0,
+    }
+
+
+def _frames(messages: list[dict]) -> list[tuple[float, bytes]]:
+    return [(index * 0.001, json.dumps(message).encode()) for index, message in enumerate(messages)]
+
+
+class RecordingBus:
+    def __init__(self) -> None:
+        self.items: list[tuple[str, dict]] = []
+        self.calls = 0
+
+    async def publish_many(self, items):
+        self.calls += 1
+        self.items.extend((stream, json.loads(data)) for stream, data in items)
+        return [str(index) for index in range(len(items))]
+
+
+async def _run_until(engine: IngestEngine, done, timeout: float = 5.0) -> None:
+    task = asyncio.create_task(engine.run())
+    try:
+        async with asyncio.timeout(timeout):
+            while not done():
+                await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+
+def test_subscription_and_sharding():
+    request = json.loads(subscription_message(["KRW-BTC", "KRW-ETH"], ["trade", "orderbook"], ticket="t"))
+    assert request == [
+        {"ticket": "t"},
+        {"type": "trade", "codes": ["KRW-BTC", "KRW-ETH"]},
+        {"type": "orderbook", "codes": ["KRW-BTC", "KRW-ETH"]},
+        {"format": "DEFAULT"},
+    ]
+    shards = shard_markets(["KRW-C", "KRW-A", "KRW-B", "KRW-A"], 2)
+    assert shards == [["KRW-A", "KRW-B"], ["KRW-C"]]
+
+
+def test_parse_frames_batches_and_skips_malformed():
+    frames = [json.dumps(_trade("KRW-BTC", 1, 0)).encode(), json.dumps(_candle("KRW-BTC", 105.0))]
+    assert [m["type"] for m in parse_frames(frames)] == ["trade", "candle.1m"]
+    assert len(parse_frames([frames[0], b"{not json", frames[1]])) == 2
+
+    batch = split_messages(
+        parse_frames(frames)
+        + [{"type": "orderbook", "code": "KRW-BTC"}, {"error": {"name": "INVALID_AUTH"}}]
+    )
+    (seq, tick), = batch.trades
+    assert seq == 1 and tick.symbol == "KRW-BTC" and tick.ts_ns == BASE_MS * 1_000_000
+    assert batch.candles[0].interval == "1m" and batch.candles[0].close == 105.0
+    assert batch.other == {"orderbook": [{"type": "orderbook", "code": "KRW-BTC"}]}
+    assert batch.errors == 1
+
+
+def test_engine_ingests_replayed_frames_over_multiple_connections():
+    markets = [f"KRW-C{index}" for index in range(6)]
+    messages = [
+        _trade(market, seq, seq * 10) for seq in range(1, 11) for market in markets
+    ] + [_candle("KRW-C0", 101.0), _candle("KRW-C0", 102.0), {"type": "orderbook", "code": "KRW-C1"}]
+    books: list[dict] = []
+
+    async def scenario() -> tuple[IngestEngine, RecordingBus, ReplayServer]:
+        bus = RecordingBus()
+        async with ReplayServer(_frames(messages), speed=100.0) as server:
+            engine = IngestEngine(
+                bus,
+                markets,
+                channels=["trade", "candle.1m", "orderbook"],
+                url=server.url,
+                markets_per_connection=2,
+                handlers={"orderbook": books.extend},
+            )
+            await _run_until(engine, lambda: engine.stats.trades == 60 and books)
+        return engine, bus, server
+
+    engine, bus, server = asyncio.run(scenario())
+
+    assert server.connections == 3
+    assert engine.stats.duplicates == 0 and engine.stats.reconnects == 0
+    ticks = [event for stream, event in bus.items if stream == resolve_stream_name(EventName.MARKET_TICK_INGESTED)]
+    assert len(ticks) == 60
+    assert ticks[0]["name"] == "market.tick.ingested"
+    payload = TickPayload.model_validate(ticks[0]["payload"])
+    assert payload.timestamp_utc.tzinfo is not None and payload.size == 0.5
+    candles = [event for stream, event in bus.items if stream == resolve_stream_name(EventName.MARKET_CANDLE_INGESTED)]
+    assert candles and CandlePayload.model_validate(candles[-1]["payload"]).close == 102.0
+    assert books == [{"type": "orderbook", "code": "KRW-C1"}]
+
+
+def test_engine_resubscribes_and_reports_gaps_after_drop(tmp_path):
+    messages = [_trade("KRW-BTC", seq, seq * 1000) for seq in range(1, 11)]
+    path = tmp_path / "btc.jsonl"
+    save_recording(path, _frames(messages))
+    gaps = []
+
+    async def scenario() -> tuple[IngestEngine, RecordingBus, ReplayServer]:
+        bus = RecordingBus()
+        async with ReplayServer(load_recording(path), drop_after=5, overlap=1) as server:
+            engine = IngestEngine(
+                bus, ["KRW-BTC"], url=server.url, reconnect_delay=0.01, on_gap=gaps.append
+            )
+            await _run_until(engine, lambda: engine.stats.trades == 10)
+        return engine, bus, server
+
+    engine, bus, server = asyncio.run(scenario())
+
+    assert server.connections == 2
+    assert len(server.subscriptions) == 2 and server.subscriptions[0][1:] == server.subscriptions[1][1:]
+    assert engine.stats.reconnects == 1
+    assert engine.stats.duplicates == 1
+    assert [event["payload"]["price"] for _, event in bus.items] == [100.0] * 10
+    (gap,) = gaps
+    assert gap.symbol == "KRW-BTC"
+    assert gap.start_ns == (BASE_MS + 5000) * 1_000_000
+    assert gap.end_ns == (BASE_MS + 6000) * 1_000_000
+
+
+def test_out_of_order_trades_are_kept_and_replays_dropped(caplog):
+    bus = RecordingBus()
+    gaps = []
+
+    def failing_handler(messages):
+        raise RuntimeError("book out of sync")
+
+    def failing_on_gap(gap):
+        gaps.append(gap)
+        raise RuntimeError("backfill unavailable")
+
+    engine = IngestEngine(
+        bus,
+        ["KRW-BTC"],
+        channels=["trade", "orderbook"],
+        handlers={"orderbook": failing_handler},
+        on_gap=failing_on_gap,
+        dedupe_window=3,
+    )
+    first = [_trade("KRW-BTC", seq, seq * 10) for seq in (1, 3, 2, 3)]
+    first.append({"type": "orderbook", "code": "KRW-BTC"})
+    asyncio.run(engine.process([json.dumps(message).encode() for message in first]))
+    assert engine.stats.trades == 3 and engine.stats.duplicates == 1
+    assert "orderbook handler failed" in caplog.text
+
+    # 1 fell out of the three-id window, so it is treated as already seen.
+    replay = [_trade("KRW-BTC", seq, seq * 10) for seq in (4, 5, 1)]
+    asyncio.run(
+        engine.process(
+            [
+                _Reconnected(["KRW-BTC"]),
+                *(json.dumps(message).encode() for message in replay),
+            ]
+        )
+    )
+    assert engine.stats.trades == 5 and engine.stats.duplicates == 2
+    (gap,) = gaps
+    assert gap.start_ns == (BASE_MS + 30) * 1_000_000
+    assert "Gap callback failed" in caplog.text
+
+
+def test_full_buffer_drops_frames_and_reports_a_gap():
+    messages = [_trade("KRW-BTC", seq, seq) for seq in range(1, 21)]
+    released = asyncio.Event()
+
+    class StalledBus(RecordingBus):
+        async def publish_many(self, items):
+            await released.wait()
+            return await super().publish_many(items)
+
+    class Socket:
+        def __init__(self):
+            self.frames = [json.dumps(message).encode() for message in messages]
+
+        async def send(self, request):
+            pass
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            if not self.frames:
+                await asyncio.sleep(3600)
+            if len(self.frames) == 5:  # the last frames arrive once the bus is back
+                await released.wait()
+            await asyncio.sleep(0)
+            return self.frames.pop(0)
+
+    class Connect:
+        async def __aenter__(self):
+            return Socket()
+
+        async def __aexit__(self, *exc):
+            return False
+
+    gaps = []
+
+    async def scenario() -> IngestEngine:
+        engine = IngestEngine(
+            StalledBus(),
+            ["KRW-BTC"],
+            channels=["trade"],
+            connect=lambda url: Connect(),
+            on_gap=gaps.append,
+            max_buffer=5,
+        )
+        task = asyncio.create_task(engine.run())
+        try:
+            async with asyncio.timeout(5):
+                while engine.stats.dropped + len(engine._buffer) + engine.stats.frames < 15:
+                    await asyncio.sleep(0.01)
+                released.set()
+                while engine.stats.trades + engine.stats.dropped < 20:
+                    await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return engine
+
+    engine = asyncio.run(scenario())
+    assert engine.stats.dropped > 0
+    assert engine.stats.trades == 20 - engine.stats.dropped
+    # The trades after the dropped frames are reported as following a gap.
+    (gap,) = gaps
+    assert gap.end_ns == (BASE_MS + 16) * 1_000_000
+
+
+def test_fetch_krw_markets_filters_quote_currency():
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/v1/market/all"
+        return httpx.Response(
+            200,
+            json=[{"market": "KRW-ETH"}, {"market": "BTC-ETH"}, {"market": "KRW-BTC"}],
+        )
+
+    async def scenario() -> list[str]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await fetch_krw_markets(client)
+
+    assert asyncio.run(scenario()) == ["KRW-BTC", "KRW-ETH"]
+
+
+class RecordingCache:
+    def __init__(self, fail: bool = False) -> None:
+        self.written: list[CandlePayload] = []
+        self.fail = fail
+
+    async def write_many(self, payloads):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.written.extend(payloads)
+
+
+def test_published_candles_are_written_through_the_cache(caplog):
+    bus = RecordingBus()
+    cache = RecordingCache()
+    engine = IngestEngine(bus, ["KRW-BTC"], channels=["candle.1m"], cache=cache)
+    frames = [json.dumps(_candle("KRW-BTC", close)).encode() for close in (101.0, 104.0)]
+
+    asyncio.run(engine.process(frames))
+
+    (written,) = cache.written
+    assert written.symbol == "KRW-BTC" and written.close == 104.0
+    assert written == CandlePayload.model_validate(bus.items[-1][1]["payload"])
+
+    down = IngestEngine(bus, ["KRW-BTC"], channels=["candle.1m"], cache=RecordingCache(fail=True))
+    assert asyncio.run(down.process(frames)) == 1
+    assert "Writing 1 candles to the cache failed" in caplog.text
+
+
+def test_candle_close_failures_are_isolated_per_market(caplog):
+    bus = RecordingBus()
+    gaps = []
+    builder = CandleBuilder(("1m",), grace=0)
+    engine = IngestEngine(bus, ["KRW-BTC", "KRW-ETH"], builder=builder, on_gap=gaps.append)
+    trades = [_trade("KRW-BTC", 1, 0), _trade("KRW-ETH", 1, 0)]
+    asyncio.run(engine.process([json.dumps(trade).encode() for trade in trades]))
+
+    close = builder._close
+
+    def failing_close(symbol, *args):
+        if symbol == "KRW-ETH":
+            raise ArithmeticError("corrupt bucket")
+        close(symbol, *args)
+
+    builder._close = failing_close
+    later = (BASE_MS + 3_600_000) * 1_000_000
+    assert asyncio.run(engine._advance(later)) == 1
+    assert bus.items[-1][1]["payload"]["symbol"] == "KRW-BTC"
+    assert "Closing KRW-ETH candles failed" in caplog.text
+    (gap,) = gaps
+    opened = BASE_MS * 1_000_000 - BASE_MS * 1_000_000 % 60_000_000_000
+    assert (gap.symbol, gap.start_ns, gap.end_ns) == ("KRW-ETH", opened, opened + 60_000_000_000)
+    # The dropped bucket is not retried on the next tick.
+    assert asyncio.run(engine._advance(later)) == 0 and len(gaps) == 1
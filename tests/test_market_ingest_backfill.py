@@ -0,0 +1,336 @@
+"""Tests for candle gap detection, request planning and the backfill scheduler."""
+
+import asyncio
+import time
+from datetime import timezone
+
+import httpx
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from autotrade.core.clock import from_ns, now_ns, to_epoch_ns
+from autotrade.core.records import CandleRecord
+from autotrade.db.candles import upsert_candles
+from autotrade.market_data.coverage import Coverage
+from autotrade.market_data.intervals import get_interval
+from autotrade.services.market_ingest.backfill import (
+    BackfillScheduler,
+    GapBackfiller,
+    PageRequest,
+    RateLimiter,
+    backfill,
+    database_sink,
+    detect_gaps,
+    find_gaps,
+    parse_remaining_req,
+    plan_requests,
+)
+
+MINUTE = get_interval("1m")
+M = MINUTE.ns
+T0 = 1_704_067_200_000_000_000  # 2024-01-01T00:00:00Z
+
+
+class UpbitStub:
+    """Candle endpoint enforcing ``limit`` requests per ``window`` seconds."""
+
+    def __init__(self, candles: dict[str, list[int]], limit: int = 10, window: float = 1.0):
+        self.candles = candles
+        self.limit = limit
+        self.window = window
+        self.sent: list[float] = []
+        self.requests: list[httpx.Request] = []
+        self.throttled = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        now = time.monotonic()
+        self.sent = [sent for sent in self.sent if now - sent < self.window]
+        if len(self.sent) >= self.limit:
+            self.throttled += 1
+            return httpx.Response(429, json={"error": {"name": "too_many_requests"}})
+        self.sent.append(now)
+        self.requests.append(request)
+        remaining = self.limit - len(self.sent)
+        headers = {"Remaining-Req": f"group=candles; min=1800; sec={remaining}"}
+
+        assert request.url.path == "/v1/candles/minutes/1"
+        market = request.url.params["market"]
+        to = to_epoch_ns(request.url.params["to"])
+        count = int(request.url.params["count"])
+        opened = [ts for ts in self.candles.get(market, []) if ts < to][-count:]
+        body = [
+            {
+                "market": market,
+                "candle_date_time_utc": from_ns(ts).replace(tzinfo=None).isoformat(),
+                "opening_price": 1.0,
+                "high_price": 2.0,
+                "low_price": 0.5,
+                "trade_price": 1.5,
+                "candle_acc_trade_volume": 3.0,
+                "unit": 1,
+            }
+            for ts in reversed(opened)
+        ]
+        return httpx.Response(200, json=body, headers=headers)
+
+
+def test_interval_alignment():
+    week = get_interval("1w")
+    wednesday = T0 + 2 * 1_440 * M + 5 * M  # 2024-01-03T00:05Z
+    assert from_ns(week.floor(wednesday)).isoformat() == "2024-01-01T00:00:00+00:00"
+    assert MINUTE.ceil(T0 + 1) == T0 + M and MINUTE.ceil(T0) == T0
+    assert MINUTE.slots(T0 + 1, T0 + 3 * M) == 2
+    assert get_interval("4h") is get_interval("240m")
+    with pytest.raises(ValueError):
+        get_interval("1M")
+
+
+def test_find_gaps_reports_missing_ranges_including_edges():
+    stored = [T0 + i * M for i in (2, 3, 7, 8)]
+    gaps = find_gaps(stored, MINUTE, T0, T0 + 10 * M)
+    assert gaps == [(T0, T0 + 2 * M), (T0 + 4 * M, T0 + 7 * M), (T0 + 9 * M, T0 + 10 * M)]
+    assert find_gaps([T0 + i * M for i in range(10)], MINUTE, T0, T0 + 10 * M) == []
+
+
+def test_plan_requests_uses_minimum_pages():
+    # Two gaps within one page span share a request.
+    gaps = [(T0, T0 + 5 * M), (T0 + 150 * M, T0 + 160 * M)]
+    assert plan_requests("KRW-BTC", MINUTE, gaps) == [
+        PageRequest("KRW-BTC", "1m", T0 + 160 * M, 160)
+    ]
+    # A 450 minute gap needs three pages, the last one partial.
+    long_gap = [(T0, T0 + 450 * M)]
+    assert [(r.to_ns - T0) // M for r in plan_requests("KRW-BTC", MINUTE, long_gap)] == [450, 250, 50]
+    assert [r.count for r in plan_requests("KRW-BTC", MINUTE, long_gap)] == [200, 200, 50]
+    # Far apart gaps need separate pages.
+    apart = [(T0, T0 + M), (T0 + 1_000 * M, T0 + 1_001 * M)]
+    assert [r.count for r in plan_requests("KRW-BTC", MINUTE, apart)] == [1, 1]
+
+
+def test_plan_covers_every_gap_slot():
+    gaps = [(T0 + s * M, T0 + e * M) for s, e in [(0, 3), (180, 240), (250, 700), (900, 901)]]
+    covered = set()
+    for request in plan_requests("KRW-BTC", MINUTE, gaps):
+        covered.update(range((request.to_ns - T0) // M - request.count, (request.to_ns - T0) // M))
+    assert all(slot in covered for s, e in [(0, 3), (180, 240), (250, 700), (900, 901)] for slot in range(s, e))
+
+
+def test_remaining_req_header_and_limiter_pause():
+    assert parse_remaining_req("group=candles; min=1800; sec=0") == {
+        "group": "candles",
+        "min": "1800",
+        "sec": "0",
+    }
+
+    async def scenario() -> float:
+        limiter = RateLimiter(1_000, window=0.2)
+        await limiter.acquire()
+        limiter.observe(0)
+        start = time.monotonic()
+        await limiter.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(scenario()) >= 0.18
+
+
+def test_scheduler_respects_rate_limit_and_streams_pages():
+    market_candles = [T0 + i * M for i in range(1_000)]
+    stub = UpbitStub({"KRW-BTC": market_candles, "KRW-ETH": market_candles}, limit=5, window=0.25)
+    requests = [
+        PageRequest(symbol, "1m", T0 + to * M, 100)
+        for symbol in ("KRW-BTC", "KRW-ETH")
+        for to in range(100, 1_100, 100)
+    ]
+    pages: list[list[CandleRecord]] = []
+
+    async def sink(request, records):
+        pages.append(records)
+
+    async def scenario():
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(stub), base_url="https://stub"
+        ) as client:
+            scheduler = BackfillScheduler(
+                client,
+                sink,
+                limiter=RateLimiter(40, burst=5, window=0.25),
+                concurrency=4,
+                base_url="https://stub",
+            )
+            return await scheduler.run(requests)
+
+    report = asyncio.run(scenario())
+
+    assert report.candles == 2_000 and not report.failed
+    assert len(pages) == 20
+    assert all(page == sorted(page, key=lambda r: r.ts_ns) for page in pages)
+    # The header clamps the bucket; only requests already in flight can be rejected.
+    assert stub.throttled <= 4
+    assert report.requests == 20 + report.rate_limited
+
+
+class FakeSession:
+    """Session double recording statements; coverage rows start empty."""
+
+    def __init__(self, stored=(), executed=None):
+        self.stored = stored
+        self.executed = [] if executed is None else executed
+
+    def get_bind(self):
+        return type("Bind", (), {"dialect": type("D", (), {"name": "postgresql"})()})()
+
+    async def scalar(self, statement):
+        return None
+
+    async def scalars(self, statement):
+        return [from_ns(ts) for ts in self.stored]
+
+    async def execute(self, statement):
+        self.executed.append(statement)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+def _coverage_writes(executed):
+    return [
+        Coverage.from_bytes("1m", statement.compile().params["runs"])
+        for statement in executed
+        if statement.table.name == "candle_coverage" and statement.is_update
+    ]
+
+
+def test_backfill_fills_detected_gaps_via_upsert():
+    stored = [T0 + i * M for i in range(0, 300) if not 50 <= i < 120 and not 200 <= i < 210]
+    stub = UpbitStub({"KRW-BTC": [T0 + i * M for i in range(300) if i != 60]})
+    executed = []
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(stub)) as client:
+            return await backfill(
+                lambda: FakeSession(stored, executed),
+                ["KRW-BTC"],
+                ["1m"],
+                T0,
+                T0 + 300 * M,
+                client=client,
+                base_url="https://stub",
+            )
+
+    report = asyncio.run(scenario())
+
+    assert len(stub.requests) == 1  # both gaps fit in one page ending at minute 210
+    assert stub.requests[0].url.params["count"] == "160"
+    assert report.candles == 160
+    (candles,) = [s for s in executed if s.table.name == "candles"]
+    sql = str(candles.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (symbol, interval, opened_at) DO UPDATE" in sql
+    # No candle opened at minute 60 but the fetched page still covers it.
+    built, page = _coverage_writes(executed)
+    assert built.gaps(T0, T0 + 300 * M) == [(T0 + 50 * M, T0 + 120 * M), (T0 + 200 * M, T0 + 210 * M)]
+    assert page.is_complete(T0 + 50 * M, T0 + 210 * M)
+
+
+def test_detect_gaps_reads_stored_coverage():
+    coverage = Coverage("1m")
+    coverage.add_range(T0, T0 + 10 * M)
+
+    class Stored(FakeSession):
+        async def scalar(self, statement):
+            return coverage.to_bytes()
+
+        async def scalars(self, statement):  # pragma: no cover - must not scan
+            raise AssertionError("candles table scanned")
+
+    gaps = asyncio.run(detect_gaps(Stored, "KRW-BTC", MINUTE, T0, T0 + 12 * M))
+    assert gaps == [(T0 + 10 * M, T0 + 12 * M)]
+
+
+def test_merge_coverage_creates_the_row_before_locking_it():
+    from autotrade.db.candles import merge_coverage
+
+    order = []
+
+    class Locking(FakeSession):
+        async def scalar(self, statement):
+            order.append(str(statement.compile(dialect=postgresql.dialect())))
+            return b""
+
+        async def execute(self, statement):
+            order.append(str(statement.compile(dialect=postgresql.dialect())))
+
+    update = Coverage("1m")
+    update.add_range(T0, T0 + 5 * M)
+    merged = asyncio.run(merge_coverage(Locking(), "KRW-BTC", "1m", update))
+
+    assert merged.spans() == [(T0, T0 + 5 * M)]
+    insert, lock, write = order
+    assert insert.startswith("INSERT INTO candle_coverage") and "DO NOTHING" in insert
+    assert lock.endswith("FOR UPDATE")
+    assert write.startswith("UPDATE candle_coverage")
+
+
+def test_upsert_candles_chunks_rows_and_updates_coverage():
+    session = FakeSession()
+    records = [CandleRecord("KRW-BTC", "1m", T0 + i * M, 1.0, 2.0, 0.5, 1.5, 3.0) for i in range(5)]
+    records.append(CandleRecord("KRW-BTC", "1m", MINUTE.floor(now_ns()), 1.0, 1.0, 1.0, 1.0, 1.0))
+    written = asyncio.run(upsert_candles(session, records, chunk_size=2))
+
+    assert written == 6
+    inserts = [s for s in session.executed if s.table.name == "candles"]
+    assert len(inserts) == 3
+    params = inserts[0].compile().params
+    assert params["opened_at_m0"].tzinfo == timezone.utc
+    # The candle still in progress is not marked as ingested.
+    (coverage,) = _coverage_writes(session.executed)
+    assert coverage.spans() == [(T0, T0 + 5 * M)]
+
+
+def test_rate_limited_pages_fail_after_the_cap():
+    stub = UpbitStub({"KRW-BTC": [T0]}, limit=0)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(stub)) as client:
+            scheduler = BackfillScheduler(
+                client,
+                lambda request, records: asyncio.sleep(0),
+                limiter=RateLimiter(1_000, window=0.001),
+                base_url="https://stub",
+                max_rate_limited=3,
+            )
+            return await scheduler.run([PageRequest("KRW-BTC", "1m", T0 + M, 1)])
+
+    report = asyncio.run(scenario())
+    assert report.rate_limited == 3 and stub.throttled == 3
+    assert report.failed == [PageRequest("KRW-BTC", "1m", T0 + M, 1)]
+
+
+def test_gap_backfiller_batches_gaps_through_one_scheduler():
+    stored = [T0 + i * M for i in range(300) if not 50 <= i < 60 and not 100 <= i < 110]
+    stub = UpbitStub({"KRW-BTC": [T0 + i * M for i in range(300)]})
+    executed = []
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(stub)) as client:
+            session_factory = lambda: FakeSession(stored, executed)  # noqa: E731
+            scheduler = BackfillScheduler(
+                client, database_sink(session_factory), base_url="https://stub"
+            )
+            backfiller = GapBackfiller(session_factory, scheduler)
+            backfiller.submit("KRW-BTC", "1m", T0 + 40 * M, T0 + 70 * M)
+            backfiller.submit("KRW-BTC", "1m", T0 + 90 * M, T0 + 120 * M)
+            running = asyncio.create_task(backfiller.run())
+            while len(_coverage_writes(executed)) < 3:  # two rebuilds, one page
+                await asyncio.sleep(0.01)
+            running.cancel()
+
+    asyncio.run(scenario())
+    # Both gaps were queued before the worker ran, so they share one page.
+    (request,) = stub.requests
+    assert request.url.params["count"] == "60"
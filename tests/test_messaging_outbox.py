@@ -0,0 +1,78 @@
+"""Tests for the transactional outbox and its relay."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy.dialects import postgresql
+
+from autotrade.core.schemas import RiskLimitBreach
+from autotrade.messaging import EventEnvelope, EventName
+from autotrade.messaging.outbox import OutboxRelay, enqueue_event
+
+
+def _envelope() -> EventEnvelope:
+    now = datetime.now(tz=timezone.utc)
+    payload = RiskLimitBreach(
+        breach_type="exposure",
+        current_value=2.0,
+        limit_value=1.0,
+        unit="ratio",
+        action_taken="blocked",
+        timestamp_utc=now,
+        timestamp_kst=now,
+    )
+    return EventEnvelope(
+        name=EventName.RISK_LIMIT_BREACHED,
+        producer="tests",
+        produced_at_utc=now,
+        produced_at_kst=now,
+        payload=payload,
+    )
+
+
+def test_enqueue_event_adds_encoded_row_to_session():
+    session = MagicMock()
+
+    row = enqueue_event(session, _envelope())
+
+    session.add.assert_called_once_with(row)
+    assert row.stream.endswith("risk.alerts")
+    assert row.event_name == "risk.limit.breached"
+    assert json.loads(row.body)["payload"]["breach_type"] == "exposure"
+
+
+def test_claim_statement_skips_locked_rows():
+    relay = OutboxRelay(MagicMock(), AsyncMock(), batch_size=50)
+
+    sql = str(relay.claim_statement().compile(dialect=postgresql.dialect()))
+
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "LIMIT" in sql
+
+
+def test_drain_once_publishes_batch_and_deletes_rows():
+    rows = [
+        SimpleNamespace(id=1, stream="s1", body='{"a": 1}'),
+        SimpleNamespace(id=2, stream="s2", body='{"b": 2}'),
+    ]
+    session = AsyncMock()
+    session.scalars.return_value = MagicMock(all=MagicMock(return_value=rows))
+    bus = AsyncMock()
+    relay = OutboxRelay(MagicMock(return_value=session), bus)
+
+    sent = asyncio.run(relay.drain_once())
+
+    assert sent == 2
+    bus.publish_many.assert_awaited_once_with([("s1", '{"a": 1}'), ("s2", '{"b": 2}')])
+    deleted = str(session.execute.await_args.args[0])
+    assert deleted.startswith("DELETE FROM outbox_events")
+    session.commit.assert_awaited_once()
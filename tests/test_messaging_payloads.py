@@ -0,0 +1,98 @@
+"""Tests for trusted and validated payload decoding."""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from autotrade.core.schemas import CandlePayload
+from autotrade.messaging import EventEnvelope, EventName, PayloadDecoder
+from autotrade.messaging.redis import encode_event
+
+
+def _candle_message(**overrides):
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    payload = {
+        "symbol": "KRW-BTC",
+        "interval": "1m",
+        "open": 1.0,
+        "high": 2.0,
+        "low": 0.5,
+        "close": 1.5,
+        "volume": 10.0,
+        "timestamp_utc": now,
+        "timestamp_kst": now,
+    }
+    payload.update(overrides)
+    envelope = EventEnvelope(
+        name=EventName.MARKET_CANDLE_INGESTED,
+        producer="tests",
+        produced_at_utc=now,
+        produced_at_kst=now,
+        payload=payload,
+    )
+    return json.loads(encode_event(envelope))
+
+
+def test_trusted_decode_matches_validated_decode():
+    message = _candle_message()
+    decoder = PayloadDecoder(sample_rate=0)
+
+    trusted = decoder.decode(message["name"], message["payload"], trusted=True)
+    validated = decoder.decode(message["name"], message["payload"])
+
+    assert isinstance(trusted, CandlePayload)
+    assert trusted.model_dump() == validated.model_dump()
+    assert trusted.timestamp_utc == datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert decoder.stats.trusted == 1 and decoder.stats.validated == 1
+
+
+def test_untrusted_payloads_are_always_validated():
+    message = _candle_message(open=-1.0)
+
+    with pytest.raises(ValueError):
+        PayloadDecoder(sample_rate=0).decode(message["name"], message["payload"])
+
+
+def test_sampling_validates_one_in_n_and_reports_drift(caplog):
+    decoder = PayloadDecoder(sample_rate=3)
+    drifted = _candle_message(open=-1.0)
+
+    for _ in range(6):
+        result = decoder.decode(drifted["name"], drifted["payload"], trusted=True)
+
+    assert result.open == -1.0
+    assert decoder.stats.sampled == 2
+    assert decoder.stats.drift == 2
+    assert "failed sampled validation" in caplog.text
+
+
+def test_decode_envelope_builds_typed_payload():
+    envelope = PayloadDecoder(sample_rate=0).decode_envelope(_candle_message())
+
+    assert envelope.name is EventName.MARKET_CANDLE_INGESTED
+    assert isinstance(envelope.produced_at_utc, datetime)
+    assert isinstance(envelope.payload, CandlePayload)
+    assert envelope.as_message()["payload"]["symbol"] == "KRW-BTC"
+
+
+def test_decode_json_validates_raw_documents():
+    message = _candle_message()
+    decoder = PayloadDecoder(sample_rate=0)
+
+    payload = decoder.decode_json(message["name"], json.dumps(message["payload"]))
+
+    assert payload == decoder.decode(message["name"], message["payload"])
+    with pytest.raises(ValueError):
+        decoder.decode_json(message["name"], json.dumps(_candle_message(open=-1.0)["payload"]))
+
+
+def test_sample_reports_drift_without_building_models():
+    decoder = PayloadDecoder(sample_rate=1)
+    name = EventName.MARKET_CANDLE_INGESTED
+
+    assert decoder.sample(name, _candle_message()["payload"])
+    assert not decoder.sample(name, _candle_message(open=-1.0)["payload"])
+    assert decoder.stats.trusted == 2 and decoder.stats.drift == 1
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import asyncio
 from datetime import datetime, timezone
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
 from autotrade.messaging.redis import RedisEventBus, ResponseError
 from autotrade.messaging.envelope import EventEnvelope
@@ -106,3 +106,20 @@ def test_publish_accepts_event_envelope():
     asyncio.run(bus.publish("stream", envelope))
 
     client.xadd.assert_awaited_once()
+
+
+def test_publish_many_uses_single_pipeline():
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[b"1-0", "1-1"])
+    client = AsyncMock()
+    client.pipeline = MagicMock(return_value=pipe)
+    bus = RedisEventBus(client)
+
+    result = asyncio.run(
+        bus.publish_many([("a", {"foo": "bar"}), ("b", '{"already": "encoded"}')])
+    )
+
+    client.pipeline.assert_called_once_with(transaction=False)
+    assert pipe.xadd.call_args_list[0].args == ("a", {"event": '{"foo": "bar"}'})
+    assert pipe.xadd.call_args_list[1].args == ("b", {"event": '{"already": "encoded"}'})
+    assert result == ["1-0", "1-1"]
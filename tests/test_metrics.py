@@ -0,0 +1,148 @@
+"""Tests for the metrics registry, timing helpers and /metrics endpoint."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from unittest.mock import AsyncMock
+
+from fastapi.testclient import TestClient
+
+from autotrade.app.main import app
+from autotrade.core.metrics import (
+    PENDING_LIMIT,
+    Histogram,
+    Registry,
+    bucket_index,
+    bucket_upper_bound,
+    timed,
+)
+from autotrade.messaging.redis import RedisEventBus
+
+
+def test_buckets_bound_relative_error():
+    rng = random.Random(3)
+    for value in [*range(2_000), *(rng.getrandbits(48) for _ in range(2_000))]:
+        index = bucket_index(value)
+        lower = bucket_upper_bound(index - 1) if index else 0
+        upper = bucket_upper_bound(index)
+        assert lower <= value < upper
+        assert value < 16 or (upper - lower) / lower <= 0.125
+
+
+def test_histogram_quantiles_and_exposition():
+    registry = Registry()
+    latency = registry.histogram("op_seconds", "Operation latency.", ("op",))
+    child = latency.labels(op="read")
+    for micros in range(1, 1_001):
+        child.record(micros * 1_000)
+
+    assert 0.00049 <= child.quantile(0.5) <= 0.00057
+    assert child.count == 1_000
+    text = registry.render()
+    assert "# TYPE op_seconds histogram" in text
+    # Fine buckets straddling an exported bound are counted in the next one.
+    le_100us = next(
+        line for line in text.splitlines() if 'le="0.0001"' in line
+    ).rsplit(" ", 1)[1]
+    assert 88 <= int(le_100us) <= 100
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 1000' in text
+    assert 'op_seconds_count{op="read"} 1000' in text
+
+
+def test_timed_decorates_sync_async_and_blocks():
+    histogram = Histogram("t_seconds", "t")
+
+    @timed(histogram)
+    def work(value):
+        return value * 2
+
+    @timed(histogram)
+    async def async_work():
+        await asyncio.sleep(0)
+        return "done"
+
+    assert work(2) == 4
+    assert asyncio.run(async_work()) == "done"
+    with timed(histogram):
+        pass
+
+    assert histogram.count == 3
+
+
+def test_timed_pairs_nested_recursive_and_threaded_use():
+    histogram = Histogram("nested_seconds", "t")
+    block = timed(histogram)
+    with block:
+        with block:
+            pass
+        time.sleep(0.002)
+    # The outer block kept its own start despite the nested entry.
+    assert histogram.count == 2 and histogram.quantile(1.0) >= 0.002
+
+    @timed(histogram)
+    def depth(level):
+        return level if level == 0 else depth(level - 1)
+
+    depth(20)
+    assert histogram.count == 23
+
+    def worker():
+        for _ in range(PENDING_LIMIT):
+            with timed(histogram):
+                pass
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Deferred durations are bucketed in batches and on read.
+    assert histogram.count == 23 + 4 * PENDING_LIMIT
+
+
+def test_deferred_observations_fold_into_the_same_buckets():
+    rng = random.Random(3)
+    values = [rng.randrange(0, 50)] + [int(rng.lognormvariate(9, 3)) for _ in range(999)]
+    recorded, deferred = Histogram("r", "r"), Histogram("d", "d")
+    for value in values + [-5]:
+        recorded.record(value)
+        deferred.defer(value)
+    deferred.fold()
+    assert deferred.counts == recorded.counts and deferred.total == recorded.total
+
+
+def test_negative_observations_are_clamped_to_zero():
+    recorded, deferred = Histogram("r", "r"), Histogram("d", "d")
+    recorded.record(-5)
+    recorded.record(7)
+    for value in [-5] * 99 + [7]:
+        deferred.defer(value)
+    deferred.fold()
+
+    assert recorded.total == 7 and recorded.counts[0] == 1
+    assert deferred.total == 7 and deferred.counts[0] == 99
+
+
+def test_bus_and_sse_metrics_are_exposed():
+    client = AsyncMock()
+    client.xadd.return_value = b"1-0"
+    client.xread.return_value = [(b"metrics.stream", [(b"1-0", {b"event": b"{}"})])]
+    bus = RedisEventBus(client)
+    asyncio.run(bus.publish("metrics.stream", {"foo": "bar"}))
+    asyncio.run(bus.read({"metrics.stream": "0"}))
+
+    with TestClient(app) as http:
+        http.get("/chart/stream", params={"limit": 2, "interval": 0.2})
+        response = http.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'autotrade_bus_messages_published_total{stream="metrics.stream"}' in body
+    assert 'autotrade_bus_messages_consumed_total{stream="metrics.stream"} 1' in body
+    assert 'autotrade_bus_publish_seconds_count{operation="publish"}' in body
+    assert "autotrade_sse_frames_total" in body
+    assert "autotrade_sse_clients 0" in body
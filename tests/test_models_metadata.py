@@ -9,6 +9,7 @@ from autotrade.db import metadata
 def test_metadata_contains_expected_tables():
     expected_tables = {
         "candles",
+        "candle_coverage",
         "ticks",
         "strategies",
         "signals",
@@ -17,6 +18,7 @@ def test_metadata_contains_expected_tables():
         "risk_snapshots",
         "risk_limit_breaches",
         "experiments",
+        "outbox_events",
     }
 
     assert expected_tables.issubset(set(metadata.tables))
@@ -0,0 +1,75 @@
+"""Tests for the fixed-point position ledger."""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from types import SimpleNamespace
+
+from autotrade.core.fixedpoint import to_fixed
+from autotrade.services.position import PositionLedger
+
+
+def _fx(value: str) -> int:
+    return to_fixed(value)
+
+
+def test_average_cost_realized_and_unrealized_pnl():
+    ledger = PositionLedger()
+    ledger.apply_fill("KRW-BTC", "buy", _fx("100"), _fx("1"))
+    ledger.apply_fill("KRW-BTC", "buy", _fx("110"), _fx("1"), fee=_fx("0.05"))
+
+    realized = ledger.apply_fill("KRW-BTC", "sell", _fx("120"), _fx("0.5"))
+
+    state = ledger.position("KRW-BTC")
+    assert realized == _fx("7.5")
+    assert state.average_price == _fx("105")
+    assert state.quantity == _fx("1.5")
+    assert state.unrealized_pnl(_fx("100")) == _fx("-7.5")
+    assert state.as_decimal()["fees"] == Decimal("0.05000000")
+
+
+def test_flip_and_exposure():
+    ledger = PositionLedger()
+    ledger.apply_fill("KRW-ETH", "buy", _fx("10"), _fx("2"))
+    ledger.apply_fill("KRW-ETH", "sell", _fx("12"), _fx("5"))
+    ledger.apply_order("KRW-BTC", "buy", SimpleNamespace(price=Decimal("50"), quantity=Decimal("1")))
+
+    eth = ledger.position("KRW-ETH")
+    assert eth.realized_pnl == _fx("4")
+    assert eth.quantity == _fx("-3") and eth.average_price == _fx("12")
+    gross, net = ledger.exposure({"KRW-ETH": _fx("11"), "KRW-BTC": _fx("60")})
+    assert gross == _fx("93") and net == _fx("27")
+    assert ledger.unrealized_pnl({"KRW-ETH": _fx("11"), "KRW-BTC": _fx("60")}) == _fx("13")
+
+
+def test_many_small_fills_stay_exact():
+    ledger = PositionLedger()
+    for _ in range(1000):
+        ledger.apply_fill("KRW-XRP", "buy", _fx("0.7"), _fx("0.1"))
+    for _ in range(1000):
+        ledger.apply_fill("KRW-XRP", "sell", _fx("0.8"), _fx("0.1"))
+
+    state = ledger.position("KRW-XRP")
+    assert state.quantity == 0 and state.cost == 0
+    assert state.realized_pnl == _fx("10")
+
+
+def test_short_round_trip_rounds_like_the_mirrored_long():
+    long, short = PositionLedger(), PositionLedger()
+    fills = [
+        ("buy", "0.33333333", "0.5"),
+        ("buy", "0.77777777", "0.3"),
+        ("sell", "0.55555555", "0.7"),
+        ("sell", "0.9", "0.1"),
+    ]
+    mirror = {"buy": "sell", "sell": "buy"}
+    for side, price, quantity in fills:
+        gained = long.apply_fill("KRW-XRP", side, _fx(price), _fx(quantity))
+        lost = short.apply_fill("KRW-XRP", mirror[side], _fx(price), _fx(quantity))
+        assert lost == -gained
+        assert short.position("KRW-XRP").cost == -long.position("KRW-XRP").cost
+
+    state = short.position("KRW-XRP")
+    assert state.quantity == 0 and state.cost == 0
+    assert state.realized_pnl == _fx("-0.07888889")
+    assert long.position("KRW-XRP").realized_pnl == _fx("0.07888889")
@@ -0,0 +1,125 @@
+"""Tests for the sampling profiler, memory tracker and admin endpoints."""
+
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from autotrade.app.main import app
+from autotrade.core.config import get_settings
+from autotrade.core.profiling import MemoryTracker, SamplingProfiler, profile
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(200))
+
+
+def test_sampling_profiler_records_busy_thread():
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,), name="spinner")
+    worker.start()
+    try:
+        with SamplingProfiler(interval=0.001) as profiler:
+            time.sleep(0.2)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert profiler.samples > 0
+    collapsed = profiler.collapsed()
+    spinner = [line for line in collapsed.splitlines() if line.startswith("spinner;")]
+    assert spinner
+    assert any("tests.test_profiling:_spin" in line for line in spinner)
+    assert "autotrade-profiler" not in collapsed
+    stack, count = collapsed.splitlines()[0].rsplit(" ", 1)
+    assert int(count) >= 1 and ";" in stack
+
+
+def test_profiler_attributes_loop_samples_to_tasks():
+    async def busy() -> None:
+        deadline = time.perf_counter() + 0.15
+        while time.perf_counter() < deadline:
+            sum(range(200))
+            await asyncio.sleep(0)
+
+    async def waiting() -> None:
+        await asyncio.Event().wait()
+
+    async def main() -> SamplingProfiler:
+        waiter = asyncio.create_task(waiting(), name="waiter")
+        profiler = SamplingProfiler(interval=0.001, tasks=True)
+        profiler.start()
+        await asyncio.create_task(busy(), name="busy-task")
+        profiler.stop()
+        waiter.cancel()
+        return profiler
+
+    collapsed = asyncio.run(main()).collapsed()
+
+    assert any(";task:busy-task;" in line for line in collapsed.splitlines())
+    awaiting = [line for line in collapsed.splitlines() if line.startswith("await;task:waiter;")]
+    assert awaiting and "test_profiler_attributes_loop_samples_to_tasks.<locals>.waiting" in awaiting[0]
+
+
+def test_profile_helper_does_not_block_loop():
+    async def main() -> tuple[SamplingProfiler, int]:
+        ticks = 0
+
+        async def ticker() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        profiler = await profile(0.1, interval=0.002)
+        task.cancel()
+        return profiler, ticks
+
+    profiler, ticks = asyncio.run(main())
+    assert profiler.samples > 0
+    assert ticks >= 5
+    assert not profiler.running
+
+
+def test_memory_tracker_reports_growth():
+    tracker = MemoryTracker()
+    retained: list[bytes] = []
+    try:
+        baseline = tracker.snapshot(limit=5)
+        assert baseline["traced_bytes"] >= 0
+        retained.extend(bytes(1024) for _ in range(2000))
+        diff = tracker.diff(limit=5)
+    finally:
+        tracker.stop()
+
+    assert diff["growth_bytes"] > 1_000_000
+    assert "test_profiling.py" in diff["top"][0]["site"]
+    assert not tracker.tracing
+
+
+def test_admin_endpoints_require_token(monkeypatch):
+    client = TestClient(app)
+    assert client.get("/admin/profile", params={"seconds": 0.05}).status_code == 404
+
+    monkeypatch.setattr(get_settings(), "admin_token", "secret")
+    assert client.get("/admin/profile", params={"seconds": 0.05}).status_code == 403
+    headers = {"X-Admin-Token": "secret"}
+
+    response = client.get(
+        "/admin/profile", params={"seconds": 0.05, "interval_ms": 2}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert int(response.headers["X-Profile-Samples"]) > 0
+
+    assert client.get("/admin/memory/diff", headers=headers).status_code == 409
+    try:
+        assert client.post("/admin/memory/snapshot", headers=headers).status_code == 200
+        diff = client.get("/admin/memory/diff", params={"limit": 3}, headers=headers)
+        assert diff.status_code == 200
+        assert len(diff.json()["top"]) <= 3
+    finally:
+        assert client.delete("/admin/memory", headers=headers).status_code == 204
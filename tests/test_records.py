@@ -0,0 +1,64 @@
+"""Tests for compact market data records."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from autotrade.core.clock import get_zone
+from autotrade.core.records import CandleRecord, TickRecord
+from autotrade.core.schemas import CandlePayload, TickPayload
+from autotrade.market_data import MarketDataStore
+
+_OPENED = datetime(2024, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+def _candle_payload() -> CandlePayload:
+    return CandlePayload(
+        symbol="KRW-BTC",
+        interval="1m",
+        open=1.5,
+        high=2.25,
+        low=0.75,
+        close=1.125,
+        volume=10.0625,
+        timestamp_utc=_OPENED,
+        timestamp_kst=_OPENED.astimezone(get_zone()),
+    )
+
+
+def test_candle_record_round_trips_payload_and_orm():
+    payload = _candle_payload()
+
+    record = CandleRecord.from_payload(payload)
+
+    assert record.ts_ns == 1_709_296_215_123_456_000
+    assert not hasattr(record, "__dict__")
+    assert record.to_payload().model_dump() == payload.model_dump()
+    row = record.to_orm()
+    assert row.opened_at == _OPENED and row.source == "upbit"
+    assert CandleRecord.from_orm(row) == record
+
+
+def test_tick_record_round_trips_payload_and_orm():
+    payload = TickPayload(
+        symbol="KRW-ETH",
+        price=4_000_000.0,
+        size=0.015,
+        timestamp_utc=_OPENED,
+        timestamp_kst=_OPENED.astimezone(get_zone()),
+    )
+
+    record = TickRecord.from_payload(payload)
+
+    assert record.to_payload().model_dump() == payload.model_dump()
+    assert TickRecord.from_orm(record.to_orm()) == record
+
+
+def test_market_data_store_accepts_records():
+    store = MarketDataStore(capacity=4)
+    record = CandleRecord.from_payload(_candle_payload())
+
+    assert store.update_record(record)
+    window = store.window("KRW-BTC", "1m")
+    assert window.timestamps.tolist() == [record.ts_ns]
+    assert window.close.tolist() == [record.close]
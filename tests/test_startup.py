@@ -0,0 +1,82 @@
+"""Import-time and startup regression checks.
+
+Each check runs in a fresh interpreter so modules already imported by other
+tests do not hide regressions. Importing the app gets 1 s and the first
+request 1.5 s; ``AUTOTRADE_STARTUP_BUDGET_MS`` overrides the import budget
+(the first-request budget scales with it) on slow CI hosts.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_PATH = Path(__file__).resolve().parents[1] / "src"
+BUDGET_MS = float(os.environ.get("AUTOTRADE_STARTUP_BUDGET_MS", "1000"))
+FIRST_REQUEST_BUDGET_MS = BUDGET_MS * 1.5
+HEAVY_MODULES = ("sqlalchemy", "redis", "numpy", "pyarrow")
+
+
+def _run(code: str, *args: str) -> subprocess.CompletedProcess[str]:
+    env = {**os.environ, "PYTHONPATH": str(SRC_PATH)}
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+        timeout=60,
+    )
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import autotrade.messaging",
+        "import autotrade.db",
+        "import autotrade.market_data",
+        "from autotrade.messaging import EventEnvelope, EventName",
+        "import autotrade.app.main",
+    ],
+)
+def test_package_imports_do_not_load_heavy_dependencies(statement):
+    result = _run(
+        f"import sys, json\n{statement}\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+
+    assert json.loads(result.stdout) == []
+
+
+def test_app_import_and_first_request_within_budget():
+    result = _run(
+        "import json, time\n"
+        "start = time.perf_counter()\n"
+        "from autotrade.app.main import app\n"
+        "imported = time.perf_counter()\n"
+        "from fastapi.testclient import TestClient\n"
+        "with TestClient(app) as client:\n"
+        "    assert client.get('/health').status_code == 200\n"
+        "done = time.perf_counter()\n"
+        "print(json.dumps([(imported - start) * 1e3, (done - start) * 1e3]))",
+    )
+    import_ms, first_request_ms = json.loads(result.stdout)
+
+    assert import_ms < BUDGET_MS
+    assert first_request_ms < FIRST_REQUEST_BUDGET_MS
+
+
+def test_importtime_breakdown_reports_autotrade_modules():
+    result = _run("import autotrade.app.main", "-X", "importtime")
+    cumulative = {
+        line.rsplit("|", 1)[1].strip(): int(line.split("|")[1])
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line
+    }
+
+    assert cumulative["autotrade.app.main"] / 1e3 < BUDGET_MS
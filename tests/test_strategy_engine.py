@@ -0,0 +1,278 @@
+"""Tests for strategy specs, volatility breakout and the strategy engine."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import numpy as np
+import pytest
+
+from autotrade.core.clock import from_ns
+from autotrade.core.schemas import CandlePayload, StrategySignal
+from autotrade.market_data.store import CandleWindow
+from autotrade.messaging.base import StreamMessage
+from autotrade.messaging.events import EventName, resolve_stream_name
+from autotrade.services.strategy import (
+    IndicatorCache,
+    StrategyEngine,
+    StrategySpec,
+    VolatilityBreakout,
+)
+
+DAY = 86_400 * 10**9
+T0 = 1_704_067_200_000_000_000  # 2024-01-01T00:00:00Z
+SYMBOLS = [f"KRW-C{index:03d}" for index in range(200)]
+
+
+def _candle(symbol: str, ts_ns: int, open_: float, high: float, low: float, close: float) -> dict:
+    opened_at = from_ns(ts_ns)
+    return {
+        "name": EventName.MARKET_CANDLE_INGESTED.value,
+        "producer": "test",
+        "produced_at_utc": from_ns(ts_ns + DAY).isoformat(),
+        "payload": {
+            "symbol": symbol,
+            "interval": "1d",
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": 1.0,
+            "timestamp_utc": opened_at.isoformat(),
+            "timestamp_kst": opened_at.isoformat(),
+            "source": "upbit",
+        },
+    }
+
+
+def _breakouts(symbols) -> list[dict]:
+    """Yesterday's 100-110 range, then today reaching 106 (target 100 + 5)."""
+
+    messages = []
+    for symbol in symbols:
+        messages.append(_candle(symbol, T0, 102.0, 110.0, 100.0, 108.0))
+        messages.append(_candle(symbol, T0 + DAY, 100.0, 101.0, 99.0, 100.5))
+        messages.append(_candle(symbol, T0 + DAY, 100.0, 106.0, 99.0, 105.5))
+    return messages
+
+
+class RecordingBus:
+    def __init__(self, batches=()) -> None:
+        self.batches = list(batches)
+        self.published: list[list[tuple[str, dict]]] = []
+        self.acked: list[str] = []
+
+    async def publish_many(self, items):
+        self.published.append([(stream, json.loads(data)) for stream, data in items])
+        return [str(index) for index in range(len(items))]
+
+    async def create_consumer_group(self, stream, group, *, mkstream=True, id="$"):
+        self.group = (stream, group)
+
+    async def read_group(self, group, consumer, streams, *, count=1, block=None):
+        if not self.batches:
+            await asyncio.sleep(0.01)
+            return []
+        (stream,) = streams
+        return [
+            StreamMessage(stream, f"{index}-0", data)
+            for index, data in enumerate(self.batches.pop(0))
+        ]
+
+    async def acknowledge(self, stream, group, message_ids):
+        self.acked.extend(message_ids)
+        return len(message_ids)
+
+
+def _spec(strategy_id: int = 7, **params) -> StrategySpec:
+    name = f"breakout-{strategy_id}"
+    return StrategySpec.create(strategy_id, name, {"kind": "volatility_breakout", **params})
+
+
+def test_spec_resolves_kind_interval_and_symbols():
+    spec = StrategySpec.create(1, "volatility_breakout", {"interval": "4h", "symbols": ["krw-btc"]})
+    assert (spec.id, spec.kind, spec.interval) == ("1", "volatility_breakout", "240m")
+    assert spec.accepts("KRW-BTC") and not spec.accepts("KRW-ETH")
+    assert _spec().interval == "1d" and _spec().accepts("KRW-ETH")
+    assert _spec(heavy=True).heavy and not _spec().heavy
+    with pytest.raises(ValueError):
+        StrategySpec.create(2, "unknown")
+
+
+def test_volatility_breakout_signals_once_per_candle():
+    logic = VolatilityBreakout({"k": 0.5, "take_profit": 0.1, "stop_loss": 0.05})
+    window = CandleWindow(
+        np.array([T0, T0 + DAY]),
+        np.array([102.0, 100.0]),
+        np.array([110.0, 104.0]),
+        np.array([100.0, 99.0]),
+        np.array([108.0, 103.0]),
+        np.ones(2),
+    )
+    cache = IndicatorCache()
+    assert logic.evaluate("KRW-BTC", window, cache) is None  # 104 < 105
+
+    window.high[-1] = 106.0
+    decision = logic.evaluate("KRW-BTC", window, cache)
+    assert decision.side == "buy" and decision.entry_price == 105.0
+    assert decision.take_profit == pytest.approx(115.5) and decision.stop_loss == 99.75
+    assert decision.confidence == pytest.approx(0.6)
+    assert logic.evaluate("KRW-BTC", window, cache) is None
+    assert logic.evaluate("KRW-ETH", window, cache) is not None
+
+
+def test_engine_evaluates_200_symbols_inline_within_budget():
+    bus = RecordingBus()
+    engine = StrategyEngine(bus, [_spec(), _spec(8, symbols=["KRW-C000"])], workers=0, budget=0.25)
+
+    published = asyncio.run(engine.process(_breakouts(SYMBOLS)))
+
+    # Repeated updates of a series are evaluated once, on the latest state.
+    assert engine.stats.evaluations == 201 and engine.stats.candles == 600
+    assert published == 201 and len(bus.published) == 1
+    stream, envelope = bus.published[0][0]
+    assert stream == resolve_stream_name(EventName.STRATEGY_SIGNAL_CREATED)
+    assert envelope["name"] == "strategy.signal.created"
+    signal = StrategySignal(**envelope["payload"])
+    assert signal.strategy_id == "7" and signal.entry_price == 105.0
+    assert engine.stats.over_budget == 0
+
+
+def test_engine_shards_heavy_strategies_across_workers():
+    bus = RecordingBus()
+    engine = StrategyEngine(bus, [_spec(heavy=True), _spec(8, symbols=SYMBOLS[:5])], workers=2)
+    messages = _breakouts(SYMBOLS[:20])
+
+    async def scenario():
+        try:
+            first = await engine.process(messages[:40])
+            second = await engine.process(messages[40:])
+            return first, second
+        finally:
+            engine.close()
+
+    first, second = asyncio.run(scenario())
+
+    # Symbols 0-12 reached their breakout in the first batch (plus 5 inline).
+    assert (first, second) == (13 + 5, 7)
+    assert engine.offloaded == {"7"}
+    assert engine.stats.offloaded == 21 and engine.stats.errors == 0
+
+
+def test_engine_reports_batches_over_budget():
+    engine = StrategyEngine(RecordingBus(), [_spec()], workers=0, budget=1e-9)
+    asyncio.run(engine.process(_breakouts(SYMBOLS[:3])))
+    assert engine.stats.over_budget == 1
+
+
+def test_engine_samples_candle_payloads_for_drift():
+    engine = StrategyEngine(RecordingBus(), [_spec()], workers=0)
+    engine.decoder.sample_rate = engine.decoder._countdown = 1
+    drifted = _candle(SYMBOLS[0], T0, 102.0, 110.0, 100.0, 108.0)
+    drifted["payload"]["volume"] = -1.0
+
+    asyncio.run(engine.process([drifted, *_breakouts(SYMBOLS[1:2])]))
+
+    assert engine.stats.candles == 4
+    assert engine.decoder.stats.sampled == 4 and engine.decoder.stats.drift == 1
+
+
+class _FakeCandleCache:
+    def __init__(self, fail_after: int | None = None) -> None:
+        self.fail_after = fail_after
+        self.reads: list[str] = []
+
+    async def get_recent(self, symbol, interval, limit):
+        if self.fail_after is not None and len(self.reads) >= self.fail_after:
+            raise ConnectionError("redis down")
+        self.reads.append(symbol)
+        candles = [_candle(symbol, T0 + day * DAY, 100.0, 110.0, 90.0, 105.0) for day in range(3)]
+        return [CandlePayload.model_validate(candle["payload"]) for candle in candles[-limit:]]
+
+
+def test_warm_up_reads_through_the_candle_cache(monkeypatch, caplog):
+    import autotrade.db.candles as candles_db
+    import autotrade.db.session as session_db
+
+    @asynccontextmanager
+    async def scope(session_factory):
+        yield None
+
+    queried: list[str] = []
+
+    async def fetch_recent_candles(session, symbol, interval, limit):
+        queried.append(symbol)
+        return []
+
+    monkeypatch.setattr(session_db, "session_scope", scope)
+    monkeypatch.setattr(candles_db, "fetch_recent_candles", fetch_recent_candles)
+
+    cached = StrategyEngine(RecordingBus(), [_spec()], workers=0)
+    cache = _FakeCandleCache()
+    assert asyncio.run(cached.warm_up(None, SYMBOLS[:3], cache=cache)) == 6
+    assert cache.reads == SYMBOLS[:3] and queried == []
+    assert list(cached.store.window(SYMBOLS[0], "1d").timestamps) == [T0 + DAY, T0 + 2 * DAY]
+
+    # Series left when the cache fails are read from the database instead.
+    degraded = StrategyEngine(RecordingBus(), [_spec()], workers=0)
+    assert asyncio.run(degraded.warm_up(None, SYMBOLS[:3], cache=_FakeCandleCache(1))) == 2
+    assert queried == SYMBOLS[1:3]
+    assert "warming up from the database" in caplog.text
+
+
+def test_run_acknowledges_processed_batches():
+    bus = RecordingBus([_breakouts(SYMBOLS[:2])])
+    engine = StrategyEngine(bus, [_spec()], workers=0)
+
+    async def scenario():
+        task = asyncio.create_task(engine.run())
+        try:
+            async with asyncio.timeout(5):
+                while len(bus.acked) < 6:
+                    await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    asyncio.run(scenario())
+    assert bus.group == (resolve_stream_name(EventName.MARKET_CANDLE_INGESTED), "strategy")
+    assert sum(len(batch) for batch in bus.published) == 2
+
+
+def test_failed_publishes_are_retried_then_dropped(caplog):
+    class FlakyBus(RecordingBus):
+        def __init__(self, failures: int) -> None:
+            super().__init__()
+            self.failures = failures
+
+        async def publish_many(self, items):
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("bus down")
+            return await super().publish_many(items)
+
+    recovered = StrategyEngine(FlakyBus(2), [_spec()], workers=0)
+    assert asyncio.run(recovered.process(_breakouts(SYMBOLS[:2]))) == 2
+
+    down = StrategyEngine(FlakyBus(10), [_spec()], workers=0, publish_attempts=2)
+    assert asyncio.run(down.process(_breakouts(SYMBOLS[:2]))) == 0
+    assert down.stats.unpublished == 2 and down.stats.batches == 1
+    assert "Dropping 2 strategy signals" in caplog.text
+
+
+def test_engine_warns_when_in_progress_candles_are_not_published(monkeypatch, caplog):
+    from autotrade.services.strategy import engine as engine_module
+
+    assert VolatilityBreakout.partial
+    StrategyEngine(RecordingBus(), [_spec()], workers=0)
+    assert "does not publish" not in caplog.text
+
+    settings = engine_module.get_settings().model_copy(
+        update={"candle_partial_updates": "1m,240m"}
+    )
+    monkeypatch.setattr(engine_module, "get_settings", lambda: settings)
+    StrategyEngine(RecordingBus(), [_spec()], workers=0)
+    assert "evaluates in-progress 1d candles" in caplog.text
@@ -0,0 +1,263 @@
+"""Tests for indexed grid levels against a linear-scan reference."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+
+import pytest
+
+from autotrade.core.clock import from_ns
+from autotrade.core.fixedpoint import get_market_spec, to_fixed
+from autotrade.market_data.store import MarketDataStore
+from autotrade.services.strategy import Grid, GridLevels, IndicatorCache, StrategyEngine, StrategySpec
+
+MINUTE = 60 * 10**9
+T0 = 1_704_067_200_000_000_000
+
+
+class RecordingBus:
+    def __init__(self) -> None:
+        self.published: list[list[tuple[str, dict]]] = []
+
+    async def publish_many(self, items):
+        self.published.append([(stream, json.loads(data)) for stream, data in items])
+        return [str(index) for index in range(len(items))]
+
+
+def _candle(minute: int, close: float) -> dict:
+    opened_at = from_ns(T0 + minute * MINUTE)
+    return {
+        "name": "market.candle.ingested",
+        "producer": "test",
+        "payload": {
+            "symbol": "KRW-BTC",
+            "interval": "1m",
+            "open": close,
+            "high": close,
+            "low": close,
+            "close": close,
+            "volume": 1.0,
+            "timestamp_utc": opened_at.isoformat(),
+            "timestamp_kst": opened_at.isoformat(),
+            "source": "upbit",
+        },
+    }
+
+
+def _naive_fills(levels: list[int], orders: dict[int, str], last: int, price: int):
+    """Scan every level, in crossing order, as the obvious implementation would."""
+
+    fills = []
+    if price < last:
+        for index in reversed(range(len(levels))):
+            level = levels[index]
+            if price <= level < last and orders.get(level) == "buy":
+                del orders[level]
+                counter = levels[index + 1] if index + 1 < len(levels) else None
+                if counter is not None and counter not in orders:
+                    orders[counter] = "sell"
+                else:
+                    counter = None
+                fills.append((level, "buy", counter))
+    elif price > last:
+        for index, level in enumerate(levels):
+            if last < level <= price and orders.get(level) == "sell":
+                del orders[level]
+                counter = levels[index - 1] if index > 0 else None
+                if counter is not None and counter not in orders:
+                    orders[counter] = "buy"
+                else:
+                    counter = None
+                fills.append((level, "sell", counter))
+    return fills
+
+
+def _walk(size: int, seed: int, start: float = 50_000_000.0, sigma: float = 0.003):
+    rng = random.Random(seed)
+    price, prices = start, []
+    for _ in range(size):
+        price *= math.exp(rng.gauss(0.0, sigma))
+        prices.append(to_fixed(round(price, -3)))
+    return prices
+
+
+@pytest.mark.parametrize("geometric", [False, True])
+def test_crossings_match_linear_scan(geometric):
+    prices = _walk(3_000, 5)
+    step = 0.001 if geometric else to_fixed(50_000)
+    grid = GridLevels("KRW-BTC", prices[0], step, 200, geometric=geometric)
+    spec = get_market_spec("KRW-BTC")
+    assert grid.prices == sorted(set(grid.prices))
+    assert all(spec.round_price(level) == level for level in grid.prices)
+
+    grid.seed(prices[0])
+    orders = dict(grid.orders)
+    assert orders and set(orders.values()) == {"buy"} and max(orders) < prices[0]
+    filled = 0
+    last = prices[0]
+    for price in prices[1:]:
+        fills = grid.on_price(price)
+        expected = _naive_fills(grid.prices, orders, last, price)
+        assert [(fill.price, fill.side, fill.counter) for fill in fills] == expected
+        assert dict(grid.orders) == orders
+        filled += len(fills)
+        last = price
+    assert filled > 100
+
+
+def test_gap_through_many_levels_fills_in_order():
+    grid = GridLevels("KRW-BTC", to_fixed(100_000_000), to_fixed(100_000), 10)
+    grid.seed(to_fixed(100_000_000))
+    fills = grid.on_price(to_fixed(99_650_000))
+    assert [fill.price for fill in fills] == [
+        to_fixed(price) for price in (99_900_000, 99_800_000, 99_700_000)
+    ]
+    # Each buy's counter sell went one level up; the top one sits on the center.
+    assert grid.resting("sell") == [to_fixed(p) for p in (99_800_000, 99_900_000, 100_000_000)]
+    fills = grid.on_price(to_fixed(100_000_000))
+    assert [(fill.side, fill.counter) for fill in fills] == [
+        ("sell", to_fixed(99_700_000)),
+        ("sell", to_fixed(99_800_000)),
+        ("sell", to_fixed(99_900_000)),
+    ]
+    assert grid.on_price(to_fixed(100_000_000)) == []
+
+
+def _fixed(*prices: int) -> list[int]:
+    return [to_fixed(price) for price in prices]
+
+
+def test_recenter_keeps_shared_levels_and_moves_cancelled_sells():
+    grid = GridLevels("KRW-BTC", to_fixed(100_000_000), to_fixed(100_000), 3)
+    grid.seed(to_fixed(100_000_000))
+    grid.on_price(to_fixed(99_650_000))  # every buy fills, counter sells rest above
+    assert grid.resting("sell") == _fixed(99_800_000, 99_900_000, 100_000_000)
+
+    changes = grid.recenter(step=to_fixed(200_000))
+    assert grid.prices == _fixed(*range(99_400_000, 100_600_001, 200_000))
+    # Shared levels keep their sells; the dropped one moves to the lowest free level.
+    assert changes.cancelled == [(to_fixed(99_900_000), "sell")]
+    assert changes.placed == [
+        (to_fixed(99_400_000), "buy"),
+        (to_fixed(99_600_000), "buy"),
+        (to_fixed(100_200_000), "sell"),
+    ]
+    assert changes.stranded == []
+    assert grid.resting("sell") == _fixed(99_800_000, 100_000_000, 100_200_000)
+    assert grid.recenter().placed == []
+
+
+def test_recenter_reports_sells_without_a_free_level():
+    grid = GridLevels("KRW-BTC", to_fixed(100_000_000), to_fixed(100_000), 3)
+    grid.seed(to_fixed(100_000_000))
+    grid.on_price(to_fixed(99_650_000))
+    grid.on_price(to_fixed(99_850_000))  # the 99.8M sell fills, a buy rests at 99.7M
+
+    changes = grid.recenter(to_fixed(99_500_000))
+    assert grid.prices[-1] == to_fixed(99_800_000)
+    assert changes.cancelled == [(to_fixed(99_900_000), "sell"), (to_fixed(100_000_000), "sell")]
+    assert changes.stranded == _fixed(99_900_000, 100_000_000)
+    assert grid.resting() == grid.resting("buy") == grid.prices[:-1]
+
+
+def test_recenter_with_new_step_and_validation():
+    grid = GridLevels("KRW-BTC", to_fixed(100_000_000), to_fixed(100_000), 3)
+    grid.seed(to_fixed(100_050_000))
+    changes = grid.recenter(step=to_fixed(200_000), levels=2)
+    assert len(grid) == 5 and grid.prices[1] - grid.prices[0] == to_fixed(200_000)
+    assert grid.resting() == grid.resting("buy") == grid.prices[:3]
+    assert {side for _, side in changes.cancelled} == {"buy"}
+    with pytest.raises(ValueError):
+        GridLevels("KRW-BTC", to_fixed(100), 0, 3)
+    with pytest.raises(ValueError):
+        grid.recenter(levels=0)
+
+
+def test_grid_strategy_signals_and_parameter_updates():
+    spec = StrategySpec.create(
+        1, "grid", {"levels": 20, "step": 100_000, "center": 100_000_000}
+    )
+    logic = spec.build()
+    assert isinstance(logic, Grid) and spec.interval == "1m"
+    store = MarketDataStore(capacity=8)
+    cache = IndicatorCache()
+
+    def tick(minute, close):
+        store.update("KRW-BTC", "1m", T0 + minute * MINUTE, close, close, close, close, 1.0)
+        return logic.evaluate("KRW-BTC", store.window("KRW-BTC", "1m", 1), cache)
+
+    assert tick(0, 100_000_000.0) is None
+    decisions = tick(1, 99_750_000.0)
+    assert [(d.side, d.entry_price, d.take_profit) for d in decisions] == [
+        ("buy", 99_900_000.0, 100_000_000.0),
+        ("buy", 99_800_000.0, 99_900_000.0),
+    ]
+    assert decisions[0].stop_loss == pytest.approx(98_000_000.0 * 0.95)
+    [sell] = tick(2, 99_950_000.0)
+    assert (sell.side, sell.entry_price, sell.take_profit) == ("sell", 99_900_000.0, 99_800_000.0)
+
+    grid = logic.grids["KRW-BTC"]
+    logic.update_params({"levels": 20, "step": 100_000, "center": 99_000_000})
+    assert logic.grids["KRW-BTC"] is grid and grid.center == to_fixed(99_000_000)
+    assert grid.orders[to_fixed(100_000_000)] == "sell"
+
+
+def test_grid_strategy_fills_levels_touched_inside_a_candle():
+    logic = StrategySpec.create(
+        1, "grid", {"levels": 20, "step": 100_000, "center": 100_000_000}
+    ).build()
+    store = MarketDataStore(capacity=8)
+    cache = IndicatorCache()
+
+    def update(minute, open_, high, low, close):
+        store.update("KRW-BTC", "1m", T0 + minute * MINUTE, open_, high, low, close, 1.0)
+        decisions = logic.evaluate("KRW-BTC", store.window("KRW-BTC", "1m", 1), cache)
+        return [(d.side, d.entry_price) for d in decisions or ()]
+
+    assert update(0, 100_000_000.0, 100_000_000.0, 100_000_000.0, 100_000_000.0) == []
+    # Dips through the 99.9M buy and recovers through its 100M counter sell.
+    assert update(1, 100_000_000.0, 100_050_000.0, 99_850_000.0, 100_050_000.0) == [
+        ("buy", 99_900_000.0),
+        ("sell", 100_000_000.0),
+    ]
+    # A later update of the same candle only walks its new low.
+    assert update(1, 100_000_000.0, 100_050_000.0, 99_750_000.0, 100_020_000.0) == [
+        ("buy", 99_900_000.0),
+        ("buy", 99_800_000.0),
+        ("sell", 99_900_000.0),
+        ("sell", 100_000_000.0),
+    ]
+    assert update(1, 100_000_000.0, 100_050_000.0, 99_750_000.0, 100_030_000.0) == []
+
+
+@pytest.mark.parametrize("stop_loss", [0, 1, 1.5, -0.1])
+def test_grid_strategy_rejects_stop_loss_outside_zero_one(stop_loss):
+    with pytest.raises(ValueError):
+        StrategySpec.create(1, "grid", {"stop_loss": stop_loss}).build()
+    logic = StrategySpec.create(1, "grid", {}).build()
+    with pytest.raises(ValueError):
+        logic.update_params({"stop_loss": stop_loss})
+    assert logic.stop_loss == 0.05
+
+
+def test_engine_applies_parameters_and_publishes_every_fill():
+    bus = RecordingBus()
+    spec = StrategySpec.create(3, "grid-btc", {"kind": "grid", "levels": 5, "step": 100_000})
+    engine = StrategyEngine(bus, [spec], workers=0)
+
+    async def scenario():
+        await engine.process([_candle(0, 100_000_000.0)])
+        first = await engine.process([_candle(1, 99_750_000.0)])
+        await engine.apply_parameters(3, {"levels": 5, "step": 100_000, "center": 99_000_000})
+        return first
+
+    assert asyncio.run(scenario()) == 2
+    assert [envelope["payload"]["side"] for _, envelope in bus.published[0]] == ["buy", "buy"]
+    assert engine.specs["3"].params["center"] == 99_000_000
+    grid = engine._logic["3"].grids["KRW-BTC"]
+    assert grid.center == to_fixed(99_000_000)
+    with pytest.raises(KeyError):
+        asyncio.run(engine.apply_parameters(4, {}))
@@ -0,0 +1,166 @@
+"""Tests for the batch and streaming technical indicators."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from autotrade.market_data.store import CandleWindow
+from autotrade.services.strategy.indicators import (
+    INDICATORS,
+    IndicatorCache,
+    bollinger,
+    create,
+    donchian,
+    sma,
+    volatility,
+)
+
+
+def _window(size: int = 300, seed: int = 7, base: float = 60_000_000.0) -> CandleWindow:
+    rng = np.random.default_rng(seed)
+    close = base * np.exp(np.cumsum(rng.normal(0.0, 0.01, size)))
+    open_ = np.concatenate(([base], close[:-1]))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, size))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, size))
+    volume = rng.uniform(0.1, 5.0, size)
+    timestamps = np.arange(size, dtype=np.int64) * 60_000_000_000
+    return CandleWindow(timestamps, open_, high, low, close, volume)
+
+
+def _stream(indicator, window: CandleWindow):
+    values = []
+    for row in zip(window.open, window.high, window.low, window.close, window.volume):
+        values.append(indicator.update(*map(float, row)))
+    return values
+
+
+CASES = [
+    ("sma", (20,)),
+    ("ema", (12,)),
+    ("atr", (14,)),
+    ("donchian", (20,)),
+    ("bollinger", (20, 2.0)),
+    ("volatility", (30,)),
+    ("volatility_range", (0.5,)),
+]
+
+
+def test_every_indicator_has_a_case():
+    assert {name for name, _ in CASES} == set(INDICATORS)
+
+
+@pytest.mark.parametrize("name,params", CASES)
+def test_streaming_matches_batch(name, params):
+    window = _window()
+    batch = create(name, *params).compute(window)
+    streamed = _stream(create(name, *params), window)
+
+    columns = batch if isinstance(batch, tuple) else (batch,)
+    rows = [value if isinstance(value, tuple) else (value,) for value in streamed]
+    for column, values in zip(columns, zip(*rows)):
+        values = np.array(values)
+        assert np.array_equal(np.isnan(column), np.isnan(values))
+        if name in ("ema", "atr", "donchian", "volatility_range"):
+            assert np.array_equal(column, values, equal_nan=True)
+        else:
+            np.testing.assert_allclose(values, column, rtol=1e-9, equal_nan=True)
+
+
+def test_batch_values_against_definitions():
+    window = _window(60)
+    close, high, low = window.close, window.high, window.low
+
+    assert np.isnan(sma(close, 5)[3]) and sma(close, 5)[4] == pytest.approx(close[:5].mean())
+    upper, lower, middle = donchian(high, low, 10)
+    assert upper[-1] == high[-10:].max() and lower[-1] == low[-10:].min()
+    assert middle[-1] == pytest.approx((upper[-1] + lower[-1]) / 2)
+    top, mid, bottom = bollinger(close, 20, 2.0)
+    assert top[-1] - mid[-1] == pytest.approx(2 * close[-20:].std())
+    returns = np.diff(np.log(close))
+    assert volatility(close, 10)[-1] == pytest.approx(returns[-10:].std(ddof=1))
+    assert np.isnan(volatility(close, 10)[9])
+    assert len(sma(close[:3], 5)) == 3 and np.isnan(sma(close[:3], 5)).all()
+
+
+def test_ready_and_invalid_parameters():
+    indicator = create("ema", 3)
+    assert not indicator.ready
+    for close in (1.0, 2.0, 3.0):
+        indicator.update(close, close, close, close, 1.0)
+    assert indicator.ready and indicator.value == 2.0
+    assert create("donchian", 2).key == ("donchian", 2)
+    with pytest.raises(ValueError):
+        create("sma", 0)
+    with pytest.raises(ValueError):
+        create("rsi", 14)
+
+
+def test_cache_shares_streaming_state_and_dedupes_updates():
+    window = _window(100)
+    cache = IndicatorCache()
+    first = cache.get("KRW-BTC", "1m", "atr", 14, history=window)
+    second = cache.get("KRW-BTC", "1m", "atr", 14)
+    other = cache.get("KRW-ETH", "1m", "atr", 14)
+    assert first is second and first is not other
+    assert first.value == create("atr", 14).compute(window)[-1]
+
+    candle = (1.0, 60_500_000.0, 59_500_000.0, 60_000_000.0, 1.0)
+    last = int(window.timestamps[-1])
+    assert cache.update("KRW-BTC", "1m", last + 60_000_000_000, *candle)
+    value = first.value
+    # A second consumer forwarding the same candle does not advance it again.
+    assert not cache.update("KRW-BTC", "1m", last + 60_000_000_000, *candle)
+    assert first.value == value and np.isnan(other.value)
+
+
+def test_cache_does_not_reapply_the_last_primed_candle():
+    closes = [2.0, 4.0, 6.0]
+    window = CandleWindow(
+        np.arange(3, dtype=np.int64) * 60_000_000_000,
+        *(np.array(closes) for _ in range(4)),
+        np.ones(3),
+    )
+    cache = IndicatorCache()
+    average = cache.get("KRW-BTC", "1m", "sma", 3, history=window)
+    assert average.value == pytest.approx(4.0)
+
+    # The producer forwards the candle the history already ended with.
+    assert not cache.update("KRW-BTC", "1m", int(window.timestamps[-1]), *[6.0] * 4, 1.0)
+    assert average.value == pytest.approx(4.0)
+
+
+def test_cache_primes_indicators_registered_mid_stream():
+    window = _window(300)
+
+    def head(size: int) -> CandleWindow:
+        return CandleWindow(*(column[:size] for column in window))
+
+    def forward(start: int, stop: int) -> None:
+        for index in range(start, stop):
+            candle = (column[index] for column in window[1:])
+            cache.update("KRW-BTC", "1m", int(window.timestamps[index]), *candle)
+
+    cache = IndicatorCache()
+    average = cache.get("KRW-BTC", "1m", "ema", 10, history=head(200))
+    forward(200, 250)
+    # The store is ahead of the forwarded candles when the second indicator
+    # registers; its history must not make the first one skip candles.
+    ranges = cache.get("KRW-BTC", "1m", "atr", 14, history=head(260))
+    forward(250, 270)
+
+    assert average.value == pytest.approx(create("ema", 10).compute(head(270))[-1])
+    assert ranges.value == pytest.approx(create("atr", 14).compute(head(270))[-1])
+
+
+def test_cache_memoizes_batch_results_per_window():
+    window = _window(100)
+    cache = IndicatorCache()
+    first = cache.compute("KRW-BTC", "1m", "bollinger", 20, 2.0, window=window)
+    again = cache.compute("KRW-BTC", "1m", "bollinger", 20, 2.0, window=window)
+    assert again is first and (cache.hits, cache.misses) == (1, 1)
+
+    shorter = CandleWindow(*(column[:-1] for column in window))
+    assert cache.compute("KRW-BTC", "1m", "bollinger", 20, 2.0, window=shorter) is not first
+    cache.discard("KRW-BTC", "1m")
+    assert cache.compute("KRW-BTC", "1m", "bollinger", 20, 2.0, window=window) is not first
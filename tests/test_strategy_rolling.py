@@ -0,0 +1,128 @@
+"""Tests for rolling window primitives and turtle breakouts against naive references."""
+
+from __future__ import annotations
+
+import math
+import random
+import statistics
+
+import pytest
+
+from autotrade.market_data.store import MarketDataStore
+from autotrade.services.strategy import IndicatorCache, StrategySpec
+from autotrade.services.strategy.rolling import (
+    RollingMax,
+    RollingMin,
+    RollingSum,
+    RollingVariance,
+)
+from autotrade.services.strategy.turtle import Turtle, TurtleBreakout
+
+DAY = 86_400 * 10**9
+
+
+def _walk(size: int, seed: int) -> list[float]:
+    rng = random.Random(seed)
+    price, values = 50_000_000.0, []
+    for _ in range(size):
+        price *= math.exp(rng.gauss(0.0, 0.02))
+        # Rounded to the KRW tick so equal values (ties) occur.
+        values.append(float(round(price, -4)))
+    return values
+
+
+@pytest.mark.parametrize("period", [1, 2, 5, 20, 55])
+def test_rolling_primitives_match_naive_windows(period):
+    values = _walk(600, period)
+    rolling_max, rolling_min = RollingMax(period), RollingMin(period)
+    rolling_sum, variance = RollingSum(period), RollingVariance(period, ddof=0)
+    for index, value in enumerate(values):
+        results = (
+            rolling_max.push(value),
+            rolling_min.push(value),
+            rolling_sum.push(value),
+            variance.push(value),
+        )
+        if index + 1 < period:
+            assert all(math.isnan(result) for result in results)
+            continue
+        window = values[index + 1 - period : index + 1]
+        assert results[0] == max(window) and results[1] == min(window)
+        assert results[2] == pytest.approx(math.fsum(window), rel=1e-12)
+        assert results[3] == pytest.approx(statistics.pvariance(window), rel=1e-6, abs=1e-3)
+        assert variance.mean == pytest.approx(statistics.fmean(window), rel=1e-12)
+        assert len(rolling_max) == period and rolling_sum.full
+
+
+def test_sample_variance_and_validation():
+    variance = RollingVariance(3, ddof=1)
+    for value in (1.0, 2.0, 4.0, 8.0):
+        variance.push(value)
+    assert variance.value == pytest.approx(statistics.variance([2.0, 4.0, 8.0]))
+    with pytest.raises(ValueError):
+        RollingMax(0)
+    with pytest.raises(ValueError):
+        RollingVariance(2, ddof=2)
+
+
+def _naive_turtle(highs, lows, entry, exit):
+    long, signals = False, []
+    for t in range(len(highs)):
+        signal = None
+        if long:
+            if t >= exit and lows[t] < min(lows[t - exit : t]):
+                long, signal = False, "exit"
+        elif t >= entry and highs[t] > max(highs[t - entry : t]):
+            long, signal = True, "entry"
+        signals.append(signal)
+    return signals
+
+
+def _candles(size: int, seed: int):
+    rng = random.Random(seed)
+    closes = _walk(size, seed)
+    opens = [closes[0]] + closes[:-1]
+    highs = [max(o, c) * (1 + rng.uniform(0, 0.01)) for o, c in zip(opens, closes)]
+    lows = [min(o, c) * (1 - rng.uniform(0, 0.01)) for o, c in zip(opens, closes)]
+    return opens, highs, lows, closes
+
+
+@pytest.mark.parametrize("entry,exit", [(20, 10), (55, 20), (3, 2)])
+def test_turtle_breakouts_match_naive_channels(entry, exit):
+    opens, highs, lows, closes = _candles(1_000, entry)
+    system = TurtleBreakout(entry, exit, atr=20)
+    streamed = [
+        system.update(o, h, l, c, 1.0) for o, h, l, c in zip(opens, highs, lows, closes)
+    ]
+    expected = _naive_turtle(highs, lows, entry, exit)
+    assert streamed == expected
+    assert expected.count("entry") > 3 and expected.count("exit") >= expected.count("entry") - 1
+
+
+def test_turtle_strategy_on_store_windows_with_in_progress_updates():
+    opens, highs, lows, closes = _candles(400, 11)
+    expected = _naive_turtle(highs, lows, 20, 10)
+    spec = StrategySpec.create(1, "turtle", {"entry": 20, "exit": 10, "atr": 20})
+    logic = spec.build()
+    assert isinstance(logic, Turtle) and spec.interval == "1d"
+    store = MarketDataStore(capacity=64)
+    cache = IndicatorCache()
+    signals = []
+    for day, (o, h, l, c) in enumerate(zip(opens, highs, lows, closes)):
+        # An in-progress update that stays inside the bar, then the final candle.
+        partial = (o, max(o, c), min(o, c), c, 0.5)
+        for values in (partial, (o, h, l, c, 1.0)):
+            store.update("KRW-BTC", "1d", day * DAY, *values)
+            window = store.window("KRW-BTC", "1d", logic.lookback)
+            decision = logic.evaluate("KRW-BTC", window, cache)
+            if decision is not None:
+                signals.append((day, decision.side))
+                if decision.side == "buy":
+                    assert decision.stop_loss < decision.entry_price < decision.take_profit
+
+    # Entries are signalled at the channel level, the same candle as the naive check.
+    assert signals == [
+        (day, "buy" if signal == "entry" else "sell")
+        for day, signal in enumerate(expected)
+        if signal is not None
+    ]
@@ -0,0 +1,108 @@
+"""Tests for clock offset estimation and slewing."""
+
+from __future__ import annotations
+
+import asyncio
+import struct
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from autotrade.app.main import app
+from autotrade.core.timesync import (
+    ClockEstimate,
+    ClockSynchronizer,
+    DisciplinedClock,
+    LocalReferenceSource,
+    SNTPSource,
+)
+
+_MS = 1_000_000
+
+
+def test_synchronizer_filters_jittery_samples():
+    source = LocalReferenceSource(3 * _MS, delay_ns=400_000, jitter_ns=2 * _MS, seed=7)
+    clock = DisciplinedClock()
+    synchronizer = ClockSynchronizer(source, clock, samples=16, sample_spacing=0)
+
+    estimate = asyncio.run(synchronizer.sync_once())
+
+    assert abs(estimate.offset_ns - 3 * _MS) < 200_000
+    assert estimate.uncertainty_ns < 2 * _MS
+    assert clock.synchronized
+    assert abs(clock.offset_ns() - estimate.offset_ns) == 0  # first estimate steps
+
+
+def test_later_corrections_are_slewed_not_stepped():
+    clock = DisciplinedClock(max_slew_ppm=500)
+    clock.apply(ClockEstimate(0, 0, 0, 1, 0))
+    clock.apply(ClockEstimate(10 * _MS, 0, 0, 1, 0))
+    anchor = time.monotonic_ns()
+
+    assert clock.offset_ns(anchor) < 10 * _MS
+    one_second_later = clock.offset_ns(anchor + 1_000_000_000)
+    assert 490_000 <= one_second_later <= 520_000
+    assert clock.offset_ns(anchor + 30_000_000_000) == 10 * _MS
+
+
+def test_sntp_source_against_local_udp_server():
+    reference_offset = 250 * _MS
+
+    class _Server(asyncio.DatagramProtocol):
+        def connection_made(self, transport):
+            self.transport = transport
+
+        def datagram_received(self, data, addr):
+            fields = list(struct.unpack("!B B b b 11I", data))
+            now = time.time_ns() + reference_offset
+            seconds, nanos = divmod(now, 1_000_000_000)
+            stamp = [seconds + 2_208_988_800, (nanos << 32) // 1_000_000_000]
+            reply = [0x24, 2, 0, 0, 0, 0, 0, *stamp, *fields[13:15], *stamp, *stamp]
+            self.transport.sendto(struct.pack("!B B b b 11I", *reply), addr)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            _Server, local_addr=("127.0.0.1", 0)
+        )
+        port = transport.get_extra_info("sockname")[1]
+        try:
+            return await SNTPSource("127.0.0.1", port).query(time.time_ns)
+        finally:
+            transport.close()
+
+    sample = asyncio.run(scenario())
+
+    assert abs(sample.offset_ns - reference_offset) < 5 * _MS
+    assert sample.delay_ns < 50 * _MS
+
+
+def test_sntp_source_rejects_short_datagrams():
+    class _Server(asyncio.DatagramProtocol):
+        def connection_made(self, transport):
+            self.transport = transport
+
+        def datagram_received(self, data, addr):
+            self.transport.sendto(data[:20], addr)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            _Server, local_addr=("127.0.0.1", 0)
+        )
+        port = transport.get_extra_info("sockname")[1]
+        try:
+            return await SNTPSource("127.0.0.1", port).query(time.time_ns)
+        finally:
+            transport.close()
+
+    with pytest.raises(ValueError, match="Short SNTP response"):
+        asyncio.run(scenario())
+
+
+def test_health_reports_clock_status():
+    response = TestClient(app).get("/health")
+
+    assert response.status_code == 200
+    assert response.json()["clock"]["synchronized"] is False